@@ -1,19 +1,20 @@
 from datetime import datetime, timedelta
 from typing import Optional
-import secrets
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.core.config import settings
 from app.db.session import get_db
 from app.models.user import User
 from app.schemas.auth import Token
 from app.schemas.user import UserCreate, UserOut, EmailVerificationResponse, ResendVerificationRequest
-from app.core.security import verify_password, get_password_hash
+from app.core.security import password_hasher, needs_rehash
 from app.services.email import email_service
+from app.services.verification_tokens import issue_verification_token, find_verification_token
 
 router = APIRouter()
 
@@ -27,40 +28,35 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 
-def generate_verification_token() -> str:
-    """Generate a secure random verification token"""
-    return secrets.token_urlsafe(32)
-
-
 def send_verification_email(user: User, db: Session) -> bool:
-    """Generate verification token and send email to user"""
-    # Generate token and set expiry (24 hours)
-    user.verification_token = generate_verification_token()
-    user.verification_token_expires = datetime.utcnow() + timedelta(hours=24)
-    db.commit()
+    """Generate verification token and queue the verification email"""
+    # Only the token hash is stored; it expires after 24 hours
+    token = issue_verification_token(db, user.id)
     
     # Create verification URL
-    verification_url = f"{settings.FRONTEND_URL}/verify-email?token={user.verification_token}"
+    verification_url = f"{settings.FRONTEND_URL}/verify-email?token={token}"
     
-    # Send email
-    return email_service.send_verification_email(
+    # Queue email; the outbox worker delivers it outside the request
+    email_service.queue_verification_email(
+        db,
         to_email=user.email,
         verification_url=verification_url,
         full_name=user.full_name
     )
+    db.commit()
+    return True
 
 
-@router.post("/register", response_model=UserOut, status_code=status.HTTP_201_CREATED)
-def register(user_in: UserCreate, db: Session = Depends(get_db)):
-    existing = db.query(User).filter(User.email == user_in.email).first()
-    if existing:
-        raise HTTPException(status_code=400, detail="Email already registered")
-    
+def _get_user_by_email(db: Session, email: str) -> Optional[User]:
+    return db.query(User).filter(User.email == email).first()
+
+
+def _create_user(db: Session, user_in: UserCreate, hashed_password: str) -> User:
     # Create user (not verified initially)
     user = User(
         email=user_in.email, 
         full_name=user_in.full_name, 
-        hashed_password=get_password_hash(user_in.password),
+        hashed_password=hashed_password,
         is_verified=False
     )
     db.add(user)
@@ -77,10 +73,22 @@ def register(user_in: UserCreate, db: Session = Depends(get_db)):
     return user
 
 
+# register/login are async so bcrypt waits on the hashing pool without holding
+# a threadpool thread; the short DB calls are still pushed to the threadpool.
+@router.post("/register", response_model=UserOut, status_code=status.HTTP_201_CREATED)
+async def register(user_in: UserCreate, db: Session = Depends(get_db)):
+    existing = await run_in_threadpool(_get_user_by_email, db, user_in.email)
+    if existing:
+        raise HTTPException(status_code=400, detail="Email already registered")
+    
+    hashed_password = await password_hasher.hash(user_in.password)
+    return await run_in_threadpool(_create_user, db, user_in, hashed_password)
+
+
 @router.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user: Optional[User] = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    user = await run_in_threadpool(_get_user_by_email, db, form_data.username)
+    if not user or not await password_hasher.verify(form_data.password, user.hashed_password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect email or password")
     
     # Check if email is verified
@@ -90,6 +98,11 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
             detail="Email not verified. Please check your email for verification link."
         )
     
+    # Transparently upgrade hashes made with an older BCRYPT_ROUNDS setting
+    if needs_rehash(user.hashed_password):
+        user.hashed_password = await password_hasher.hash(form_data.password)
+        await run_in_threadpool(db.commit)
+    
     access_token = create_access_token({"sub": str(user.id)})
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -97,19 +110,19 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
 @router.get("/verify-email", response_model=EmailVerificationResponse)
 def verify_email(token: str, db: Session = Depends(get_db)):
     """Verify user's email address using the token from email link"""
-    user = db.query(User).filter(User.verification_token == token).first()
+    verification = find_verification_token(db, token)
     
-    if not user:
+    if not verification:
         raise HTTPException(status_code=400, detail="Invalid verification token")
     
     # Check if token has expired
-    if user.verification_token_expires and user.verification_token_expires < datetime.utcnow():
+    if verification.expires_at < datetime.utcnow():
         raise HTTPException(status_code=400, detail="Verification token has expired. Please request a new one.")
     
-    # Mark user as verified
+    # Mark user as verified and consume the token
+    user = db.get(User, verification.user_id)
     user.is_verified = True
-    user.verification_token = None
-    user.verification_token_expires = None
+    db.delete(verification)
     db.commit()
     
     return {
@@ -1,73 +1,116 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from typing import List
 
 from app.dependencies.auth import get_current_user
-from app.db.session import get_db
-from app.models.user import User
+from app.core.principal_cache import UserSnapshot
+from app.db.session import get_async_db
+from app.dependencies.db import get_async_read_db
 from app.models.client import Client
+from app.models.invoice import Invoice
 from app.schemas.client import ClientCreate, ClientOut, ClientUpdate
+from app.core.quotas import quota
+from app.core.etags import collection_etag, etag_headers, if_none_match_satisfied, make_etag, not_modified, timestamp_tag
+from app.core.pagination import clamp_limit, decode_cursor, fetch_page_async, finish_page, resolve_sort, sort_orders
 
 
 router = APIRouter()
 
+CLIENT_SORTS = sort_orders(Client.id, name=Client.name)
+
+
+async def _get_owned_client(db: AsyncSession, current_user: UserSnapshot, client_id: int, options=()) -> Client:
+    client = await db.get(Client, client_id, options=list(options))
+    if not client or client.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Client not found")
+    return client
+
+
+def _client_etag(client_id: int, updated_at) -> str:
+    return make_etag(client_id, timestamp_tag(updated_at))
+
 
 @router.get("/clients", response_model=List[ClientOut])
-def list_clients(
+async def list_clients(
+    response: Response,
     limit: int = 50,
-    offset: int = 0,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    sort: str = "id",
+    cursor: str | None = None,
+    if_none_match: str | None = Header(None),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: UserSnapshot = Depends(get_current_user),
 ):
-    if limit <= 0:
-        limit = 50
-    limit = min(limit, 100)
-    if offset < 0:
-        offset = 0
-    return (
-        db.query(Client)
-        .filter(Client.user_id == current_user.id)
-        .limit(limit)
-        .offset(offset)
-        .all()
-    )
+    limit = clamp_limit(limit)
+    key = resolve_sort(CLIENT_SORTS, sort)
+    after = decode_cursor("clients", sort, key, cursor) if cursor else None
+
+    max_updated_at, count = (
+        await db.execute(select(func.max(Client.updated_at), func.count()).where(Client.user_id == current_user.id))
+    ).one()
+    etag = collection_etag(current_user.id, max_updated_at, count)
+    if if_none_match_satisfied(if_none_match, etag):
+        return not_modified(etag)
 
+    rows = await fetch_page_async(db, select(Client).where(Client.user_id == current_user.id), key, after, limit)
+    rows, headers = finish_page(rows, limit, "clients", sort, key)
+    response.headers.update(headers)
+    response.headers.update(etag_headers(etag))
+    return rows
 
-@router.post("/clients", response_model=ClientOut, status_code=status.HTTP_201_CREATED)
-def create_client(payload: ClientCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+
+@router.post("/clients", response_model=ClientOut, status_code=status.HTTP_201_CREATED, dependencies=[Depends(quota("write"))])
+async def create_client(payload: ClientCreate, response: Response, db: AsyncSession = Depends(get_async_db), current_user: UserSnapshot = Depends(get_current_user)):
     client = Client(user_id=current_user.id, **payload.dict())
     db.add(client)
-    db.commit()
-    db.refresh(client)
+    await db.commit()
+    await db.refresh(client)
+    response.headers.update(etag_headers(_client_etag(client.id, client.updated_at)))
     return client
 
 
 @router.get("/clients/{client_id}", response_model=ClientOut)
-def get_client(client_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    client = db.get(Client, client_id)
-    if not client or client.user_id != current_user.id:
-        raise HTTPException(status_code=404, detail="Client not found")
+async def get_client(
+    client_id: int,
+    response: Response,
+    if_none_match: str | None = Header(None),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: UserSnapshot = Depends(get_current_user),
+):
+    if if_none_match is not None:
+        updated_at = (await db.execute(
+            select(Client.updated_at).where(Client.id == client_id, Client.user_id == current_user.id)
+        )).first()
+        if updated_at is not None:
+            etag = _client_etag(client_id, updated_at[0])
+            if if_none_match_satisfied(if_none_match, etag):
+                return not_modified(etag)
+
+    client = await _get_owned_client(db, current_user, client_id)
+    response.headers.update(etag_headers(_client_etag(client.id, client.updated_at)))
     return client
 
 
-@router.put("/clients/{client_id}", response_model=ClientOut)
-def update_client(client_id: int, payload: ClientUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    client = db.get(Client, client_id)
-    if not client or client.user_id != current_user.id:
-        raise HTTPException(status_code=404, detail="Client not found")
+@router.put("/clients/{client_id}", response_model=ClientOut, dependencies=[Depends(quota("write"))])
+async def update_client(client_id: int, payload: ClientUpdate, response: Response, db: AsyncSession = Depends(get_async_db), current_user: UserSnapshot = Depends(get_current_user)):
+    client = await _get_owned_client(db, current_user, client_id)
     for field, value in payload.dict(exclude_unset=True).items():
         setattr(client, field, value)
     db.add(client)
-    db.commit()
-    db.refresh(client)
+    await db.commit()
+    await db.refresh(client)
+    response.headers.update(etag_headers(_client_etag(client.id, client.updated_at)))
     return client
 
 
-@router.delete("/clients/{client_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_client(client_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    client = db.get(Client, client_id)
-    if not client or client.user_id != current_user.id:
-        raise HTTPException(status_code=404, detail="Client not found")
-    db.delete(client)
-    db.commit()
+@router.delete("/clients/{client_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(quota("write"))])
+async def delete_client(client_id: int, db: AsyncSession = Depends(get_async_db), current_user: UserSnapshot = Depends(get_current_user)):
+    # The ORM cascade deletes invoices and their items; load them up front
+    # (lazy loads are not available on AsyncSession)
+    client = await _get_owned_client(
+        db, current_user, client_id, options=[selectinload(Client.invoices).selectinload(Invoice.items)]
+    )
+    await db.delete(client)
+    await db.commit()
     return None
@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.dependencies.auth import get_current_user
+from app.core.principal_cache import UserSnapshot
+from app.dependencies.db import get_async_read_db
+from app.models.client import Client
+from app.models.invoice_stats import InvoiceStats
+from app.schemas.dashboard import DashboardStats
+from app.services.invoice_stats import summarize_stats
+
+router = APIRouter()
+
+
+@router.get("/dashboard/stats", response_model=DashboardStats)
+async def dashboard_stats(db: AsyncSession = Depends(get_async_read_db), current_user: UserSnapshot = Depends(get_current_user)):
+    """Invoice counts and revenue / outstanding / overdue amounts per currency, from the maintained aggregates"""
+    # One primary-key range read, however many invoices the user has
+    rows = (await db.execute(
+        select(InvoiceStats.currency, InvoiceStats.status, InvoiceStats.invoice_count, InvoiceStats.total)
+        .where(InvoiceStats.user_id == current_user.id)
+    )).all()
+    total_clients = await db.scalar(select(func.count()).select_from(Client).where(Client.user_id == current_user.id))
+    return summarize_stats(rows, total_clients)
@@ -6,7 +6,9 @@ from app.db.session import get_db
 from app.models.extraction import Extraction
 from app.core.config import settings
 from app.services.openai_extractor import OpenAIExtractor
-from app.core.rate_limiter import extraction_rate_limiter
+from app.core.principal_cache import UserSnapshot
+from app.core.quotas import quota
+from app.dependencies.auth import get_optional_current_user
 
 router = APIRouter()
 
@@ -16,16 +18,15 @@ def get_extractor(provider: Optional[str] = None):
     return OpenAIExtractor(api_key=settings.OPENAI_API_KEY)
 
 
-@router.post("/extract-job-details")
+@router.post("/extract-job-details", dependencies=[Depends(quota("extraction"))])
 def extract_job_details(
     request: Request,
     db: Session = Depends(get_db),
+    current_user: Optional[UserSnapshot] = Depends(get_optional_current_user),
     provider: Optional[str] = None,
     text: Optional[str] = Form(default=None),
     file: Optional[UploadFile] = File(default=None),
 ):
-    # Apply rate limiting
-    extraction_rate_limiter.check_rate_limit(request)
     # Acquire inputs; we send image directly to GPT-Vision (no local OCR)
     raw_text = (text or "").strip()
     file_bytes = None
@@ -45,9 +46,9 @@ def extract_job_details(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Extraction failed: {e}")
 
-    # Persist extraction (anonymous, no user required)
+    # Persist extraction (attributed to the user when signed in)
     ext = Extraction(
-        user_id=None,  # Anonymous extraction
+        user_id=current_user.id if current_user else None,
         source_type="screenshot" if file is not None else "text",
         source_url=None,
         raw_text=raw_text,
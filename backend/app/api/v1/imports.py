@@ -0,0 +1,64 @@
+from typing import Literal, Optional
+
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.orm import Session
+
+from app.dependencies.auth import get_current_user
+from app.core.principal_cache import UserSnapshot
+from app.core.quotas import quota
+from app.db.session import get_db
+from app.models.import_job import ImportJob
+from app.schemas.import_job import ImportJobOut
+from app.services.imports import ImportRejected, resumable_import, run_import, start_import, text_lines
+
+router = APIRouter()
+
+
+def _body_chunks(request: Request):
+    """The request body, each chunk awaited on the event loop when the CSV reader needs it."""
+    chunks = request.stream().__aiter__()
+
+    async def next_chunk():
+        return await chunks.__anext__()
+
+    while True:
+        try:
+            yield anyio.from_thread.run(next_chunk)
+        except StopAsyncIteration:
+            return
+
+
+@router.post("/imports/{kind}", response_model=ImportJobOut, dependencies=[Depends(quota("import"))])
+def import_csv(
+    kind: Literal["clients", "invoices"],
+    request: Request,
+    import_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: UserSnapshot = Depends(get_current_user),
+):
+    """
+    Import the CSV file sent as the request body (Content-Type: text/csv).
+    A sync route: the file is parsed in the threadpool as it is uploaded,
+    committing every chunk of rows. Send the same file with ?import_id= to
+    finish an import whose upload was cut off.
+    """
+    try:
+        if import_id is not None:
+            job = resumable_import(db, current_user.id, kind, import_id)
+        else:
+            job = start_import(db, current_user.id, kind)
+        rows, seconds = run_import(db, job, text_lines(_body_chunks(request)))
+    except ImportRejected as exc:
+        raise HTTPException(status_code=exc.status_code, detail=exc.detail)
+    result = ImportJobOut.model_validate(job)
+    result.rows_per_second = round(rows / seconds, 1) if seconds else None
+    return result
+
+
+@router.get("/imports/{import_id}", response_model=ImportJobOut)
+def get_import(import_id: int, db: Session = Depends(get_db), current_user: UserSnapshot = Depends(get_current_user)):
+    job = db.get(ImportJob, import_id)
+    if job is None or job.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return job
@@ -1,27 +1,50 @@
-from typing import List
-from decimal import Decimal, ROUND_HALF_UP
-from datetime import date
-import datetime as dt
-from fastapi import APIRouter, Depends, HTTPException, status, Response
-from sqlalchemy.orm import Session
+from typing import List, Literal
+from datetime import date, datetime
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status, Response
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy import func, select
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm.exc import StaleDataError
 
 from app.dependencies.auth import get_current_user
-from app.db.session import get_db
-from app.models.user import User
+from app.core.principal_cache import UserSnapshot
+from app.db.session import get_async_db
+from app.dependencies.db import get_async_read_db, get_read_db
 from app.models.client import Client
 from app.models.invoice import Invoice, InvoiceItem
-from app.schemas.invoice import InvoiceCreate, InvoiceOut, InvoiceUpdate, InvoiceItemCreate, UserBusinessInfo
+from app.schemas.invoice import (
+    BulkResult, InvoiceBulkCreate, InvoiceBulkDelete, InvoiceBulkUpdate,
+    InvoiceCreate, InvoiceOut, InvoiceUpdate, InvoiceItemCreate, UserBusinessInfo,
+)
+from app.core.quotas import quota
+from app.core.etags import (
+    collection_etag, etag_headers, if_none_match_satisfied, invoice_etag, not_modified,
+    precondition_failed, require_if_match, timestamp_tag,
+)
+from app.core.invoice_numbers import allocate_invoice_number
+from app.services.invoice_export import MEDIA_TYPES, stream_invoices
+from app.services.invoices import (
+    ITEM_COLUMNS, NUMBER_ATTEMPTS, bulk_create_invoices, bulk_delete_invoices, bulk_update_invoices,
+    diff_items, duplicate_number_message, item_values, unknown_items_message,
+)
+from app.core.pagination import clamp_limit, decode_cursor, fetch_page_async, finish_page, resolve_sort, sort_orders
 
 
 router = APIRouter()
 
-TWO_PLACES = Decimal("0.01")
+INVOICE_SORTS = sort_orders(
+    Invoice.id, due_date=Invoice.due_date, created_at=Invoice.created_at, total=Invoice.total,
+)
 
+# Built once: list responses are validated from the ORM rows and dumped to JSON bytes in one pass
+invoice_list_adapter = TypeAdapter(List[InvoiceOut])
 
-def _enrich_invoice_with_user_info(invoice: Invoice, user: User) -> Invoice:
-    """Add user business information to invoice for display purposes"""
-    invoice.user_business_info = UserBusinessInfo(
+
+def _business_info(user: UserSnapshot) -> UserBusinessInfo:
+    return UserBusinessInfo(
         full_name=user.full_name,
         email=user.email,
         phone=user.phone,
@@ -31,95 +54,115 @@ def _enrich_invoice_with_user_info(invoice: Invoice, user: User) -> Invoice:
         tax_id=user.tax_id,
         website=user.website,
     )
+
+
+def _enrich_invoice_with_user_info(invoice: Invoice, user: UserSnapshot) -> Invoice:
+    """Add user business information to invoice for display purposes"""
+    invoice.user_business_info = _business_info(user)
     return invoice
 
 
-def _get_owned_invoice(db: Session, current_user: User, invoice_id: int) -> Invoice:
-    invoice = db.get(Invoice, invoice_id)
+async def _get_owned_invoice(db: AsyncSession, current_user: UserSnapshot, invoice_id: int) -> Invoice:
+    # Items are always serialized, and AsyncSession can't lazy-load them later
+    result = await db.execute(
+        select(Invoice)
+        .options(selectinload(Invoice.items))
+        .where(Invoice.id == invoice_id)
+        .execution_options(populate_existing=True)
+    )
+    invoice = result.scalar_one_or_none()
     if not invoice or invoice.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Invoice not found")
     return invoice
 
 
+def _invoice_filters(user_id: int, status: str | None, client_id: int | None, due_from: date | None, due_to: date | None) -> list:
+    conditions = [Invoice.user_id == user_id]
+    if status:
+        conditions.append(Invoice.status == status)
+    if client_id:
+        conditions.append(Invoice.client_id == client_id)
+    if due_from:
+        conditions.append(Invoice.due_date >= due_from)
+    if due_to:
+        conditions.append(Invoice.due_date <= due_to)
+    return conditions
+
+
 @router.get("/invoices", response_model=List[InvoiceOut])
-def list_invoices(
+async def list_invoices(
     limit: int = 50,
-    offset: int = 0,
     status: str | None = None,
     client_id: int | None = None,
     due_from: date | None = None,
     due_to: date | None = None,
-    cursor: int | None = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-    response: Response = None,
+    sort: str = "id",
+    cursor: str | None = None,
+    if_none_match: str | None = Header(None),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: UserSnapshot = Depends(get_current_user),
 ):
-    # Sanitize pagination
-    if limit <= 0:
-        limit = 50
-    limit = min(limit, 100)
-    if offset < 0:
-        offset = 0
-    q = db.query(Invoice).filter(Invoice.user_id == current_user.id)
-    if status:
-        q = q.filter(Invoice.status == status)
-    if client_id:
-        q = q.filter(Invoice.client_id == client_id)
-    if due_from:
-        q = q.filter(Invoice.due_date >= due_from)
-    if due_to:
-        q = q.filter(Invoice.due_date <= due_to)
-    if cursor:
-        q = q.filter(Invoice.id > cursor)
-
-    q = q.order_by(Invoice.id.asc()).limit(limit).offset(offset)
-    rows = q.all()
-
-    # Enrich invoices with user business info
+    limit = clamp_limit(limit)
+    key = resolve_sort(INVOICE_SORTS, sort)
+    after = decode_cursor("invoices", sort, key, cursor) if cursor else None
+    conditions = _invoice_filters(current_user.id, status, client_id, due_from, due_to)
+
+    # Collection ETag of everything the filters select (the page is part of the URL)
+    max_updated_at, count = (await db.execute(select(func.max(Invoice.updated_at), func.count()).where(*conditions))).one()
+    etag = collection_etag(current_user.id, max_updated_at, count, timestamp_tag(current_user.updated_at))
+    if if_none_match_satisfied(if_none_match, etag):
+        return not_modified(etag)
+
+    q = select(Invoice).options(selectinload(Invoice.items)).where(*conditions)
+    rows = await fetch_page_async(db, q, key, after, limit)
+
+    # Business info is the same for the whole page
+    business_info = _business_info(current_user)
     for invoice in rows:
-        _enrich_invoice_with_user_info(invoice, current_user)
+        invoice.user_business_info = business_info
+
+    rows, headers = finish_page(rows, limit, "invoices", sort, key)
+    headers.update(etag_headers(etag))
+    return Response(
+        invoice_list_adapter.dump_json(invoice_list_adapter.validate_python(rows, from_attributes=True)),
+        media_type="application/json",
+        headers=headers,
+    )
 
-    # Expose a simple cursor in header if more results likely exist
-    if rows:
-        response.headers["X-Next-Cursor"] = str(rows[-1].id)
-    return rows
+
+@router.get("/invoices/export", response_class=StreamingResponse, dependencies=[Depends(quota("export"))])
+def export_invoices(
+    response: Response,
+    export_format: Literal["csv", "ndjson"] = Query("csv", alias="format"),
+    status: str | None = None,
+    client_id: int | None = None,
+    due_from: date | None = None,
+    due_to: date | None = None,
+    db: Session = Depends(get_read_db),
+    current_user: UserSnapshot = Depends(get_current_user),
+):
+    """Every invoice matching the list_invoices filters, with its items, streamed as CSV (one line per item) or NDJSON (one invoice per line)"""
+    conditions = _invoice_filters(current_user.id, status, client_id, due_from, due_to)
+    filename = f"invoices-{date.today():%Y-%m-%d}.{export_format}"
+    # A returned Response is sent as is: carry over the RateLimit-* headers quota() set on the injected one
+    return StreamingResponse(
+        stream_invoices(db, conditions, export_format),
+        media_type=MEDIA_TYPES[export_format],
+        headers={**response.headers, "Content-Disposition": f'attachment; filename="{filename}"', "Cache-Control": "no-store"},
+    )
 
 
-@router.post("/invoices", response_model=InvoiceOut, status_code=status.HTTP_201_CREATED)
-def create_invoice(payload: InvoiceCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+@router.post("/invoices", response_model=InvoiceOut, status_code=status.HTTP_201_CREATED, dependencies=[Depends(quota("write"))])
+async def create_invoice(payload: InvoiceCreate, response: Response, db: AsyncSession = Depends(get_async_db), current_user: UserSnapshot = Depends(get_current_user)):
     # Ensure client belongs to current user
-    client = db.get(Client, payload.client_id)
+    client = await db.get(Client, payload.client_id)
     if not client or client.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Client not found")
 
-    # Generate invoice number if not provided
-    number = payload.number
-    if not number:
-        today = dt.date.today()
-        # Count existing invoices issued today for sequence
-        count_today = (
-            db.query(Invoice)
-            .filter(Invoice.user_id == current_user.id, Invoice.issued_date == today)
-            .count()
-        )
-        number = f"INV-{today:%Y%m%d}-{count_today + 1:03d}"
-
-    # Check for existing invoice with same number
-    existing_invoice = (
-        db.query(Invoice)
-        .filter(Invoice.user_id == current_user.id, Invoice.number == number)
-        .first()
-    )
-    if existing_invoice:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Invoice number '{number}' already exists. Please use a different number."
-        )
-
-    invoice = Invoice(
+    fields = dict(
         user_id=current_user.id,
         client_id=payload.client_id,
-        number=number,
+        number=payload.number,
         status=payload.status or "draft",
         issued_date=payload.issued_date,
         due_date=payload.due_date,
@@ -129,91 +172,167 @@ def create_invoice(payload: InvoiceCreate, db: Session = Depends(get_db), curren
         total=payload.total,
         notes=payload.notes,
     )
-    
-    try:
-        db.add(invoice)
-        db.flush()  # get invoice.id before adding items
-    except IntegrityError:
-        db.rollback()
-        raise HTTPException(
-            status_code=400,
-            detail=f"Invoice number '{number}' already exists. Please use a different number."
-        )
-
-    if payload.items:
-        for item in payload.items:
-            _add_item(db, invoice, item)
-
-    db.commit()
-    db.refresh(invoice)
+    invoice_id = await db.run_sync(_insert_numbered_invoice, fields, payload.items or [])
+    invoice = await _get_owned_invoice(db, current_user, invoice_id)
     
     # Enrich with user business info
     _enrich_invoice_with_user_info(invoice, current_user)
     
+    response.headers.update(etag_headers(invoice_etag(invoice.version, current_user.updated_at)))
     return invoice
 
 
-def _quantize(value: Decimal | None) -> Decimal:
-    if value is None:
-        return Decimal("0.00")
-    if not isinstance(value, Decimal):
-        value = Decimal(value)
-    return value.quantize(TWO_PLACES, rounding=ROUND_HALF_UP)
+def _insert_numbered_invoice(db: Session, fields: dict, items: List[InvoiceItemCreate]) -> int:
+    """
+    Number (unless hand-entered), insert and commit a new invoice; returns its id.
+
+    Runs as one sync call (one threadpool hop) so the sequence row locked by
+    allocate_invoice_number is released without waiting on the event loop;
+    a lock held across awaits would leave parallel creates for the same user
+    queued behind a request that can't get a thread back.
+
+    Hand-entered numbers are checked by uq_user_invoice_number alone. A
+    generated number can still hit an earlier hand-entered one: that value
+    is burned and the next one drawn.
+    """
+    for _ in range(NUMBER_ATTEMPTS):
+        invoice = Invoice(**fields)
+        if invoice.number is None:
+            invoice.number = allocate_invoice_number(db, invoice.user_id)
+        db.add(invoice)
+        try:
+            db.flush()  # get invoice.id before adding items
+        except IntegrityError:
+            db.rollback()
+            if fields["number"]:
+                raise HTTPException(status_code=400, detail=duplicate_number_message(fields["number"]))
+            allocate_invoice_number(db, fields["user_id"])
+            db.commit()
+            continue
+        for item in items:
+            _add_item(db, invoice, item)
+        # Read the id before commit expires the instance (reading it after would cost a refresh SELECT)
+        invoice_id = invoice.id
+        db.commit()
+        return invoice_id
+    raise HTTPException(status_code=409, detail="Could not allocate an invoice number, please retry")
 
 
 def _add_item(db: Session, invoice: Invoice, item: InvoiceItemCreate) -> InvoiceItem:
-    amount = item.amount
-    if amount is None:
-        amount = _quantize(item.quantity) * _quantize(item.unit_price)
-        amount = _quantize(amount)
-    inv_item = InvoiceItem(
-        invoice_id=invoice.id,
-        description=item.description,
-        quantity=_quantize(item.quantity),
-        unit_price=_quantize(item.unit_price),
-        amount=_quantize(amount),
-    )
+    inv_item = InvoiceItem(invoice_id=invoice.id, **item_values(item))
     db.add(inv_item)
     return inv_item
 
 
 @router.get("/invoices/{invoice_id}", response_model=InvoiceOut)
-def get_invoice(invoice_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    invoice = _get_owned_invoice(db, current_user, invoice_id)
+async def get_invoice(
+    invoice_id: int,
+    response: Response,
+    if_none_match: str | None = Header(None),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: UserSnapshot = Depends(get_current_user),
+):
+    if if_none_match is not None:
+        # Revalidation: compare against the version alone, before loading items or serializing
+        version = await db.scalar(
+            select(Invoice.version).where(Invoice.id == invoice_id, Invoice.user_id == current_user.id)
+        )
+        if version is not None:
+            etag = invoice_etag(version, current_user.updated_at)
+            if if_none_match_satisfied(if_none_match, etag):
+                return not_modified(etag)
+
+    invoice = await _get_owned_invoice(db, current_user, invoice_id)
     _enrich_invoice_with_user_info(invoice, current_user)
+    response.headers.update(etag_headers(invoice_etag(invoice.version, current_user.updated_at)))
     return invoice
 
 
-@router.put("/invoices/{invoice_id}", response_model=InvoiceOut)
-def update_invoice(invoice_id: int, payload: InvoiceUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    invoice = _get_owned_invoice(db, current_user, invoice_id)
+@router.put("/invoices/{invoice_id}", response_model=InvoiceOut, dependencies=[Depends(quota("write"))])
+async def update_invoice(
+    invoice_id: int,
+    payload: InvoiceUpdate,
+    response: Response,
+    if_match: str | None = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_current_user),
+):
+    invoice = await _get_owned_invoice(db, current_user, invoice_id)
+    require_if_match(if_match, invoice.version)
 
     # Update scalar fields
     for field, value in payload.dict(exclude_unset=True, exclude={"items"}).items():
         setattr(invoice, field, value)
 
-    # Replace items if provided
+    # Diff items by id against the ones just loaded: unchanged items aren't touched
     if payload.items is not None:
-        # Delete existing items - use query to avoid session tracking issues
-        db.query(InvoiceItem).filter(InvoiceItem.invoice_id == invoice_id).delete()
-        db.flush()
-        
-        # Add new items
-        for item in payload.items:
-            _add_item(db, invoice, item)
+        current = {item.id: item for item in invoice.items}
+        changes = diff_items(
+            {item_id: {column: getattr(item, column) for column in ITEM_COLUMNS} for item_id, item in current.items()},
+            payload.items,
+        )
+        if changes.unknown:
+            raise HTTPException(status_code=400, detail=unknown_items_message(changes.unknown))
+        for item_id, values in changes.updates.items():
+            for column, value in values.items():
+                setattr(current[item_id], column, value)
+        for item_id in changes.deletes:
+            invoice.items.remove(current[item_id])  # delete-orphan
+        invoice.items.extend(InvoiceItem(**values) for values in changes.inserts)
+
+    if payload.model_fields_set:
+        # Always UPDATE the invoice row, so item-only edits bump version (and updated_at) too
+        invoice.updated_at = datetime.utcnow()
+    try:
+        await db.flush()
+    except StaleDataError:
+        await db.rollback()
+        raise precondition_failed()
 
-    db.commit()
-    db.refresh(invoice)
-    
-    # Enrich with user business info
+    # Serialize from the flushed objects (new item ids and version included) instead of re-reading
     _enrich_invoice_with_user_info(invoice, current_user)
-    
-    return invoice
+    updated = InvoiceOut.model_validate(invoice)
+    await db.commit()
+    response.headers.update(etag_headers(invoice_etag(updated.version, current_user.updated_at)))
+    return updated
 
 
-@router.delete("/invoices/{invoice_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_invoice(invoice_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    invoice = _get_owned_invoice(db, current_user, invoice_id)
-    db.delete(invoice)
-    db.commit()
+@router.delete("/invoices/{invoice_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(quota("write"))])
+async def delete_invoice(invoice_id: int, if_match: str | None = Header(None), db: AsyncSession = Depends(get_async_db), current_user: UserSnapshot = Depends(get_current_user)):
+    invoice = await _get_owned_invoice(db, current_user, invoice_id)
+    require_if_match(if_match, invoice.version)
+    await db.delete(invoice)
+    try:
+        await db.commit()
+    except StaleDataError:
+        await db.rollback()
+        raise precondition_failed()
     return None
+
+
+# Bulk endpoints: one request, one transaction, a result per entry (see app.services.invoices)
+
+async def _run_bulk(db: AsyncSession, operation, *args) -> BulkResult:
+    try:
+        return await db.run_sync(operation, *args)
+    except (IntegrityError, StaleDataError):
+        # A number checked free was taken, or an invoice changed, by a concurrent request
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Invoices changed while the batch was applied, please retry")
+
+
+@router.post("/invoices:bulk", response_model=BulkResult, dependencies=[Depends(quota("write"))])
+async def bulk_create(payload: InvoiceBulkCreate, db: AsyncSession = Depends(get_async_db), current_user: UserSnapshot = Depends(get_current_user)):
+    """Create up to BULK_MAX_INVOICES invoices; entries that fail are reported and skipped."""
+    return await _run_bulk(db, bulk_create_invoices, current_user.id, payload.invoices)
+
+
+@router.patch("/invoices:bulk", response_model=BulkResult, dependencies=[Depends(quota("write"))])
+async def bulk_update(payload: InvoiceBulkUpdate, db: AsyncSession = Depends(get_async_db), current_user: UserSnapshot = Depends(get_current_user)):
+    """Partially update invoices by id; `items`, when given, is diffed against the invoice's items."""
+    return await _run_bulk(db, bulk_update_invoices, current_user.id, payload.invoices)
+
+
+@router.delete("/invoices:bulk", response_model=BulkResult, dependencies=[Depends(quota("write"))])
+async def bulk_delete(payload: InvoiceBulkDelete, db: AsyncSession = Depends(get_async_db), current_user: UserSnapshot = Depends(get_current_user)):
+    return await _run_bulk(db, bulk_delete_invoices, current_user.id, payload.ids)
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends, Query, status
+
+from app.core.principal_cache import UserSnapshot, principal_cache
+from app.db.replica import replica_router
+from app.db.slow_queries import slow_query_log
+from app.dependencies.auth import get_current_admin
+
+router = APIRouter()
+
+
+@router.get("/monitoring/principal-cache")
+def principal_cache_stats(admin: UserSnapshot = Depends(get_current_admin)):
+    """Hit/miss counters for the per-process authenticated-user cache."""
+    return principal_cache.stats()
+
+
+@router.get("/monitoring/read-replica")
+def read_replica_status(admin: UserSnapshot = Depends(get_current_admin)):
+    """Health, lag and routing counters for the DATABASE_READ_URL replica."""
+    return replica_router.stats()
+
+
+@router.get("/monitoring/slow-queries")
+def slow_queries(limit: int = Query(50, ge=1, le=1000), admin: UserSnapshot = Depends(get_current_admin)):
+    """Most recent statements over SLOW_QUERY_THRESHOLD_MS, newest first."""
+    return {
+        "threshold_ms": slow_query_log.threshold_ms,
+        "recorded": slow_query_log.recorded,
+        "entries": slow_query_log.snapshot(limit),
+    }
+
+
+@router.delete("/monitoring/slow-queries", status_code=status.HTTP_204_NO_CONTENT)
+def clear_slow_queries(admin: UserSnapshot = Depends(get_current_admin)):
+    slow_query_log.clear()
+    return None
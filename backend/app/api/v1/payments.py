@@ -6,17 +6,22 @@ import hashlib
 import json
 import logging
 
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
-from app.dependencies.auth import get_current_user
+from app.db.session import get_async_db, get_db
+from app.dependencies.auth import get_current_user, get_current_user_model
+from app.dependencies.db import get_read_db
+from app.core.principal_cache import UserSnapshot, principal_cache
 from app.models.user import User
 from app.models.payment import Payment
 from app.services.paystack import create_subscription_payment_link as paystack_link, verify_payment as paystack_verify
 from app.services.stripe import create_subscription_payment_link as stripe_link, verify_payment as stripe_verify
 from app.schemas.user import UserRead
 from app.core.config import settings
+from app.core.pagination import clamp_limit, decode_cursor, fetch_page, finish_page, resolve_sort, sort_orders
 from pydantic import BaseModel
 
 # Set up logging
@@ -24,6 +29,8 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+PAYMENT_SORTS = sort_orders(Payment.id, created_at=Payment.created_at)
+
 
 class CreateSubscriptionRequest(BaseModel):
     provider: Literal["paystack", "stripe"] = "paystack"
@@ -44,7 +51,7 @@ class VerifyPaymentRequest(BaseModel):
 @router.post("/subscription/create", response_model=SubscriptionResponse)
 def create_pro_subscription(
     request: CreateSubscriptionRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Create a payment link for pro-tier subscription."""
@@ -93,7 +100,7 @@ def create_pro_subscription(
 @router.post("/subscription/verify")
 def verify_subscription_payment(
     request: VerifyPaymentRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_model),
     db: Session = Depends(get_db)
 ):
     """Verify subscription payment and activate pro tier."""
@@ -129,6 +136,7 @@ def verify_subscription_payment(
         current_user.subscription_updated_at = datetime.utcnow()
         
         db.commit()
+        principal_cache.invalidate_user(current_user.id)
         
         return {"message": "Subscription activated successfully", "is_pro": True}
     else:
@@ -140,7 +148,7 @@ def verify_subscription_payment(
 
 @router.get("/subscription/status")
 def get_subscription_status(
-    current_user: User = Depends(get_current_user)
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
     """Get current user's subscription status."""
     return {
@@ -155,16 +163,20 @@ def get_subscription_status(
 
 @router.get("/history")
 def get_payment_history(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    response: Response,
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
     limit: int = 50,
-    offset: int = 0
+    sort: str = "-created_at",
+    cursor: str | None = None,
 ):
-    """Get user's payment history."""
-    payments = db.query(Payment).filter(
-        Payment.user_id == current_user.id
-    ).order_by(Payment.created_at.desc()).limit(limit).offset(offset).all()
-    
+    """Get user's payment history (newest first by default; keyset-paginated, see app.core.pagination)."""
+    limit = clamp_limit(limit)
+    key = resolve_sort(PAYMENT_SORTS, sort)
+    after = decode_cursor("payments", sort, key, cursor) if cursor else None
+    rows = fetch_page(db, select(Payment).where(Payment.user_id == current_user.id), key, after, limit)
+    payments, headers = finish_page(rows, limit, "payments", sort, key)
+    response.headers.update(headers)
     return [
         {
             "id": p.id,
@@ -183,7 +195,7 @@ def get_payment_history(
 
 
 @router.post("/webhook/paystack")
-async def paystack_webhook(request: Request, db: Session = Depends(get_db)):
+async def paystack_webhook(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Handle Paystack webhook notifications with signature verification."""
     try:
         # Get raw body for signature verification
@@ -251,7 +263,7 @@ def _verify_paystack_signature(body: bytes, signature: str) -> bool:
         return False
 
 
-async def _handle_paystack_charge_success(data: dict, db: Session):
+async def _handle_paystack_charge_success(data: dict, db: AsyncSession):
     """Handle successful charge event from Paystack."""
     reference = data.get("reference")
     amount = data.get("amount", 0) / 100  # Convert from kobo to naira/dollars
@@ -264,10 +276,12 @@ async def _handle_paystack_charge_success(data: dict, db: Session):
     logger.info(f"Processing successful charge for reference: {reference}")
     
     # Find payment record
-    payment = db.query(Payment).filter(
-        Payment.provider_ref == reference,
-        Payment.provider == "paystack"
-    ).first()
+    payment = await db.scalar(
+        select(Payment).where(
+            Payment.provider_ref == reference,
+            Payment.provider == "paystack"
+        ).limit(1)
+    )
     
     if not payment:
         logger.warning(f"Payment record not found for reference: {reference}")
@@ -283,7 +297,7 @@ async def _handle_paystack_charge_success(data: dict, db: Session):
     payment.updated_at = datetime.utcnow()
     
     # Get user and update subscription
-    user = db.query(User).filter(User.id == payment.user_id).first()
+    user = await db.get(User, payment.user_id)
     if not user:
         logger.error(f"User not found for payment {reference}")
         return
@@ -298,15 +312,16 @@ async def _handle_paystack_charge_success(data: dict, db: Session):
     user.subscription_updated_at = datetime.utcnow()
     
     try:
-        db.commit()
+        await db.commit()
+        principal_cache.invalidate_user(user.id)
         logger.info(f"Successfully activated pro subscription for user {user.id} (payment: {reference})")
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Failed to update database for payment {reference}: {str(e)}")
         raise
 
 
-async def _handle_paystack_subscription_create(data: dict, db: Session):
+async def _handle_paystack_subscription_create(data: dict, db: AsyncSession):
     """Handle subscription creation event from Paystack."""
     subscription_code = data.get("subscription_code")
     customer_email = data.get("customer", {}).get("email")
@@ -315,14 +330,15 @@ async def _handle_paystack_subscription_create(data: dict, db: Session):
     
     # Find user by email and update subscription info if needed
     if customer_email:
-        user = db.query(User).filter(User.email == customer_email).first()
+        user = await db.scalar(select(User).where(User.email == customer_email).limit(1))
         if user and user.subscription_provider == "paystack":
             user.subscription_provider_id = subscription_code
             user.subscription_updated_at = datetime.utcnow()
-            db.commit()
+            await db.commit()
+            principal_cache.invalidate_user(user.id)
 
 
-async def _handle_paystack_subscription_disable(data: dict, db: Session):
+async def _handle_paystack_subscription_disable(data: dict, db: AsyncSession):
     """Handle subscription disable event from Paystack."""
     subscription_code = data.get("subscription_code")
     customer_email = data.get("customer", {}).get("email")
@@ -331,13 +347,14 @@ async def _handle_paystack_subscription_disable(data: dict, db: Session):
     
     # Find user and disable subscription
     if customer_email:
-        user = db.query(User).filter(User.email == customer_email).first()
+        user = await db.scalar(select(User).where(User.email == customer_email).limit(1))
         if user and user.subscription_provider_id == subscription_code:
             user.is_pro = False
             user.subscription_status = "cancelled"
             user.subscription_end_date = datetime.utcnow()
             user.subscription_updated_at = datetime.utcnow()
-            db.commit()
+            await db.commit()
+            principal_cache.invalidate_user(user.id)
             logger.info(f"Disabled pro subscription for user {user.id}")
 
 
@@ -3,14 +3,15 @@ from sqlalchemy.orm import Session
 
 from app.db.session import get_db
 from app.dependencies.auth import get_current_user
-from app.models.user import User
+from app.core.principal_cache import UserSnapshot
 from app.models.invoice import Invoice
+from app.core.quotas import quota
 
 router = APIRouter()
 
 
-@router.post("/send-reminder")
-def send_reminder(invoice_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+@router.post("/send-reminder", dependencies=[Depends(quota("write"))])
+def send_reminder(invoice_id: int, db: Session = Depends(get_db), current_user: UserSnapshot = Depends(get_current_user)):
     inv = db.get(Invoice, invoice_id)
     if not inv or inv.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Invoice not found")
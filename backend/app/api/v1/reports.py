@@ -0,0 +1,49 @@
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.dependencies.auth import get_current_user
+from app.core.principal_cache import UserSnapshot
+from app.dependencies.db import get_async_read_db
+from app.schemas.report import AgingReport, RevenueMonth, RevenueReport
+from app.services.reports import aging_query, revenue_query, shift_month, summarize_aging
+
+router = APIRouter()
+
+MONTH_PATTERN = r"^\d{4}-(0[1-9]|1[0-2])$"
+
+# Longest range one revenue request may cover
+MAX_REPORT_MONTHS = 120
+
+
+@router.get("/reports/revenue", response_model=RevenueReport)
+async def revenue_report(
+    start: str | None = Query(None, alias="from", pattern=MONTH_PATTERN),
+    end: str | None = Query(None, alias="to", pattern=MONTH_PATTERN),
+    currency: str | None = None,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: UserSnapshot = Depends(get_current_user),
+):
+    """Invoiced and paid totals per month (YYYY-MM, by issue date) and currency; the last 12 months by default"""
+    end = end or f"{date.today():%Y-%m}"
+    start = start or shift_month(end, -11)
+    if start > end:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    if shift_month(start, MAX_REPORT_MONTHS) <= end:
+        raise HTTPException(status_code=400, detail=f"Reports cover at most {MAX_REPORT_MONTHS} months")
+    rows = (await db.execute(revenue_query(current_user.id, start, end, currency))).all()
+    return RevenueReport(start=start, end=end, months=[RevenueMonth.model_validate(row._mapping) for row in rows])
+
+
+@router.get("/reports/aging", response_model=AgingReport)
+async def aging_report(
+    as_of: date | None = None,
+    currency: str | None = None,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: UserSnapshot = Depends(get_current_user),
+):
+    """Open (sent / overdue) invoices by days past due: current, 0-30, 31-60, 61-90, 90+"""
+    as_of = as_of or date.today()
+    rows = (await db.execute(aging_query(current_user.id, as_of, currency))).all()
+    return summarize_aging(rows, as_of)
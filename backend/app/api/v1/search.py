@@ -0,0 +1,59 @@
+from typing import List, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.dependencies.auth import get_current_user
+from app.core.principal_cache import UserSnapshot
+from app.core.pagination import clamp_limit, open_cursor, seal_cursor
+from app.dependencies.db import get_async_read_db
+from app.schemas.search import SearchResult
+from app.services.search import run_search, search_terms
+
+router = APIRouter()
+
+
+def _search_key(terms: list[str], kind: str | None) -> str:
+    # Cursors are only valid for the search that issued them
+    return f"{kind or '*'}:{' '.join(terms)}"
+
+
+def _decode_search_cursor(cursor: str, key: str) -> tuple:
+    name, values = open_cursor("search", cursor)
+    if name != key:
+        raise HTTPException(status_code=400, detail="Cursor was issued for a different search")
+    try:
+        rank, document_id = values
+        return float(rank), int(document_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.get("/search", response_model=List[SearchResult])
+async def search(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    kind: Literal["invoice", "client"] | None = Query(None, alias="type"),
+    limit: int = 20,
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: UserSnapshot = Depends(get_current_user),
+):
+    """Invoices (number, client, notes, item descriptions) and clients (name, email) matching every word of `q`, most relevant first"""
+    terms = search_terms(q)
+    if not terms:
+        raise HTTPException(status_code=400, detail="Search for at least one word or number")
+    limit = clamp_limit(limit, default=20, maximum=50)
+    key = _search_key(terms, kind)
+    after = _decode_search_cursor(cursor, key) if cursor else None
+
+    rows = await db.run_sync(run_search, current_user.id, terms, kind, after, limit)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    response.headers["X-Has-More"] = "true" if has_more else "false"
+    if has_more:
+        response.headers["X-Next-Cursor"] = seal_cursor("search", key, [rows[-1].rank, rows[-1].id])
+    return [
+        SearchResult(type=row.kind, id=row.entity_id, title=row.title, subtitle=row.subtitle, score=-row.rank)
+        for row in rows
+    ]
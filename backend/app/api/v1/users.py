@@ -1,25 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-from sqlalchemy.orm import Session
-from app.dependencies.auth import get_current_user
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, UploadFile, File
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from app.dependencies.auth import get_async_current_user_model, get_current_user
+from app.core.principal_cache import UserSnapshot, principal_cache
+from app.core.etags import etag_headers, if_none_match_satisfied, make_etag, not_modified, timestamp_tag
 from app.schemas.user import UserOut, UserRead, UserUpdate
 from app.models.user import User
-from app.db.session import get_db
+from app.db.session import get_async_db
 from app.services.storage import save_bytes
 import uuid
 from pathlib import Path
 
 router = APIRouter()
 
+
+def _profile_etag(user) -> str:
+    return make_etag(user.id, timestamp_tag(user.updated_at))
+
+
 @router.get("/me", response_model=UserRead)
-def read_me(current_user: User = Depends(get_current_user)):
+async def read_me(
+    response: Response,
+    if_none_match: str | None = Header(None),
+    current_user: UserSnapshot = Depends(get_current_user),
+):
     """Get current authenticated user details"""
+    # The snapshot carries updated_at, so revalidation needs no query at all
+    etag = _profile_etag(current_user)
+    if if_none_match_satisfied(if_none_match, etag):
+        return not_modified(etag)
+    response.headers.update(etag_headers(etag))
     return current_user
 
 @router.patch("/me", response_model=UserRead)
-def update_me(
+async def update_me(
     user_update: UserUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    response: Response,
+    user: User = Depends(get_async_current_user_model),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update current user's profile and business details"""
     
@@ -27,18 +45,20 @@ def update_me(
     update_data = user_update.model_dump(exclude_unset=True)
     
     for field, value in update_data.items():
-        setattr(current_user, field, value)
+        setattr(user, field, value)
     
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    principal_cache.invalidate_user(user.id)
+    await db.refresh(user)
+    response.headers.update(etag_headers(_profile_etag(user)))
     
-    return current_user
+    return user
 
 @router.post("/upload-avatar", response_model=dict)
 async def upload_avatar(
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    user: User = Depends(get_async_current_user_model),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Upload user avatar image"""
     
@@ -57,23 +77,23 @@ async def upload_avatar(
     
     # Generate unique filename
     file_extension = Path(file.filename).suffix
-    unique_filename = f"avatar_{current_user.id}_{uuid.uuid4().hex[:8]}{file_extension}"
+    unique_filename = f"avatar_{user.id}_{uuid.uuid4().hex[:8]}{file_extension}"
     
     # Save file
-    abs_path, public_url = save_bytes(unique_filename, contents)
+    abs_path, public_url = await run_in_threadpool(save_bytes, unique_filename, contents)
     
     # Update user avatar URL
-    current_user.avatar_url = public_url
-    db.commit()
-    db.refresh(current_user)
+    user.avatar_url = public_url
+    await db.commit()
+    principal_cache.invalidate_user(user.id)
     
     return {"url": public_url, "message": "Avatar uploaded successfully"}
 
 @router.post("/upload-logo", response_model=dict)
 async def upload_company_logo(
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    user: User = Depends(get_async_current_user_model),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Upload company logo image"""
     
@@ -92,14 +112,14 @@ async def upload_company_logo(
     
     # Generate unique filename
     file_extension = Path(file.filename).suffix
-    unique_filename = f"logo_{current_user.id}_{uuid.uuid4().hex[:8]}{file_extension}"
+    unique_filename = f"logo_{user.id}_{uuid.uuid4().hex[:8]}{file_extension}"
     
     # Save file
-    abs_path, public_url = save_bytes(unique_filename, contents)
+    abs_path, public_url = await run_in_threadpool(save_bytes, unique_filename, contents)
     
     # Update user company logo URL
-    current_user.company_logo_url = public_url
-    db.commit()
-    db.refresh(current_user)
+    user.company_logo_url = public_url
+    await db.commit()
+    principal_cache.invalidate_user(user.id)
     
     return {"url": public_url, "message": "Company logo uploaded successfully"}
@@ -9,6 +9,62 @@ class Settings(BaseModel):
     SECRET_KEY: str = os.getenv("SECRET_KEY", "dev-secret-key")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24
+
+    # Password hashing (bcrypt runs in a dedicated process pool, see app.core.security)
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))  # 0 = hash in the threadpool
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))  # queued jobs before 503
+    # Authenticated-user cache (per process, see app.core.principal_cache)
+    PRINCIPAL_CACHE_TTL_SECONDS: float = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "30"))  # 0 disables
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+    # Comma-separated emails allowed to read /v1/monitoring endpoints
+    ADMIN_EMAILS: list[str] = [e.strip().lower() for e in os.getenv("ADMIN_EMAILS", "").split(",") if e.strip()]
+
+    # Rate limit state: memory (per process) | shm (shared by workers on a node) | redis (shared by nodes)
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "memory")
+    RATE_LIMIT_SHM_PATH: str | None = os.getenv("RATE_LIMIT_SHM_PATH")  # default /dev/shm/invoyq-ratelimit
+    RATE_LIMIT_SHM_SLOTS: int = int(os.getenv("RATE_LIMIT_SHM_SLOTS", "65536"))
+    RATE_LIMIT_REDIS_URL: str | None = os.getenv("RATE_LIMIT_REDIS_URL")  # redis://[:password@]host:6379/0
+    RATE_LIMIT_FAIL_OPEN: bool = os.getenv("RATE_LIMIT_FAIL_OPEN", "true").lower() == "true"
+    # Apply pending schema migrations at startup instead of refusing to start (see app.db.migrate)
+    SCHEMA_AUTO_MIGRATE: bool = os.getenv(
+        "SCHEMA_AUTO_MIGRATE", "true" if os.getenv("DATABASE_URL", "sqlite").startswith("sqlite") else "false"
+    ).lower() == "true"
+    # Batched backfills run by migrations (see app.db.backfill)
+    BACKFILL_BATCH_SIZE: int = int(os.getenv("BACKFILL_BATCH_SIZE", "1000"))
+    BACKFILL_SLEEP_SECONDS: float = float(os.getenv("BACKFILL_SLEEP_SECONDS", "0.05"))  # pause between batches
+    BACKFILL_LOCK_TIMEOUT_MS: int = int(os.getenv("BACKFILL_LOCK_TIMEOUT_MS", "2000"))
+
+    # Per-request SQL instrumentation (see app.db.query_stats); 0 disables the warning
+    QUERY_BUDGET_WARN_STATEMENTS: int = int(os.getenv("QUERY_BUDGET_WARN_STATEMENTS", "25"))
+    # Make implicit relationship lazy loads raise (for tests / CI, to catch N+1 queries)
+    SQLALCHEMY_RAISELOAD: bool = os.getenv("SQLALCHEMY_RAISELOAD", "false").lower() == "true"
+    # Slow query log (see app.db.slow_queries); threshold 0 disables it
+    SLOW_QUERY_THRESHOLD_MS: float = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+    SLOW_QUERY_LOG_SIZE: int = int(os.getenv("SLOW_QUERY_LOG_SIZE", "200"))
+    SLOW_QUERY_EXPLAIN: bool = os.getenv("SLOW_QUERY_EXPLAIN", "false").lower() == "true"  # re-runs slow SELECTs
+    # Per-statement timeout so runaway queries can't pin pool connections (0 disables)
+    DB_STATEMENT_TIMEOUT_MS: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+
+    # Generated invoice numbers (see app.core.invoice_numbers). {date} is today, {seq} the per-user counter;
+    # the counter restarts whenever the rest of the number changes, so this default numbers each day from 001
+    INVOICE_NUMBER_FORMAT: str = os.getenv("INVOICE_NUMBER_FORMAT", "INV-{date:%Y%m%d}-{seq:03d}")
+
+    # Read replica routing (DATABASE_READ_URL, see app.db.replica)
+    DATABASE_READ_PIN_SECONDS: float = float(os.getenv("DATABASE_READ_PIN_SECONDS", "5"))  # read-your-writes window
+    DATABASE_READ_MAX_LAG_SECONDS: float = float(os.getenv("DATABASE_READ_MAX_LAG_SECONDS", "5"))
+    DATABASE_READ_HEALTH_INTERVAL_SECONDS: float = float(os.getenv("DATABASE_READ_HEALTH_INTERVAL_SECONDS", "5"))
+
+    # Number of reverse proxies in front of the app whose X-Forwarded-For entries are trusted
+    TRUSTED_PROXY_HOPS: int = int(os.getenv("TRUSTED_PROXY_HOPS", "0"))
+
+    # Quotas (see app.core.quotas)
+    QUOTA_EXTRACTION_ANONYMOUS_PER_DAY: int = int(os.getenv("QUOTA_EXTRACTION_ANONYMOUS_PER_DAY", "5"))
+    QUOTA_EXTRACTION_FREE_PER_DAY: int = int(os.getenv("QUOTA_EXTRACTION_FREE_PER_DAY", "20"))
+    QUOTA_EXTRACTION_PRO_PER_DAY: int = int(os.getenv("QUOTA_EXTRACTION_PRO_PER_DAY", "500"))
+    QUOTA_WRITE_FREE_PER_MINUTE: int = int(os.getenv("QUOTA_WRITE_FREE_PER_MINUTE", "60"))
+    QUOTA_WRITE_PRO_PER_MINUTE: int = int(os.getenv("QUOTA_WRITE_PRO_PER_MINUTE", "300"))
+
     # Extraction settings
     EXTRACTOR_PROVIDER: str = os.getenv("EXTRACTOR_PROVIDER", "openai")  # openai only
     OPENAI_API_KEY: str | None = os.getenv("OPENAI_API_KEY")
@@ -36,6 +92,17 @@ class Settings(BaseModel):
     SMTP_USE_TLS: bool = os.getenv("SMTP_USE_TLS", "true").lower() == "true"
     SMTP_USE_SSL: bool = os.getenv("SMTP_USE_SSL", "false").lower() == "true"
     
+    # Email outbox: handlers queue emails, a worker delivers them (see app.services.email_outbox)
+    EMAIL_OUTBOX_IN_PROCESS: bool = os.getenv("EMAIL_OUTBOX_IN_PROCESS", "true").lower() == "true"
+    EMAIL_OUTBOX_POLL_SECONDS: float = float(os.getenv("EMAIL_OUTBOX_POLL_SECONDS", "5"))
+    EMAIL_OUTBOX_BATCH_SIZE: int = int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE", "50"))
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", "5"))
+    EMAIL_OUTBOX_SMTP_KEEPALIVE_SECONDS: float = float(os.getenv("EMAIL_OUTBOX_SMTP_KEEPALIVE_SECONDS", "30"))
+    
+    # Expired verification tokens are deleted in batches by a background task
+    VERIFICATION_TOKEN_SWEEP_INTERVAL_SECONDS: float = float(os.getenv("VERIFICATION_TOKEN_SWEEP_INTERVAL_SECONDS", "3600"))  # 0 disables
+    VERIFICATION_TOKEN_SWEEP_BATCH_SIZE: int = int(os.getenv("VERIFICATION_TOKEN_SWEEP_BATCH_SIZE", "500"))
+    
     # Frontend URL for email verification links
     FRONTEND_URL: str = os.getenv("FRONTEND_URL", "http://localhost:3000")
 
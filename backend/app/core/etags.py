@@ -0,0 +1,91 @@
+"""
+Entity tags for conditional requests.
+
+Optimistic concurrency: an invoice's ETag starts with its version column
+(`"7-..."`), sent on GET / POST / PUT responses. Writes may send it back as
+`If-Match`; if the invoice has been changed since (its version moved on),
+the write is refused with 412 instead of silently overwriting the other
+editor's change. Without If-Match the write goes through as before.
+
+Conditional GET: single resources and lists answer `If-None-Match` with 304
+when their tag still matches. The tag is computed from a one-column (or, for
+lists, one-row aggregate) query, so a 304 never loads relationships or
+serializes a body:
+
+- invoices: version, plus the owner's updated_at (invoices embed the
+  owner's business details)
+- clients / the profile: updated_at
+- lists: max(updated_at) and count of the rows the filters select; an edit
+  moves the max, a delete changes the count
+"""
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException, Response, status
+
+# Browsers may keep a copy but must revalidate it on every use; never stored by shared caches
+CACHE_CONTROL = "private, no-cache"
+
+
+def timestamp_tag(moment: Optional[datetime]) -> str:
+    # Rows that predate the updated_at column (NULL until backfilled) share "0"
+    return f"{moment:%Y%m%d%H%M%S%f}" if moment else "0"
+
+
+def make_etag(*parts) -> str:
+    return '"' + "-".join(str(part) for part in parts) + '"'
+
+
+def invoice_etag(version: int, owner_updated_at: Optional[datetime]) -> str:
+    return make_etag(version, timestamp_tag(owner_updated_at))
+
+
+def collection_etag(user_id: int, max_updated_at: Optional[datetime], count: int, *parts) -> str:
+    return make_etag(user_id, timestamp_tag(max_updated_at), count, *parts)
+
+
+def etag_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+
+def _candidates(header: str) -> list[str]:
+    return [candidate.strip() for candidate in header.split(",")]
+
+
+def if_match_satisfied(if_match: Optional[str], version: int) -> bool:
+    """
+    Strong comparison (RFC 9110 13.1.1) of the version part: weak tags never
+    match, `*` always does. The owner part is ignored, so a profile edit
+    doesn't fail invoice writes; `"7"` and `"7-..."` are equivalent.
+    """
+    if if_match is None:
+        return True
+    for candidate in _candidates(if_match):
+        if candidate == "*":
+            return True
+        if len(candidate) > 1 and candidate[0] == candidate[-1] == '"' and candidate[1:-1].split("-")[0] == str(version):
+            return True
+    return False
+
+
+def if_none_match_satisfied(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison (RFC 9110 13.1.2): `W/"x"` matches `"x"`, `*` matches any current tag."""
+    if if_none_match is None:
+        return False
+    return any(candidate == "*" or candidate.removeprefix("W/") == etag for candidate in _candidates(if_none_match))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=etag_headers(etag))
+
+
+def precondition_failed() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail="This invoice was changed by someone else. Reload it and try again.",
+    )
+
+
+def require_if_match(if_match: Optional[str], version: int) -> None:
+    if not if_match_satisfied(if_match, version):
+        raise precondition_failed()
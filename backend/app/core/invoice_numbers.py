@@ -0,0 +1,103 @@
+"""
+Generated invoice numbers from per-user sequences.
+
+INVOICE_NUMBER_FORMAT is a str.format template with `{date}` (today) and
+`{seq}` (the counter), e.g. "INV-{date:%Y%m%d}-{seq:03d}" or
+"{date:%Y}/{seq:05d}". Each distinct rendering of everything except the
+counter is its own sequence scope: "INV-20250115-{seq}" restarts daily,
+"{date:%Y}/{seq}" yearly, "INV-{seq}" never.
+
+The next value is taken with a single upsert on the (user_id, scope) row,
+
+    INSERT INTO invoice_sequences ... VALUES (?, ?, 1)
+    ON CONFLICT (user_id, scope) DO UPDATE SET last_value = last_value + 1
+    RETURNING last_value
+
+so numbering costs one round trip, and the row lock it holds until the
+invoice's transaction ends serializes concurrent creates for the same user
+instead of letting them collide on uq_user_invoice_number. A rolled back
+create gives its value back.
+"""
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.invoice_sequence import InvoiceSequence
+
+
+class _SequenceSlot:
+    """Stands in for {seq} (whatever its format spec) when rendering a scope."""
+
+    def __format__(self, spec: str) -> str:
+        return "{seq}"
+
+
+def sequence_scope(number_format: str, day: date) -> str:
+    return number_format.format(date=day, seq=_SequenceSlot())
+
+
+def format_invoice_number(number_format: str, day: date, value: int) -> str:
+    return number_format.format(date=day, seq=value)
+
+
+def validate_number_format(number_format: str) -> None:
+    """Raise ValueError unless the template renders and contains {seq} exactly once."""
+    try:
+        scope = sequence_scope(number_format, date.today())
+        format_invoice_number(number_format, date.today(), 1)
+    except (KeyError, IndexError, ValueError) as exc:
+        raise ValueError(f"Invalid INVOICE_NUMBER_FORMAT {number_format!r}: {exc}") from exc
+    if scope.count("{seq}") != 1:
+        raise ValueError(f"INVOICE_NUMBER_FORMAT {number_format!r} must contain {{seq}} exactly once")
+
+
+validate_number_format(settings.INVOICE_NUMBER_FORMAT)
+
+
+def next_sequence_value(db: Session, user_id: int, scope: str, count: int = 1) -> int:
+    """Advance the user's counter for scope by count (creating it) and return the new last value."""
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        stmt = insert(InvoiceSequence).values(user_id=user_id, scope=scope, last_value=count)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[InvoiceSequence.user_id, InvoiceSequence.scope],
+            set_={"last_value": InvoiceSequence.last_value + count},
+        ).returning(InvoiceSequence.last_value)
+        return db.execute(stmt).scalar_one()
+
+    # Generic fallback: lock the row, then update
+    current = db.execute(
+        select(InvoiceSequence.last_value)
+        .where(InvoiceSequence.user_id == user_id, InvoiceSequence.scope == scope)
+        .with_for_update()
+    ).scalar_one_or_none()
+    if current is None:
+        db.add(InvoiceSequence(user_id=user_id, scope=scope, last_value=count))
+        db.flush()
+        return count
+    db.execute(
+        update(InvoiceSequence)
+        .where(InvoiceSequence.user_id == user_id, InvoiceSequence.scope == scope)
+        .values(last_value=current + count)
+    )
+    return current + count
+
+
+def allocate_invoice_numbers(
+    db: Session, user_id: int, count: int, day: Optional[date] = None, number_format: Optional[str] = None,
+) -> list[str]:
+    """The user's next count invoice numbers, taken with one statement in the caller's transaction."""
+    day = day or date.today()
+    number_format = number_format or settings.INVOICE_NUMBER_FORMAT
+    last = next_sequence_value(db, user_id, sequence_scope(number_format, day), count)
+    return [format_invoice_number(number_format, day, value) for value in range(last - count + 1, last + 1)]
+
+
+def allocate_invoice_number(db: Session, user_id: int, day: Optional[date] = None, number_format: Optional[str] = None) -> str:
+    """The user's next invoice number, in the caller's transaction (use via `await db.run_sync(...)`)."""
+    return allocate_invoice_numbers(db, user_id, 1, day, number_format)[0]
@@ -0,0 +1,209 @@
+"""
+Keyset pagination with opaque, signed cursors.
+
+List endpoints take `sort` (one of the resource's named orders, "-" prefix
+for descending) and `cursor`. Every order ends with the primary key, so the
+sort key is unique; a page is a seek past the last row of the previous one,
+
+    WHERE user_id = ? AND (due_date, id) > (?, ?) ORDER BY due_date, id LIMIT 51
+
+which an index on (user_id, due_date, id) answers without scanning skipped
+rows the way OFFSET does. `limit + 1` rows are fetched so has-more is exact:
+X-Has-More is always set, X-Next-Cursor only when there is a next page.
+
+Cursors are base64url JSON of the sort name and key values, HMAC-signed with
+SECRET_KEY and bound to the resource, so clients can't forge or reuse them
+across endpoints. NULLs (due_date, total) sort after every value ascending
+and before every value descending, as in Postgres; the NULL and non-NULL
+ranges are fetched as separate seeks, the second only when the page
+crosses into it.
+"""
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Optional, Sequence
+import base64
+import hashlib
+import hmac
+import json
+
+from fastapi import HTTPException
+from sqlalchemy import and_, tuple_
+from sqlalchemy.sql import Select
+
+from app.core.config import settings
+
+SIGNATURE_BYTES = 12
+
+
+@dataclass(frozen=True)
+class SortKey:
+    """Order by `column` (then `tiebreak`, the primary key, unless column is the key itself)."""
+    column: Any
+    tiebreak: Any = None
+    descending: bool = False
+
+    @property
+    def columns(self) -> list:
+        return [self.column] if self.tiebreak is None else [self.column, self.tiebreak]
+
+    @property
+    def nullable(self) -> bool:
+        return self.tiebreak is not None and self.column.property.columns[0].nullable
+
+
+def sort_orders(id_column, **columns) -> dict[str, SortKey]:
+    """{"id": ..., "-id": ..., "name": ..., "-name": ...} for the given columns."""
+    orders = {"id": SortKey(id_column), "-id": SortKey(id_column, descending=True)}
+    for name, column in columns.items():
+        orders[name] = SortKey(column, id_column)
+        orders[f"-{name}"] = SortKey(column, id_column, descending=True)
+    return orders
+
+
+def resolve_sort(orders: dict[str, SortKey], sort: str) -> SortKey:
+    if sort not in orders:
+        raise HTTPException(status_code=400, detail=f"Unknown sort '{sort}'. Use one of: {', '.join(orders)}")
+    return orders[sort]
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _sign(resource: str, payload: str) -> bytes:
+    message = f"{resource}:{payload}".encode()
+    return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).digest()[:SIGNATURE_BYTES]
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _decode_value(column, value: Any) -> Any:
+    if value is None:
+        return None
+    python_type = column.property.columns[0].type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
+
+
+def seal_cursor(resource: str, name: str, values: list) -> str:
+    """Signed cursor carrying `name` (the sort, or whatever else the page depends on) and JSON values."""
+    payload = _b64encode(json.dumps([name, values], separators=(",", ":")).encode())
+    return f"{payload}.{_b64encode(_sign(resource, payload))}"
+
+
+def open_cursor(resource: str, cursor: str) -> tuple[str, list]:
+    """(name, values) of a cursor sealed for `resource`; 400 if it was forged or issued elsewhere."""
+    try:
+        payload, signature = cursor.split(".")
+        if not hmac.compare_digest(_b64decode(signature), _sign(resource, payload)):
+            raise ValueError("bad signature")
+        name, values = json.loads(_b64decode(payload))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return name, values
+
+
+def encode_cursor(resource: str, sort: str, key: SortKey, row) -> str:
+    return seal_cursor(resource, sort, [_encode_value(getattr(row, column.key)) for column in key.columns])
+
+
+def decode_cursor(resource: str, sort: str, key: SortKey, cursor: str) -> tuple:
+    cursor_sort, values = open_cursor(resource, cursor)
+    if cursor_sort != sort:
+        raise HTTPException(status_code=400, detail=f"Cursor was issued for sort '{cursor_sort}'")
+    try:
+        if len(values) != len(key.columns):
+            raise ValueError("wrong arity")
+        return tuple(_decode_value(column, value) for column, value in zip(key.columns, values))
+    except (ValueError, TypeError, ArithmeticError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _segments(key: SortKey, after: Optional[tuple]) -> list[tuple]:
+    """(filter, order_by) pairs covering the rows after `after`, in page order.
+
+    A nullable sort column is split into its NULL and non-NULL ranges, each of
+    which is a plain index seek; one OR-ed predicate could only seek on user_id.
+    """
+    column, tiebreak = key.column, key.tiebreak
+    if tiebreak is None:
+        seek = None if after is None else (column < after[0] if key.descending else column > after[0])
+        return [(seek, [column.desc() if key.descending else column.asc()])]
+
+    by_value = [column.desc(), tiebreak.desc()] if key.descending else [column.asc(), tiebreak.asc()]
+    by_id = [tiebreak.desc()] if key.descending else [tiebreak.asc()]
+    value, last_id = after if after is not None else (None, None)
+    if not key.nullable:
+        if after is None:
+            return [(None, by_value)]
+        past = tuple_(column, tiebreak) < tuple_(value, last_id) if key.descending else tuple_(column, tiebreak) > tuple_(value, last_id)
+        return [(past, by_value)]
+
+    # NULLs sort after every value ascending, before every value descending
+    if after is None:
+        nulls, values = column.is_(None), column.is_not(None)
+    elif value is None:
+        nulls = and_(column.is_(None), tiebreak < last_id if key.descending else tiebreak > last_id)
+        values = column.is_not(None) if key.descending else None
+    else:
+        nulls = None if key.descending else column.is_(None)
+        values = tuple_(column, tiebreak) < tuple_(value, last_id) if key.descending else tuple_(column, tiebreak) > tuple_(value, last_id)
+    segments = [(nulls, by_id), (values, by_value)] if key.descending else [(values, by_value), (nulls, by_id)]
+    return [(where, order) for where, order in segments if where is not None]
+
+
+def keyset_queries(statement: Select, key: SortKey, after: Optional[tuple]) -> list[Select]:
+    """Ordered statements whose concatenated results are the rows after `after`."""
+    queries = []
+    for where, order in _segments(key, after):
+        segment = statement if where is None else statement.where(where)
+        queries.append(segment.order_by(*order))
+    return queries
+
+
+def fetch_page(db, statement: Select, key: SortKey, after: Optional[tuple], limit: int) -> list:
+    """Up to limit + 1 rows (the extra one only signals has-more); later segments run only if needed."""
+    rows = []
+    for query in keyset_queries(statement, key, after):
+        rows += db.scalars(query.limit(limit + 1 - len(rows))).all()
+        if len(rows) > limit:
+            break
+    return rows
+
+
+async def fetch_page_async(db, statement: Select, key: SortKey, after: Optional[tuple], limit: int) -> list:
+    """fetch_page for AsyncSession / ThreadpoolSession."""
+    rows = []
+    for query in keyset_queries(statement, key, after):
+        rows += (await db.execute(query.limit(limit + 1 - len(rows)))).scalars().all()
+        if len(rows) > limit:
+            break
+    return rows
+
+
+def clamp_limit(limit: int, default: int = 50, maximum: int = 100) -> int:
+    return default if limit <= 0 else min(limit, maximum)
+
+
+def finish_page(rows: Sequence, limit: int, resource: str, sort: str, key: SortKey) -> tuple[Sequence, dict]:
+    """Drop the look-ahead row; returns the page and its X-Has-More / X-Next-Cursor headers."""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    headers = {"X-Has-More": "true" if has_more else "false"}
+    if has_more:
+        headers["X-Next-Cursor"] = encode_cursor(resource, sort, key, rows[-1])
+    return rows, headers
@@ -0,0 +1,163 @@
+from collections import OrderedDict
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import Dict, Optional, Set, Tuple
+import threading
+import time
+
+from app.core.config import settings
+
+
+@dataclass(frozen=True, slots=True)
+class UserSnapshot:
+    """
+    Immutable, detached view of the authenticated user.
+
+    Returned by get_current_user so authenticated requests do not need a
+    users row from the database. Routes that modify the user must load the
+    ORM row instead (see get_current_user_model).
+    """
+    id: int
+    email: str
+    full_name: Optional[str] = None
+    is_active: Optional[bool] = True
+    is_verified: Optional[bool] = False
+
+    is_pro: Optional[bool] = False
+    subscription_status: Optional[str] = None
+    subscription_provider: Optional[str] = None
+    subscription_provider_id: Optional[str] = None
+    subscription_start_date: Optional[datetime] = None
+    subscription_end_date: Optional[datetime] = None
+
+    avatar_url: Optional[str] = None
+    phone: Optional[str] = None
+    company_name: Optional[str] = None
+    company_logo_url: Optional[str] = None
+    company_address: Optional[str] = None
+    tax_id: Optional[str] = None
+    website: Optional[str] = None
+    updated_at: Optional[datetime] = None  # ETag of /me and, as business info, of invoices
+
+    @classmethod
+    def from_user(cls, user) -> "UserSnapshot":
+        return cls(**{f.name: getattr(user, f.name) for f in fields(cls)})
+
+
+CacheKey = Tuple[str, int]  # (token signature, user id)
+
+
+class PrincipalCache:
+    """
+    In-process TTL + LRU cache of UserSnapshot keyed by (token signature, user id).
+
+    Each worker process has its own cache, so invalidation only reaches the
+    current process; the TTL bounds how long other workers can serve a stale
+    snapshot.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 30):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries: "OrderedDict[CacheKey, Tuple[float, UserSnapshot]]" = OrderedDict()
+        self.keys_by_user: Dict[int, Set[CacheKey]] = {}
+        # Bumped on invalidation so a lookup that raced with an update cannot re-cache stale data.
+        # Values come from one counter, and only the max_entries most recently invalidated users
+        # are kept: a dropped user's value is folded into generation_floor, which untracked users report.
+        self.generations: "OrderedDict[int, int]" = OrderedDict()
+        self.generation_counter = 0
+        self.generation_floor = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def _discard(self, key: CacheKey) -> None:
+        self.entries.pop(key, None)
+        keys = self.keys_by_user.get(key[1])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.keys_by_user[key[1]]
+
+    def get(self, signature: str, user_id: int) -> Optional[UserSnapshot]:
+        key = (signature, user_id)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, snapshot = entry
+            if expires_at <= time.monotonic():
+                self._discard(key)
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return snapshot
+
+    def generation(self, user_id: int) -> int:
+        with self.lock:
+            return self.generations.get(user_id, self.generation_floor)
+
+    def put(self, signature: str, user_id: int, snapshot: UserSnapshot, generation: int) -> None:
+        if not self.enabled:
+            return
+        key = (signature, user_id)
+        with self.lock:
+            if self.generations.get(user_id, self.generation_floor) != generation:
+                return
+            self.entries[key] = (time.monotonic() + self.ttl_seconds, snapshot)
+            self.entries.move_to_end(key)
+            self.keys_by_user.setdefault(user_id, set()).add(key)
+            while len(self.entries) > self.max_entries:
+                oldest = next(iter(self.entries))
+                self._discard(oldest)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Drop every cached principal for user_id (call after committing changes to the user)."""
+        with self.lock:
+            self.generation_counter += 1
+            self.generations[user_id] = self.generation_counter
+            self.generations.move_to_end(user_id)
+            while len(self.generations) > max(self.max_entries, 1):
+                _, dropped = self.generations.popitem(last=False)
+                self.generation_floor = max(self.generation_floor, dropped)
+            for key in list(self.keys_by_user.get(user_id, ())):
+                self._discard(key)
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.keys_by_user.clear()
+            self.generations.clear()
+            # Lookups that started before the clear must not cache their result either
+            self.generation_floor = self.generation_counter
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+# Global principal cache used by get_current_user
+principal_cache = PrincipalCache(
+    max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
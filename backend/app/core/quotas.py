@@ -0,0 +1,221 @@
+"""
+Tier-aware quotas for expensive and write endpoints.
+
+Each metric has a policy per tier (anonymous, free, pro) made of up to three
+limits, checked in this order:
+
+- per_minute:  short-term rate, kept in the shared rate limit backend
+- per_day:     daily budget, a usage_counters row incremented with one upsert
+- concurrency: requests in flight per subject (per worker process)
+
+Use as a route dependency:
+
+    @router.post("/extract-job-details", dependencies=[Depends(quota("extraction"))])
+
+Responses carry RateLimit-Limit / RateLimit-Remaining / RateLimit-Reset for
+whichever limit is closest to running out, so clients can back off early.
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional
+import math
+import threading
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy import select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.principal_cache import UserSnapshot
+from app.core.rate_limiter import get_client_ip, rate_limit_backend
+from app.db.session import get_db
+from app.dependencies.auth import get_optional_current_user
+from app.models.usage_counter import UsageCounter
+
+
+@dataclass(frozen=True)
+class QuotaPolicy:
+    per_minute: int
+    per_day: Optional[int] = None
+    concurrency: Optional[int] = None
+
+
+QUOTA_POLICIES: Dict[str, Dict[str, QuotaPolicy]] = {
+    "extraction": {
+        "anonymous": QuotaPolicy(per_minute=5, per_day=settings.QUOTA_EXTRACTION_ANONYMOUS_PER_DAY, concurrency=1),
+        "free": QuotaPolicy(per_minute=10, per_day=settings.QUOTA_EXTRACTION_FREE_PER_DAY, concurrency=2),
+        "pro": QuotaPolicy(per_minute=30, per_day=settings.QUOTA_EXTRACTION_PRO_PER_DAY, concurrency=5),
+    },
+    # Exports hold a connection for as long as the download runs
+    "export": {
+        "anonymous": QuotaPolicy(per_minute=2, concurrency=1),
+        "free": QuotaPolicy(per_minute=5, concurrency=1),
+        "pro": QuotaPolicy(per_minute=20, concurrency=2),
+    },
+    # Imports hold a connection for as long as the upload runs
+    "import": {
+        "anonymous": QuotaPolicy(per_minute=2, concurrency=1),
+        "free": QuotaPolicy(per_minute=5, concurrency=1),
+        "pro": QuotaPolicy(per_minute=20, concurrency=1),
+    },
+    "write": {
+        "anonymous": QuotaPolicy(per_minute=30),
+        "free": QuotaPolicy(per_minute=settings.QUOTA_WRITE_FREE_PER_MINUTE),
+        "pro": QuotaPolicy(per_minute=settings.QUOTA_WRITE_PRO_PER_MINUTE),
+    },
+}
+
+
+def user_tier(user: Optional[UserSnapshot]) -> str:
+    if user is None:
+        return "anonymous"
+    if user.is_pro and user.subscription_status == "active":
+        return "pro"
+    return "free"
+
+
+def increment_daily_usage(db: Session, subject: str, metric: str, day: date, limit: int) -> Optional[int]:
+    """
+    Count one unit of usage for today and return the new total, or None if the
+    limit was already reached (in which case nothing is counted).
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        stmt = insert(UsageCounter).values(subject=subject, metric=metric, day=day, count=1)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UsageCounter.subject, UsageCounter.metric, UsageCounter.day],
+            set_={"count": UsageCounter.count + 1},
+            where=UsageCounter.count < limit,
+        ).returning(UsageCounter.count)
+        return db.execute(stmt).scalar_one_or_none()
+
+    # Generic fallback: lock the row, then update
+    counter = db.execute(
+        select(UsageCounter)
+        .where(UsageCounter.subject == subject, UsageCounter.metric == metric, UsageCounter.day == day)
+        .with_for_update()
+    ).scalar_one_or_none()
+    if counter is None:
+        db.add(UsageCounter(subject=subject, metric=metric, day=day, count=1))
+        return 1
+    if counter.count >= limit:
+        return None
+    db.execute(
+        update(UsageCounter)
+        .where(UsageCounter.subject == subject, UsageCounter.metric == metric, UsageCounter.day == day)
+        .values(count=UsageCounter.count + 1)
+    )
+    return counter.count + 1
+
+
+def refund_daily_usage(db: Session, subject: str, metric: str, day: date) -> None:
+    """Give back one unit counted by increment_daily_usage."""
+    db.execute(
+        update(UsageCounter)
+        .where(UsageCounter.subject == subject, UsageCounter.metric == metric, UsageCounter.day == day, UsageCounter.count > 0)
+        .values(count=UsageCounter.count - 1)
+    )
+
+
+class ConcurrencyLimiter:
+    """Counts in-flight requests per key within this process."""
+
+    def __init__(self):
+        self.in_flight: Dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, key: str, limit: int) -> bool:
+        with self.lock:
+            current = self.in_flight.get(key, 0)
+            if current >= limit:
+                return False
+            self.in_flight[key] = current + 1
+            return True
+
+    def release(self, key: str) -> None:
+        with self.lock:
+            current = self.in_flight.get(key, 0) - 1
+            if current > 0:
+                self.in_flight[key] = current
+            else:
+                self.in_flight.pop(key, None)
+
+
+concurrency_limiter = ConcurrencyLimiter()
+
+
+def _seconds_until_midnight_utc(now: datetime) -> int:
+    tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    return math.ceil((tomorrow - now).total_seconds())
+
+
+def quota(metric: str):
+    """Build a dependency enforcing the quota policy for metric."""
+    if metric not in QUOTA_POLICIES:
+        raise KeyError(f"No quota policy for {metric}")
+
+    def enforce_quota(
+        request: Request,
+        response: Response,
+        db: Session = Depends(get_db),
+        current_user: Optional[UserSnapshot] = Depends(get_optional_current_user),
+    ):
+        tier = user_tier(current_user)
+        policy = QUOTA_POLICIES[metric][tier]
+        subject = f"user:{current_user.id}" if current_user else f"ip:{get_client_ip(request)}"
+
+        # (limit, remaining, reset seconds) for each window, reported via headers
+        windows = []
+        rate = rate_limit_backend.hit(f"quota:{metric}:{subject}", policy.per_minute, 60)
+        windows.append((policy.per_minute, rate.remaining, math.ceil(rate.reset_after)))
+        if not rate.allowed:
+            raise _quota_exceeded(f"Rate limit exceeded for {tier} tier", windows, math.ceil(rate.retry_after))
+
+        counted_day = None
+        if policy.per_day is not None:
+            now = datetime.utcnow()
+            used = increment_daily_usage(db, subject, metric, now.date(), policy.per_day)
+            db.commit()
+            reset = _seconds_until_midnight_utc(now)
+            windows.append((policy.per_day, policy.per_day - used if used is not None else 0, reset))
+            if used is None:
+                raise _quota_exceeded(f"Daily {metric} quota of {policy.per_day} reached for {tier} tier", windows, reset)
+            counted_day = now.date()
+
+        concurrency_key = f"{metric}:{subject}"
+        if policy.concurrency is not None and not concurrency_limiter.acquire(concurrency_key, policy.concurrency):
+            raise _quota_exceeded(f"Too many concurrent {metric} requests", windows, 1)
+
+        response.headers.update(_ratelimit_headers(windows))
+        try:
+            yield
+        except Exception:
+            # Only requests that succeed use up the daily quota: a failed one (say the provider errored) gives its unit back
+            if counted_day is not None:
+                db.rollback()
+                refund_daily_usage(db, subject, metric, counted_day)
+                db.commit()
+            raise
+        finally:
+            if policy.concurrency is not None:
+                concurrency_limiter.release(concurrency_key)
+
+    return enforce_quota
+
+
+def _ratelimit_headers(windows) -> Dict[str, str]:
+    # Report the window closest to running out
+    limit, remaining, reset = min(windows, key=lambda w: (w[1], -w[2]))
+    return {
+        "RateLimit-Limit": str(limit),
+        "RateLimit-Remaining": str(max(0, remaining)),
+        "RateLimit-Reset": str(max(0, reset)),
+    }
+
+
+def _quota_exceeded(detail: str, windows, retry_after: int) -> HTTPException:
+    headers = _ratelimit_headers(windows)
+    headers["Retry-After"] = str(max(1, retry_after))
+    return HTTPException(status_code=429, detail=detail, headers=headers)
@@ -0,0 +1,333 @@
+"""
+Storage backends for app.core.rate_limiter.
+
+- memory: per-process GCRA table (default; limits multiply with uvicorn --workers)
+- shm:    GCRA table in an mmap'd file shared by every worker on the node
+- redis:  sliding-window counters on any server speaking the Redis protocol,
+          shared by every node
+"""
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
+from urllib.parse import urlparse
+import hashlib
+import logging
+import math
+import mmap
+import os
+import socket
+import struct
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitDecision(NamedTuple):
+    allowed: bool
+    remaining: int  # requests still available right now
+    retry_after: float  # seconds until the next request would be allowed (0 if allowed)
+    reset_after: float  # seconds until the full quota is available again
+
+
+class RateLimitBackendError(Exception):
+    pass
+
+
+def gcra(tat: float, now: float, limit: int, window_seconds: float) -> Tuple[float, RateLimitDecision]:
+    """
+    Apply one request to a GCRA state.
+
+    tat is the key's theoretical arrival time (use `now` for unknown keys).
+    Returns the new tat to store (unchanged when denied) and the decision.
+    """
+    interval = window_seconds / limit
+    new_tat = (tat if tat > now else now) + interval
+    allowed = new_tat - now <= window_seconds
+    if not allowed:
+        new_tat = tat
+    backlog = new_tat - now
+    remaining = int((window_seconds - backlog) / interval + 1e-9) if backlog < window_seconds else 0
+    retry_after = 0.0 if allowed else backlog - window_seconds + interval
+    return new_tat, RateLimitDecision(allowed, remaining, retry_after, backlog if backlog > 0 else 0.0)
+
+
+class RateLimitBackend(ABC):
+    """hit() must apply a request to `key` atomically and return the decision."""
+
+    @abstractmethod
+    def hit(self, key: str, limit: int, window_seconds: float, now: Optional[float] = None) -> RateLimitDecision:
+        ...
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+    Per-process GCRA table: one monotonic-clock float per key.
+
+    Keys are kept in LRU order; every hit evicts up to a couple of
+    least-recently-used keys whose tat has passed (they are back to a full
+    quota, so forgetting them changes nothing), and the table is hard capped
+    at max_keys.
+    """
+
+    # Idle keys examined per hit; keeps eviction O(1) amortized
+    SWEEP_PER_CHECK = 2
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self.tats: "OrderedDict[str, float]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def hit(self, key: str, limit: int, window_seconds: float, now: Optional[float] = None) -> RateLimitDecision:
+        if now is None:
+            now = time.monotonic()
+        tats = self.tats
+
+        with self.lock:
+            new_tat, decision = gcra(tats.get(key, now), now, limit, window_seconds)
+            if decision.allowed:
+                tats[key] = new_tat
+                tats.move_to_end(key)
+
+            # Evict idle keys from the LRU end, then enforce the cap
+            for _ in range(self.SWEEP_PER_CHECK):
+                oldest_key = next(iter(tats), None)
+                if oldest_key is None or tats[oldest_key] > now:
+                    break
+                del tats[oldest_key]
+            if len(tats) > self.max_keys:
+                tats.popitem(last=False)
+        return decision
+
+
+class SharedMemoryRateLimitBackend(RateLimitBackend):
+    """
+    GCRA table in an mmap'd file so every worker process on a node shares it.
+
+    The file is a fixed array of 16-byte slots (8-byte key hash, 8-byte tat)
+    with short linear probing; a key whose slot is taken by an active key
+    replaces the probed slot with the oldest tat. Updates are serialized with
+    flock() on the file (plus a thread lock, since flock does not exclude
+    threads of the same process). Times use CLOCK_MONOTONIC, which is
+    system-wide on Linux, so put the file on tmpfs (/dev/shm) where it does
+    not outlive a reboot.
+    """
+
+    SLOT = struct.Struct("<Qd")
+    PROBES = 8
+
+    def __init__(self, path: str, slots: int = 65536):
+        try:
+            import fcntl
+        except ImportError:  # pragma: no cover - Windows
+            raise RateLimitBackendError("The shm rate limit backend requires a POSIX system")
+        self._fcntl = fcntl
+        self.path = path
+        self.slots = slots
+        size = slots * self.SLOT.size
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self.fd).st_size < size:
+            os.ftruncate(self.fd, size)
+        self.map = mmap.mmap(self.fd, size)
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        # Never 0: a zero hash marks an empty slot
+        return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little") | 1
+
+    def hit(self, key: str, limit: int, window_seconds: float, now: Optional[float] = None) -> RateLimitDecision:
+        if now is None:
+            now = time.monotonic()
+        key_hash = self._hash(key)
+        start = key_hash % self.slots
+        slot, size, buf = self.SLOT, self.SLOT.size, self.map
+
+        with self.lock:
+            self._fcntl.flock(self.fd, self._fcntl.LOCK_EX)
+            try:
+                target = None
+                tat = now
+                victim, victim_tat = None, math.inf
+                for probe in range(self.PROBES):
+                    offset = ((start + probe) % self.slots) * size
+                    slot_hash, slot_tat = slot.unpack_from(buf, offset)
+                    if slot_hash == key_hash:
+                        target, tat = offset, slot_tat
+                        break
+                    if slot_hash == 0 or slot_tat <= now:
+                        # Empty, or idle (full quota): free to reuse
+                        if victim_tat > -math.inf:
+                            victim, victim_tat = offset, -math.inf
+                    elif slot_tat < victim_tat:
+                        victim, victim_tat = offset, slot_tat
+                if target is None:
+                    target = victim
+
+                new_tat, decision = gcra(tat, now, limit, window_seconds)
+                if decision.allowed:
+                    slot.pack_into(buf, target, key_hash, new_tat)
+            finally:
+                self._fcntl.flock(self.fd, self._fcntl.LOCK_UN)
+        return decision
+
+    def close(self) -> None:
+        self.map.close()
+        os.close(self.fd)
+
+
+class _RESPConnection:
+    """Tiny client for the Redis serialization protocol (just enough for counters)."""
+
+    def __init__(self, url: str, timeout: float = 0.5):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self.sock: Optional[socket.socket] = None
+        self.reader = None
+
+    def _connect(self) -> None:
+        # Kept only once AUTH and SELECT went through: a half set up socket would answer NOAUTH from then on
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        reader = sock.makefile("rb")
+        try:
+            if self.password:
+                sock.sendall(self._encode(b"AUTH", self.password))
+                self._read_reply(reader)
+            if self.db:
+                sock.sendall(self._encode(b"SELECT", str(self.db)))
+                self._read_reply(reader)
+        except BaseException:
+            reader.close()
+            sock.close()
+            raise
+        self.sock, self.reader = sock, reader
+
+    @staticmethod
+    def _encode(*args) -> bytes:
+        out = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode("utf-8")
+            out.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        return b"".join(out)
+
+    def _read_reply(self, reader=None):
+        reader = reader or self.reader
+        line = reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by server")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            raise RateLimitBackendError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            return [self._read_reply(reader) for _ in range(int(payload))]
+        raise RateLimitBackendError(f"Unexpected reply: {line!r}")
+
+    def pipeline(self, *commands):
+        """Send several commands in one round trip and return their replies."""
+        if self.sock is None:
+            self._connect()
+        try:
+            self.sock.sendall(b"".join(self._encode(*command) for command in commands))
+            return [self._read_reply() for _ in commands]
+        except BaseException:
+            # An error reply or a timeout leaves later replies unread: start over on a new connection
+            self.close()
+            raise
+
+    def close(self) -> None:
+        sock, self.sock = self.sock, None
+        reader, self.reader = self.reader, None
+        if reader is not None:
+            reader.close()
+        if sock is not None:
+            sock.close()
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """
+    Sliding-window counter on a Redis-protocol server.
+
+    Uses only INCR/PEXPIRE/GET/DECR so it works against Redis, KeyDB,
+    Dragonfly or a test stand-in. The estimate weights the previous window by
+    how much of it still overlaps the sliding window. Timestamps are wall
+    clock so several nodes agree on window boundaries.
+
+    If the server is unreachable, requests are allowed (fail_open) or denied.
+    """
+
+    def __init__(self, url: str, prefix: str = "ratelimit", fail_open: bool = True, timeout: float = 0.5):
+        self.connection = _RESPConnection(url, timeout=timeout)
+        self.prefix = prefix
+        self.fail_open = fail_open
+        self.lock = threading.Lock()
+
+    def hit(self, key: str, limit: int, window_seconds: float, now: Optional[float] = None) -> RateLimitDecision:
+        if now is None:
+            now = time.time()
+        window_index = int(now // window_seconds)
+        elapsed = now - window_index * window_seconds
+        current_key = f"{self.prefix}:{key}:{window_index}"
+        previous_key = f"{self.prefix}:{key}:{window_index - 1}"
+
+        try:
+            with self.lock:
+                count, _, previous = self.connection.pipeline(
+                    (b"INCR", current_key),
+                    (b"PEXPIRE", current_key, int(window_seconds * 2000)),
+                    (b"GET", previous_key),
+                )
+                previous = int(previous or 0)
+                weight = 1 - elapsed / window_seconds
+                estimated = previous * weight + count
+                allowed = estimated <= limit
+                if not allowed:
+                    # Denied requests don't consume quota
+                    self.connection.pipeline((b"DECR", current_key))
+        except (OSError, ConnectionError, RateLimitBackendError) as e:
+            logger.warning(f"Rate limit backend unavailable: {str(e)}")
+            return RateLimitDecision(self.fail_open, limit if self.fail_open else 0, 0.0 if self.fail_open else 1.0, 0.0)
+
+        remaining = max(0, int(limit - estimated))
+        if allowed:
+            retry_after = 0.0
+        elif previous and count <= limit:
+            # Wait until enough of the previous window has slid out
+            retry_after = max(0.0, window_seconds * (1 - (limit - count) / previous) - elapsed)
+        else:
+            retry_after = window_seconds - elapsed
+        return RateLimitDecision(allowed, remaining, retry_after, window_seconds - elapsed + (window_seconds if previous else 0.0))
+
+
+def default_shm_path() -> str:
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, "invoyq-ratelimit")
+
+
+def build_rate_limit_backend(kind: str, shm_path: Optional[str] = None, shm_slots: int = 65536,
+                             redis_url: Optional[str] = None, fail_open: bool = True) -> RateLimitBackend:
+    """Create the backend named by RATE_LIMIT_BACKEND."""
+    if kind == "memory":
+        return MemoryRateLimitBackend()
+    if kind == "shm":
+        return SharedMemoryRateLimitBackend(shm_path or default_shm_path(), slots=shm_slots)
+    if kind == "redis":
+        if not redis_url:
+            raise RateLimitBackendError("RATE_LIMIT_REDIS_URL is required for the redis backend")
+        return RedisRateLimitBackend(redis_url, fail_open=fail_open)
+    raise RateLimitBackendError(f"Unknown rate limit backend: {kind}")
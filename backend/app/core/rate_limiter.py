@@ -1,70 +1,85 @@
-from datetime import datetime, timedelta
-from typing import Dict, List
+from typing import Optional
 from fastapi import HTTPException, Request
-import threading
+import math
 
+from app.core.config import settings
+from app.core.rate_limit_backends import (
+    RateLimitBackend,
+    RateLimitDecision,
+    MemoryRateLimitBackend,
+    build_rate_limit_backend,
+)
 
-class InMemoryRateLimiter:
+
+def get_client_ip(request: Request) -> str:
+    """
+    Client address for rate limiting.
+
+    X-Forwarded-For is client-controlled except for the entries appended by
+    our own proxies, so only the TRUSTED_PROXY_HOPS rightmost entries are
+    believed; with no trusted proxies the socket peer address is used.
+    """
+    client_ip = request.client.host if request.client else "unknown"
+    hops = settings.TRUSTED_PROXY_HOPS
+    forwarded_for = request.headers.get("X-Forwarded-For")
+    if hops > 0 and forwarded_for:
+        entries = [entry.strip() for entry in forwarded_for.split(",") if entry.strip()]
+        if entries:
+            client_ip = entries[-min(hops, len(entries))]
+    return client_ip
+
+
+class RateLimiter:
     """
-    Simple in-memory rate limiter using sliding window approach.
-    Not suitable for production with multiple instances, but good for single-instance dev/test.
+    Rate limiter with pluggable state storage (see app.core.rate_limit_backends).
+
+    The default memory backend is per process, so `uvicorn --workers N` gives
+    each worker its own budget; use the shm backend to share limits between
+    workers on a node, or redis to share them between nodes.
     """
-    
-    def __init__(self, max_requests: int = 5, window_minutes: int = 1):
+
+    def __init__(self, max_requests: int = 5, window_minutes: float = 1,
+                 backend: Optional[RateLimitBackend] = None, name: str = "default"):
         self.max_requests = max_requests
-        self.window_duration = timedelta(minutes=window_minutes)
-        self.requests: Dict[str, List[datetime]] = {}
-        self.lock = threading.Lock()
-    
+        self.window_seconds = window_minutes * 60
+        self.backend = backend or MemoryRateLimitBackend()
+        self.name = name
+
     def _get_client_key(self, request: Request) -> str:
         """Generate a unique key for the client based on IP address."""
-        client_ip = request.client.host if request.client else "unknown"
-        forwarded_for = request.headers.get("X-Forwarded-For")
-        if forwarded_for:
-            # Use the first IP in case of multiple proxies
-            client_ip = forwarded_for.split(",")[0].strip()
-        return client_ip
-    
-    def _cleanup_old_requests(self, client_key: str, now: datetime):
-        """Remove requests that are outside the current window."""
-        if client_key in self.requests:
-            cutoff_time = now - self.window_duration
-            self.requests[client_key] = [
-                req_time for req_time in self.requests[client_key]
-                if req_time > cutoff_time
-            ]
-            if not self.requests[client_key]:
-                del self.requests[client_key]
-    
+        return get_client_ip(request)
+
+    def hit(self, key: str, now: Optional[float] = None) -> RateLimitDecision:
+        """Record a request for key and return whether it is allowed."""
+        return self.backend.hit(f"{self.name}:{key}", self.max_requests, self.window_seconds, now)
+
     def is_allowed(self, request: Request) -> bool:
         """Check if the request should be allowed based on rate limiting."""
-        client_key = self._get_client_key(request)
-        now = datetime.utcnow()
-        
-        with self.lock:
-            # Clean up old requests
-            self._cleanup_old_requests(client_key, now)
-            
-            # Initialize client if not exists
-            if client_key not in self.requests:
-                self.requests[client_key] = []
-            
-            # Check if under limit
-            if len(self.requests[client_key]) >= self.max_requests:
-                return False
-            
-            # Add current request
-            self.requests[client_key].append(now)
-            return True
-    
+        return self.hit(self._get_client_key(request)).allowed
+
     def check_rate_limit(self, request: Request):
         """Check rate limit and raise HTTPException if exceeded."""
-        if not self.is_allowed(request):
+        decision = self.hit(self._get_client_key(request))
+        if not decision.allowed:
             raise HTTPException(
                 status_code=429,
-                detail=f"Rate limit exceeded. Maximum {self.max_requests} requests per {self.window_duration.total_seconds() / 60} minutes."
+                detail=f"Rate limit exceeded. Maximum {self.max_requests} requests per {self.window_seconds / 60} minutes.",
+                headers={"Retry-After": str(math.ceil(decision.retry_after))},
             )
 
 
-# Global rate limiter instance for extraction endpoint
-extraction_rate_limiter = InMemoryRateLimiter(max_requests=10, window_minutes=1)
\ No newline at end of file
+class InMemoryRateLimiter(RateLimiter):
+    """Rate limiter with its own per-process table (useful for tests and dev)."""
+
+    def __init__(self, max_requests: int = 5, window_minutes: float = 1, max_keys: int = 100_000):
+        super().__init__(max_requests, window_minutes, backend=MemoryRateLimitBackend(max_keys=max_keys))
+
+
+# Shared backend for all limiters in this process, chosen by RATE_LIMIT_BACKEND
+rate_limit_backend = build_rate_limit_backend(
+    settings.RATE_LIMIT_BACKEND,
+    shm_path=settings.RATE_LIMIT_SHM_PATH,
+    shm_slots=settings.RATE_LIMIT_SHM_SLOTS,
+    redis_url=settings.RATE_LIMIT_REDIS_URL,
+    fail_open=settings.RATE_LIMIT_FAIL_OPEN,
+)
@@ -1,7 +1,18 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
 import bcrypt
+from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
 
 # Cost factor for bcrypt. 12 is a good default balance of security/perf.
-_BCRYPT_ROUNDS = 12
+_BCRYPT_ROUNDS = settings.BCRYPT_ROUNDS
 
 def _truncate_to_72_bytes(text: str) -> bytes:
     """Return the UTF-8 bytes of text truncated to bcrypt's 72-byte limit."""
@@ -19,8 +30,96 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return False
 
 
-def get_password_hash(password: str) -> str:
+def get_password_hash(password: str, rounds: Optional[int] = None) -> str:
     pw = _truncate_to_72_bytes(password)
-    salt = bcrypt.gensalt(rounds=_BCRYPT_ROUNDS)
+    salt = bcrypt.gensalt(rounds=rounds or _BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(pw, salt)
     return hashed.decode("utf-8")
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """Return True if the hash was produced with a cost other than the configured one."""
+    # bcrypt hashes look like $2b$12$<salt+digest>
+    try:
+        return int(hashed_password.split("$")[2]) != _BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a dedicated process pool so a burst of logins cannot starve
+    the AnyIO threadpool that serves every other sync endpoint.
+
+    At most `workers + max_pending` jobs are admitted at once; anything beyond
+    that is shed with a 503 instead of queueing unboundedly.
+    """
+
+    def __init__(self, workers: int = 2, max_pending: int = 32):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._in_flight = 0
+        self.lock = threading.Lock()
+
+    @property
+    def capacity(self) -> int:
+        return max(self.workers, 1) + self.max_pending
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self.lock:
+            if self._executor is None:
+                # spawn: forking a process that already runs threads is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def _reset_executor(self) -> None:
+        with self.lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run(self, fn, *args):
+        with self.lock:
+            if self._in_flight >= self.capacity:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Authentication service is busy. Please retry shortly.",
+                    headers={"Retry-After": "1"},
+                )
+            self._in_flight += 1
+        try:
+            if self.workers <= 0:
+                return await run_in_threadpool(fn, *args)
+            loop = asyncio.get_running_loop()
+            try:
+                return await loop.run_in_executor(self._get_executor(), fn, *args)
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM killed); start a fresh pool on the next call
+                self._reset_executor()
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Authentication service is busy. Please retry shortly.",
+                    headers={"Retry-After": "1"},
+                )
+        finally:
+            with self.lock:
+                self._in_flight -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password, _BCRYPT_ROUNDS)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        self._reset_executor()
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
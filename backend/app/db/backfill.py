@@ -0,0 +1,218 @@
+"""
+Batched, resumable backfills.
+
+A backfill updates one table in primary-key order, `batch_size` keys per
+transaction, so no statement locks more than one batch of rows or writes one
+huge chunk of WAL. The highest key processed is committed to
+backfill_checkpoints in the same transaction as each batch, so an interrupted
+run resumes where it stopped. Every batch runs under a lock timeout: a batch
+that can't get its locks is retried after a pause instead of queueing behind
+(and blocking) application traffic.
+
+Migrations declare backfills next to their schema change:
+
+    BACKFILLS = [Backfill("invoice_currency", "invoices", "currency = 'NGN'", "currency IS NULL")]
+
+app.db.migrate runs them after the migration's DDL commits and records the
+version only once they complete. They can also be inspected or run directly:
+
+    python -m app.db.backfill --status
+    python -m app.db.backfill invoice_currency --batch-size 5000 --sleep 0.1
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Optional
+import argparse
+import logging
+import time
+
+from sqlalchemy import select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import OperationalError
+
+from app.core.config import settings
+from app.models.backfill_checkpoint import BackfillCheckpoint
+
+logger = logging.getLogger(__name__)
+
+# Seconds between progress log lines
+PROGRESS_LOG_INTERVAL = 5.0
+
+
+@dataclass(frozen=True)
+class Backfill:
+    name: str  # checkpoint key, unique across migrations
+    table: str
+    set_sql: str  # SET clause, e.g. "currency = 'NGN'"
+    where_sql: str = "1 = 1"  # rows that still need the update
+    key: str = "id"  # integer primary key, walked in ascending order
+
+
+@dataclass
+class BackfillProgress:
+    name: str
+    last_key: int
+    max_key: int
+    rows_updated: int  # total, including earlier interrupted runs
+    batches: int  # this run
+    elapsed_seconds: float  # this run
+    run_rows_updated: int = 0
+    completed: bool = False
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.run_rows_updated / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    @property
+    def percent(self) -> float:
+        return 100.0 if self.completed or not self.max_key else min(100.0, 100.0 * self.last_key / self.max_key)
+
+
+def _set_lock_timeout(conn: Connection, lock_timeout_ms: int) -> None:
+    if conn.dialect.name == "postgresql":
+        # SET doesn't take bind parameters; the value is an int
+        conn.execute(text(f"SET LOCAL lock_timeout = '{int(lock_timeout_ms)}ms'"))
+    elif conn.dialect.name == "sqlite":
+        conn.execute(text(f"PRAGMA busy_timeout = {int(lock_timeout_ms)}"))
+
+
+def _is_lock_timeout(exc: OperationalError) -> bool:
+    code = getattr(exc.orig, "pgcode", None) or getattr(exc.orig, "sqlstate", None)
+    return code == "55P03" or "database is locked" in str(exc.orig)
+
+
+def run_backfill(
+    conn: Connection,
+    backfill: Backfill,
+    batch_size: Optional[int] = None,
+    sleep_seconds: Optional[float] = None,
+    lock_timeout_ms: Optional[int] = None,
+    max_retries: int = 5,
+    progress: Optional[Callable[[BackfillProgress], None]] = None,
+) -> BackfillProgress:
+    """Run (or resume) a backfill to completion; `progress` is called after every batch."""
+    batch_size = batch_size or settings.BACKFILL_BATCH_SIZE
+    sleep_seconds = settings.BACKFILL_SLEEP_SECONDS if sleep_seconds is None else sleep_seconds
+    lock_timeout_ms = lock_timeout_ms or settings.BACKFILL_LOCK_TIMEOUT_MS
+    checkpoints = BackfillCheckpoint.__table__
+    quote = conn.dialect.identifier_preparer.quote
+    table, key = quote(backfill.table), quote(backfill.key)
+
+    with conn.begin():
+        checkpoints.create(bind=conn, checkfirst=True)
+        row = conn.execute(select(checkpoints).where(checkpoints.c.name == backfill.name)).first()
+        if row is None:
+            conn.execute(checkpoints.insert().values(name=backfill.name, last_key=0, rows_updated=0))
+        max_key = conn.execute(text(f"SELECT max({key}) FROM {table}")).scalar() or 0
+
+    state = BackfillProgress(
+        name=backfill.name,
+        last_key=row.last_key if row else 0,
+        max_key=max_key,
+        rows_updated=row.rows_updated if row else 0,
+        batches=0,
+        elapsed_seconds=0.0,
+        completed=bool(row and row.completed_at),
+    )
+    if state.completed:
+        return state
+
+    next_batch_end = text(
+        f"SELECT max({key}) FROM (SELECT {key} FROM {table} WHERE {key} > :last ORDER BY {key} LIMIT :n) AS batch"
+    )
+    update_batch = text(
+        f"UPDATE {table} SET {backfill.set_sql} WHERE {key} > :last AND {key} <= :upper AND ({backfill.where_sql})"
+    )
+    start = last_log = time.perf_counter()
+    while not state.completed:
+        for attempt in range(max_retries + 1):
+            try:
+                with conn.begin():
+                    _set_lock_timeout(conn, lock_timeout_ms)
+                    upper = conn.execute(next_batch_end, {"last": state.last_key, "n": batch_size}).scalar()
+                    checkpoint = checkpoints.update().where(checkpoints.c.name == backfill.name)
+                    if upper is None:
+                        conn.execute(checkpoint.values(updated_at=datetime.utcnow(), completed_at=datetime.utcnow()))
+                        updated = 0
+                    else:
+                        updated = conn.execute(update_batch, {"last": state.last_key, "upper": upper}).rowcount
+                        conn.execute(checkpoint.values(
+                            last_key=upper,
+                            rows_updated=checkpoints.c.rows_updated + updated,
+                            updated_at=datetime.utcnow(),
+                        ))
+                break
+            except OperationalError as e:
+                if not _is_lock_timeout(e) or attempt == max_retries:
+                    raise
+                logger.warning(f"Backfill {backfill.name}: lock timeout after key {state.last_key}, retrying")
+                time.sleep(max(sleep_seconds, 0.1) * 2 ** attempt)
+
+        if upper is None:
+            state.completed = True
+        else:
+            state.last_key = upper
+            state.max_key = max(state.max_key, upper)
+            state.rows_updated += updated
+            state.run_rows_updated += updated
+            state.batches += 1
+        state.elapsed_seconds = time.perf_counter() - start
+        if progress:
+            progress(state)
+        if state.completed or time.perf_counter() - last_log >= PROGRESS_LOG_INTERVAL:
+            last_log = time.perf_counter()
+            logger.info(
+                f"Backfill {backfill.name}: key {state.last_key}/{state.max_key} ({state.percent:.1f}%), "
+                f"{state.rows_updated} rows updated, {state.rows_per_second:.0f} rows/s"
+            )
+        if not state.completed and sleep_seconds:
+            time.sleep(sleep_seconds)
+    return state
+
+
+def registered_backfills() -> dict[str, Backfill]:
+    from app.db.migrations import MIGRATIONS
+
+    return {b.name: b for migration in MIGRATIONS for b in getattr(migration, "BACKFILLS", [])}
+
+
+def main() -> None:
+    from app.db.session import engine
+
+    backfills = registered_backfills()
+    parser = argparse.ArgumentParser(description="Run or resume a batched backfill.")
+    parser.add_argument("name", nargs="?", choices=sorted(backfills), help="backfill to run")
+    parser.add_argument("--status", action="store_true", help="show checkpoints and exit")
+    parser.add_argument("--restart", action="store_true", help="discard the checkpoint and start from the first key")
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--sleep", type=float, default=None, help="seconds to pause between batches")
+    parser.add_argument("--lock-timeout-ms", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    checkpoints = BackfillCheckpoint.__table__
+    with engine.connect() as conn:
+        if args.status or not args.name:
+            checkpoints.create(bind=conn, checkfirst=True)
+            rows = {row.name: row for row in conn.execute(select(checkpoints))}
+            for name in sorted(set(backfills) | set(rows)):
+                row = rows.get(name)
+                if row is None:
+                    print(f"  [ ] {name}: not started")
+                else:
+                    state = "✓" if row.completed_at else "…"
+                    print(f"  [{state}] {name}: last key {row.last_key}, {row.rows_updated} rows updated")
+            return
+        if args.restart:
+            with conn.begin():
+                checkpoints.create(bind=conn, checkfirst=True)
+                conn.execute(checkpoints.delete().where(checkpoints.c.name == args.name))
+        result = run_backfill(
+            conn, backfills[args.name],
+            batch_size=args.batch_size, sleep_seconds=args.sleep, lock_timeout_ms=args.lock_timeout_ms,
+        )
+    print(f"✓ {result.name}: {result.rows_updated} rows updated ({result.rows_per_second:.0f} rows/s this run)")
+
+
+if __name__ == "__main__":
+    main()
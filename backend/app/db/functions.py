@@ -0,0 +1,59 @@
+"""
+SQL functions whose spelling differs between SQLite and Postgres.
+
+Compiled per dialect, so queries (reports, aggregate rebuilds, search) are written once:
+
+    select(year_month(Invoice.issued_date), func.sum(Invoice.total)).group_by(year_month(Invoice.issued_date))
+"""
+from sqlalchemy import String, Text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+
+class year_month(FunctionElement):
+    """`'YYYY-MM'` of a date or timestamp expression."""
+    type = String()
+    name = "year_month"
+    inherit_cache = True
+
+
+@compiles(year_month)
+def _year_month(element, compiler, **kw):
+    return "to_char(%s, 'YYYY-MM')" % compiler.process(element.clauses, **kw)
+
+
+@compiles(year_month, "sqlite")
+def _year_month_sqlite(element, compiler, **kw):
+    return "strftime('%%Y-%%m', %s)" % compiler.process(element.clauses, **kw)
+
+
+class search_vector(FunctionElement):
+    """
+    Postgres `to_tsvector('simple', ...)`, spelled the same way in the GIN
+    index and in queries so the planner can use the index ('simple': names
+    and invoice numbers are not stemmed).
+    """
+    name = "search_vector"
+    inherit_cache = True
+
+
+@compiles(search_vector)
+def _search_vector(element, compiler, **kw):
+    return "to_tsvector('simple', %s)" % compiler.process(element.clauses, **kw)
+
+
+class text_agg(FunctionElement):
+    """Space-separated concatenation of a text expression over a group (NULLs skipped)."""
+    type = Text()
+    name = "text_agg"
+    inherit_cache = True
+
+
+@compiles(text_agg)
+def _text_agg(element, compiler, **kw):
+    return "string_agg(%s, ' ')" % compiler.process(element.clauses, **kw)
+
+
+@compiles(text_agg, "sqlite")
+def _text_agg_sqlite(element, compiler, **kw):
+    return "group_concat(%s, ' ')" % compiler.process(element.clauses, **kw)
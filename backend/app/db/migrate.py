@@ -0,0 +1,162 @@
+"""
+Schema versioning.
+
+The schema_version table records every applied migration from
+app.db.migrations. App startup only runs `check_schema` (a single
+`SELECT max(version)`); migrations are applied explicitly:
+
+    python -m app.db.migrate             # apply pending migrations
+    python -m app.db.migrate --status    # show current and latest version
+
+With SCHEMA_AUTO_MIGRATE=true (the default for SQLite) startup applies
+pending migrations itself instead of refusing to start.
+
+A migration may also list BACKFILLS (app.db.backfill). They run in batches
+after its DDL commits, and the version is recorded once they finish, so an
+interrupted data migration resumes from its checkpoint on the next run.
+"""
+from typing import Optional
+import argparse
+import importlib
+import logging
+import pkgutil
+
+from sqlalchemy import func, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+from app.db.backfill import run_backfill
+from app.db.migrations import LATEST_VERSION, MIGRATIONS
+from app.db.slow_queries import statement_timeout
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary key for pg_advisory_lock, so concurrent deploys migrate one at a time
+MIGRATION_LOCK_KEY = 7_311_042
+
+
+class SchemaOutOfDateError(RuntimeError):
+    pass
+
+
+def load_models() -> None:
+    """Import every module in app.models so Base.metadata is complete."""
+    import app.models
+
+    for module in pkgutil.iter_modules(app.models.__path__):
+        importlib.import_module(f"app.models.{module.name}")
+
+
+def current_version(conn: Connection) -> Optional[int]:
+    """Highest applied version, 0 for an unversioned database, None if the table is missing."""
+    from app.models.schema_version import SchemaVersion
+
+    try:
+        # Core table, so the check doesn't need the ORM mappers configured
+        return conn.execute(select(func.coalesce(func.max(SchemaVersion.__table__.c.version), 0))).scalar_one()
+    except (OperationalError, ProgrammingError):
+        conn.rollback()
+        return None
+
+
+def migrate(engine: Engine, target: Optional[int] = None, backfill_options: Optional[dict] = None) -> list[int]:
+    """
+    Apply pending migrations up to target (default: latest). Returns the
+    versions applied. backfill_options are passed on to run_backfill.
+    """
+    from app.models.schema_version import SchemaVersion
+
+    load_models()
+    target = LATEST_VERSION if target is None else target
+    applied = []
+    # DDL and index builds may legitimately outlast DB_STATEMENT_TIMEOUT_MS
+    with statement_timeout(0), engine.connect() as conn:
+        locked = engine.dialect.name == "postgresql"
+        if locked:
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            conn.commit()
+        try:
+            SchemaVersion.__table__.create(bind=conn, checkfirst=True)
+            conn.commit()
+            # Re-read under the lock: another process may have just migrated
+            version = current_version(conn) or 0
+            conn.commit()
+            for migration in MIGRATIONS:
+                if migration.VERSION <= version or migration.VERSION > target:
+                    continue
+                logger.info(f"Applying schema migration {migration.VERSION}: {migration.DESCRIPTION}")
+                record_version = SchemaVersion.__table__.insert().values(
+                    version=migration.VERSION, description=migration.DESCRIPTION,
+                )
+                backfills = getattr(migration, "BACKFILLS", [])
+                with conn.begin():
+                    migration.upgrade(conn)
+                    if not backfills:
+                        conn.execute(record_version)
+                if backfills:
+                    for backfill in backfills:
+                        run_backfill(conn, backfill, **(backfill_options or {}))
+                    with conn.begin():
+                        conn.execute(record_version)
+                applied.append(migration.VERSION)
+        finally:
+            if locked:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+                conn.commit()
+    return applied
+
+
+def check_schema(engine: Engine, auto_migrate: bool = False) -> int:
+    """
+    Startup check: one version query. Applies pending migrations when
+    auto_migrate is set, otherwise raises SchemaOutOfDateError.
+    """
+    with engine.connect() as conn:
+        version = current_version(conn)
+    if version is not None and version >= LATEST_VERSION:
+        if version > LATEST_VERSION:
+            logger.warning(f"Database schema version {version} is newer than this code ({LATEST_VERSION})")
+        return version
+    if not auto_migrate:
+        raise SchemaOutOfDateError(
+            f"Database schema is at version {version or 0}, this code needs {LATEST_VERSION}. "
+            "Run `python -m app.db.migrate`."
+        )
+    migrate(engine)
+    return LATEST_VERSION
+
+
+def main() -> None:
+    from app.db.session import engine
+
+    parser = argparse.ArgumentParser(description="Apply versioned schema migrations.")
+    parser.add_argument("--status", action="store_true", help="show the current and latest version and exit")
+    parser.add_argument("--to", type=int, default=None, help="stop after this version")
+    parser.add_argument("--batch-size", type=int, default=None, help="backfill rows per transaction")
+    parser.add_argument("--sleep", type=float, default=None, help="seconds to pause between backfill batches")
+    parser.add_argument("--lock-timeout-ms", type=int, default=None, help="lock timeout for each backfill batch")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    load_models()
+    with engine.connect() as conn:
+        version = current_version(conn) or 0
+    if args.status:
+        print(f"Schema version {version} (latest {LATEST_VERSION})")
+        for migration in MIGRATIONS:
+            marker = "✓" if migration.VERSION <= version else " "
+            print(f"  [{marker}] {migration.VERSION:04d} {migration.DESCRIPTION}")
+        return
+
+    backfill_options = {
+        "batch_size": args.batch_size, "sleep_seconds": args.sleep, "lock_timeout_ms": args.lock_timeout_ms,
+    }
+    applied = migrate(engine, target=args.to, backfill_options=backfill_options)
+    if applied:
+        print(f"✓ Applied migrations {', '.join(str(v) for v in applied)}; schema is at version {applied[-1]}")
+    else:
+        print(f"✓ Schema is up to date (version {version})")
+
+
+if __name__ == "__main__":
+    main()
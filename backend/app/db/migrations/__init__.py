@@ -0,0 +1,41 @@
+"""
+Versioned schema migrations, applied in order by app.db.migrate.
+
+Each module defines VERSION, DESCRIPTION and upgrade(conn), which runs inside
+the migration's transaction. Version 1 creates every table from the current
+models, so on a fresh database later migrations find their change already in
+place: write them to be idempotent (check before altering). Data changes
+on large tables belong in BACKFILLS (app.db.backfill) rather than one
+unbounded UPDATE inside upgrade().
+"""
+from app.db.migrations import (
+    v0001_baseline,
+    v0002_invoice_currency,
+    v0003_verification_tokens,
+    v0004_composite_indexes,
+    v0005_keyset_indexes,
+    v0006_invoice_sequences,
+    v0007_invoice_version,
+    v0008_updated_at,
+    v0009_invoice_stats,
+    v0010_invoice_monthly_stats,
+    v0011_search_documents,
+    v0012_import_jobs,
+)
+
+MIGRATIONS = [
+    v0001_baseline,
+    v0002_invoice_currency,
+    v0003_verification_tokens,
+    v0004_composite_indexes,
+    v0005_keyset_indexes,
+    v0006_invoice_sequences,
+    v0007_invoice_version,
+    v0008_updated_at,
+    v0009_invoice_stats,
+    v0010_invoice_monthly_stats,
+    v0011_search_documents,
+    v0012_import_jobs,
+]
+
+LATEST_VERSION = MIGRATIONS[-1].VERSION
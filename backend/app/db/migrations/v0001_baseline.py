@@ -0,0 +1,11 @@
+from sqlalchemy.engine import Connection
+
+from app.db.session import Base
+
+VERSION = 1
+DESCRIPTION = "Create missing tables"
+
+
+def upgrade(conn: Connection) -> None:
+    # app.db.migrate imports every model before running migrations
+    Base.metadata.create_all(bind=conn, checkfirst=True)
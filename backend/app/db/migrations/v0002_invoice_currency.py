@@ -0,0 +1,19 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+from app.db.backfill import Backfill
+
+VERSION = 2
+DESCRIPTION = "Add invoices.currency (default NGN)"
+
+# Rows created before the column existed; updated in batches after the ALTER commits
+BACKFILLS = [
+    Backfill("invoice_currency", "invoices", "currency = 'NGN'", "currency IS NULL OR currency = ''"),
+]
+
+
+def upgrade(conn: Connection) -> None:
+    columns = {c["name"] for c in inspect(conn).get_columns("invoices")}
+    if "currency" not in columns:
+        # A constant default is a catalog-only change on Postgres 11+, no table rewrite
+        conn.execute(text("ALTER TABLE invoices ADD COLUMN currency VARCHAR(3) NOT NULL DEFAULT 'NGN'"))
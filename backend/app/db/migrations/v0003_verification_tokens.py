@@ -0,0 +1,33 @@
+from sqlalchemy import DateTime, Integer, String, inspect, text
+from sqlalchemy.engine import Connection
+
+from app.models.verification_token import EmailVerificationToken
+from app.services.verification_tokens import hash_token
+
+VERSION = 3
+DESCRIPTION = "Move pending verification tokens to email_verification_tokens (hashed)"
+
+
+def upgrade(conn: Connection) -> None:
+    columns = {c["name"] for c in inspect(conn).get_columns("users")}
+    if "verification_token" not in columns:
+        return
+
+    rows = conn.execute(text("""
+        SELECT id, verification_token, verification_token_expires
+        FROM users
+        WHERE verification_token IS NOT NULL
+    """).columns(id=Integer, verification_token=String, verification_token_expires=DateTime)).fetchall()
+    tokens = [
+        {"user_id": user_id, "token_hash": hash_token(token), "expires_at": expires}
+        for user_id, token, expires in rows
+        if expires is not None
+    ]
+    if tokens:
+        conn.execute(EmailVerificationToken.__table__.insert(), tokens)
+    # Stop carrying raw tokens in the users table
+    conn.execute(text("""
+        UPDATE users
+        SET verification_token = NULL, verification_token_expires = NULL
+        WHERE verification_token IS NOT NULL
+    """))
@@ -0,0 +1,28 @@
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateIndex
+
+from app.models.client import Client
+from app.models.extraction import Extraction
+from app.models.invoice import Invoice
+from app.models.payment import Payment
+
+VERSION = 4
+DESCRIPTION = "Composite indexes for the hot query shapes"
+
+# Covered by a composite index with the same leading column (or by uq_user_invoice_number)
+REPLACED_INDEXES = [
+    "ix_invoices_user_id",
+    "ix_invoices_number",
+    "ix_clients_user_id",
+    "ix_payments_user_id",
+    "ix_extractions_user_id",
+]
+
+
+def upgrade(conn: Connection) -> None:
+    for model in (Invoice, Client, Payment, Extraction):
+        for index in model.__table__.indexes:
+            conn.execute(CreateIndex(index, if_not_exists=True))
+    for name in REPLACED_INDEXES:
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
@@ -0,0 +1,24 @@
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateIndex
+
+from app.models.client import Client
+from app.models.invoice import Invoice
+from app.models.payment import Payment
+
+VERSION = 5
+DESCRIPTION = "Indexes ending in id for keyset pagination sort orders"
+
+# Same leading columns without the id tiebreaker
+REPLACED_INDEXES = [
+    "ix_invoices_user_due_date",
+    "ix_payments_user_created_at",
+]
+
+
+def upgrade(conn: Connection) -> None:
+    for model in (Invoice, Client, Payment):
+        for index in model.__table__.indexes:
+            conn.execute(CreateIndex(index, if_not_exists=True))
+    for name in REPLACED_INDEXES:
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
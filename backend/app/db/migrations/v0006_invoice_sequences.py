@@ -0,0 +1,13 @@
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.models.invoice_sequence import InvoiceSequence
+
+VERSION = 6
+DESCRIPTION = "invoice_sequences table for atomic invoice numbering"
+
+
+def upgrade(conn: Connection) -> None:
+    InvoiceSequence.__table__.create(bind=conn, checkfirst=True)
+    # Only served the COUNT(*) the old numbering ran on every create
+    conn.execute(text("DROP INDEX IF EXISTS ix_invoices_user_issued_date"))
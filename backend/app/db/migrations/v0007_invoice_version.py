@@ -0,0 +1,12 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+VERSION = 7
+DESCRIPTION = "Add invoices.version for optimistic concurrency (If-Match / ETag)"
+
+
+def upgrade(conn: Connection) -> None:
+    columns = {c["name"] for c in inspect(conn).get_columns("invoices")}
+    if "version" not in columns:
+        # A constant default is a catalog-only change on Postgres 11+, no table rewrite
+        conn.execute(text("ALTER TABLE invoices ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
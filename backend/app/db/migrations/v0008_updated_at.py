@@ -0,0 +1,22 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+from app.db.backfill import Backfill
+
+VERSION = 8
+DESCRIPTION = "Add clients.updated_at and users.updated_at (conditional GET ETags)"
+
+# Rows created before the columns existed; updated in batches after the ALTERs commit
+BACKFILLS = [
+    Backfill("client_updated_at", "clients", "updated_at = CURRENT_TIMESTAMP", "updated_at IS NULL"),
+    Backfill("user_updated_at", "users", "updated_at = CURRENT_TIMESTAMP", "updated_at IS NULL"),
+]
+
+
+def upgrade(conn: Connection) -> None:
+    for table in ("clients", "users"):
+        columns = {c["name"] for c in inspect(conn).get_columns(table)}
+        if "updated_at" not in columns:
+            # Nullable without a default: catalog-only on Postgres, and SQLite can't add a
+            # column whose default isn't constant
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN updated_at TIMESTAMP"))
@@ -0,0 +1,13 @@
+from sqlalchemy.engine import Connection
+
+from app.models.invoice_stats import InvoiceStats
+from app.services.invoice_stats import rebuild_invoice_stats
+
+VERSION = 9
+DESCRIPTION = "invoice_stats table of per-user, per-currency dashboard aggregates"
+
+
+def upgrade(conn: Connection) -> None:
+    InvoiceStats.__table__.create(bind=conn, checkfirst=True)
+    # One INSERT ... SELECT ... GROUP BY; on a fresh database there is nothing to count
+    rebuild_invoice_stats(conn)
@@ -0,0 +1,12 @@
+from sqlalchemy.engine import Connection
+
+from app.models.invoice_stats import InvoiceMonthlyStats
+from app.services.invoice_stats import rebuild_monthly_stats
+
+VERSION = 10
+DESCRIPTION = "invoice_monthly_stats table of per-user, per-month revenue rollups"
+
+
+def upgrade(conn: Connection) -> None:
+    InvoiceMonthlyStats.__table__.create(bind=conn, checkfirst=True)
+    rebuild_monthly_stats(conn)
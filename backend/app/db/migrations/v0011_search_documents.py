@@ -0,0 +1,13 @@
+from sqlalchemy.engine import Connection
+
+from app.models.search_document import SearchDocument
+from app.services.search import rebuild_search_index
+
+VERSION = 11
+DESCRIPTION = "search_documents table with its full-text index (FTS5 on SQLite, GIN tsvector on Postgres)"
+
+
+def upgrade(conn: Connection) -> None:
+    # Creating the table also creates its dialect's full-text index (see app.models.search_document)
+    SearchDocument.__table__.create(bind=conn, checkfirst=True)
+    rebuild_search_index(conn)
@@ -0,0 +1,10 @@
+from sqlalchemy.engine import Connection
+
+from app.models.import_job import ImportJob
+
+VERSION = 12
+DESCRIPTION = "import_jobs table: progress checkpoints of resumable CSV imports"
+
+
+def upgrade(conn: Connection) -> None:
+    ImportJob.__table__.create(bind=conn, checkfirst=True)
@@ -0,0 +1,145 @@
+"""
+Per-request SQL statement counts and timings, and N+1 detection.
+
+QueryStatsMiddleware gives every HTTP request a RequestQueryStats object (in a
+ContextVar, so it follows the request into the threadpool and SQLAlchemy's
+async greenlets). Engine-level cursor events count and time each statement
+into it, and the response carries
+
+    Server-Timing: db;dur=3.2;desc="4 queries"
+
+Requests issuing more than QUERY_BUDGET_WARN_STATEMENTS statements are logged
+as warnings with `db_statements` / `db_time_ms` fields; every request is
+logged at DEBUG.
+
+For tests, `capture_queries()` records the statements issued inside a block
+(tests/conftest.py builds the `max_queries` fixture on it), and
+`enable_raiseload()` makes any implicit lazy load raise instead of quietly
+issuing one query per row (SQLALCHEMY_RAISELOAD=true enables it at import).
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+import logging
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import ORMExecuteState, Session, raiseload
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RequestQueryStats:
+    route: Optional[str] = None  # "GET /v1/invoices"
+    statements: int = 0
+    seconds: float = 0.0
+
+    def server_timing(self) -> str:
+        noun = "query" if self.statements == 1 else "queries"
+        return f'db;dur={self.seconds * 1000:.1f};desc="{self.statements} {noun}"'
+
+
+current_query_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("current_query_stats", default=None)
+
+
+@dataclass
+class CapturedQueries:
+    statements: list[str] = field(default_factory=list)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+# Active capture_queries() blocks; they see statements from every thread
+_captures: list[CapturedQueries] = []
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_statement_timer(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info["query_started_at"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_statement(conn, cursor, statement, parameters, context, executemany) -> None:
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.seconds += time.perf_counter() - conn.info.pop("query_started_at", time.perf_counter())
+    for capture in _captures:
+        capture.statements.append(statement)
+
+
+@contextmanager
+def capture_queries() -> Iterator[CapturedQueries]:
+    """Record every statement executed (on any engine, in any thread) inside the block."""
+    capture = CapturedQueries()
+    _captures.append(capture)
+    try:
+        yield capture
+    finally:
+        _captures.remove(capture)
+
+
+class QueryStatsMiddleware:
+    """Pure ASGI middleware, so the header is added without buffering the response."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestQueryStats(route=f"{scope['method']} {scope['path']}")
+        token = current_query_stats.set(stats)
+        status_code = None
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = [*message["headers"], (b"server-timing", stats.server_timing().encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_query_stats.reset(token)
+            fields = {"db_statements": stats.statements, "db_time_ms": round(stats.seconds * 1000, 1)}
+            line = (
+                f"{stats.route} {status_code}: "
+                f"db_statements={fields['db_statements']} db_time_ms={fields['db_time_ms']}"
+            )
+            budget = settings.QUERY_BUDGET_WARN_STATEMENTS
+            if budget and stats.statements > budget:
+                logger.warning(f"Query budget exceeded ({budget}) {line}", extra=fields)
+            else:
+                logger.debug(line, extra=fields)
+
+
+def _raiseload_implicit_loads(state: ORMExecuteState) -> None:
+    # Explicit loader options on the statement still win over the wildcard
+    if state.is_select and not state.is_column_load and not state.is_relationship_load:
+        state.statement = state.statement.options(raiseload("*"))
+
+
+def enable_raiseload() -> None:
+    """Make every implicit relationship lazy load raise (all Sessions, including AsyncSession's)."""
+    if not event.contains(Session, "do_orm_execute", _raiseload_implicit_loads):
+        event.listen(Session, "do_orm_execute", _raiseload_implicit_loads)
+
+
+def disable_raiseload() -> None:
+    if event.contains(Session, "do_orm_execute", _raiseload_implicit_loads):
+        event.remove(Session, "do_orm_execute", _raiseload_implicit_loads)
+
+
+if settings.SQLALCHEMY_RAISELOAD:
+    enable_raiseload()
@@ -0,0 +1,142 @@
+"""
+Read replica routing (DATABASE_READ_URL).
+
+Read-only endpoints take their session from app.dependencies.db, which asks
+`replica_router` whether the replica may serve the current user:
+
+- the replica must be configured and healthy: a background monitor measures
+  its replication lag every DATABASE_READ_HEALTH_INTERVAL_SECONDS and marks it
+  unhealthy when the lag exceeds DATABASE_READ_MAX_LAG_SECONDS or the check
+  fails (a connection error during a replica read does the same);
+- the user must not have written recently: every commit made while serving
+  an authenticated request pins that user to the primary for
+  DATABASE_READ_PIN_SECONDS, so they always read their own writes.
+
+Pins are kept per process; with several workers a user's next read may land
+on a worker that did not see the write, so keep the pin window comfortably
+above the typical replication lag.
+"""
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Optional
+import asyncio
+import logging
+import threading
+import time
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.db.session import read_engine
+
+logger = logging.getLogger(__name__)
+
+# Id of the user the current request is authenticated as (set by get_current_user)
+request_user_id: ContextVar[Optional[int]] = ContextVar("request_user_id", default=None)
+
+
+class ReplicaRouter:
+    def __init__(self, enabled: bool, pin_seconds: float = 5, max_lag_seconds: float = 5, max_pins: int = 100_000):
+        self.enabled = enabled
+        self.pin_seconds = pin_seconds
+        self.max_lag_seconds = max_lag_seconds
+        self.max_pins = max_pins
+        self.pins: "OrderedDict[int, float]" = OrderedDict()  # user id -> pinned until (monotonic)
+        self.lock = threading.Lock()
+        self.healthy = True
+        self.lag_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.replica_reads = 0
+        self.primary_reads = 0
+
+    def pin(self, user_id: int, now: Optional[float] = None) -> None:
+        if now is None:
+            now = time.monotonic()
+        with self.lock:
+            self.pins[user_id] = now + self.pin_seconds
+            self.pins.move_to_end(user_id)
+            # Pins are kept in expiry order, so expired ones sit at the front
+            while self.pins and (len(self.pins) > self.max_pins or next(iter(self.pins.values())) <= now):
+                self.pins.popitem(last=False)
+
+    def is_pinned(self, user_id: int, now: Optional[float] = None) -> bool:
+        until = self.pins.get(user_id)
+        return until is not None and until > (now if now is not None else time.monotonic())
+
+    def use_replica(self, user_id: Optional[int]) -> bool:
+        """Decide where one read goes, and count it."""
+        use = self.enabled and self.healthy and not (user_id is not None and self.is_pinned(user_id))
+        if use:
+            self.replica_reads += 1
+        else:
+            self.primary_reads += 1
+        return use
+
+    def record_check(self, lag_seconds: float) -> None:
+        self.lag_seconds = lag_seconds
+        healthy = lag_seconds <= self.max_lag_seconds
+        if healthy != self.healthy:
+            logger.warning(f"Read replica {'healthy' if healthy else 'lagging'} (lag {lag_seconds:.1f}s)")
+        self.healthy = healthy
+        self.last_error = None if healthy else f"Replication lag {lag_seconds:.1f}s"
+
+    def mark_unhealthy(self, error: str) -> None:
+        if self.healthy:
+            logger.warning(f"Read replica unavailable, using primary: {error}")
+        self.healthy = False
+        self.last_error = error
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "healthy": self.healthy,
+            "lag_seconds": self.lag_seconds,
+            "last_error": self.last_error,
+            "pinned_users": sum(1 for user_id in list(self.pins) if self.is_pinned(user_id)),
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+        }
+
+
+replica_router = ReplicaRouter(
+    enabled=read_engine is not None,
+    pin_seconds=settings.DATABASE_READ_PIN_SECONDS,
+    max_lag_seconds=settings.DATABASE_READ_MAX_LAG_SECONDS,
+)
+
+
+@event.listens_for(Session, "after_commit")
+def _pin_writer_to_primary(session: Session) -> None:
+    user_id = request_user_id.get()
+    if user_id is not None:
+        replica_router.pin(user_id)
+
+
+def measure_replica_lag(engine: Engine) -> float:
+    """Seconds the replica is behind its primary (0 when fully replayed or not a Postgres standby)."""
+    with engine.connect() as conn:
+        if engine.dialect.name != "postgresql":
+            conn.execute(text("SELECT 1"))
+            return 0.0
+        lag = conn.execute(text(
+            "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+            "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+        )).scalar()
+        return float(lag or 0.0)
+
+
+def check_replica(router: ReplicaRouter, engine: Engine) -> None:
+    try:
+        router.record_check(measure_replica_lag(engine))
+    except Exception as e:
+        router.mark_unhealthy(str(e))
+
+
+async def run_replica_monitor(router: ReplicaRouter, engine: Engine, interval_seconds: float) -> None:
+    """Background loop started from app startup; the check runs in the threadpool."""
+    while True:
+        await run_in_threadpool(check_replica, router, engine)
+        await asyncio.sleep(interval_seconds)
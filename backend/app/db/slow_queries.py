@@ -0,0 +1,224 @@
+"""
+Slow query log and per-statement timeouts.
+
+`install_query_hooks(engine)` is called by app.db.session for every engine
+it builds:
+
+- Statements slower than SLOW_QUERY_THRESHOLD_MS go into `slow_query_log`, a
+  bounded ring buffer (SLOW_QUERY_LOG_SIZE) served to admins at
+  GET /v1/monitoring/slow-queries. Entries keep the normalized SQL (literals
+  replaced by ?), the shape of the parameters (types, never values), the
+  request route and, with SLOW_QUERY_EXPLAIN=true, the plan: EXPLAIN ANALYZE
+  on Postgres (the SELECT runs a second time, inside a savepoint), EXPLAIN
+  QUERY PLAN on SQLite.
+- DB_STATEMENT_TIMEOUT_MS caps every statement so a runaway query can't pin a
+  pool connection: `SET LOCAL statement_timeout` at the start of each
+  Postgres transaction (works behind a transaction-mode pooler), or a
+  progress handler that interrupts the statement on SQLite. Code that
+  legitimately runs long (migrations, exports) widens it for its own context:
+
+      with statement_timeout(0):  # 0 = no limit
+          ...
+"""
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Iterator, Optional
+import logging
+import re
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.db.query_stats import current_query_stats
+
+logger = logging.getLogger(__name__)
+
+# SQLite VM instructions between progress handler calls
+SQLITE_PROGRESS_STEPS = 10_000
+
+_statement_timeout_override: ContextVar[Optional[int]] = ContextVar("statement_timeout_override", default=None)
+
+
+@contextmanager
+def statement_timeout(milliseconds: int) -> Iterator[None]:
+    """Override DB_STATEMENT_TIMEOUT_MS for transactions started in this context (0 = no limit)."""
+    token = _statement_timeout_override.set(milliseconds)
+    try:
+        yield
+    finally:
+        _statement_timeout_override.reset(token)
+
+
+def current_statement_timeout_ms() -> int:
+    override = _statement_timeout_override.get()
+    return settings.DB_STATEMENT_TIMEOUT_MS if override is None else override
+
+
+@dataclass
+class SlowQuery:
+    at: datetime
+    duration_ms: float
+    sql: str
+    params: Any
+    route: Optional[str]
+    plan: Optional[str] = None
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms: float, max_entries: int = 200, explain: bool = False):
+        self.threshold_ms = threshold_ms
+        self.explain = explain
+        self.entries: deque[SlowQuery] = deque(maxlen=max_entries)
+        self.lock = threading.Lock()
+        self.recorded = 0
+
+    def record(self, entry: SlowQuery) -> None:
+        with self.lock:
+            self.entries.append(entry)
+            self.recorded += 1
+
+    def snapshot(self, limit: Optional[int] = None) -> list[dict]:
+        """Newest first."""
+        with self.lock:
+            entries = list(reversed(self.entries))
+        return [asdict(e) for e in entries[:limit]]
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+
+slow_query_log = SlowQueryLog(
+    threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+    max_entries=settings.SLOW_QUERY_LOG_SIZE,
+    explain=settings.SLOW_QUERY_EXPLAIN,
+)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%\(\w+\)s|\$\d+|__\[POSTCOMPILE_\w+\])(?:\s*,\s*(?:\?|%\(\w+\)s|\$\d+))*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str) -> str:
+    """Collapse whitespace, replace literals with ? and IN lists with (...), so equal shapes group together."""
+    sql = _WHITESPACE.sub(" ", statement).strip()
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    return _PLACEHOLDER_LIST.sub("(...)", sql)
+
+
+def params_shape(parameters: Any, executemany: bool = False) -> Any:
+    """Parameter types without values (they may hold personal data)."""
+    if executemany:
+        rows = list(parameters or [])
+        return {"rows": len(rows), "row": params_shape(rows[0]) if rows else None}
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return None
+
+
+def _explain(conn, cursor, statement: str, parameters) -> Optional[str]:
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        prefix = "EXPLAIN (ANALYZE, BUFFERS) "
+    elif dialect == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN "
+    else:
+        return None
+    # Plans come from a fresh DBAPI cursor, so they aren't counted or timed themselves
+    explain_cursor = cursor.connection.cursor()
+    try:
+        if dialect == "postgresql":
+            # A failed EXPLAIN must not abort the request's transaction
+            explain_cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            explain_cursor.execute(prefix + statement, parameters)
+            plan = "\n".join(" ".join(str(col) for col in row) for row in explain_cursor.fetchall())
+        except Exception as e:
+            if dialect == "postgresql":
+                explain_cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            return f"EXPLAIN failed: {e}"
+        if dialect == "postgresql":
+            explain_cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+        return plan
+    finally:
+        explain_cursor.close()
+
+
+def install_query_hooks(engine: Engine, log: SlowQueryLog = slow_query_log) -> None:
+    """Attach the slow query log and statement timeouts to a (sync) engine."""
+    dialect = engine.dialect.name
+
+    if dialect == "sqlite":
+        @event.listens_for(engine, "connect")
+        def _install_progress_handler(dbapi_connection, connection_record):
+            if not hasattr(dbapi_connection, "set_progress_handler"):
+                return  # aiosqlite: no synchronous hook
+            info = connection_record.info
+
+            def interrupt_when_overdue() -> int:
+                deadline = info.get("statement_deadline")
+                return 1 if deadline is not None and time.monotonic() > deadline else 0
+
+            dbapi_connection.set_progress_handler(interrupt_when_overdue, SQLITE_PROGRESS_STEPS)
+
+    if dialect == "postgresql":
+        @event.listens_for(engine, "commit")
+        @event.listens_for(engine, "rollback")
+        def _transaction_ended(conn):
+            conn.info.pop("statement_timeout_set", None)
+
+        @event.listens_for(engine, "checkin")
+        def _connection_returned(dbapi_connection, connection_record):
+            connection_record.info.pop("statement_timeout_set", None)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        timeout_ms = current_statement_timeout_ms()
+        if dialect == "postgresql" and "statement_timeout_set" not in conn.info:
+            # SET LOCAL lasts until the end of the transaction this statement opens or joins.
+            # A server-side (named) cursor can only run the query it declares: use a plain one
+            if getattr(cursor, "name", None):
+                plain = conn.connection.cursor()
+                plain.execute(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+                plain.close()
+            else:
+                cursor.execute(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+            conn.info["statement_timeout_set"] = True
+        elif dialect == "sqlite":
+            conn.info["statement_deadline"] = time.monotonic() + timeout_ms / 1000 if timeout_ms else None
+        conn.info["slow_query_started_at"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        conn.info.pop("statement_deadline", None)
+        started = conn.info.pop("slow_query_started_at", None)
+        if started is None or log.threshold_ms <= 0:
+            return
+        duration_ms = (time.perf_counter() - started) * 1000
+        if duration_ms < log.threshold_ms:
+            return
+        stats = current_query_stats.get()
+        plan = None
+        # ANALYZE executes the statement again, so only plain SELECTs are explained
+        if log.explain and not executemany and statement.lstrip().upper().startswith("SELECT"):
+            plan = _explain(conn, cursor, statement, parameters)
+        entry = SlowQuery(
+            at=datetime.utcnow(),
+            duration_ms=round(duration_ms, 1),
+            sql=normalize_sql(statement),
+            params=params_shape(parameters, executemany),
+            route=stats.route if stats else None,
+            plan=plan,
+        )
+        log.record(entry)
+        logger.warning(f"Slow query ({entry.duration_ms}ms) on {entry.route or 'background'}: {entry.sql[:500]}")
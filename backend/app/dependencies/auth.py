@@ -2,15 +2,20 @@ from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from app.core.config import settings
-from app.db.session import get_db
+from app.core.principal_cache import UserSnapshot, principal_cache
+from app.db.replica import request_user_id
+from app.db.session import get_async_db, get_db
 from app.models.user import User
 
 reuse_oauth2 = OAuth2PasswordBearer(tokenUrl="/v1/auth/login")
+optional_oauth2 = OAuth2PasswordBearer(tokenUrl="/v1/auth/login", auto_error=False)
 
 
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(reuse_oauth2)) -> User:
+async def get_current_user(db: Session = Depends(get_db), token: str = Depends(reuse_oauth2)) -> UserSnapshot:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -23,7 +28,70 @@ def get_current_user(db: Session = Depends(get_db), token: str = Depends(reuse_o
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    user = db.get(User, int(user_id))
+
+    # Commits made while serving this request pin the user to the primary
+    request_user_id.set(int(user_id))
+
+    # The token is verified above, so its signature identifies it cheaply
+    signature = token.rsplit(".", 1)[-1]
+    cached = principal_cache.get(signature, int(user_id))
+    if cached is not None:
+        return cached
+
+    generation = principal_cache.generation(int(user_id))
+    # Only cache misses touch the database (and the threadpool)
+    user = await run_in_threadpool(db.get, User, int(user_id))
     if user is None:
         raise credentials_exception
+    snapshot = UserSnapshot.from_user(user)
+    principal_cache.put(signature, user.id, snapshot, generation)
+    return snapshot
+
+
+async def get_optional_current_user(
+    db: Session = Depends(get_db),
+    token: Optional[str] = Depends(optional_oauth2),
+) -> Optional[UserSnapshot]:
+    """Like get_current_user, but returns None for anonymous or invalid credentials."""
+    if not token:
+        return None
+    try:
+        return await get_current_user(db, token)
+    except HTTPException:
+        return None
+
+
+def get_current_user_model(
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> User:
+    """Load the authenticated user's ORM row, for routes that modify it."""
+    user = db.get(User, current_user.id)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return user
+
+
+async def get_async_current_user_model(
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+) -> User:
+    """get_current_user_model for async routes: the row is loaded on their AsyncSession."""
+    user = await db.get(User, current_user.id)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
+
+
+def get_current_admin(current_user: UserSnapshot = Depends(get_current_user)) -> UserSnapshot:
+    if current_user.email.lower() not in settings.ADMIN_EMAILS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return current_user
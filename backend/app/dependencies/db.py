@@ -0,0 +1,61 @@
+from typing import AsyncGenerator, Generator
+
+from fastapi import Depends
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.orm import Session
+
+from app.core.principal_cache import UserSnapshot
+from app.db import session as db_session
+from app.db.replica import replica_router
+from app.db.session import ThreadpoolSession, get_async_db, get_db
+from app.dependencies.auth import get_current_user
+
+
+def _replica_failed(error: DBAPIError) -> None:
+    # Connection-level failures send later reads to the primary until the monitor sees the replica recover
+    if error.connection_invalidated or isinstance(error, OperationalError):
+        replica_router.mark_unhealthy(str(error.orig))
+
+
+def get_read_db(
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> Generator[Session, None, None]:
+    """Session for read-only endpoints: the replica when it is healthy and the user has not written recently."""
+    if not replica_router.use_replica(current_user.id):
+        yield db
+        return
+    replica = db_session.ReadSessionLocal()
+    try:
+        yield replica
+    except DBAPIError as e:
+        _replica_failed(e)
+        raise
+    finally:
+        replica.close()
+
+
+async def get_async_read_db(
+    current_user: UserSnapshot = Depends(get_current_user),
+    db=Depends(get_async_db),
+) -> AsyncGenerator:
+    """get_read_db for routes on get_async_db."""
+    if not replica_router.use_replica(current_user.id):
+        yield db
+        return
+    if db_session.AsyncReadSessionLocal is not None:
+        async with db_session.AsyncReadSessionLocal() as replica:
+            try:
+                yield replica
+            except DBAPIError as e:
+                _replica_failed(e)
+                raise
+        return
+    replica = db_session.ReadSessionLocal()
+    try:
+        yield ThreadpoolSession(replica)
+    except DBAPIError as e:
+        _replica_failed(e)
+        raise
+    finally:
+        replica.close()
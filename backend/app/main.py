@@ -1,3 +1,4 @@
+import asyncio
 import os
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
@@ -6,19 +7,37 @@ from app.api.v1.auth import router as auth_router
 from app.api.v1.users import router as users_router
 from app.api.v1.clients import router as clients_router
 from app.api.v1.invoices import router as invoices_router
+from app.api.v1.dashboard import router as dashboard_router
+from app.api.v1.reports import router as reports_router
+from app.api.v1.search import router as search_router
+from app.api.v1.imports import router as imports_router
 from app.api.v1.extraction import router as extraction_router
 from app.api.v1.reminders import router as reminders_router
 from app.api.v1.payments import router as payments_router
-from app.db.session import Base, engine
+from app.api.v1.monitoring import router as monitoring_router
+from app.db.session import engine, read_engine, SessionLocal
+from app.db.migrate import check_schema
+from app.db.replica import replica_router, run_replica_monitor
+from app.db.query_stats import QueryStatsMiddleware
 from app.core.config import settings
+from app.core.security import password_hasher
+from app.services.verification_tokens import run_token_sweeper
+from app.services.email_outbox import build_worker, run_outbox_worker
 
 # Ensure models are imported so SQLAlchemy registers them with Base.metadata
 # Routers import models already, but this import path makes the intent explicit.
 from app.models import user as user_model  # noqa: F401
 from app.models import client as client_model  # noqa: F401
 from app.models import invoice as invoice_model  # noqa: F401
+from app.models import invoice_stats as invoice_stats_model  # noqa: F401
+from app.models import search_document as search_document_model  # noqa: F401
+from app.models import import_job as import_job_model  # noqa: F401
 from app.models import payment as payment_model  # noqa: F401
 from app.models import extraction as extraction_model  # noqa: F401
+from app.models import verification_token as verification_token_model  # noqa: F401
+from app.models import email_outbox as email_outbox_model  # noqa: F401
+from app.models import usage_counter as usage_counter_model  # noqa: F401
+from app.models import schema_version as schema_version_model  # noqa: F401
 
 app = FastAPI(title="InvoYQ API", version="0.1.0")
 
@@ -29,15 +48,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Keyset pagination and query timing headers, readable by the frontend
+    expose_headers=["X-Next-Cursor", "X-Has-More", "Server-Timing", "ETag"],
 )
+# Statement count / DB time per request, as a Server-Timing header and log fields
+app.add_middleware(QueryStatsMiddleware)
 
 app.include_router(auth_router, prefix="/v1/auth", tags=["auth"]) 
 app.include_router(users_router, prefix="/v1", tags=["users"]) 
 app.include_router(clients_router, prefix="/v1", tags=["clients"]) 
 app.include_router(invoices_router, prefix="/v1", tags=["invoices"]) 
+app.include_router(dashboard_router, prefix="/v1", tags=["dashboard"]) 
+app.include_router(reports_router, prefix="/v1", tags=["reports"]) 
+app.include_router(search_router, prefix="/v1", tags=["search"]) 
+app.include_router(imports_router, prefix="/v1", tags=["imports"]) 
 app.include_router(extraction_router, prefix="/v1", tags=["extraction"]) 
 app.include_router(reminders_router, prefix="/v1", tags=["reminders"]) 
 app.include_router(payments_router, prefix="/v1/payments", tags=["payments"]) 
+app.include_router(monitoring_router, prefix="/v1", tags=["monitoring"]) 
 
 # Serve generated files via /static for local/dev usage
 os.makedirs(settings.STORAGE_LOCAL_DIR, exist_ok=True)
@@ -45,6 +73,55 @@ app.mount("/static", StaticFiles(directory=settings.STORAGE_LOCAL_DIR), name="st
 
 
 @app.on_event("startup")
-def on_startup_create_tables() -> None:
-	"""Create database tables if they do not exist."""
-	Base.metadata.create_all(bind=engine)
+def on_startup_check_schema() -> None:
+	"""Verify the schema version (one query); see app.db.migrate."""
+	check_schema(engine, auto_migrate=settings.SCHEMA_AUTO_MIGRATE)
+
+
+background_tasks: list[asyncio.Task] = []
+
+
+@app.on_event("startup")
+async def on_startup_start_token_sweeper() -> None:
+	"""Periodically delete expired email verification tokens."""
+	if settings.VERIFICATION_TOKEN_SWEEP_INTERVAL_SECONDS > 0:
+		background_tasks.append(asyncio.create_task(run_token_sweeper(
+			SessionLocal,
+			interval_seconds=settings.VERIFICATION_TOKEN_SWEEP_INTERVAL_SECONDS,
+			batch_size=settings.VERIFICATION_TOKEN_SWEEP_BATCH_SIZE,
+		)))
+
+
+@app.on_event("startup")
+async def on_startup_start_email_outbox() -> None:
+	"""Deliver queued emails from this process unless a separate worker is used."""
+	if settings.EMAIL_OUTBOX_IN_PROCESS:
+		background_tasks.append(asyncio.create_task(run_outbox_worker(
+			build_worker(SessionLocal),
+			poll_seconds=settings.EMAIL_OUTBOX_POLL_SECONDS,
+		)))
+
+
+@app.on_event("startup")
+async def on_startup_start_replica_monitor() -> None:
+	"""Track read replica health and lag so reads fall back to the primary."""
+	if read_engine is not None:
+		background_tasks.append(asyncio.create_task(run_replica_monitor(
+			replica_router,
+			read_engine,
+			interval_seconds=settings.DATABASE_READ_HEALTH_INTERVAL_SECONDS,
+		)))
+
+
+@app.on_event("shutdown")
+async def on_shutdown_stop_background_tasks() -> None:
+	"""Cancel background loops started at startup."""
+	for task in background_tasks:
+		task.cancel()
+	background_tasks.clear()
+
+
+@app.on_event("shutdown")
+def on_shutdown_stop_hashing_pool() -> None:
+	"""Stop the bcrypt worker processes."""
+	password_hasher.shutdown()
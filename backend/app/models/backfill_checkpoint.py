@@ -0,0 +1,16 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime
+
+from app.db.session import Base
+
+
+class BackfillCheckpoint(Base):
+    """Progress of a batched backfill, committed with each batch (see app.db.backfill)."""
+    __tablename__ = "backfill_checkpoints"
+
+    name = Column(String, primary_key=True)
+    last_key = Column(Integer, nullable=False, default=0)  # highest primary key already processed
+    rows_updated = Column(Integer, nullable=False, default=0)
+    started_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    completed_at = Column(DateTime, nullable=True)
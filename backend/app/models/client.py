@@ -1,4 +1,6 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, String, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 from app.db.session import Base
@@ -6,13 +8,21 @@ from app.db.session import Base
 
 class Client(Base):
     __tablename__ = "clients"
+    __table_args__ = (
+        # list_clients: WHERE user_id ORDER BY id
+        Index("ix_clients_user_id_id", "user_id", "id"),
+        # list_clients?sort=name
+        Index("ix_clients_user_name_id", "user_id", "name", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     name = Column(String, nullable=False)
     email = Column(String, nullable=True)
     phone = Column(String, nullable=True)
     address = Column(String, nullable=True)
+    # ETag source; NULL only on rows created before the column existed (until backfilled)
+    updated_at = Column(DateTime, nullable=True, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     invoices = relationship("Invoice", back_populates="client", cascade="all, delete-orphan")
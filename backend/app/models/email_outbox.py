@@ -0,0 +1,26 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+
+from app.db.session import Base
+
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        # Worker polls for due messages: WHERE status = 'pending' AND next_attempt_at <= now
+        Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    to_email = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    html_body = Column(Text, nullable=False)
+    text_body = Column(Text, nullable=True)
+
+    status = Column(String, nullable=False, default="pending")  # pending, sent, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
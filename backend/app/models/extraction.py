@@ -1,14 +1,18 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, JSON
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, JSON, Index
 
 from app.db.session import Base
 
 
 class Extraction(Base):
     __tablename__ = "extractions"
+    __table_args__ = (
+        # A user's extractions, newest first
+        Index("ix_extractions_user_created_at", "user_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True, index=True)  # Allow anonymous extractions
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True)  # Allow anonymous extractions
     source_type = Column(String, nullable=False)  # screenshot | text
     source_url = Column(String, nullable=True)
     raw_text = Column(String, nullable=True)
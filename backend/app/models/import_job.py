@@ -0,0 +1,29 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, JSON
+
+from app.db.session import Base
+
+
+class ImportJob(Base):
+    """A CSV import and its progress, committed with each chunk of rows (see app.services.imports)."""
+    __tablename__ = "import_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    kind = Column(String, nullable=False)  # clients, invoices
+    status = Column(String, nullable=False, default="running")  # running, completed
+
+    rows_done = Column(Integer, nullable=False, default=0)  # data rows handled and committed; a resume skips them
+    imported = Column(Integer, nullable=False, default=0)
+    duplicates = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    errors = Column(JSON, nullable=False, default=list)  # [{"row": n, "error": "..."}], the first MAX_REPORTED_ERRORS
+    fingerprint = Column(String, nullable=True)  # sha256 of the header and the rows done, to recognize the file on resume
+
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    completed_at = Column(DateTime, nullable=True)
+
+    # Two requests resuming the same import: the second one's checkpoint fails instead of double-importing
+    version = Column(Integer, nullable=False, default=1)
+    __mapper_args__ = {"version_id_col": version}
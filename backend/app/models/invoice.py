@@ -1,6 +1,6 @@
 from datetime import date, datetime
-from sqlalchemy import Column, Integer, String, ForeignKey, Date, Numeric, JSON, Text, UniqueConstraint, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, ForeignKey, Date, Numeric, JSON, Text, UniqueConstraint, DateTime, Index
+from sqlalchemy.orm import column_property, relationship
 
 from app.db.session import Base
 
@@ -10,21 +10,31 @@ class Invoice(Base):
     __table_args__ = (
         # Enforce per-user unique invoice number when provided
         UniqueConstraint("user_id", "number", name="uq_user_invoice_number"),
+        # list_invoices: WHERE user_id [AND status | client_id] ORDER BY id
+        Index("ix_invoices_user_id_id", "user_id", "id"),
+        Index("ix_invoices_user_status_id", "user_id", "status", "id"),
+        Index("ix_invoices_user_client_id", "user_id", "client_id", "id"),
+        # list_invoices due_from/due_to range, and keyset pages for sort=due_date / created_at / total
+        Index("ix_invoices_user_due_date_id", "user_id", "due_date", "id"),
+        Index("ix_invoices_user_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_invoices_user_total_id", "user_id", "total", "id"),
     )
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     client_id = Column(Integer, ForeignKey("clients.id", ondelete="CASCADE"), nullable=False, index=True)
 
-    number = Column(String, nullable=True, index=True)
-    status = Column(String, nullable=False, default="draft")  # draft, sent, paid, overdue, cancelled
-    issued_date = Column(Date, nullable=True)
+    number = Column(String, nullable=True)  # looked up via uq_user_invoice_number
+    # status, issued_date, currency and total keep their previous value when changed, even if
+    # it was expired (active_history), so the aggregates can move the invoice between rows
+    status = column_property(Column(String, nullable=False, default="draft"), active_history=True)  # draft, sent, paid, overdue, cancelled
+    issued_date = column_property(Column(Date, nullable=True), active_history=True)
     due_date = Column(Date, nullable=True)
 
-    currency = Column(String(3), nullable=False, default="NGN")  # ISO 4217 currency code
+    currency = column_property(Column(String(3), nullable=False, default="NGN"), active_history=True)  # ISO 4217 currency code
     subtotal = Column(Numeric(12, 2), nullable=True)
     tax = Column(Numeric(12, 2), nullable=True)
-    total = Column(Numeric(12, 2), nullable=True)
+    total = column_property(Column(Numeric(12, 2), nullable=True), active_history=True)
 
     pdf_url = Column(String, nullable=True)
     payment_link = Column(String, nullable=True)  # Optional user-provided payment link
@@ -32,6 +42,9 @@ class Invoice(Base):
 
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Bumped by every ORM UPDATE (which also checks it, raising StaleDataError); the invoice's ETag
+    version = Column(Integer, nullable=False, default=1)
+    __mapper_args__ = {"version_id_col": version}
 
     # Relationships
     client = relationship("Client", back_populates="invoices")
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, String, ForeignKey
+
+from app.db.session import Base
+
+
+class InvoiceSequence(Base):
+    """Last invoice number handed out per user and scope, incremented in place by app.core.invoice_numbers."""
+    __tablename__ = "invoice_sequences"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    scope = Column(String, primary_key=True)  # the number format rendered up to the sequence: "INV-20250115-{seq}"
+    last_value = Column(Integer, nullable=False, default=0)
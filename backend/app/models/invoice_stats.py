@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, Numeric, String, ForeignKey
+
+from app.db.session import Base
+
+
+class InvoiceStats(Base):
+    """
+    Count and total of a user's invoices per currency and status, adjusted in
+    the same transaction as every invoice write by app.services.invoice_stats.
+    The dashboard reads it by primary key prefix (user_id).
+    """
+    __tablename__ = "invoice_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    currency = Column(String(3), primary_key=True)
+    status = Column(String, primary_key=True)
+    invoice_count = Column(Integer, nullable=False, default=0)
+    total = Column(Numeric(14, 2), nullable=False, default=0)  # NULL invoice totals count as 0
+
+
+class InvoiceMonthlyStats(Base):
+    """
+    InvoiceStats split by month ('YYYY-MM' of the issue date, or of the
+    creation date for invoices without one); the revenue report reads it by
+    primary key range, however much history the user has.
+    """
+    __tablename__ = "invoice_monthly_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    month = Column(String(7), primary_key=True)
+    currency = Column(String(3), primary_key=True)
+    status = Column(String, primary_key=True)
+    invoice_count = Column(Integer, nullable=False, default=0)
+    total = Column(Numeric(14, 2), nullable=False, default=0)
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, ForeignKey, Numeric, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, Numeric, DateTime, Index
 from sqlalchemy.orm import relationship
 
 from app.db.session import Base
@@ -7,9 +7,15 @@ from app.db.session import Base
 
 class Payment(Base):
     __tablename__ = "payments"
+    __table_args__ = (
+        # Payment history: WHERE user_id ORDER BY created_at DESC, id DESC (keyset pages)
+        Index("ix_payments_user_created_at_id", "user_id", "created_at", "id"),
+        # Verification and webhooks look payments up by provider reference
+        Index("ix_payments_provider_ref", "provider_ref"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     payment_type = Column(String, nullable=False, default="subscription")  # subscription, one-time
     amount = Column(Numeric(12, 2), nullable=False)
     currency = Column(String, nullable=False, default="USD")
@@ -0,0 +1,13 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime
+
+from app.db.session import Base
+
+
+class SchemaVersion(Base):
+    """One row per applied migration (see app.db.migrate)."""
+    __tablename__ = "schema_version"
+
+    version = Column(Integer, primary_key=True)
+    description = Column(String, nullable=False)
+    applied_at = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -0,0 +1,54 @@
+from sqlalchemy import DDL, Column, ForeignKey, Index, Integer, String, Text, UniqueConstraint, event
+
+from app.db.functions import search_vector
+from app.db.session import Base
+
+
+class SearchDocument(Base):
+    """
+    The searchable text of one invoice (number, client name, notes, item
+    descriptions) or client (name, email), kept in sync by app.services.search.
+
+    Full-text indexed per dialect: a contentless FTS5 table
+    (search_documents_fts, maintained by triggers) on SQLite, a GIN index over
+    to_tsvector('simple', content) on Postgres.
+    """
+    __tablename__ = "search_documents"
+    __table_args__ = (
+        UniqueConstraint("kind", "entity_id", name="uq_search_documents_entity"),
+        Index("ix_search_documents_user_id_id", "user_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    kind = Column(String(16), nullable=False)  # invoice, client
+    entity_id = Column(Integer, nullable=False)
+    title = Column(String, nullable=True)  # invoice number / client name
+    subtitle = Column(String, nullable=True)  # client name / client email
+    content = Column(Text, nullable=False)
+
+
+Index(
+    "ix_search_documents_content_tsv", search_vector(SearchDocument.content), postgresql_using="gin",
+).ddl_if(dialect="postgresql")
+
+# SQLite: a contentless FTS5 index (the text lives in search_documents) updated
+# by triggers, so every write path only has to maintain the plain table. The
+# owner is indexed as a token ("u42") so a search intersects the user's postings
+# instead of filtering every user's matches.
+_SQLITE_FTS = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_documents_fts USING fts5(owner, content, content='', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS search_documents_ai AFTER INSERT ON search_documents BEGIN "
+    "INSERT INTO search_documents_fts(rowid, owner, content) VALUES (new.id, 'u' || new.user_id, new.content); END",
+    "CREATE TRIGGER IF NOT EXISTS search_documents_ad AFTER DELETE ON search_documents BEGIN "
+    "INSERT INTO search_documents_fts(search_documents_fts, rowid, owner, content) "
+    "VALUES ('delete', old.id, 'u' || old.user_id, old.content); END",
+    "CREATE TRIGGER IF NOT EXISTS search_documents_au AFTER UPDATE ON search_documents BEGIN "
+    "INSERT INTO search_documents_fts(search_documents_fts, rowid, owner, content) "
+    "VALUES ('delete', old.id, 'u' || old.user_id, old.content); "
+    "INSERT INTO search_documents_fts(rowid, owner, content) VALUES (new.id, 'u' || new.user_id, new.content); END",
+]
+
+for _statement in _SQLITE_FTS:
+    event.listen(SearchDocument.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+event.listen(SearchDocument.__table__, "before_drop", DDL("DROP TABLE IF EXISTS search_documents_fts").execute_if(dialect="sqlite"))
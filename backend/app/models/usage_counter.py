@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, String, Date
+
+from app.db.session import Base
+
+
+class UsageCounter(Base):
+    """Daily usage per subject, incremented in place by app.core.quotas."""
+    __tablename__ = "usage_counters"
+
+    subject = Column(String, primary_key=True)  # "user:42" or "ip:203.0.113.7"
+    metric = Column(String, primary_key=True)  # extraction, write
+    day = Column(Date, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
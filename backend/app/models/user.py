@@ -11,10 +11,8 @@ class User(Base):
     full_name = Column(String, nullable=True)
     is_active = Column(Boolean, default=True)
     
-    # Email verification fields
+    # Email verification (pending tokens live in email_verification_tokens)
     is_verified = Column(Boolean, default=False)
-    verification_token = Column(String, nullable=True)
-    verification_token_expires = Column(DateTime, nullable=True)
     
     # Pro-tier subscription fields
     is_pro = Column(Boolean, default=False)
@@ -33,3 +31,6 @@ class User(Base):
     company_address = Column(String, nullable=True)
     tax_id = Column(String, nullable=True)  # VAT/Tax ID
     website = Column(String, nullable=True)
+
+    # Any change to the row (profile, verification, subscription); the /me ETag
+    updated_at = Column(DateTime, nullable=True, default=datetime.utcnow, onupdate=datetime.utcnow)
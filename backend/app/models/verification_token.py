@@ -0,0 +1,15 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+
+from app.db.session import Base
+
+
+class EmailVerificationToken(Base):
+    __tablename__ = "email_verification_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    # SHA-256 hex digest of the token sent by email; the raw token is never stored
+    token_hash = Column(String(64), nullable=False, unique=True, index=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
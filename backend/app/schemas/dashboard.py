@@ -0,0 +1,28 @@
+from decimal import Decimal
+from typing import Dict, List
+
+from pydantic import BaseModel
+
+
+class StatusTotals(BaseModel):
+    count: int
+    total: Decimal
+
+
+class CurrencyStats(BaseModel):
+    """Figures for one currency; amounts in different currencies are never added up."""
+    currency: str
+    invoice_count: int = 0
+    revenue: Decimal = Decimal("0.00")  # paid
+    outstanding: Decimal = Decimal("0.00")  # sent + overdue
+    overdue: Decimal = Decimal("0.00")
+    by_status: Dict[str, StatusTotals] = {}
+
+
+class DashboardStats(BaseModel):
+    total_clients: int
+    total_invoices: int
+    paid_invoices: int
+    unpaid_invoices: int  # draft + sent
+    overdue_invoices: int
+    currencies: List[CurrencyStats] = []  # most invoices first
@@ -0,0 +1,27 @@
+from datetime import datetime
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel
+
+
+class ImportRowError(BaseModel):
+    row: int  # line of the CSV record, the header being row 1
+    error: str
+
+
+class ImportJobOut(BaseModel):
+    id: int  # send back as ?import_id= with the same file to resume an interrupted import
+    kind: Literal["clients", "invoices"]
+    status: Literal["running", "completed"]
+    rows_done: int
+    imported: int
+    duplicates: int  # clients skipped because their email is already taken
+    failed: int
+    errors: List[ImportRowError] = []  # the first ones; `failed` and `duplicates` count them all
+    created_at: datetime
+    updated_at: datetime
+    completed_at: Optional[datetime] = None
+    rows_per_second: Optional[float] = None  # of this request's run
+
+    class Config:
+        from_attributes = True
@@ -1,6 +1,6 @@
 from datetime import date, datetime
-from typing import List, Optional
-from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
 from decimal import Decimal
 
 
@@ -30,6 +30,10 @@ class InvoiceItemCreate(InvoiceItemBase):
     pass
 
 
+class InvoiceItemUpsert(InvoiceItemBase):
+    id: int | None = None  # an existing item of the invoice to keep (and update); omit for a new one
+
+
 class InvoiceItemOut(InvoiceItemBase):
     id: int
 
@@ -65,7 +69,9 @@ class InvoiceUpdate(BaseModel):
     tax: Decimal | None = None
     total: Decimal | None = None
     notes: str | None = None
-    items: List[InvoiceItemCreate] | None = None  # replace items if provided
+    # The invoice's full item list: items with an id are kept (updated if changed), items
+    # without one are added, and current items left out are deleted
+    items: List[InvoiceItemUpsert] | None = None
 
 
 class InvoiceOut(InvoiceBase):
@@ -76,6 +82,45 @@ class InvoiceOut(InvoiceBase):
     user_business_info: Optional[UserBusinessInfo] = None  # Business details for invoice display
     created_at: datetime
     updated_at: datetime
+    version: int  # send back as If-Match: "<version>" to update only if nobody else has
 
     class Config:
         from_attributes = True
+
+
+# Largest batch accepted by the /invoices:bulk endpoints
+BULK_MAX_INVOICES = 500
+
+
+class InvoiceBulkCreate(BaseModel):
+    # Validated one by one (as InvoiceCreate), so a bad entry fails alone instead of the whole batch
+    invoices: List[Dict[str, Any]] = Field(..., min_length=1, max_length=BULK_MAX_INVOICES)
+
+
+class InvoiceBulkUpdateItem(InvoiceUpdate):
+    id: int
+    version: int | None = None  # as If-Match: the entry is refused (412) if the invoice's version differs
+
+
+class InvoiceBulkUpdate(BaseModel):
+    # Validated one by one (as InvoiceBulkUpdateItem)
+    invoices: List[Dict[str, Any]] = Field(..., min_length=1, max_length=BULK_MAX_INVOICES)
+
+
+class InvoiceBulkDelete(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=BULK_MAX_INVOICES)
+
+
+class BulkItemResult(BaseModel):
+    index: int  # position in the request batch
+    status: int  # HTTP status this item would have had on its own: 201 / 200 / 204, or 400 / 404 / 409 / 412 / 422
+    id: int | None = None
+    number: str | None = None
+    version: int | None = None
+    error: str | None = None
+
+
+class BulkResult(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult]
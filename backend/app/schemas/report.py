@@ -0,0 +1,37 @@
+from datetime import date
+from decimal import Decimal
+from typing import List
+
+from pydantic import BaseModel
+
+
+class RevenueMonth(BaseModel):
+    month: str  # YYYY-MM
+    currency: str
+    invoice_count: int  # issued that month; drafts and cancelled invoices aren't revenue
+    invoiced: Decimal
+    paid: Decimal
+
+
+class RevenueReport(BaseModel):
+    start: str
+    end: str
+    months: List[RevenueMonth] = []  # by month, then currency; months without invoices are left out
+
+
+class AgingBucket(BaseModel):
+    bucket: str  # current (not yet due), 0-30, 31-60, 61-90, 90+ days past due
+    invoice_count: int
+    total: Decimal
+
+
+class AgingCurrency(BaseModel):
+    currency: str
+    invoice_count: int
+    total: Decimal
+    buckets: List[AgingBucket]  # every bucket, in order, zeros included
+
+
+class AgingReport(BaseModel):
+    as_of: date
+    currencies: List[AgingCurrency] = []
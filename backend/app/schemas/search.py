@@ -0,0 +1,11 @@
+from typing import Literal, Optional
+
+from pydantic import BaseModel
+
+
+class SearchResult(BaseModel):
+    type: Literal["invoice", "client"]
+    id: int  # of the invoice or client
+    title: Optional[str] = None  # invoice number / client name
+    subtitle: Optional[str] = None  # client name / client email
+    score: float  # higher is more relevant; only comparable within one search
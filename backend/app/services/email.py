@@ -1,10 +1,13 @@
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import Optional
+from typing import Optional, Tuple
 import logging
 
+from sqlalchemy.orm import Session
+
 from app.core.config import settings
+from app.models.email_outbox import EmailOutbox
 
 logger = logging.getLogger(__name__)
 
@@ -22,39 +25,48 @@ class EmailService:
         self.use_tls = settings.SMTP_USE_TLS
         self.use_ssl = settings.SMTP_USE_SSL
     
+    def build_message(self, to_email: str, subject: str, html_content: str, text_content: Optional[str] = None) -> MIMEMultipart:
+        """Build the MIME message for an email"""
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = subject
+        msg['From'] = f"{self.smtp_from_name} <{self.smtp_from_email}>"
+        msg['To'] = to_email
+        
+        # Add plain text version if provided
+        if text_content:
+            part1 = MIMEText(text_content, 'plain')
+            msg.attach(part1)
+        
+        # Add HTML version
+        part2 = MIMEText(html_content, 'html')
+        msg.attach(part2)
+        return msg
+    
+    def connect(self) -> smtplib.SMTP:
+        """Open an authenticated SMTP connection (caller is responsible for closing it)"""
+        if self.use_ssl:
+            # Use SSL (port 465)
+            server = smtplib.SMTP_SSL(self.smtp_host, self.smtp_port)
+        else:
+            # Use TLS (port 587)
+            server = smtplib.SMTP(self.smtp_host, self.smtp_port)
+        try:
+            if self.use_tls and not self.use_ssl:
+                server.starttls()
+            if self.smtp_user and self.smtp_password:
+                server.login(self.smtp_user, self.smtp_password)
+        except BaseException:
+            # A failed handshake (bad password, TLS error) must not leave the socket open
+            server.close()
+            raise
+        return server
+    
     def _send_email(self, to_email: str, subject: str, html_content: str, text_content: Optional[str] = None) -> bool:
-        """Send an email using SMTP"""
+        """Send an email immediately over a new SMTP connection"""
         try:
-            # Create message
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = subject
-            msg['From'] = f"{self.smtp_from_name} <{self.smtp_from_email}>"
-            msg['To'] = to_email
-            
-            # Add plain text version if provided
-            if text_content:
-                part1 = MIMEText(text_content, 'plain')
-                msg.attach(part1)
-            
-            # Add HTML version
-            part2 = MIMEText(html_content, 'html')
-            msg.attach(part2)
-            
-            # Send email using SSL or TLS
-            if self.use_ssl:
-                # Use SSL (port 465)
-                with smtplib.SMTP_SSL(self.smtp_host, self.smtp_port) as server:
-                    if self.smtp_user and self.smtp_password:
-                        server.login(self.smtp_user, self.smtp_password)
-                    server.send_message(msg)
-            else:
-                # Use TLS (port 587)
-                with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                    if self.use_tls:
-                        server.starttls()
-                    if self.smtp_user and self.smtp_password:
-                        server.login(self.smtp_user, self.smtp_password)
-                    server.send_message(msg)
+            msg = self.build_message(to_email, subject, html_content, text_content)
+            with self.connect() as server:
+                server.send_message(msg)
             
             logger.info(f"Email sent successfully to {to_email}")
             return True
@@ -63,10 +75,14 @@ class EmailService:
             logger.error(f"Failed to send email to {to_email}: {str(e)}")
             raise  # Re-raise to provide better error feedback
     
-    def send_verification_email(self, to_email: str, verification_url: str, full_name: Optional[str] = None) -> bool:
-        """Send email verification link to user"""
-        display_name = full_name or to_email
-        
+    def enqueue(self, db: Session, to_email: str, subject: str, html_content: str, text_content: Optional[str] = None) -> EmailOutbox:
+        """Queue an email in the outbox; it is delivered by the outbox worker. Caller commits."""
+        message = EmailOutbox(to_email=to_email, subject=subject, html_body=html_content, text_body=text_content)
+        db.add(message)
+        return message
+    
+    def verification_email_content(self, verification_url: str, display_name: str) -> Tuple[str, str, str]:
+        """Return (subject, html, text) for the email verification message"""
         subject = "Verify your InvoYQ account"
         
         html_content = f"""
@@ -130,7 +146,17 @@ class EmailService:
         © 2025 InvoYQ. All rights reserved.
         """
         
+        return subject, html_content, text_content
+    
+    def send_verification_email(self, to_email: str, verification_url: str, full_name: Optional[str] = None) -> bool:
+        """Send email verification link to user"""
+        subject, html_content, text_content = self.verification_email_content(verification_url, full_name or to_email)
         return self._send_email(to_email, subject, html_content, text_content)
+    
+    def queue_verification_email(self, db: Session, to_email: str, verification_url: str, full_name: Optional[str] = None) -> EmailOutbox:
+        """Queue email verification link for delivery by the outbox worker"""
+        subject, html_content, text_content = self.verification_email_content(verification_url, full_name or to_email)
+        return self.enqueue(db, to_email, subject, html_content, text_content)
 
 
 # Create singleton instance
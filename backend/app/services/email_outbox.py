@@ -0,0 +1,218 @@
+"""
+Email outbox worker.
+
+Request handlers only INSERT into email_outbox (see EmailService.enqueue).
+This worker drains due messages in batches over one kept-alive,
+authenticated SMTP connection and retries failures with exponential backoff.
+
+Run it in-process (EMAIL_OUTBOX_IN_PROCESS=true, started from app startup)
+or as a separate process:
+
+    python -m app.services.email_outbox            # poll forever
+    python -m app.services.email_outbox --once     # drain what is due and exit
+"""
+from datetime import datetime, timedelta
+from typing import Callable, Optional, Tuple
+import argparse
+import asyncio
+import logging
+import smtplib
+import time
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.models.email_outbox import EmailOutbox
+from app.services.email import EmailService, email_service
+
+logger = logging.getLogger(__name__)
+
+
+class PooledSMTPConnection:
+    """
+    Keeps a single authenticated SMTP connection open between sends.
+
+    The connection is probed with NOOP when it has been idle longer than
+    keepalive_seconds and transparently re-opened if the server dropped it.
+    """
+
+    def __init__(self, service: EmailService, keepalive_seconds: float = 30):
+        self.service = service
+        self.keepalive_seconds = keepalive_seconds
+        self.server: Optional[smtplib.SMTP] = None
+        self.last_used = 0.0
+        self.connections_opened = 0
+
+    def _ensure_connected(self) -> smtplib.SMTP:
+        if self.server is not None and time.monotonic() - self.last_used > self.keepalive_seconds:
+            try:
+                code, _ = self.server.noop()
+                if code != 250:
+                    self.close()
+            except smtplib.SMTPException:
+                self.close()
+        if self.server is None:
+            self.server = self.service.connect()
+            self.connections_opened += 1
+        return self.server
+
+    def send(self, message: EmailOutbox) -> None:
+        msg = self.service.build_message(message.to_email, message.subject, message.html_body, message.text_body)
+        try:
+            self._ensure_connected().send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            # Server closed an idle connection between our probe and the send; retry once
+            self.close()
+            self._ensure_connected().send_message(msg)
+        self.last_used = time.monotonic()
+
+    def close(self) -> None:
+        server, self.server = self.server, None
+        if server is not None:
+            try:
+                server.quit()
+            except (smtplib.SMTPException, OSError):
+                server.close()
+
+
+def _is_permanent(error: Exception) -> bool:
+    """5xx replies (bad recipient, rejected content) will not succeed on retry."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
+
+
+def _is_connection_error(error: Exception) -> bool:
+    """Errors that say nothing about the message itself, only about the connection."""
+    if isinstance(error, (smtplib.SMTPConnectError, smtplib.SMTPAuthenticationError)):
+        return True
+    return not isinstance(error, (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused))
+
+
+class OutboxWorker:
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        connection: PooledSMTPConnection,
+        batch_size: int = 50,
+        max_attempts: int = 5,
+        backoff_base_seconds: float = 30,
+        backoff_max_seconds: float = 3600,
+    ):
+        self.session_factory = session_factory
+        self.connection = connection
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+
+    def backoff(self, attempts: int) -> timedelta:
+        return timedelta(seconds=min(self.backoff_base_seconds * 2 ** (attempts - 1), self.backoff_max_seconds))
+
+    def drain_once(self) -> Tuple[int, int]:
+        """Send one batch of due messages. Returns (sent, failed)."""
+        db = self.session_factory()
+        sent = failed = 0
+        try:
+            now = datetime.utcnow()
+            # SKIP LOCKED lets several workers drain concurrently on Postgres (ignored by SQLite)
+            batch = db.execute(
+                select(EmailOutbox)
+                .where(EmailOutbox.status == "pending", EmailOutbox.next_attempt_at <= now)
+                .order_by(EmailOutbox.id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            ).scalars().all()
+
+            for message in batch:
+                try:
+                    self.connection.send(message)
+                except Exception as e:
+                    failed += 1
+                    message.attempts += 1
+                    message.last_error = str(e)[:1000]
+                    if _is_permanent(e) or message.attempts >= self.max_attempts:
+                        message.status = "failed"
+                        logger.error(f"Giving up on email {message.id} to {message.to_email}: {str(e)}")
+                    else:
+                        message.next_attempt_at = datetime.utcnow() + self.backoff(message.attempts)
+                        logger.warning(f"Email {message.id} to {message.to_email} failed, retrying: {str(e)}")
+                    if _is_connection_error(e):
+                        # Connection-level problem; leave the rest of the batch for the next poll
+                        self.connection.close()
+                        break
+                else:
+                    sent += 1
+                    message.status = "sent"
+                    message.attempts += 1
+                    message.sent_at = datetime.utcnow()
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        if sent:
+            logger.info(f"Email outbox: sent {sent}, failed {failed}")
+        return sent, failed
+
+    def drain(self) -> Tuple[int, int]:
+        """Keep sending batches until nothing is due."""
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = self.drain_once()
+            total_sent += sent
+            total_failed += failed
+            if sent + failed < self.batch_size:
+                return total_sent, total_failed
+
+
+def build_worker(session_factory: Callable[[], Session]) -> OutboxWorker:
+    return OutboxWorker(
+        session_factory,
+        PooledSMTPConnection(email_service, keepalive_seconds=settings.EMAIL_OUTBOX_SMTP_KEEPALIVE_SECONDS),
+        batch_size=settings.EMAIL_OUTBOX_BATCH_SIZE,
+        max_attempts=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+    )
+
+
+async def run_outbox_worker(worker: OutboxWorker, poll_seconds: float) -> None:
+    """In-process loop started from app startup; SMTP I/O runs in the threadpool."""
+    try:
+        while True:
+            try:
+                await run_in_threadpool(worker.drain)
+            except Exception as e:
+                logger.error(f"Email outbox drain failed: {str(e)}")
+            await asyncio.sleep(poll_seconds)
+    finally:
+        worker.connection.close()
+
+
+def main() -> None:
+    from app.db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Deliver queued emails from the email_outbox table.")
+    parser.add_argument("--once", action="store_true", help="drain due messages and exit")
+    parser.add_argument("--poll-seconds", type=float, default=settings.EMAIL_OUTBOX_POLL_SECONDS)
+    parser.add_argument("--batch-size", type=int, default=settings.EMAIL_OUTBOX_BATCH_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    worker = build_worker(SessionLocal)
+    worker.batch_size = args.batch_size
+    try:
+        while True:
+            sent, failed = worker.drain()
+            if args.once:
+                print(f"Sent {sent}, failed {failed}")
+                return
+            time.sleep(args.poll_seconds)
+    finally:
+        worker.connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+"""
+Bulk import of clients and invoices from a CSV file, streamed.
+
+Records are read one at a time from the upload (or a file, for the CLI) and
+handled in chunks of IMPORT_CHUNK_ROWS: each chunk is validated, written with
+executemany INSERTs and committed together with the import's progress in
+import_jobs. Memory holds one chunk, whatever the size of the file.
+
+Columns are matched by name, case insensitive; an unknown column rejects the
+file rather than being dropped from every row.
+
+- clients: name, email, phone, address columns. A row whose email (case
+  insensitive) belongs to an existing client or an earlier row is skipped as
+  a duplicate, checked against one index of the user's emails read up front
+- invoices: the CSV of GET /v1/invoices/export, one line per item with the
+  lines of an invoice consecutive, grouped by invoice_id (an invoice may
+  have no number) or, in a file without that column, by invoice_number. The client is found by client_id,
+  client_email or client_name, from one index of the user's clients read up
+  front; invoices are then created as by POST /v1/invoices:bulk
+
+Rows that can't be imported are reported by line, they don't stop the import.
+
+An interrupted import (upload cut off, process killed) keeps the chunks it
+committed. Sending the same file again with its import id skips the rows
+already done; a hash of the header and those rows, stored with each
+checkpoint, checks that it is the same file.
+
+    python -m app.services.imports clients clients.csv --user-id 42 [--resume 7]
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import islice
+from typing import Iterable, Iterator, Optional
+import argparse
+import csv
+import hashlib
+import io
+import time
+
+from pydantic import ValidationError
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.models.client import Client
+from app.models.import_job import ImportJob
+from app.schemas.client import ClientCreate
+from app.services.invoices import create_invoices, validation_message
+from app.services.search import mark_clients
+
+# Rows validated, inserted and committed at a time
+IMPORT_CHUNK_ROWS = 500
+
+# Row errors kept on the job; past this they are only counted
+MAX_REPORTED_ERRORS = 1000
+
+KINDS = ("clients", "invoices")
+
+CLIENT_COLUMNS = {"name": "name", "email": "email", "phone": "phone", "address": "address"}
+# invoice_status as written by the export; status accepted too
+INVOICE_COLUMNS = {
+    "invoice_number": "number", "invoice_status": "status", "status": "status", "currency": "currency",
+    "issued_date": "issued_date", "due_date": "due_date", "subtotal": "subtotal", "tax": "tax", "total": "total",
+    "notes": "notes",
+}
+ITEM_COLUMNS = {"item_description": "description", "item_quantity": "quantity", "item_unit_price": "unit_price"}
+CLIENT_KEYS = ("client_id", "client_email", "client_name")
+# Export columns the database assigns again (ids, timestamps) or computes (item amounts);
+# invoice_id only tells which lines belong to the same invoice
+EXPORT_ONLY_COLUMNS = ("invoice_id", "created_at", "updated_at", "item_id", "item_amount")
+
+
+class ImportRejected(Exception):
+    """The file can't be imported (or this import resumed); status_code is the HTTP answer."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+@dataclass
+class ChunkOutcome:
+    imported: int = 0
+    duplicates: int = 0
+    failed: int = 0
+    errors: list = field(default_factory=list)  # [{"row": n, "error": "..."}]
+
+    def error(self, row: int, message: str) -> None:
+        self.failed += 1
+        self.errors.append({"row": row, "error": message})
+
+
+class _ByteChunks(io.RawIOBase):
+    def __init__(self, chunks: Iterable[bytes]):
+        self.chunks = iter(chunks)
+        self.pending = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self.pending:
+            self.pending = next(self.chunks, None)
+            if self.pending is None:
+                return 0
+        size = min(len(buffer), len(self.pending))
+        buffer[:size], self.pending = self.pending[:size], self.pending[size:]
+        return size
+
+
+def text_lines(chunks: Iterable[bytes]) -> io.TextIOWrapper:
+    """Text lines of a UTF-8 byte stream (a BOM is dropped), read as they are asked for."""
+    return io.TextIOWrapper(io.BufferedReader(_ByteChunks(chunks)), encoding="utf-8-sig", newline="")
+
+
+def _records(lines: Iterable[str]) -> Iterator[list[str]]:
+    try:
+        yield from csv.reader(lines)
+    except UnicodeDecodeError:
+        raise ImportRejected(400, "The file must be UTF-8 encoded")
+    except csv.Error as exc:
+        raise ImportRejected(400, f"Malformed CSV: {exc}")
+
+
+def _digest(fingerprint, record: list[str]) -> None:
+    fingerprint.update(("\x1f".join(record) + "\x1e").encode())
+
+
+def _blank(record: list[str]) -> bool:
+    return not any(value.strip() for value in record)
+
+
+class _Columns:
+    def __init__(self, header: list[str], known: Iterable[str]):
+        # A misspelt column would otherwise be dropped from every row without a word
+        unknown = [name for name in header if name not in known]
+        if unknown:
+            raise ImportRejected(400, f"Unknown columns: {', '.join(unknown)}")
+        repeated = sorted({name for name in header if header.count(name) > 1})
+        if repeated:
+            raise ImportRejected(400, f"Repeated columns: {', '.join(repeated)}")
+        self.index = {name: i for i, name in enumerate(header)}
+
+    def get(self, record: list[str], name: str) -> str:
+        i = self.index.get(name)
+        return record[i].strip() if i is not None and i < len(record) else ""
+
+    def values(self, record: list[str], names: dict) -> dict:
+        """{field: value} of the non-empty `names` columns ({column: field})."""
+        return {key: value for column, key in names.items() if (value := self.get(record, column))}
+
+
+class _ClientRows:
+    """Clients, deduplicated by email."""
+
+    def __init__(self, db: Session, user_id: int, header: list[str]):
+        if "name" not in header:
+            raise ImportRejected(400, "Missing column: name")
+        self.db, self.user_id, self.columns = db, user_id, _Columns(header, CLIENT_COLUMNS)
+        # The one read of existing clients: {lowercased email: client id}
+        self.emails = dict(db.execute(
+            select(func.lower(Client.email), Client.id).where(Client.user_id == user_id, Client.email.is_not(None))
+        ).all())
+
+    def same_group(self, previous: list[str], record: list[str]) -> bool:
+        return False
+
+    def import_chunk(self, chunk: list[tuple[int, list[str]]]) -> ChunkOutcome:
+        outcome, rows, now = ChunkOutcome(), [], datetime.utcnow()
+        for row, record in chunk:
+            if _blank(record):
+                continue
+            try:
+                payload = ClientCreate.model_validate(self.columns.values(record, CLIENT_COLUMNS))
+            except ValidationError as exc:
+                outcome.error(row, validation_message(exc))
+                continue
+            if payload.email:
+                key = payload.email.lower()
+                if key in self.emails:
+                    owner = self.emails[key]
+                    outcome.duplicates += 1
+                    outcome.errors.append({"row": row, "error": (
+                        f"Duplicate email {payload.email}: " + (f"client {owner} has it" if owner else "an earlier row has it")
+                    )})
+                    continue
+                self.emails[key] = None
+            rows.append({"user_id": self.user_id, **payload.model_dump(), "updated_at": now})
+        if rows:
+            ids = self.db.scalars(insert(Client).returning(Client.id), rows).all()
+            mark_clients(self.db, new=ids)
+            outcome.imported = len(ids)
+        return outcome
+
+
+class _InvoiceRows:
+    """Invoices with their items, one line per item."""
+
+    def __init__(self, db: Session, user_id: int, header: list[str]):
+        if not set(CLIENT_KEYS) & set(header):
+            raise ImportRejected(400, f"Missing column: one of {', '.join(CLIENT_KEYS)}")
+        known = [*INVOICE_COLUMNS, *ITEM_COLUMNS, *CLIENT_KEYS, *EXPORT_ONLY_COLUMNS]
+        self.db, self.user_id, self.columns = db, user_id, _Columns(header, known)
+        self.group_column = "invoice_id" if "invoice_id" in header else "invoice_number"
+        # The one read of existing clients, by id, email and name
+        clients = db.execute(select(Client.id, Client.email, Client.name).where(Client.user_id == user_id)).all()
+        self.client_ids = {client.id for client in clients}
+        self.by_email = {client.email.lower(): client.id for client in clients if client.email}
+        self.by_name = {}
+        for client in clients:
+            self.by_name.setdefault(client.name.lower(), client.id)
+
+    def same_group(self, previous: list[str], record: list[str]) -> bool:
+        key = self.columns.get(record, self.group_column)
+        return bool(key) and key == self.columns.get(previous, self.group_column)
+
+    def _client_id(self, record: list[str]) -> Optional[int]:
+        client_id = self.columns.get(record, "client_id")
+        if client_id.isdigit() and int(client_id) in self.client_ids:
+            return int(client_id)
+        email, name = self.columns.get(record, "client_email").lower(), self.columns.get(record, "client_name").lower()
+        return self.by_email.get(email) if email else self.by_name.get(name) if name else None
+
+    def import_chunk(self, chunk: list[tuple[int, list[str]]]) -> ChunkOutcome:
+        outcome, raw_items, first_rows = ChunkOutcome(), [], []
+        groups: list[list[tuple[int, list[str]]]] = []
+        for row, record in chunk:
+            if groups and self.same_group(groups[-1][-1][1], record):
+                groups[-1].append((row, record))
+            elif not _blank(record):
+                groups.append([(row, record)])
+        for lines in groups:
+            row, first = lines[0]
+            client_id = self._client_id(first)
+            if client_id is None:
+                outcome.error(row, "Client not found")
+                continue
+            raw = {"client_id": client_id, **self.columns.values(first, INVOICE_COLUMNS)}
+            items = [self.columns.values(record, ITEM_COLUMNS) for _, record in lines]
+            raw["items"] = [item for item in items if item]
+            raw_items.append(raw)
+            first_rows.append(row)
+        result = create_invoices(self.db, self.user_id, raw_items)
+        outcome.imported = result.succeeded
+        for item in result.results:
+            if item.error is not None:
+                outcome.error(first_rows[item.index], item.error)
+        return outcome
+
+
+def _chunks(rows: Iterator[tuple[int, list[str]]], same_group) -> Iterator[list[tuple[int, list[str]]]]:
+    # A chunk ends between two invoices, never inside one
+    chunk = []
+    for row in rows:
+        if len(chunk) >= IMPORT_CHUNK_ROWS and not same_group(chunk[-1][1], row[1]):
+            yield chunk
+            chunk = []
+        chunk.append(row)
+    if chunk:
+        yield chunk
+
+
+def start_import(db: Session, user_id: int, kind: str) -> ImportJob:
+    job = ImportJob(user_id=user_id, kind=kind, errors=[])
+    db.add(job)
+    db.commit()
+    return job
+
+
+def resumable_import(db: Session, user_id: int, kind: str, import_id: int) -> ImportJob:
+    """The user's interrupted import `import_id` of `kind`."""
+    job = db.get(ImportJob, import_id)
+    if job is None or job.user_id != user_id or job.kind != kind:
+        raise ImportRejected(404, "Import not found")
+    if job.status == "completed":
+        raise ImportRejected(409, "This import has already completed")
+    return job
+
+
+def _checkpoint(db: Session, job: ImportJob, rows: int, outcome: ChunkOutcome, fingerprint: str) -> None:
+    # The chunk's rows and the progress that skips them on resume commit together
+    job.rows_done += rows
+    job.imported += outcome.imported
+    job.duplicates += outcome.duplicates
+    job.failed += outcome.failed
+    if outcome.errors and len(job.errors) < MAX_REPORTED_ERRORS:
+        job.errors = [*job.errors, *outcome.errors][:MAX_REPORTED_ERRORS]
+    job.fingerprint = fingerprint
+    try:
+        db.commit()
+    except StaleDataError:
+        db.rollback()
+        raise ImportRejected(409, "This import is being resumed by another request")
+
+
+def run_import(db: Session, job: ImportJob, lines: Iterable[str]) -> tuple[int, float]:
+    """
+    Import the CSV `lines` (header first) for job's user, after the job's
+    rows_done rows. Commits each chunk; returns (rows handled, seconds).
+    """
+    started = time.perf_counter()
+    records = _records(lines)
+    header = [name.strip().lower() for name in next(records, [])]
+    if not header:
+        raise ImportRejected(400, "The file is empty")
+    rows_class = _ClientRows if job.kind == "clients" else _InvoiceRows
+    importer = rows_class(db, job.user_id, header)
+
+    fingerprint = hashlib.sha256()
+    _digest(fingerprint, header)
+    rows = enumerate(records, start=2)
+    skipped = 0
+    for _, record in islice(rows, job.rows_done):
+        _digest(fingerprint, record)
+        skipped += 1
+    if skipped < job.rows_done or (job.fingerprint is not None and fingerprint.hexdigest() != job.fingerprint):
+        raise ImportRejected(409, "This is not the file of the interrupted import: send the same file to resume it")
+
+    handled = 0
+    for chunk in _chunks(rows, importer.same_group):
+        outcome = importer.import_chunk(chunk)
+        for _, record in chunk:
+            _digest(fingerprint, record)
+        _checkpoint(db, job, len(chunk), outcome, fingerprint.hexdigest())
+        handled += len(chunk)
+
+    job.status = "completed"
+    job.completed_at = datetime.utcnow()
+    job.fingerprint = fingerprint.hexdigest()
+    db.commit()
+    return handled, time.perf_counter() - started
+
+
+def main() -> None:
+    from app.db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Import clients or invoices from a CSV file.")
+    parser.add_argument("kind", choices=KINDS)
+    parser.add_argument("path", help="CSV file, UTF-8, with a header row")
+    parser.add_argument("--user-id", type=int, required=True, help="account to import into")
+    parser.add_argument("--resume", type=int, default=None, metavar="IMPORT_ID", help="continue an interrupted import of this file")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.resume is not None:
+            job = resumable_import(db, args.user_id, args.kind, args.resume)
+        else:
+            job = start_import(db, args.user_id, args.kind)
+        print(f"import {job.id}: if interrupted, continue with --resume {job.id}")
+        with open(args.path, encoding="utf-8-sig", newline="") as lines:
+            rows, seconds = run_import(db, job, lines)
+        print(
+            f"✓ {job.rows_done} rows: {job.imported} imported, {job.duplicates} duplicates, {job.failed} failed "
+            f"({rows / seconds if seconds else 0:.0f} rows/s)"
+        )
+        for error in job.errors:
+            print(f"  row {error['row']}: {error['error']}")
+    except ImportRejected as exc:
+        raise SystemExit(f"✗ {exc.detail}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
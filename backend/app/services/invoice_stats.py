@@ -0,0 +1,227 @@
+"""
+Invoice aggregates: count and total per user, currency and status, overall
+(invoice_stats, the dashboard) and per month (invoice_monthly_stats, the
+revenue report).
+
+Both are kept exact incrementally instead of summing invoices on every read.
+Every write nets its changes into a StatsDelta and applies it in the same
+transaction as the invoice rows:
+
+- ORM flushes (create, update, delete, client cascades, reminders) are picked
+  up by the after_flush listener below, from the flushed objects and their
+  attribute history
+- the Core statements of the /invoices:bulk endpoints (app.services.invoices)
+  call apply_stats_delta themselves
+
+Each key is adjusted with an upsert (`invoice_count = invoice_count + ?`), so
+concurrent writers add to each other's changes instead of overwriting them;
+rows are applied in key order so two transactions can't deadlock on them.
+
+rebuild_invoice_stats / rebuild_monthly_stats recompute the tables from
+invoices, to repair them after a manual data fix (or a bug):
+
+    python -m app.services.invoice_stats [--user-id 42]
+"""
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterable, Optional
+import argparse
+
+from sqlalchemy import delete, event, func, insert, inspect, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.db.functions import year_month
+from app.models.invoice import Invoice
+from app.models.invoice_stats import InvoiceMonthlyStats, InvoiceStats
+from app.schemas.dashboard import CurrencyStats, DashboardStats, StatusTotals
+
+# Columns that decide which rows an invoice counts in, and by how much
+STATS_COLUMNS = ("user_id", "currency", "status", "total", "issued_date", "created_at")
+
+PAID_STATUSES = ("paid",)
+OUTSTANDING_STATUSES = ("sent", "overdue")  # billed, not yet paid
+UNPAID_STATUSES = ("draft", "sent")  # the dashboard counts overdue separately
+
+
+def invoice_month(issued_date: Optional[date], created_at: datetime) -> str:
+    """The month an invoice counts in: of its issue date, or of its creation for invoices without one."""
+    return f"{issued_date or created_at:%Y-%m}"
+
+
+class StatsDelta:
+    """
+    Net change per invoice_stats and invoice_monthly_stats key, accumulated
+    over a transaction's writes. Invoices are described by their STATS_COLUMNS
+    values: (user_id, currency, status, total, issued_date, created_at).
+    """
+
+    def __init__(self):
+        self.changes: dict[tuple, list] = defaultdict(lambda: [0, Decimal(0)])  # (user_id, currency, status)
+        self.monthly: dict[tuple, list] = defaultdict(lambda: [0, Decimal(0)])  # (user_id, month, currency, status)
+
+    def add(self, user_id: int, currency: str, status: str, total: Optional[Decimal],
+            issued_date: Optional[date], created_at: datetime, sign: int = 1) -> None:
+        month = invoice_month(issued_date, created_at)
+        for change in (self.changes[(user_id, currency, status)], self.monthly[(user_id, month, currency, status)]):
+            change[0] += sign
+            change[1] += sign * Decimal(total or 0)
+
+    def move(self, old: tuple, new: tuple) -> None:
+        if old != new:
+            self.add(*old, sign=-1)
+            self.add(*new)
+
+    def rows(self) -> list[dict]:
+        return [
+            {"user_id": user_id, "currency": currency, "status": status, "invoice_count": count, "total": total}
+            for (user_id, currency, status), (count, total) in sorted(self.changes.items())
+            if count or total
+        ]
+
+    def monthly_rows(self) -> list[dict]:
+        return [
+            {"user_id": user_id, "month": month, "currency": currency, "status": status, "invoice_count": count, "total": total}
+            for (user_id, month, currency, status), (count, total) in sorted(self.monthly.items())
+            if count or total
+        ]
+
+
+def _add_to_counts(conn: Connection, table, rows: list[dict]) -> None:
+    """Add each row's invoice_count and total to the row with the same primary key (creating it)."""
+    if not rows:
+        return
+    key = list(table.primary_key.columns)
+    dialect = conn.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        insert_ = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        stmt = insert_(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=key,
+            set_={
+                "invoice_count": table.c.invoice_count + stmt.excluded.invoice_count,
+                "total": table.c.total + stmt.excluded.total,
+            },
+        )
+        conn.execute(stmt, rows)
+        return
+
+    # Generic fallback: adjust in place, insert keys seen for the first time
+    for row in rows:
+        result = conn.execute(
+            update(table)
+            .where(*(column == row[column.name] for column in key))
+            .values(invoice_count=table.c.invoice_count + row["invoice_count"], total=table.c.total + row["total"])
+        )
+        if result.rowcount == 0:
+            conn.execute(insert(table).values(**row))
+
+
+def apply_stats_delta(conn: Connection, delta: StatsDelta) -> None:
+    _add_to_counts(conn, InvoiceStats.__table__, delta.rows())
+    _add_to_counts(conn, InvoiceMonthlyStats.__table__, delta.monthly_rows())
+
+
+def _stats_values(invoice: Invoice, previous: bool = False) -> tuple:
+    state = inspect(invoice)
+    values = []
+    for column in STATS_COLUMNS:
+        history = state.attrs[column].history
+        values.append(history.deleted[0] if previous and history.deleted else getattr(invoice, column))
+    return tuple(values)
+
+
+@event.listens_for(Session, "before_flush")
+def _load_deleted_invoices(session: Session, flush_context, instances) -> None:
+    # A deleted row can't be loaded after the flush: read any expired values now
+    for invoice in session.deleted:
+        if isinstance(invoice, Invoice):
+            _stats_values(invoice)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_invoice_changes(session: Session, flush_context) -> None:
+    # new / dirty / deleted and attribute history still describe the flush that just ran
+    delta = StatsDelta()
+    for invoice in session.new:
+        if isinstance(invoice, Invoice):
+            delta.add(*_stats_values(invoice))
+    for invoice in session.dirty:
+        if isinstance(invoice, Invoice):
+            delta.move(_stats_values(invoice, previous=True), _stats_values(invoice))
+    for invoice in session.deleted:
+        if isinstance(invoice, Invoice):
+            delta.add(*_stats_values(invoice), sign=-1)
+    apply_stats_delta(session.connection(), delta)
+
+
+def _rebuild(conn: Connection, table, groups: list, user_id: Optional[int]) -> int:
+    if conn.dialect.name == "postgresql":
+        # Holds off concurrent adjustments until this transaction commits: a writer that
+        # already adjusted commits first and is counted below, one that hasn't applies
+        # its change on top of the rebuilt rows
+        conn.execute(text(f"LOCK TABLE {table.name} IN SHARE ROW EXCLUSIVE MODE"))
+    clear = delete(table)
+    counted = select(*groups, func.count(), func.coalesce(func.sum(Invoice.total), 0)).group_by(*groups)
+    if user_id is not None:
+        clear = clear.where(table.c.user_id == user_id)
+        counted = counted.where(Invoice.user_id == user_id)
+    conn.execute(clear)
+    columns = [column.name for column in table.primary_key.columns] + ["invoice_count", "total"]
+    return conn.execute(insert(table).from_select(columns, counted)).rowcount
+
+
+def rebuild_invoice_stats(conn: Connection, user_id: Optional[int] = None) -> int:
+    """Recompute invoice_stats from invoices (every user's, or one user's); returns the rows written."""
+    return _rebuild(conn, InvoiceStats.__table__, [Invoice.user_id, Invoice.currency, Invoice.status], user_id)
+
+
+def rebuild_monthly_stats(conn: Connection, user_id: Optional[int] = None) -> int:
+    """Recompute invoice_monthly_stats from invoices; returns the rows written."""
+    month = year_month(func.coalesce(Invoice.issued_date, Invoice.created_at))
+    return _rebuild(conn, InvoiceMonthlyStats.__table__, [Invoice.user_id, month, Invoice.currency, Invoice.status], user_id)
+
+
+def summarize_stats(rows: Iterable, total_clients: int) -> DashboardStats:
+    """Build the dashboard figures from a user's invoice_stats rows (currency, status, invoice_count, total)."""
+    currencies: dict[str, CurrencyStats] = {}
+    counts: dict[str, int] = defaultdict(int)
+    for row in rows:
+        if not row.invoice_count:
+            continue
+        stats = currencies.setdefault(row.currency, CurrencyStats(currency=row.currency))
+        stats.by_status[row.status] = StatusTotals(count=row.invoice_count, total=row.total)
+        stats.invoice_count += row.invoice_count
+        if row.status in PAID_STATUSES:
+            stats.revenue += row.total
+        if row.status in OUTSTANDING_STATUSES:
+            stats.outstanding += row.total
+        if row.status == "overdue":
+            stats.overdue += row.total
+        counts[row.status] += row.invoice_count
+    return DashboardStats(
+        total_clients=total_clients,
+        total_invoices=sum(counts.values()),
+        paid_invoices=sum(counts[status] for status in PAID_STATUSES),
+        unpaid_invoices=sum(counts[status] for status in UNPAID_STATUSES),
+        overdue_invoices=counts["overdue"],
+        currencies=sorted(currencies.values(), key=lambda stats: (-stats.invoice_count, stats.currency)),
+    )
+
+
+def main() -> None:
+    from app.db.session import engine
+
+    parser = argparse.ArgumentParser(description="Recompute the invoice aggregates (invoice_stats, invoice_monthly_stats) from invoices.")
+    parser.add_argument("--user-id", type=int, default=None, help="only rebuild this user's rows")
+    args = parser.parse_args()
+    with engine.begin() as conn:
+        rows = rebuild_invoice_stats(conn, args.user_id)
+        monthly_rows = rebuild_monthly_stats(conn, args.user_id)
+    print(f"✓ invoice_stats rebuilt: {rows} rows, invoice_monthly_stats: {monthly_rows} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,382 @@
+"""
+Invoice writes shared by the single-invoice routes and the /invoices:bulk endpoints.
+
+Bulk operations apply a whole batch in one transaction with a fixed number
+of statements, however many invoices it holds: one query resolves every
+referenced client (or invoice), one checks every number, and invoices and
+items are written with executemany inserts / primary-key updates.
+
+Each entry gets its own BulkItemResult. An entry that fails on its own (bad
+payload 422, unknown client or invoice 404, duplicate number 400, stale
+version 412) is reported and skipped, and the rest of the batch is still
+applied.
+
+Dashboard aggregates (invoice_stats) are adjusted in the same transaction:
+these Core statements bypass the ORM flush that app.services.invoice_stats
+listens to, so they apply their StatsDelta themselves. For the same reason
+they record the invoices whose search documents need rewriting at commit
+(app.services.search.mark_invoices).
+
+Item lists sent with an update are diffed against the current items by id
+(diff_items): new items are inserted, changed ones updated, missing ones
+deleted, and unchanged ones left alone with their ids.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Iterable
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.core.invoice_numbers import allocate_invoice_numbers
+from app.models.client import Client
+from app.models.invoice import Invoice, InvoiceItem
+from app.services.invoice_stats import StatsDelta, apply_stats_delta
+from app.services.search import INVOICE_TEXT, mark_invoices
+from app.schemas.invoice import (
+    BulkItemResult, BulkResult, InvoiceBulkUpdateItem, InvoiceCreate, InvoiceItemCreate, InvoiceItemUpsert,
+)
+
+TWO_PLACES = Decimal("0.01")
+
+# Generated numbers tried per invoice before giving up (they can hit hand-entered ones)
+NUMBER_ATTEMPTS = 5
+
+
+def quantize_money(value: Decimal | None) -> Decimal:
+    if value is None:
+        return Decimal("0.00")
+    if not isinstance(value, Decimal):
+        value = Decimal(value)
+    return value.quantize(TWO_PLACES, rounding=ROUND_HALF_UP)
+
+
+def item_values(item: InvoiceItemCreate) -> dict:
+    """Column values for an invoice item; amount defaults to quantity * unit_price."""
+    amount = item.amount
+    if amount is None:
+        amount = quantize_money(item.quantity) * quantize_money(item.unit_price)
+    return {
+        "description": item.description,
+        "quantity": quantize_money(item.quantity),
+        "unit_price": quantize_money(item.unit_price),
+        "amount": quantize_money(amount),
+    }
+
+
+# Item columns compared by diff_items
+ITEM_COLUMNS = ("description", "quantity", "unit_price", "amount")
+
+
+@dataclass
+class ItemChanges:
+    inserts: list[dict] = field(default_factory=list)  # column values of new items
+    updates: dict[int, dict] = field(default_factory=dict)  # item id -> only the columns that changed
+    deletes: list[int] = field(default_factory=list)
+    unknown: list[int] = field(default_factory=list)  # ids that aren't (or are repeated) items of the invoice
+
+
+def diff_items(current: dict[int, dict], incoming: list[InvoiceItemUpsert]) -> ItemChanges:
+    """
+    Compare a requested item list with the invoice's current items ({id:
+    column values}): unchanged items cost nothing and keep their ids.
+    """
+    changes = ItemChanges()
+    kept = set()
+    for item in incoming:
+        values = item_values(item)
+        if item.id is None:
+            changes.inserts.append(values)
+        elif item.id not in current or item.id in kept:
+            changes.unknown.append(item.id)
+        else:
+            kept.add(item.id)
+            changed = {column: value for column, value in values.items() if current[item.id][column] != value}
+            if changed:
+                changes.updates[item.id] = changed
+    changes.deletes = [item_id for item_id in current if item_id not in kept]
+    return changes
+
+
+def unknown_items_message(item_ids: list[int]) -> str:
+    return f"Items {', '.join(map(str, item_ids))} are not items of this invoice (or are listed twice)"
+
+
+def duplicate_number_message(number: str) -> str:
+    return f"Invoice number '{number}' already exists. Please use a different number."
+
+
+def validation_message(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" for e in exc.errors())
+
+
+def _validate_each(model: type[BaseModel], raw_items: list[dict[str, Any]], results: dict) -> dict[int, Any]:
+    payloads = {}
+    for index, raw in enumerate(raw_items):
+        try:
+            payloads[index] = model.model_validate(raw)
+        except ValidationError as exc:
+            results[index] = BulkItemResult(index=index, status=422, error=validation_message(exc))
+    return payloads
+
+
+def _numbers_in_use(db: Session, user_id: int, numbers: Iterable[str]) -> dict[str, int]:
+    """{number: invoice id} for the given numbers the user already has."""
+    numbers = set(numbers)
+    if not numbers:
+        return {}
+    rows = db.execute(select(Invoice.number, Invoice.id).where(Invoice.user_id == user_id, Invoice.number.in_(numbers)))
+    return dict(rows.all())
+
+
+def _insert_items(db: Session, items_by_invoice: dict[int, list[InvoiceItemCreate]]) -> None:
+    rows = [
+        {"invoice_id": invoice_id, **item_values(item)}
+        for invoice_id, items in items_by_invoice.items()
+        for item in items
+    ]
+    if rows:
+        db.execute(insert(InvoiceItem), rows)
+
+
+def _summarize(results: dict[int, BulkItemResult]) -> BulkResult:
+    ordered = [results[index] for index in sorted(results)]
+    failed = sum(result.error is not None for result in ordered)
+    return BulkResult(succeeded=len(ordered) - failed, failed=failed, results=ordered)
+
+
+def bulk_create_invoices(db: Session, user_id: int, raw_items: list[dict[str, Any]]) -> BulkResult:
+    """
+    Create a batch of invoices (InvoiceCreate payloads) and commit.
+
+    Committing here keeps the sequence row lock from allocate_invoice_numbers
+    inside one `run_sync` call, as create_invoice does. A hand-entered number
+    taken concurrently after the check surfaces as IntegrityError.
+    """
+    result = create_invoices(db, user_id, raw_items)
+    db.commit()
+    return result
+
+
+def create_invoices(db: Session, user_id: int, raw_items: list[dict[str, Any]]) -> BulkResult:
+    """bulk_create_invoices without the commit, for callers that commit more with the batch."""
+    results: dict[int, BulkItemResult] = {}
+    payloads: dict[int, InvoiceCreate] = _validate_each(InvoiceCreate, raw_items, results)
+
+    client_ids = {payload.client_id for payload in payloads.values()}
+    owned_clients = set(db.scalars(
+        select(Client.id).where(Client.user_id == user_id, Client.id.in_(client_ids))
+    )) if client_ids else set()
+    for index, payload in list(payloads.items()):
+        if payload.client_id not in owned_clients:
+            results[index] = BulkItemResult(index=index, status=404, error="Client not found")
+            del payloads[index]
+
+    # Hand-entered numbers and a first draw of generated ones are checked with one query
+    numbers = {index: payload.number for index, payload in payloads.items() if payload.number}
+    pending = [index for index, payload in payloads.items() if not payload.number]
+    drawn = dict(zip(pending, allocate_invoice_numbers(db, user_id, len(pending)))) if pending else {}
+    in_use = _numbers_in_use(db, user_id, [*numbers.values(), *drawn.values()])
+    seen = set()
+    for index, number in list(numbers.items()):
+        if number in in_use or number in seen:
+            results[index] = BulkItemResult(index=index, status=400, number=number, error=duplicate_number_message(number))
+            del payloads[index], numbers[index]
+        seen.add(number)
+
+    for _ in range(NUMBER_ATTEMPTS):
+        clashes = [index for index, number in drawn.items() if number in in_use or number in seen]
+        numbers.update((index, number) for index, number in drawn.items() if index not in clashes)
+        seen.update(numbers.values())
+        if not clashes:
+            break
+        # Drawn values that hit hand-entered numbers stay burned; draw replacements
+        drawn = dict(zip(clashes, allocate_invoice_numbers(db, user_id, len(clashes))))
+        in_use = _numbers_in_use(db, user_id, drawn.values())
+    else:
+        for index in clashes:
+            results[index] = BulkItemResult(index=index, status=409, error="Could not allocate an invoice number, please retry")
+            del payloads[index]
+
+    if payloads:
+        indexes = sorted(payloads)
+        now = datetime.utcnow()
+        rows = [
+            {
+                "user_id": user_id,
+                "client_id": payloads[index].client_id,
+                "number": numbers[index],
+                "status": payloads[index].status or "draft",
+                "issued_date": payloads[index].issued_date,
+                "due_date": payloads[index].due_date,
+                "currency": payloads[index].currency or "NGN",
+                "subtotal": payloads[index].subtotal,
+                "tax": payloads[index].tax,
+                "total": payloads[index].total,
+                "notes": payloads[index].notes,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for index in indexes
+        ]
+        # Every row has a number, unique per user, so RETURNING needn't preserve row order
+        # (SQLite can only guarantee that by falling back to one INSERT per row)
+        ids = dict(db.execute(insert(Invoice).returning(Invoice.number, Invoice.id), rows).all())
+        _insert_items(db, {ids[numbers[index]]: payloads[index].items or [] for index in indexes})
+        delta = StatsDelta()
+        for row in rows:
+            delta.add(user_id, row["currency"], row["status"], row["total"], row["issued_date"], row["created_at"])
+        apply_stats_delta(db.connection(), delta)
+        mark_invoices(db, new=ids.values())
+        for index in indexes:
+            results[index] = BulkItemResult(index=index, status=201, id=ids[numbers[index]], number=numbers[index], version=1)
+    return _summarize(results)
+
+
+def bulk_update_invoices(db: Session, user_id: int, raw_items: list[dict[str, Any]]) -> BulkResult:
+    """
+    Apply a batch of partial updates (InvoiceBulkUpdateItem: id, optional
+    expected version, any InvoiceUpdate fields; `items` is diffed against the
+    invoice's current items) and commit. Updates are version-checked, so an
+    invoice changed concurrently raises StaleDataError.
+    """
+    results: dict[int, BulkItemResult] = {}
+    payloads: dict[int, InvoiceBulkUpdateItem] = _validate_each(InvoiceBulkUpdateItem, raw_items, results)
+
+    ids = {payload.id for payload in payloads.values()}
+    current = {
+        row.id: row for row in db.execute(
+            select(
+                Invoice.id, Invoice.number, Invoice.version,
+                Invoice.currency, Invoice.status, Invoice.total, Invoice.issued_date, Invoice.created_at,
+            )
+            .where(Invoice.user_id == user_id, Invoice.id.in_(ids))
+        )
+    } if ids else {}
+    seen_ids = set()
+    for index, payload in list(payloads.items()):
+        if payload.id not in current:
+            results[index] = BulkItemResult(index=index, status=404, id=payload.id, error="Invoice not found")
+            del payloads[index]
+        elif payload.id in seen_ids:
+            results[index] = BulkItemResult(index=index, status=400, id=payload.id, error="Invoice appears more than once in the batch")
+            del payloads[index]
+        elif payload.version is not None and payload.version != current[payload.id].version:
+            results[index] = BulkItemResult(
+                index=index, status=412, id=payload.id, version=current[payload.id].version,
+                error="Invoice was changed by someone else",
+            )
+            del payloads[index]
+        seen_ids.add(payload.id)
+
+    renames = {
+        index: payload.number for index, payload in payloads.items()
+        if payload.number and payload.number != current[payload.id].number
+    }
+    in_use = _numbers_in_use(db, user_id, renames.values())
+    seen_numbers = set()
+    for index, number in renames.items():
+        if in_use.get(number, payloads[index].id) != payloads[index].id or number in seen_numbers:
+            results[index] = BulkItemResult(index=index, status=400, id=payloads[index].id, number=number, error=duplicate_number_message(number))
+            del payloads[index]
+        seen_numbers.add(number)
+
+    # One fetch of the current items of every invoice whose item list was sent
+    with_items = {payload.id: payload.items for payload in payloads.values() if payload.items is not None}
+    current_items: dict[int, dict[int, dict]] = {invoice_id: {} for invoice_id in with_items}
+    if with_items:
+        rows = db.execute(
+            select(InvoiceItem.id, InvoiceItem.invoice_id, *(getattr(InvoiceItem, c) for c in ITEM_COLUMNS))
+            .where(InvoiceItem.invoice_id.in_(with_items))
+        )
+        for row in rows:
+            current_items[row.invoice_id][row.id] = {c: getattr(row, c) for c in ITEM_COLUMNS}
+    changes = {}
+    for index, payload in list(payloads.items()):
+        if payload.id in with_items:
+            changes[payload.id] = diff_items(current_items[payload.id], with_items[payload.id])
+            if changes[payload.id].unknown:
+                results[index] = BulkItemResult(index=index, status=400, id=payload.id, error=unknown_items_message(changes.pop(payload.id).unknown))
+                del payloads[index]
+
+    if payloads:
+        now = datetime.utcnow()
+        # ORM bulk UPDATE by primary key, checking and bumping each row's version
+        db.execute(update(Invoice), [
+            {
+                "id": payload.id,
+                **payload.model_dump(exclude_unset=True, exclude={"id", "items", "version"}),
+                "updated_at": now,
+                "version": current[payload.id].version,
+            }
+            for payload in payloads.values()
+        ])
+        # Rows read above are version-checked by the UPDATE, so their old values are still current
+        delta = StatsDelta()
+        for payload in payloads.values():
+            old = current[payload.id]
+            new = payload.model_dump(exclude_unset=True, include={"currency", "status", "total", "issued_date"})
+            delta.move(
+                (user_id, old.currency, old.status, old.total, old.issued_date, old.created_at),
+                (
+                    user_id, new.get("currency", old.currency), new.get("status", old.status),
+                    new.get("total", old.total), new.get("issued_date", old.issued_date), old.created_at,
+                ),
+            )
+        apply_stats_delta(db.connection(), delta)
+        item_updates = [
+            {"id": item_id, **values} for diff in changes.values() for item_id, values in diff.updates.items()
+        ]
+        if item_updates:
+            db.execute(update(InvoiceItem), item_updates)
+        deleted = [item_id for diff in changes.values() for item_id in diff.deletes]
+        if deleted:
+            db.execute(delete(InvoiceItem).where(InvoiceItem.id.in_(deleted)))
+        inserts = [{"invoice_id": invoice_id, **values} for invoice_id, diff in changes.items() for values in diff.inserts]
+        if inserts:
+            db.execute(insert(InvoiceItem), inserts)
+        mark_invoices(db, changed=[
+            payload.id for payload in payloads.values()
+            if payload.id in changes or payload.model_fields_set & set(INVOICE_TEXT)
+        ])
+        for index, payload in payloads.items():
+            number = payload.number if "number" in payload.model_fields_set else current[payload.id].number
+            results[index] = BulkItemResult(
+                index=index, status=200, id=payload.id, number=number, version=current[payload.id].version + 1,
+            )
+    db.commit()
+    return _summarize(results)
+
+
+def bulk_delete_invoices(db: Session, user_id: int, ids: list[int]) -> BulkResult:
+    """Delete the user's invoices (and their items) by id and commit."""
+    results: dict[int, BulkItemResult] = {}
+    owned = set(db.scalars(select(Invoice.id).where(Invoice.user_id == user_id, Invoice.id.in_(set(ids)))))
+    seen = set()
+    for index, invoice_id in enumerate(ids):
+        if invoice_id not in owned:
+            results[index] = BulkItemResult(index=index, status=404, id=invoice_id, error="Invoice not found")
+        elif invoice_id in seen:
+            results[index] = BulkItemResult(index=index, status=400, id=invoice_id, error="Invoice appears more than once in the batch")
+        else:
+            results[index] = BulkItemResult(index=index, status=204, id=invoice_id)
+        seen.add(invoice_id)
+
+    if owned:
+        # Items explicitly: SQLite doesn't enforce the ON DELETE CASCADE
+        db.execute(delete(InvoiceItem).where(InvoiceItem.invoice_id.in_(owned)))
+        # RETURNING the deleted rows' values: exact even if one was changed since the check above
+        deleted = db.execute(
+            delete(Invoice).where(Invoice.id.in_(owned)).returning(
+                Invoice.currency, Invoice.status, Invoice.total, Invoice.issued_date, Invoice.created_at,
+            )
+        )
+        delta = StatsDelta()
+        for row in deleted:
+            delta.add(user_id, row.currency, row.status, row.total, row.issued_date, row.created_at, sign=-1)
+        apply_stats_delta(db.connection(), delta)
+        mark_invoices(db, deleted=owned)
+    db.commit()
+    return _summarize(results)
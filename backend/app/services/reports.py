@@ -0,0 +1,95 @@
+"""
+Revenue and accounts-receivable reports, computed in SQL.
+
+Revenue reads invoice_monthly_stats (kept current by app.services.invoice_stats),
+so its cost depends on the months asked for, not on how many invoices they
+hold. Aging groups the user's open invoices (sent / overdue) into buckets of
+days past due_date with one GROUP BY; bucket edges are bound as dates, so no
+date arithmetic has to be spelled per dialect.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Iterable, Optional
+
+from sqlalchemy import Select, case, func, select
+
+from app.models.invoice import Invoice
+from app.models.invoice_stats import InvoiceMonthlyStats
+from app.schemas.report import AgingBucket, AgingCurrency, AgingReport
+from app.services.invoice_stats import OUTSTANDING_STATUSES, PAID_STATUSES
+
+# Issued-but-not-billed: left out of revenue
+UNBILLED_STATUSES = ("draft", "cancelled")
+
+# (bucket, oldest days past due it holds); "current" is not yet due, or has no due date
+AGING_BUCKETS = (("0-30", 30), ("31-60", 60), ("61-90", 90), ("90+", None))
+AGING_BUCKET_NAMES = ("current", *(name for name, _ in AGING_BUCKETS))
+
+
+def shift_month(month: str, months: int) -> str:
+    """`'2025-01'` shifted by a number of months (negative for earlier)."""
+    year, index = divmod(int(month[:4]) * 12 + int(month[5:7]) - 1 + months, 12)
+    return f"{year:04d}-{index + 1:02d}"
+
+
+def revenue_query(user_id: int, start: str, end: str, currency: Optional[str] = None) -> Select:
+    stats = InvoiceMonthlyStats
+    billed = stats.status.notin_(UNBILLED_STATUSES)
+    invoice_count = func.sum(case((billed, stats.invoice_count), else_=0))
+    query = (
+        select(
+            stats.month,
+            stats.currency,
+            invoice_count.label("invoice_count"),
+            func.sum(case((billed, stats.total), else_=0)).label("invoiced"),
+            func.sum(case((stats.status.in_(PAID_STATUSES), stats.total), else_=0)).label("paid"),
+        )
+        .where(stats.user_id == user_id, stats.month >= start, stats.month <= end)
+        .group_by(stats.month, stats.currency)
+        .having(invoice_count > 0)
+        .order_by(stats.month, stats.currency)
+    )
+    if currency:
+        query = query.where(stats.currency == currency)
+    return query
+
+
+def aging_query(user_id: int, as_of: date, currency: Optional[str] = None) -> Select:
+    due = Invoice.due_date
+    bucket = case(
+        (due.is_(None) | (due > as_of), "current"),
+        *((due >= as_of - timedelta(days=days), name) for name, days in AGING_BUCKETS if days is not None),
+        else_=AGING_BUCKETS[-1][0],
+    )
+    open_invoices = select(Invoice.currency, bucket.label("bucket"), Invoice.total).where(
+        Invoice.user_id == user_id, Invoice.status.in_(OUTSTANDING_STATUSES)
+    )
+    if currency:
+        open_invoices = open_invoices.where(Invoice.currency == currency)
+    # Grouped outside: Postgres won't match a GROUP BY CASE whose dates are separate bind parameters
+    rows = open_invoices.subquery()
+    return (
+        select(rows.c.currency, rows.c.bucket, func.count().label("invoice_count"), func.coalesce(func.sum(rows.c.total), 0).label("total"))
+        .group_by(rows.c.currency, rows.c.bucket)
+    )
+
+
+def summarize_aging(rows: Iterable, as_of: date) -> AgingReport:
+    """Build the report from aging_query rows (currency, bucket, invoice_count, total)."""
+    by_currency: dict[str, dict[str, tuple]] = defaultdict(dict)
+    for row in rows:
+        by_currency[row.currency][row.bucket] = (row.invoice_count, Decimal(row.total))
+    currencies = []
+    for currency, buckets in sorted(by_currency.items()):
+        filled = [
+            AgingBucket(bucket=name, invoice_count=buckets.get(name, (0,))[0], total=buckets.get(name, (0, Decimal("0.00")))[1])
+            for name in AGING_BUCKET_NAMES
+        ]
+        currencies.append(AgingCurrency(
+            currency=currency,
+            invoice_count=sum(bucket.invoice_count for bucket in filled),
+            total=sum((bucket.total for bucket in filled), Decimal("0.00")),
+            buckets=filled,
+        ))
+    return AgingReport(as_of=as_of, currencies=currencies)
@@ -0,0 +1,287 @@
+"""
+Full-text search over a user's invoices and clients.
+
+search_documents holds one row of searchable text per invoice (number,
+client name, notes, item descriptions) and per client (name, email). It is
+kept in sync within the same transaction as the writes it reflects, but once
+per commit rather than once per flush:
+
+- ORM flushes record which invoices and clients changed text (after_flush,
+  from the flushed objects and their attribute history)
+- the Core statements of the /invoices:bulk endpoints and of CSV imports
+  record theirs with mark_invoices / mark_clients
+- before the commit, the touched documents are rewritten with one INSERT ...
+  SELECT ... ON CONFLICT DO UPDATE per kind, whatever the number of rows, and
+  those of deleted entities removed with one DELETE. The upsert (not a DELETE
+  then INSERT) lets two transactions rewrite the same document at once: the
+  second one's DELETE would miss the row the first just inserted
+
+A client rename rewrites the documents of the client's invoices too.
+
+Queries are ranked by relevance (bm25 on SQLite FTS5, ts_rank on Postgres)
+and paged with a keyset cursor over (rank, document id). Every term must
+match, as a prefix: "acm logo" finds "Acme" / "Logo design".
+
+rebuild_search_index rewrites every document (or one user's), to fill the
+table on upgrade or repair it after a manual data fix:
+
+    python -m app.services.search [--user-id 42]
+"""
+from typing import Optional
+import argparse
+import re
+
+from sqlalchemy import and_, column, delete, event, func, insert, inspect, literal, literal_column, or_, select, table, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.db.functions import search_vector, text_agg
+from app.models.client import Client
+from app.models.invoice import Invoice, InvoiceItem
+from app.models.search_document import SearchDocument
+
+KINDS = ("invoice", "client")
+
+# Attributes whose change rewrites a document
+INVOICE_TEXT = ("number", "notes", "client_id")
+ITEM_TEXT = ("description", "invoice_id")
+CLIENT_TEXT = ("name", "email")
+
+# Longest query considered: terms past this are ignored
+MAX_TERMS = 8
+
+_TERM = re.compile(r"\w+")
+
+_PENDING = "search_pending"
+
+_fts = table("search_documents_fts", column("rowid"))
+
+_DOCUMENT_COLUMNS = ["user_id", "kind", "entity_id", "title", "subtitle", "content"]
+
+
+def search_terms(q: str) -> list[str]:
+    """Lowercased words of a query; punctuation (and so any query syntax) is dropped."""
+    return _TERM.findall(q.lower())[:MAX_TERMS]
+
+
+class PendingSearch:
+    """Entities whose documents a transaction has to rewrite, by kind."""
+
+    def __init__(self):
+        self.new: dict[str, set] = {kind: set() for kind in KINDS}
+        self.changed: dict[str, set] = {kind: set() for kind in KINDS}
+        self.deleted: dict[str, set] = {kind: set() for kind in KINDS}
+        self.renamed_clients: set = set()
+
+    def __bool__(self) -> bool:
+        return any(self.new.values()) or any(self.changed.values()) or any(self.deleted.values()) or bool(self.renamed_clients)
+
+
+def _pending(session: Session) -> PendingSearch:
+    return session.info.setdefault(_PENDING, PendingSearch())
+
+
+def _mark(session: Session, kind: str, new, changed, deleted) -> None:
+    pending = _pending(session)
+    pending.new[kind].update(new)
+    pending.changed[kind].update(changed)
+    pending.deleted[kind].update(deleted)
+
+
+def mark_invoices(session: Session, new=(), changed=(), deleted=()) -> None:
+    """Record invoices written with Core statements, which the flush listener doesn't see."""
+    _mark(session, "invoice", new, changed, deleted)
+
+
+def mark_clients(session: Session, new=(), changed=(), deleted=()) -> None:
+    """mark_invoices for clients (CSV imports insert them with Core statements)."""
+    _mark(session, "client", new, changed, deleted)
+
+
+def _invoice_documents(where) -> select:
+    items = select(text_agg(InvoiceItem.description)).where(InvoiceItem.invoice_id == Invoice.id).scalar_subquery()
+    content = (
+        func.coalesce(Invoice.number, "") + " " + Client.name + " "
+        + func.coalesce(Invoice.notes, "") + " " + func.coalesce(items, "")
+    )
+    return (
+        select(Invoice.user_id, literal("invoice"), Invoice.id, Invoice.number, Client.name, content)
+        .join(Client, Client.id == Invoice.client_id)
+        .where(where)
+    )
+
+
+def _client_documents(where) -> select:
+    content = Client.name + " " + func.coalesce(Client.email, "")
+    return select(Client.user_id, literal("client"), Client.id, Client.name, Client.email, content).where(where)
+
+
+def _write_documents(conn: Connection, kind: str, documents: select) -> None:
+    """INSERT ... SELECT `documents`, overwriting the ones that already exist."""
+    dialect = conn.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        insert_ = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        stmt = insert_(SearchDocument).from_select(_DOCUMENT_COLUMNS, documents)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[SearchDocument.kind, SearchDocument.entity_id],
+            set_={name: stmt.excluded[name] for name in ("user_id", "title", "subtitle", "content")},
+        )
+        conn.execute(stmt)
+        return
+
+    # Generic fallback: delete, then insert
+    entity_ids = select(documents.subquery().c.id)
+    conn.execute(delete(SearchDocument).where(SearchDocument.kind == kind, SearchDocument.entity_id.in_(entity_ids)))
+    conn.execute(insert(SearchDocument).from_select(_DOCUMENT_COLUMNS, documents))
+
+
+def sync_search_documents(conn: Connection, pending: PendingSearch) -> None:
+    """Rewrite the documents of the pending entities: one upsert per kind, one DELETE for deleted entities."""
+    stale = []
+    for kind in KINDS:
+        # Entities created in this transaction have no document yet
+        ids = pending.deleted[kind] - pending.new[kind]
+        if ids:
+            stale.append(and_(SearchDocument.kind == kind, SearchDocument.entity_id.in_(ids)))
+    if stale:
+        conn.execute(delete(SearchDocument).where(or_(*stale)))
+
+    invoice_ids = (pending.new["invoice"] | pending.changed["invoice"]) - pending.deleted["invoice"]
+    where = []
+    if invoice_ids:
+        where.append(Invoice.id.in_(invoice_ids))
+    if pending.renamed_clients:
+        where.append(Invoice.client_id.in_(pending.renamed_clients))
+    if where:
+        _write_documents(conn, "invoice", _invoice_documents(or_(*where)))
+    client_ids = (pending.new["client"] | pending.changed["client"]) - pending.deleted["client"]
+    if client_ids:
+        _write_documents(conn, "client", _client_documents(Client.id.in_(client_ids)))
+
+
+def _text_changed(obj, attributes) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[name].history.has_changes() for name in attributes)
+
+
+@event.listens_for(Session, "before_flush")
+def _load_deleted_items(session: Session, flush_context, instances) -> None:
+    # A deleted row can't be loaded after the flush: read the invoice it belonged to now
+    for obj in session.deleted:
+        if isinstance(obj, InvoiceItem):
+            obj.invoice_id
+
+
+@event.listens_for(Session, "after_flush")
+def _track_search_changes(session: Session, flush_context) -> None:
+    pending = _pending(session)
+    for obj in session.new:
+        if isinstance(obj, Invoice):
+            pending.new["invoice"].add(obj.id)
+        elif isinstance(obj, InvoiceItem):
+            pending.changed["invoice"].add(obj.invoice_id)
+        elif isinstance(obj, Client):
+            pending.new["client"].add(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, Invoice) and _text_changed(obj, INVOICE_TEXT):
+            pending.changed["invoice"].add(obj.id)
+        elif isinstance(obj, InvoiceItem) and _text_changed(obj, ITEM_TEXT):
+            pending.changed["invoice"].add(obj.invoice_id)
+            # An item moved to another invoice leaves its old one too
+            pending.changed["invoice"].update(inspect(obj).attrs.invoice_id.history.deleted)
+        elif isinstance(obj, Client) and _text_changed(obj, CLIENT_TEXT):
+            pending.changed["client"].add(obj.id)
+            if inspect(obj).attrs.name.history.has_changes():
+                pending.renamed_clients.add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, Invoice):
+            pending.deleted["invoice"].add(inspect(obj).identity[0])
+        elif isinstance(obj, InvoiceItem):
+            pending.changed["invoice"].add(obj.invoice_id)
+        elif isinstance(obj, Client):
+            pending.deleted["client"].add(inspect(obj).identity[0])
+
+
+@event.listens_for(Session, "before_commit")
+def _sync_before_commit(session: Session) -> None:
+    # Commit flushes after this hook: flush first so the last changes are recorded too
+    session.flush()
+    pending = session.info.pop(_PENDING, None)
+    if pending:
+        sync_search_documents(session.connection(), pending)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_on_end(session: Session, transaction) -> None:
+    # Changes recorded by a transaction that rolled back are no longer true
+    if transaction.parent is None:
+        session.info.pop(_PENDING, None)
+
+
+def _match(conn: Connection, user_id: int, terms: list[str]) -> tuple:
+    """(join target, match clause, rank) for the dialect; lower rank is more relevant."""
+    if conn.dialect.name == "postgresql":
+        query = func.to_tsquery(literal_column("'simple'"), " & ".join(f"{term}:*" for term in terms))
+        vector = search_vector(SearchDocument.content)
+        return None, vector.op("@@")(query), -func.ts_rank(vector, query)
+    # The owner token narrows the match inside the index; it carries no weight in the rank
+    query = f'owner:"u{user_id}" AND ' + " ".join(f'content:"{term}"*' for term in terms)
+    match = literal_column("search_documents_fts").op("MATCH")(query)
+    return _fts, match, func.bm25(literal_column("search_documents_fts"), 0.0, 1.0)
+
+
+def search_query(conn: Connection, user_id: int, terms: list[str], kind: Optional[str] = None,
+                 after: Optional[tuple] = None, limit: int = 20) -> select:
+    """
+    The user's documents matching every term, most relevant first, after the
+    (rank, id) keyset `after`; limit + 1 rows, the last one only signals has-more.
+    """
+    target, match, rank = _match(conn, user_id, terms)
+    matches = select(
+        SearchDocument.id, SearchDocument.kind, SearchDocument.entity_id,
+        SearchDocument.title, SearchDocument.subtitle, rank.label("rank"),
+    ).where(match, SearchDocument.user_id == user_id)
+    if target is not None:
+        matches = matches.join(target, target.c.rowid == SearchDocument.id)
+    if kind is not None:
+        matches = matches.where(SearchDocument.kind == kind)
+    # Ranks are computed per row, so the keyset applies outside the matching query
+    ranked = matches.subquery()
+    page = select(ranked).order_by(ranked.c.rank, ranked.c.id).limit(limit + 1)
+    if after is not None:
+        page = page.where(tuple_(ranked.c.rank, ranked.c.id) > tuple_(*after))
+    return page
+
+
+def run_search(db: Session, user_id: int, terms: list[str], kind: Optional[str], after: Optional[tuple], limit: int) -> list:
+    conn = db.connection()
+    return conn.execute(search_query(conn, user_id, terms, kind, after, limit)).all()
+
+
+def rebuild_search_index(conn: Connection, user_id: Optional[int] = None) -> int:
+    """Rewrite every document (or one user's) from invoices and clients; returns the rows written."""
+    clear = delete(SearchDocument)
+    invoices, clients = Invoice.id.is_not(None), Client.id.is_not(None)
+    if user_id is not None:
+        clear = clear.where(SearchDocument.user_id == user_id)
+        invoices, clients = Invoice.user_id == user_id, Client.user_id == user_id
+    conn.execute(clear)
+    written = conn.execute(insert(SearchDocument).from_select(_DOCUMENT_COLUMNS, _invoice_documents(invoices))).rowcount
+    written += conn.execute(insert(SearchDocument).from_select(_DOCUMENT_COLUMNS, _client_documents(clients))).rowcount
+    return written
+
+
+def main() -> None:
+    from app.db.session import engine
+
+    parser = argparse.ArgumentParser(description="Rewrite the search index (search_documents) from invoices and clients.")
+    parser.add_argument("--user-id", type=int, default=None, help="only rebuild this user's documents")
+    args = parser.parse_args()
+    with engine.begin() as conn:
+        rows = rebuild_search_index(conn, args.user_id)
+    print(f"✓ search_documents rebuilt: {rows} rows")
+
+
+if __name__ == "__main__":
+    main()
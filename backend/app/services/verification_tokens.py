@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+import asyncio
+import hashlib
+import logging
+import secrets
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.models.verification_token import EmailVerificationToken
+
+logger = logging.getLogger(__name__)
+
+VERIFICATION_TOKEN_TTL = timedelta(hours=24)
+
+
+def hash_token(token: str) -> str:
+    """Return the SHA-256 hex digest stored in place of the raw token."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def issue_verification_token(db: Session, user_id: int) -> str:
+    """Replace any pending tokens for the user with a fresh one. Caller commits."""
+    token = secrets.token_urlsafe(32)
+    db.execute(delete(EmailVerificationToken).where(EmailVerificationToken.user_id == user_id))
+    db.add(EmailVerificationToken(
+        user_id=user_id,
+        token_hash=hash_token(token),
+        expires_at=datetime.utcnow() + VERIFICATION_TOKEN_TTL,
+    ))
+    return token
+
+
+def find_verification_token(db: Session, token: str) -> Optional[EmailVerificationToken]:
+    return db.execute(
+        select(EmailVerificationToken).where(EmailVerificationToken.token_hash == hash_token(token))
+    ).scalar_one_or_none()
+
+
+def sweep_expired_tokens(db: Session, batch_size: int = 500, now: Optional[datetime] = None) -> int:
+    """
+    Delete expired tokens in chunks of batch_size, committing after each chunk
+    so no single statement holds locks on a large range. Returns rows deleted.
+    """
+    now = now or datetime.utcnow()
+    deleted = 0
+    while True:
+        ids = db.execute(
+            select(EmailVerificationToken.id)
+            .where(EmailVerificationToken.expires_at < now)
+            .order_by(EmailVerificationToken.expires_at)
+            .limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+        db.execute(delete(EmailVerificationToken).where(EmailVerificationToken.id.in_(ids)))
+        db.commit()
+        deleted += len(ids)
+        if len(ids) < batch_size:
+            break
+    return deleted
+
+
+async def run_token_sweeper(session_factory: Callable[[], Session], interval_seconds: float, batch_size: int) -> None:
+    """Background loop started from app startup; runs the sweep in the threadpool."""
+
+    def _sweep() -> int:
+        db = session_factory()
+        try:
+            return sweep_expired_tokens(db, batch_size=batch_size)
+        finally:
+            db.close()
+
+    while True:
+        try:
+            deleted = await run_in_threadpool(_sweep)
+            if deleted:
+                logger.info(f"Swept {deleted} expired verification tokens")
+        except Exception as e:
+            logger.error(f"Verification token sweep failed: {str(e)}")
+        await asyncio.sleep(interval_seconds)
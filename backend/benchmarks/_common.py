@@ -0,0 +1,103 @@
+"""
+Shared helpers for the benchmark scripts in this directory.
+
+Each benchmark runs the real FastAPI app in-process against a throwaway SQLite
+database (or BENCH_DATABASE_URL) so results are comparable between runs.
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add backend directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.session import Base, get_db
+from app.core.security import get_password_hash
+
+BENCH_PASSWORD = "secret123"
+
+
+def make_database(url: str | None = None):
+    """Create a fresh database and return (engine, SessionLocal)."""
+    url = url or os.getenv("BENCH_DATABASE_URL")
+    if not url:
+        fd, path = tempfile.mkstemp(suffix=".db", prefix="invoyq_bench_")
+        os.close(fd)
+        url = f"sqlite:///{path}"
+    connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+    engine = create_engine(url, connect_args=connect_args)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def install_database(app, SessionLocal) -> None:
+    """Point the app's get_db dependency at the benchmark database."""
+
+    def override_get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+
+
+def create_user(SessionLocal, email: str = "bench@example.com", rounds: int | None = None):
+    from app.models.user import User
+
+    db = SessionLocal()
+    user = User(
+        email=email,
+        full_name="Bench User",
+        hashed_password=get_password_hash(BENCH_PASSWORD, rounds=rounds),
+        is_verified=True,
+    )
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    db.close()
+    return user
+
+
+def auth_headers(user_id: int) -> dict:
+    from app.api.v1.auth import create_access_token
+
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(label: str, samples: list[float], elapsed: float | None = None) -> str:
+    """Format latency samples (seconds) as a one-line report."""
+    line = (
+        f"{label:<28} n={len(samples):<6} "
+        f"p50={percentile(samples, 50) * 1000:8.2f}ms "
+        f"p99={percentile(samples, 99) * 1000:8.2f}ms "
+        f"mean={statistics.fmean(samples) * 1000 if samples else 0:8.2f}ms"
+    )
+    if elapsed:
+        line += f" rps={len(samples) / elapsed:9.1f}"
+    return line
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
@@ -0,0 +1,94 @@
+"""
+Threadpool vs AsyncSession request path.
+
+Drives GET /v1/invoices and GET /v1/clients/{id} with concurrent clients,
+first with routes on the threadpool-backed session (DATABASE_ASYNC=false),
+then on a native AsyncSession (DATABASE_ASYNC=true), and reports requests/sec
+and p50/p99 for each:
+
+    python benchmarks/bench_async_db.py --clients 64 --requests 40
+    BENCH_DATABASE_URL=postgresql://... python benchmarks/bench_async_db.py
+"""
+import argparse
+import asyncio
+import time
+
+import _common
+import anyio.to_thread
+import httpx
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.main import app
+from app.db.session import build_async_engine, get_async_db, to_async_url
+from app.models.client import Client
+from app.models.invoice import Invoice, InvoiceItem
+
+
+async def _client_loop(client: httpx.AsyncClient, paths: list[str], headers: dict, count: int, samples: list):
+    for i in range(count):
+        start = time.perf_counter()
+        r = await client.get(paths[i % len(paths)], headers=headers)
+        samples.append(time.perf_counter() - start)
+        assert r.status_code == 200, r.text
+
+
+async def _run_mode(label: str, paths: list[str], headers: dict, args) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm up connection pools and the principal cache
+        await _client_loop(client, paths, headers, len(paths), [])
+        samples: list[float] = []
+        with _common.Timer() as timer:
+            await asyncio.gather(*(
+                _client_loop(client, paths, headers, args.requests, samples) for _ in range(args.clients)
+            ))
+    print(_common.summarize(label, samples, timer.elapsed))
+
+
+async def run(args) -> None:
+    engine, SessionLocal = _common.make_database()
+    _common.install_database(app, SessionLocal)
+    user = _common.create_user(SessionLocal, rounds=4)
+    headers = _common.auth_headers(user.id)
+
+    db = SessionLocal()
+    client_row = Client(user_id=user.id, name="Acme")
+    db.add(client_row)
+    db.flush()
+    for i in range(args.invoices):
+        invoice = Invoice(user_id=user.id, client_id=client_row.id, number=f"B-{i}")
+        invoice.items = [InvoiceItem(description=f"Line {n}", quantity=1, unit_price=10, amount=10) for n in range(3)]
+        db.add(invoice)
+    db.commit()
+    paths = ["/v1/invoices?limit=20", f"/v1/clients/{client_row.id}"]
+    db.close()
+
+    anyio.to_thread.current_default_thread_limiter().total_tokens = args.threadpool_size
+    print(f"database={engine.url.get_backend_name()} clients={args.clients} requests/client={args.requests} threadpool={args.threadpool_size}")
+
+    app.dependency_overrides.pop(get_async_db, None)
+    await _run_mode("threadpool session", paths, headers, args)
+
+    async_engine = build_async_engine(to_async_url(engine.url.render_as_string(hide_password=False)))
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with AsyncSessionLocal() as session:
+            yield session
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    await _run_mode("AsyncSession", paths, headers, args)
+    await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=64, help="concurrent clients")
+    parser.add_argument("--requests", type=int, default=40, help="requests per client")
+    parser.add_argument("--invoices", type=int, default=100)
+    parser.add_argument("--threadpool-size", type=int, default=40, help="anyio worker threads (Starlette default 40)")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Cold start: time from process spawn to the first successful request.
+
+Starts `uvicorn app.main:app` against a migrated database (throwaway SQLite
+or BENCH_DATABASE_URL) and polls GET /v1/clients with a bearer token until it
+returns 200. Also times the startup schema step in-process: the old
+`Base.metadata.create_all` (reflects every table) against `check_schema`
+(one version query), which is where a remote database makes the difference:
+
+    python benchmarks/bench_cold_start.py --runs 5
+    BENCH_DATABASE_URL=postgresql://... python benchmarks/bench_cold_start.py
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import _common
+import httpx
+
+from app.db.migrate import check_schema, load_models, migrate
+from app.db.session import Base
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_first_request(database_url: str, headers: dict, timeout: float) -> float:
+    port = _free_port()
+    env = {
+        **os.environ,
+        "DATABASE_URL": database_url,
+        "SCHEMA_AUTO_MIGRATE": "false",
+        "EMAIL_OUTBOX_IN_PROCESS": "false",
+    }
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with {process.returncode}")
+            try:
+                r = httpx.get(f"http://127.0.0.1:{port}/v1/clients", headers=headers, timeout=1)
+                if r.status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.TransportError:
+                pass
+            time.sleep(0.01)
+        raise TimeoutError(f"No 200 from /v1/clients within {timeout}s")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    load_models()
+    engine, SessionLocal = _common.make_database()
+    migrate(engine)
+    user = _common.create_user(SessionLocal, rounds=4)
+    headers = _common.auth_headers(user.id)
+    database_url = engine.url.render_as_string(hide_password=False)
+
+    create_all, version_check = [], []
+    for _ in range(args.runs):
+        # Fresh connections each time, as in a new worker
+        engine.dispose()
+        with _common.Timer() as timer:
+            Base.metadata.create_all(bind=engine)
+        create_all.append(timer.elapsed)
+        engine.dispose()
+        with _common.Timer() as timer:
+            check_schema(engine)
+        version_check.append(timer.elapsed)
+    print(_common.summarize("startup create_all", create_all))
+    print(_common.summarize("startup check_schema", version_check))
+
+    samples = [time_to_first_request(database_url, headers, args.timeout) for _ in range(args.runs)]
+    print(_common.summarize("spawn -> first 200", samples))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Email delivery throughput against a local SMTP stand-in.
+
+Compares the outbox worker (one kept-alive connection, batched) with the old
+behaviour of opening a new authenticated connection per message:
+
+    python benchmarks/bench_email_outbox.py --messages 2000
+"""
+import argparse
+
+import _common
+from tests.smtp_stub import SMTPStub
+
+from app.services.email import EmailService
+from app.services.email_outbox import OutboxWorker, PooledSMTPConnection
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    _, SessionLocal = _common.make_database()
+    with SMTPStub() as smtp:
+        service = EmailService()
+        service.smtp_host, service.smtp_port = smtp.host, smtp.port
+        service.smtp_user, service.smtp_password = "user", "password"
+        service.use_tls = service.use_ssl = False
+
+        # Enqueue cost is what a request handler now pays
+        db = SessionLocal()
+        with _common.Timer() as enqueue:
+            for i in range(args.messages):
+                service.enqueue(db, f"user{i}@example.com", "Verify your account", "<p>Hi</p>", "Hi")
+                db.commit()
+        db.close()
+
+        worker = OutboxWorker(SessionLocal, PooledSMTPConnection(service), batch_size=args.batch_size)
+        with _common.Timer() as pooled:
+            sent, failed = worker.drain()
+        worker.connection.close()
+        pooled_connections = smtp.connections
+
+        with _common.Timer() as per_message:
+            for i in range(args.messages):
+                service._send_email(f"user{i}@example.com", "Verify your account", "<p>Hi</p>", "Hi")
+
+    print(f"messages={args.messages} batch_size={args.batch_size}")
+    print(f"enqueue (INSERT+COMMIT)      {args.messages / enqueue.elapsed:9.1f} msg/s  {enqueue.elapsed / args.messages * 1000:.3f} ms/msg")
+    print(f"outbox worker (pooled)       {sent / pooled.elapsed:9.1f} msg/s  connections={pooled_connections} failed={failed}")
+    print(f"connection per message       {args.messages / per_message.elapsed:9.1f} msg/s  connections={args.messages}")
+
+
+if __name__ == "__main__":
+    main()
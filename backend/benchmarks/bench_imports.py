@@ -0,0 +1,105 @@
+"""
+POST /v1/imports/clients with an N-row CSV, against --sample rows created
+one POST /v1/clients call at a time.
+
+The upload is fed to the app through ASGI in --chunk-bytes pieces generated
+on the fly, so neither side ever holds the whole file; RSS is sampled as the
+body is read. A streamed import keeps RSS flat whatever --rows is.
+
+    python benchmarks/bench_imports.py --rows 200000
+"""
+import argparse
+import asyncio
+import json
+
+import _common
+from bench_invoice_export import rss_mb
+from httpx import ASGITransport, AsyncClient
+
+from app.main import app
+from app.core import quotas
+from app.core.quotas import QuotaPolicy
+
+
+def csv_body(rows: int, chunk_bytes: int):
+    """The file, header first, in pieces of about chunk_bytes; a few rows are duplicates."""
+    piece = ["name,email,phone,address\n"]
+    size = len(piece[0])
+    for n in range(rows):
+        email = f"client{n - 1 if n % 100 == 99 else n}@example.com"
+        line = f'"Client {n}, Ltd",{email},+1 555 {n:07d},"{n} Main Street"\n'
+        piece.append(line)
+        size += len(line)
+        if size >= chunk_bytes:
+            yield "".join(piece).encode()
+            piece, size = [], 0
+    if piece:
+        yield "".join(piece).encode()
+
+
+async def upload(headers: dict, rows: int, chunk_bytes: int) -> tuple[dict, list[float], float]:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST", "scheme": "http",
+        "path": "/v1/imports/clients", "raw_path": b"/v1/imports/clients", "query_string": b"", "root_path": "",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in {**headers, "Content-Type": "text/csv"}.items()],
+        "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+    }
+    body = csv_body(rows, chunk_bytes)
+    samples = [rss_mb()]
+    response = {"status": None, "body": b""}
+
+    async def receive():
+        chunk = next(body, None)
+        samples.append(rss_mb())
+        return {"type": "http.request", "body": chunk or b"", "more_body": chunk is not None}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            response["body"] += message.get("body", b"")
+
+    with _common.Timer() as timer:
+        await app(scope, receive, send)
+    assert response["status"] == 200, response
+    samples.append(rss_mb())
+    return json.loads(response["body"]), samples, timer.elapsed
+
+
+async def one_by_one(headers: dict, rows: int) -> float:
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://bench") as http:
+        with _common.Timer() as timer:
+            for n in range(rows):
+                r = await http.post("/v1/clients", json={"name": f"Single {n}", "email": f"single{n}@example.com"}, headers=headers)
+                assert r.status_code in (200, 201), r.text
+    return timer.elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--sample", type=int, default=500, help="clients created one request at a time, for comparison")
+    parser.add_argument("--chunk-bytes", type=int, default=64 * 1024)
+    args = parser.parse_args()
+
+    for metric in ("import", "write"):
+        quotas.QUOTA_POLICIES[metric] = {tier: QuotaPolicy(per_minute=10**9) for tier in ("anonymous", "free", "pro")}
+    engine, SessionLocal = _common.make_database()
+    _common.install_database(app, SessionLocal)
+    user = _common.create_user(SessionLocal, rounds=4)
+    headers = _common.auth_headers(user.id)
+
+    elapsed = asyncio.run(one_by_one(headers, args.sample))
+    print(f"{'POST /v1/clients':<28} {args.sample:>9} rows in {elapsed:6.1f}s ({args.sample / elapsed:9.1f} rows/s)")
+
+    job, samples, elapsed = asyncio.run(upload(headers, args.rows, args.chunk_bytes))
+    print(
+        f"{'POST /v1/imports/clients':<28} {args.rows:>9} rows in {elapsed:6.1f}s ({args.rows / elapsed:9.1f} rows/s)  "
+        f"imported={job['imported']} duplicates={job['duplicates']} failed={job['failed']}  "
+        f"RSS start={samples[0]:7.1f}MB peak={max(samples):7.1f}MB end={samples[-1]:7.1f}MB"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Month-end import throughput: N invoices with a few items each, pushed
+
+- one POST /v1/invoices per invoice (auth, client check, numbering and a
+  flush per item on every call)
+- POST /v1/invoices:bulk in batches (one client query, one number draw,
+  executemany inserts per batch)
+
+Write quotas are lifted so only the endpoints are measured:
+
+    python benchmarks/bench_invoice_bulk.py --invoices 1000 --batch-size 250
+"""
+import argparse
+import asyncio
+import time
+
+import _common
+import httpx
+from sqlalchemy import func, select
+
+from app.main import app
+from app.core import quotas
+from app.core.quotas import QuotaPolicy
+from app.models.client import Client
+from app.models.invoice import Invoice, InvoiceItem
+
+
+def make_payloads(client_id: int, invoices: int, items: int) -> list[dict]:
+    return [
+        {
+            "client_id": client_id,
+            "due_date": "2025-02-28",
+            "items": [{"description": f"Line {n}", "quantity": "2", "unit_price": "12.50"} for n in range(items)],
+        }
+        for _ in range(invoices)
+    ]
+
+
+async def one_by_one(headers: dict, payloads: list[dict]) -> tuple[list[float], float]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        samples = []
+        with _common.Timer() as timer:
+            for payload in payloads:
+                start = time.perf_counter()
+                r = await client.post("/v1/invoices", json=payload, headers=headers)
+                samples.append(time.perf_counter() - start)
+                assert r.status_code == 201, r.text
+    return samples, timer.elapsed
+
+
+async def in_batches(headers: dict, payloads: list[dict], batch_size: int) -> tuple[list[float], float]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        samples = []
+        with _common.Timer() as timer:
+            for offset in range(0, len(payloads), batch_size):
+                start = time.perf_counter()
+                r = await client.post("/v1/invoices:bulk", json={"invoices": payloads[offset:offset + batch_size]}, headers=headers)
+                samples.append(time.perf_counter() - start)
+                assert r.status_code == 200 and r.json()["failed"] == 0, r.text
+    return samples, timer.elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--invoices", type=int, default=1000)
+    parser.add_argument("--items", type=int, default=3, help="items per invoice")
+    parser.add_argument("--batch-size", type=int, default=250)
+    args = parser.parse_args()
+
+    quotas.QUOTA_POLICIES["write"] = {tier: QuotaPolicy(per_minute=10**9) for tier in ("anonymous", "free", "pro")}
+    engine, SessionLocal = _common.make_database()
+    _common.install_database(app, SessionLocal)
+    user = _common.create_user(SessionLocal, rounds=4)
+    db = SessionLocal()
+    client_row = Client(user_id=user.id, name="Acme")
+    db.add(client_row)
+    db.commit()
+    client_id = client_row.id
+    db.close()
+    headers = _common.auth_headers(user.id)
+    payloads = make_payloads(client_id, args.invoices, args.items)
+
+    for label, run in (
+        ("POST /v1/invoices", lambda: one_by_one(headers, payloads)),
+        (f"POST /v1/invoices:bulk x{args.batch_size}", lambda: in_batches(headers, payloads, args.batch_size)),
+    ):
+        samples, elapsed = asyncio.run(run())
+        print(_common.summarize(label, samples, elapsed))
+        print(f"{'':<28} {args.invoices / elapsed:9.1f} invoices/s")
+
+    db = SessionLocal()
+    invoices = db.scalar(select(func.count(Invoice.id)))
+    items = db.scalar(select(func.count(InvoiceItem.id)))
+    assert invoices == 2 * args.invoices and items == invoices * args.items, (invoices, items)
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Memory of GET /v1/invoices/export: N invoices with a few items each,
+exported as CSV and NDJSON while the process RSS is sampled every
+--sample-every bytes of response body.
+
+The app is driven through ASGI directly, discarding body chunks as they are
+sent (httpx's ASGITransport would collect the whole body first). A streaming
+export keeps RSS flat: the peak stays near the starting RSS whatever --invoices is.
+
+    python benchmarks/bench_invoice_export.py --invoices 500000
+"""
+import argparse
+import asyncio
+import os
+from datetime import date, datetime
+
+import _common
+from sqlalchemy import insert, select
+
+from app.main import app
+from app.core import quotas
+from app.core.quotas import QuotaPolicy
+from app.models.client import Client
+from app.models.invoice import Invoice, InvoiceItem
+
+SEED_BATCH = 10_000
+
+
+def rss_mb() -> float:
+    """Current resident set size (Linux /proc); peak RSS elsewhere."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def seed(SessionLocal, user_id: int, invoices: int, items: int) -> None:
+    """Core executemany inserts: the search index and aggregates aren't needed to export."""
+    db = SessionLocal()
+    client_row = Client(user_id=user_id, name="Acme")
+    db.add(client_row)
+    db.commit()
+    now = datetime.utcnow()
+    for offset in range(0, invoices, SEED_BATCH):
+        count = min(SEED_BATCH, invoices - offset)
+        rows = [
+            {
+                "user_id": user_id, "client_id": client_row.id, "number": f"EX-{offset + n}", "status": "paid",
+                "issued_date": date(2025, 1, 1), "currency": "NGN", "total": 75, "notes": "Thanks for your business",
+                "created_at": now, "updated_at": now, "version": 1,
+            }
+            for n in range(count)
+        ]
+        db.execute(insert(Invoice), rows)
+        ids = db.scalars(select(Invoice.id).where(Invoice.number.in_([row["number"] for row in rows]))).all()
+        db.execute(insert(InvoiceItem), [
+            {"invoice_id": invoice_id, "description": f"Line {n}", "quantity": 1, "unit_price": 25, "amount": 25}
+            for invoice_id in ids for n in range(items)
+        ])
+        db.commit()
+    db.close()
+
+
+async def export(headers: dict, export_format: str, sample_every: int) -> tuple[int, list[float], float]:
+    """Stream one export through the app; returns (body bytes, RSS samples in MB, seconds)."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": "/v1/invoices/export", "raw_path": b"/v1/invoices/export",
+        "query_string": f"format={export_format}".encode(), "root_path": "",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+        "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+    }
+    received = {"bytes": 0, "next_sample": 0, "status": None}
+    samples = [rss_mb()]
+    requested = False
+    never = asyncio.Event()
+
+    async def receive():
+        # The request body, then nothing: the client never disconnects
+        nonlocal requested
+        if requested:
+            await never.wait()
+        requested = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            received["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            received["bytes"] += len(message.get("body", b""))
+            if received["bytes"] >= received["next_sample"]:
+                samples.append(rss_mb())
+                received["next_sample"] += sample_every
+
+    with _common.Timer() as timer:
+        await app(scope, receive, send)
+    assert received["status"] == 200, received["status"]
+    samples.append(rss_mb())
+    return received["bytes"], samples, timer.elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--invoices", type=int, default=100_000)
+    parser.add_argument("--items", type=int, default=3, help="items per invoice")
+    parser.add_argument("--sample-every", type=int, default=5 * 2**20, help="bytes of body between RSS samples")
+    args = parser.parse_args()
+
+    quotas.QUOTA_POLICIES["export"] = {tier: QuotaPolicy(per_minute=10**9) for tier in ("anonymous", "free", "pro")}
+    engine, SessionLocal = _common.make_database()
+    _common.install_database(app, SessionLocal)
+    user = _common.create_user(SessionLocal, rounds=4)
+    with _common.Timer() as timer:
+        seed(SessionLocal, user.id, args.invoices, args.items)
+    print(f"seeded {args.invoices} invoices x {args.items} items in {timer.elapsed:.1f}s")
+    headers = _common.auth_headers(user.id)
+
+    for export_format in ("csv", "ndjson"):
+        size, samples, elapsed = asyncio.run(export(headers, export_format, args.sample_every))
+        print(
+            f"{'export ' + export_format:<28} {size / 2**20:9.1f} MB in {elapsed:6.1f}s "
+            f"({args.invoices / elapsed:9.1f} invoices/s)  "
+            f"RSS start={samples[0]:7.1f}MB peak={max(samples):7.1f}MB end={samples[-1]:7.1f}MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Invoice list serialization: 100-invoice pages with 20 items each.
+
+First times serialization alone on rows loaded once (selectinload):
+
+- response_model: business info built per row, then validation to models,
+  conversion to JSON-able Python and json.dumps (what FastAPI does for a
+  returned list with response_model)
+- TypeAdapter: business info built once, validate + dump_json to bytes
+  (what list_invoices does now)
+
+then the full GET /v1/invoices?limit=100 request:
+
+    python benchmarks/bench_invoice_list.py --iterations 200
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import List
+
+import _common
+import httpx
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from app.main import app
+from app.api.v1.invoices import _business_info, _enrich_invoice_with_user_info, invoice_list_adapter
+from app.core.principal_cache import UserSnapshot
+from app.models.client import Client
+from app.models.invoice import Invoice, InvoiceItem
+from app.models.user import User
+from app.schemas.invoice import InvoiceOut
+
+
+def seed(SessionLocal, user_id: int, invoices: int, items: int) -> None:
+    db = SessionLocal()
+    client_row = Client(user_id=user_id, name="Acme")
+    db.add(client_row)
+    db.flush()
+    for i in range(invoices):
+        invoice = Invoice(user_id=user_id, client_id=client_row.id, number=f"L-{i}", total=items * 10)
+        invoice.items = [
+            InvoiceItem(description=f"Line {n} of invoice {i}", quantity=1, unit_price=10, amount=10) for n in range(items)
+        ]
+        db.add(invoice)
+    db.commit()
+    db.close()
+
+
+def time_serializers(SessionLocal, user_id: int, iterations: int) -> None:
+    db = SessionLocal()
+    user = UserSnapshot.from_user(db.get(User, user_id))
+    rows = db.scalars(
+        select(Invoice).options(selectinload(Invoice.items)).where(Invoice.user_id == user_id).order_by(Invoice.id).limit(100)
+    ).all()
+    response_model = TypeAdapter(List[InvoiceOut])
+
+    def per_row() -> bytes:
+        for invoice in rows:
+            _enrich_invoice_with_user_info(invoice, user)
+        models = response_model.validate_python(rows, from_attributes=True)
+        return json.dumps(response_model.dump_python(models, mode="json")).encode()
+
+    def single_pass() -> bytes:
+        business_info = _business_info(user)
+        for invoice in rows:
+            invoice.user_business_info = business_info
+        return invoice_list_adapter.dump_json(invoice_list_adapter.validate_python(rows, from_attributes=True))
+
+    assert json.loads(per_row()) == json.loads(single_pass())
+    for label, serialize in (("response_model + json.dumps", per_row), ("TypeAdapter.dump_json", single_pass)):
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            serialize()
+            samples.append(time.perf_counter() - start)
+        print(_common.summarize(label, samples))
+    db.close()
+
+
+async def time_requests(headers: dict, iterations: int) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        r = await client.get("/v1/invoices?limit=100", headers=headers)
+        assert r.status_code == 200 and len(r.json()) == 100, r.text
+        samples = []
+        with _common.Timer() as timer:
+            for _ in range(iterations):
+                start = time.perf_counter()
+                r = await client.get("/v1/invoices?limit=100", headers=headers)
+                samples.append(time.perf_counter() - start)
+    print(_common.summarize("GET /v1/invoices?limit=100", samples, timer.elapsed))
+    print(f"response size: {len(r.content) / 1024:.0f} KiB, Server-Timing: {r.headers.get('server-timing')}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--items", type=int, default=20, help="items per invoice")
+    args = parser.parse_args()
+
+    engine, SessionLocal = _common.make_database()
+    _common.install_database(app, SessionLocal)
+    user = _common.create_user(SessionLocal, rounds=4)
+    seed(SessionLocal, user.id, invoices=100, items=args.items)
+
+    time_serializers(SessionLocal, user.id, args.iterations)
+    asyncio.run(time_requests(_common.auth_headers(user.id), args.iterations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Login burst vs. invoice reads.
+
+Fires a burst of concurrent logins while other clients keep reading
+/v1/invoices, then reports p50/p99 for both. Run once with the hashing pool
+and once with hashing in the threadpool to compare:
+
+    python benchmarks/bench_login_under_load.py --workers 2
+    python benchmarks/bench_login_under_load.py --workers 0
+"""
+import argparse
+import asyncio
+import time
+
+import _common
+import httpx
+
+from app.main import app
+from app.core import security
+from app.models.client import Client
+from app.models.invoice import Invoice
+
+
+async def _login_loop(client: httpx.AsyncClient, email: str, count: int, samples: list, errors: list):
+    for _ in range(count):
+        start = time.perf_counter()
+        r = await client.post("/v1/auth/login", data={"username": email, "password": _common.BENCH_PASSWORD})
+        samples.append(time.perf_counter() - start)
+        if r.status_code != 200:
+            errors.append(r.status_code)
+
+
+async def _read_loop(client: httpx.AsyncClient, headers: dict, stop: asyncio.Event, samples: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        r = await client.get("/v1/invoices?limit=20", headers=headers)
+        samples.append(time.perf_counter() - start)
+        assert r.status_code == 200, r.text
+
+
+async def run(args) -> None:
+    security.password_hasher.workers = args.workers
+    security._BCRYPT_ROUNDS = args.rounds
+
+    _, SessionLocal = _common.make_database()
+    _common.install_database(app, SessionLocal)
+    user = _common.create_user(SessionLocal, rounds=args.rounds)
+    headers = _common.auth_headers(user.id)
+
+    db = SessionLocal()
+    client_row = Client(user_id=user.id, name="Acme")
+    db.add(client_row)
+    db.flush()
+    db.add_all(Invoice(user_id=user.id, client_id=client_row.id, number=f"B-{i}") for i in range(50))
+    db.commit()
+    db.close()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm up the pool so process start-up is not counted
+        await client.post("/v1/auth/login", data={"username": user.email, "password": _common.BENCH_PASSWORD})
+
+        login_samples, read_samples, errors = [], [], []
+        stop = asyncio.Event()
+        readers = [asyncio.create_task(_read_loop(client, headers, stop, read_samples)) for _ in range(args.readers)]
+        with _common.Timer() as timer:
+            await asyncio.gather(*(
+                _login_loop(client, user.email, args.logins_per_client, login_samples, errors)
+                for _ in range(args.login_clients)
+            ))
+        stop.set()
+        await asyncio.gather(*readers)
+
+    security.password_hasher.shutdown()
+    print(f"hash workers={args.workers} rounds={args.rounds} login clients={args.login_clients} readers={args.readers}")
+    print(_common.summarize("POST /v1/auth/login", login_samples, timer.elapsed))
+    print(_common.summarize("GET /v1/invoices", read_samples, timer.elapsed))
+    if errors:
+        print(f"login errors: {len(errors)} (503 shed: {errors.count(503)})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=2, help="PASSWORD_HASH_WORKERS (0 = threadpool)")
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--login-clients", type=int, default=40)
+    parser.add_argument("--logins-per-client", type=int, default=2)
+    parser.add_argument("--readers", type=int, default=8)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
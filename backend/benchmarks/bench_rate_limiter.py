@@ -0,0 +1,49 @@
+"""
+Rate limiter microbenchmark over many distinct keys.
+
+Feeds N distinct client keys through the limiter (as a scan of one-off IPs
+would) and reports traced memory at checkpoints plus the cost per check:
+
+    python benchmarks/bench_rate_limiter.py --keys 1000000
+"""
+import argparse
+import time
+import tracemalloc
+
+import _common  # noqa: F401  (puts the backend on sys.path)
+
+from app.core.rate_limiter import InMemoryRateLimiter
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keys", type=int, default=1_000_000)
+    parser.add_argument("--max-keys", type=int, default=100_000)
+    parser.add_argument("--checkpoints", type=int, default=10)
+    args = parser.parse_args()
+
+    limiter = InMemoryRateLimiter(max_requests=10, window_minutes=1, max_keys=args.max_keys)
+    keys = [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}:{i}" for i in range(args.keys)]
+    step = max(1, args.keys // args.checkpoints)
+
+    # Timing pass (no tracemalloc overhead)
+    start = time.perf_counter()
+    for key in keys:
+        limiter.hit(key)
+    elapsed = time.perf_counter() - start
+    print(f"{args.keys} checks in {elapsed:.2f}s -> {elapsed / args.keys * 1e9:.0f} ns/check")
+
+    # Memory pass on a fresh limiter
+    limiter = InMemoryRateLimiter(max_requests=10, window_minutes=1, max_keys=args.max_keys)
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    for i, key in enumerate(keys, 1):
+        limiter.hit(key)
+        if i % step == 0:
+            current = tracemalloc.get_traced_memory()[0] - baseline
+            print(f"after {i:>9} keys: tracked={len(limiter.tats):>7} memory={current / 1024 / 1024:7.2f} MiB")
+    tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import os
+from contextlib import contextmanager
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app.db.session import Base, get_db
+from app.core.principal_cache import principal_cache
+from app.core.rate_limiter import rate_limit_backend
+from app.db.query_stats import capture_queries, disable_raiseload, enable_raiseload
+
+
+@pytest.fixture(autouse=True, scope="session")
+def raise_on_lazy_loads():
+    # Relationships must be loaded explicitly (selectinload etc.); an implicit lazy load is an N+1 waiting to happen
+    enable_raiseload()
+    yield
+    disable_raiseload()
+
+
+# A throwaway SQLite file per test, plus Postgres when TEST_POSTGRES_URL is set
+DATABASE_URLS = ["sqlite"]
+if os.getenv("TEST_POSTGRES_URL"):
+    DATABASE_URLS.append(os.environ["TEST_POSTGRES_URL"])
+
+
+@pytest.fixture(params=DATABASE_URLS, ids=lambda url: url.split(":", 1)[0])
+def database_url(request, tmp_path):
+    if request.param == "sqlite":
+        return f"sqlite:///{tmp_path / 'test.db'}"
+    return request.param
+
+
+@pytest.fixture()
+def db_connection(database_url):
+    """A connection inside a transaction that is rolled back after the test."""
+    connect_args = {"check_same_thread": False} if database_url.startswith("sqlite") else {}
+    engine = create_engine(database_url, connect_args=connect_args)
+    Base.metadata.create_all(bind=engine)
+
+    connection = engine.connect()
+    transaction = connection.begin()
+    try:
+        yield connection
+    finally:
+        transaction.rollback()
+        connection.close()
+        engine.dispose()
+
+
+@pytest.fixture()
+def db_sessions(db_connection):
+    return sessionmaker(autocommit=False, autoflush=False, bind=db_connection)
+
+
+@pytest.fixture()
+def client_app(db_sessions):
+    """
+    (TestClient, SessionLocal), with get_db serving sessions of db_sessions.
+    A module needing more setup overrides it, taking this one as its argument:
+
+        @pytest.fixture()
+        def client_app(client_app, monkeypatch):
+            monkeypatch.setattr(...)
+            return client_app
+    """
+
+    def override_get_db():
+        db = db_sessions()
+        try:
+            yield db
+            db.flush()
+        finally:
+            db.close()
+
+    # Put back whatever was installed before, e.g. by a module-level override
+    previous = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        yield TestClient(app), db_sessions
+    finally:
+        if previous is None:
+            app.dependency_overrides.pop(get_db, None)
+        else:
+            app.dependency_overrides[get_db] = previous
+
+
+@pytest.fixture()
+def max_queries():
+    """
+    Statement budget for a block:
+
+        with max_queries(3):
+            client.get("/v1/invoices", headers=headers)
+    """
+
+    @contextmanager
+    def budget(limit: int):
+        with capture_queries() as captured:
+            yield captured
+        assert captured.count <= limit, (
+            f"{captured.count} statements issued, budget is {limit}:\n" + "\n".join(captured.statements)
+        )
+
+    return budget
+
+
+@pytest.fixture(autouse=True)
+def reset_principal_cache():
+    # Each test module uses its own database, so user ids (and even tokens) repeat across tests
+    principal_cache.clear()
+    yield
+    principal_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_rate_limits():
+    # Quota windows are keyed by user id / client IP, which repeat across tests too
+    tats = getattr(rate_limit_backend, "tats", None)
+    if tats is not None:
+        tats.clear()
+    yield
@@ -0,0 +1,93 @@
+"""
+Minimal in-process server speaking the Redis protocol for tests. Supports the
+handful of commands used by the redis rate limit backend.
+"""
+import socketserver
+import threading
+import time
+
+
+class _RESPHandler(socketserver.StreamRequestHandler):
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        count = int(line[1:-2])
+        args = []
+        for _ in range(count):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self) -> None:
+        stub: "RedisStub" = self.server.stub
+        while True:
+            args = self._read_command()
+            if args is None:
+                return
+            self.wfile.write(stub.execute(args))
+            self.wfile.flush()
+
+
+class _ThreadingServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class RedisStub:
+    """Usage: with RedisStub() as redis: url = redis.url"""
+
+    def __init__(self, password: str | None = None):
+        self.password = password
+        self.data: dict[bytes, bytes] = {}
+        self.expires: dict[bytes, float] = {}
+        self.commands: list[bytes] = []
+        self.lock = threading.Lock()
+        self._server = _ThreadingServer(("127.0.0.1", 0), _RESPHandler)
+        self._server.stub = self
+        host, port = self._server.server_address
+        auth = f":{password}@" if password else ""
+        self.url = f"redis://{auth}{host}:{port}/0"
+
+    def _get(self, key: bytes):
+        if key in self.expires and self.expires[key] <= time.monotonic():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return self.data.get(key)
+
+    def _incr_by(self, key: bytes, amount: int) -> bytes:
+        value = int(self._get(key) or 0) + amount
+        self.data[key] = str(value).encode()
+        return b":%d\r\n" % value
+
+    def execute(self, args: list[bytes]) -> bytes:
+        command = args[0].upper()
+        with self.lock:
+            self.commands.append(command)
+            if command == b"PING":
+                return b"+PONG\r\n"
+            if command == b"AUTH":
+                return b"+OK\r\n" if args[1].decode() == self.password else b"-WRONGPASS invalid password\r\n"
+            if command == b"SELECT":
+                return b"+OK\r\n"
+            if command == b"INCR":
+                return self._incr_by(args[1], 1)
+            if command == b"DECR":
+                return self._incr_by(args[1], -1)
+            if command == b"GET":
+                value = self._get(args[1])
+                return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+            if command == b"PEXPIRE":
+                if self._get(args[1]) is None:
+                    return b":0\r\n"
+                self.expires[args[1]] = time.monotonic() + int(args[2]) / 1000
+                return b":1\r\n"
+            return b"-ERR unknown command\r\n"
+
+    def __enter__(self) -> "RedisStub":
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,105 @@
+"""
+Minimal in-process SMTP server for tests and benchmarks (an aiosmtpd-style
+stand-in without the dependency). Accepts any AUTH, or only the given
+password, and records every message.
+"""
+import base64
+import socketserver
+import threading
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def _reply(self, line: str) -> None:
+        self.wfile.write(f"{line}\r\n".encode())
+        self.wfile.flush()
+
+    def handle(self) -> None:
+        server: "SMTPStub" = self.server.stub
+        with server.lock:
+            server.connections += 1
+            server.open_connections += 1
+        try:
+            self._serve(server)
+        finally:
+            with server.lock:
+                server.open_connections -= 1
+
+    def _serve(self, server: "SMTPStub") -> None:
+        self._reply("220 stub ESMTP ready")
+        recipients: list[str] = []
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            line = raw.decode().rstrip("\r\n")
+            command = line.split(" ", 1)[0].upper()
+            if command in ("EHLO", "HELO"):
+                self.wfile.write(b"250-stub\r\n250-AUTH PLAIN LOGIN\r\n250 OK\r\n")
+                self.wfile.flush()
+            elif command == "AUTH":
+                # AUTH PLAIN <base64 of "\0user\0password">; other mechanisms only pass without a password
+                parts = line.split(" ")
+                credentials = base64.b64decode(parts[2]).split(b"\0") if len(parts) == 3 and parts[1].upper() == "PLAIN" else []
+                if server.password is not None and credentials[-1:] != [server.password.encode()]:
+                    self._reply("535 Authentication credentials invalid")
+                    continue
+                with server.lock:
+                    server.logins += 1
+                self._reply("235 Authentication successful")
+            elif command == "MAIL":
+                recipients = []
+                self._reply("250 OK")
+            elif command == "RCPT":
+                address = line.split(":", 1)[1].strip().strip("<>")
+                if address in server.reject:
+                    self._reply("550 No such user")
+                else:
+                    recipients.append(address)
+                    self._reply("250 OK")
+            elif command == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                body = []
+                while True:
+                    data_line = self.rfile.readline()
+                    if data_line in (b".\r\n", b""):
+                        break
+                    body.append(data_line)
+                with server.lock:
+                    server.messages.append((recipients, b"".join(body)))
+                self._reply("250 OK queued")
+            elif command in ("NOOP", "RSET"):
+                self._reply("250 OK")
+            elif command == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+
+class _ThreadingServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class SMTPStub:
+    """Usage: with SMTPStub() as smtp: ... smtp.port, smtp.messages"""
+
+    def __init__(self, reject: tuple[str, ...] = (), password: str | None = None):
+        self.reject = set(reject)
+        self.password = password
+        self.messages: list[tuple[list[str], bytes]] = []
+        self.connections = 0
+        self.open_connections = 0  # not yet closed by the client
+        self.logins = 0
+        self.lock = threading.Lock()
+        self._server = _ThreadingServer(("127.0.0.1", 0), _SMTPHandler)
+        self._server.stub = self
+        self.host, self.port = self._server.server_address
+
+    def __enter__(self) -> "SMTPStub":
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
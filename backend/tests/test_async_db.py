@@ -0,0 +1,120 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.main import app
+from app.db.session import Base, get_async_db, get_db, to_async_url
+from app.api.v1.auth import create_access_token
+from app.core.security import get_password_hash
+from app.models.payment import Payment
+from app.models.user import User
+
+
+@pytest.fixture()
+def client_app(tmp_path):
+    # Routes on get_async_db get a real AsyncSession (aiosqlite), as with DATABASE_ASYNC=true
+    url = f"sqlite:///{tmp_path / 'test_async.db'}"
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    # NullPool: TestClient runs each request on a fresh event loop
+    async_engine = create_async_engine(to_async_url(url), poolclass=NullPool)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    sessions = []
+
+    def override_get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def override_get_async_db():
+        async with AsyncSessionLocal() as db:
+            sessions.append(db)
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    try:
+        yield TestClient(app), SessionLocal, sessions
+    finally:
+        app.dependency_overrides.pop(get_async_db, None)
+        engine.dispose()
+
+
+def create_verified_user(SessionLocal, email: str) -> tuple[int, dict]:
+    db = SessionLocal()
+    user = User(email=email, full_name="Async User", hashed_password=get_password_hash("secret123", rounds=4), is_verified=True)
+    db.add(user)
+    db.commit()
+    user_id = user.id
+    db.close()
+    return user_id, {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+
+
+def test_to_async_url():
+    assert to_async_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+    assert to_async_url("postgresql://u:p@db:5432/app") == "postgresql+asyncpg://u:p@db:5432/app"
+    assert to_async_url("postgresql+psycopg2://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+
+
+def test_crud_on_async_session(client_app):
+    client, _, sessions = client_app
+    _, headers = create_verified_user(client_app[1], "async@example.com")
+
+    r = client.post("/v1/clients", json={"name": "Acme", "email": "billing@acme.com"}, headers=headers)
+    assert r.status_code == 201, r.text
+    client_id = r.json()["id"]
+
+    r = client.post("/v1/invoices", json={
+        "client_id": client_id,
+        "items": [{"description": "Design", "quantity": "2", "unit_price": "50"}],
+    }, headers=headers)
+    assert r.status_code == 201, r.text
+    invoice = r.json()
+    assert invoice["number"].startswith("INV-")
+    assert invoice["items"][0]["amount"] == "100.00"
+    assert invoice["user_business_info"]["email"] == "async@example.com"
+
+    r = client.put(f"/v1/invoices/{invoice['id']}", json={
+        "status": "sent",
+        "items": [{"description": "Build", "quantity": "1", "unit_price": "75"}, {"description": "Host", "amount": "5"}],
+    }, headers=headers)
+    assert r.status_code == 200, r.text
+    assert [item["description"] for item in r.json()["items"]] == ["Build", "Host"]
+
+    r = client.get("/v1/invoices", headers=headers)
+    assert r.status_code == 200
+    assert [inv["status"] for inv in r.json()] == ["sent"]
+    assert len(r.json()[0]["items"]) == 2
+
+    # Deleting the client cascades through its invoices and their items
+    assert client.delete(f"/v1/clients/{client_id}", headers=headers).status_code == 204
+    assert client.get(f"/v1/invoices/{invoice['id']}", headers=headers).status_code == 404
+    assert all(isinstance(db, AsyncSession) for db in sessions)
+
+
+def test_profile_and_webhook_on_async_session(client_app):
+    client, SessionLocal, _ = client_app
+    user_id, headers = create_verified_user(SessionLocal, "pro@example.com")
+
+    r = client.patch("/v1/me", json={"company_name": "Async Ltd"}, headers=headers)
+    assert r.status_code == 200, r.text
+    assert client.get("/v1/me", headers=headers).json()["company_name"] == "Async Ltd"
+
+    db = SessionLocal()
+    db.add(Payment(user_id=user_id, amount=29.99, provider="paystack", provider_ref="ref-1"))
+    db.commit()
+    db.close()
+
+    r = client.post(
+        "/v1/payments/webhook/paystack",
+        json={"event": "charge.success", "data": {"reference": "ref-1", "amount": 2999, "status": "success"}},
+        headers={"x-paystack-signature": "unused-without-secret"},
+    )
+    assert r.status_code == 200, r.text
+    assert client.get("/v1/me", headers=headers).json()["is_pro"] is True
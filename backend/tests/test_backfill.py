@@ -0,0 +1,70 @@
+import pytest
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, event, select
+
+from app.db.backfill import Backfill, run_backfill
+from app.models.backfill_checkpoint import BackfillCheckpoint
+
+metadata = MetaData()
+widgets = Table("widgets", metadata, Column("id", Integer, primary_key=True), Column("label", String))
+
+BACKFILL = Backfill("widget_label", "widgets", "label = 'default'", "label IS NULL")
+
+
+@pytest.fixture()
+def conn(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'backfill.db'}")
+    metadata.create_all(engine)
+    with engine.begin() as setup:
+        # Every third row already has a value; ids have gaps
+        setup.execute(widgets.insert(), [
+            {"id": i * 2, "label": "set" if i % 3 == 0 else None} for i in range(1, 26)
+        ])
+    with engine.connect() as conn:
+        yield conn
+    engine.dispose()
+
+
+def labels(conn):
+    rows = conn.execute(select(widgets.c.label)).scalars().all()
+    conn.commit()
+    return rows
+
+
+def test_backfill_updates_in_keyset_batches(conn):
+    updates = []
+
+    @event.listens_for(conn, "before_cursor_execute")
+    def record(conn, cursor, statement, *args):
+        if statement.startswith("UPDATE widgets"):
+            updates.append(statement)
+
+    seen = []
+
+    result = run_backfill(conn, BACKFILL, batch_size=10, sleep_seconds=0, progress=lambda p: seen.append(p.last_key))
+
+    assert labels(conn).count(None) == 0
+    assert labels(conn).count("set") == 8
+    assert result.completed and result.rows_updated == 17 and result.batches == 3
+    assert seen[:3] == [20, 40, 50]
+    assert len(updates) == 3
+    row = conn.execute(select(BackfillCheckpoint.__table__)).one()
+    assert row.last_key == 50 and row.completed_at is not None
+
+
+def test_backfill_resumes_from_checkpoint(conn):
+    class Interrupted(Exception):
+        pass
+
+    def stop_after_first_batch(progress):
+        raise Interrupted
+
+    with pytest.raises(Interrupted):
+        run_backfill(conn, BACKFILL, batch_size=10, sleep_seconds=0, progress=stop_after_first_batch)
+    assert labels(conn).count(None) == 17 - 7  # ids 2..20 were committed with the checkpoint
+
+    result = run_backfill(conn, BACKFILL, batch_size=10, sleep_seconds=0)
+    assert result.batches == 2 and result.run_rows_updated == 10 and result.rows_updated == 17
+    assert labels(conn).count(None) == 0
+
+    # A completed backfill is a no-op
+    assert run_backfill(conn, BACKFILL, batch_size=10, sleep_seconds=0).batches == 0
@@ -0,0 +1,100 @@
+import pytest
+
+from app.api.v1.auth import create_access_token
+from app.core.security import get_password_hash
+from app.models.client import Client
+from app.models.user import User
+
+
+@pytest.fixture()
+def seeded(client_app):
+    client, SessionLocal = client_app
+    db = SessionLocal()
+    user = User(email="etag@example.com", hashed_password=get_password_hash("secret123", rounds=4), is_verified=True)
+    db.add(user)
+    db.flush()
+    client_row = Client(user_id=user.id, name="Acme")
+    db.add(client_row)
+    db.commit()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+    client_id = client_row.id
+    db.close()
+
+    r = client.post("/v1/invoices", json={"client_id": client_id, "items": [{"description": "Design", "unit_price": "10"}]}, headers=headers)
+    assert r.status_code == 201, r.text
+    return client, headers, client_id, r.json()["id"]
+
+
+def revalidate(client, url, headers, etag):
+    return client.get(url, headers={**headers, "If-None-Match": etag})
+
+
+def test_invoice_revalidates_from_its_version(seeded, max_queries):
+    client, headers, _, invoice_id = seeded
+    url = f"/v1/invoices/{invoice_id}"
+    r = client.get(url, headers=headers)
+    etag = r.headers["etag"]
+    assert r.headers["cache-control"] == "private, no-cache"
+
+    with max_queries(1) as captured:
+        r = revalidate(client, url, headers, etag)
+    assert r.status_code == 304 and r.content == b"" and r.headers["etag"] == etag
+    assert "invoice_items" not in captured.statements[0]
+    assert revalidate(client, url, headers, f'"nope", W/{etag}').status_code == 304
+
+    client.put(url, json={"notes": "Net 30"}, headers=headers)
+    r = revalidate(client, url, headers, etag)
+    assert r.status_code == 200 and r.json()["notes"] == "Net 30" and r.headers["etag"] != etag
+
+    # Invoices embed the owner's business details, so a profile edit changes their tag too
+    etag = r.headers["etag"]
+    assert client.patch("/v1/me", json={"company_name": "Acme Studio"}, headers=headers).status_code == 200
+    r = revalidate(client, url, headers, etag)
+    assert r.status_code == 200 and r.json()["user_business_info"]["company_name"] == "Acme Studio"
+
+
+def test_client_and_profile_revalidate(seeded, max_queries):
+    client, headers, client_id, _ = seeded
+    url = f"/v1/clients/{client_id}"
+    etag = client.get(url, headers=headers).headers["etag"]
+    with max_queries(1):
+        assert revalidate(client, url, headers, etag).status_code == 304
+    r = client.put(url, json={"phone": "0800"}, headers=headers)
+    assert r.headers["etag"] != etag
+    assert revalidate(client, url, headers, etag).status_code == 200
+    assert revalidate(client, url, headers, r.headers["etag"]).status_code == 304
+
+    etag = client.get("/v1/me", headers=headers).headers["etag"]
+    with max_queries(0):
+        assert revalidate(client, "/v1/me", headers, etag).status_code == 304
+    r = client.patch("/v1/me", json={"full_name": "E. Tag"}, headers=headers)
+    assert r.headers["etag"] != etag
+    r = revalidate(client, "/v1/me", headers, etag)
+    assert r.status_code == 200 and r.json()["full_name"] == "E. Tag"
+
+
+def test_collection_etags(seeded, max_queries):
+    client, headers, client_id, invoice_id = seeded
+    etag = client.get("/v1/invoices", headers=headers).headers["etag"]
+    with max_queries(1):
+        assert revalidate(client, "/v1/invoices", headers, etag).status_code == 304
+    # Filters select a different collection
+    assert client.get("/v1/invoices?status=paid", headers=headers).headers["etag"] != etag
+
+    # Creates and edits move max(updated_at); deletes change the count
+    second = client.post("/v1/invoices", json={"client_id": client_id}, headers=headers).json()["id"]
+    r = revalidate(client, "/v1/invoices", headers, etag)
+    assert r.status_code == 200 and len(r.json()) == 2
+    etag = r.headers["etag"]
+    client.put(f"/v1/invoices/{invoice_id}", json={"status": "sent"}, headers=headers)
+    r = revalidate(client, "/v1/invoices", headers, etag)
+    assert r.status_code == 200
+    etag = r.headers["etag"]
+    client.delete(f"/v1/invoices/{second}", headers=headers)
+    assert revalidate(client, "/v1/invoices", headers, etag).status_code == 200
+
+    etag = client.get("/v1/clients", headers=headers).headers["etag"]
+    assert revalidate(client, "/v1/clients", headers, etag).status_code == 304
+    client.post("/v1/clients", json={"name": "Globex"}, headers=headers)
+    r = revalidate(client, "/v1/clients", headers, etag)
+    assert r.status_code == 200 and len(r.json()) == 2
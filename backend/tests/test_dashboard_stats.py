@@ -0,0 +1,141 @@
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, select, update
+
+from app.api.v1.auth import create_access_token
+from app.core.security import get_password_hash
+from app.models.client import Client
+from app.models.invoice import Invoice
+from app.models.invoice_stats import InvoiceStats
+from app.models.user import User
+from app.services.invoice_stats import rebuild_invoice_stats
+
+
+@pytest.fixture()
+def seeded(client_app):
+    client, SessionLocal = client_app
+    db = SessionLocal()
+    user = User(email="stats@example.com", hashed_password=get_password_hash("secret123", rounds=4), is_verified=True)
+    other = User(email="other@example.com", hashed_password="x", is_verified=True)
+    db.add_all([user, other])
+    db.flush()
+    acme, globex, theirs = Client(user_id=user.id, name="Acme"), Client(user_id=user.id, name="Globex"), Client(user_id=other.id, name="Theirs")
+    db.add_all([acme, globex, theirs])
+    db.flush()
+    db.add(Invoice(user_id=other.id, client_id=theirs.id, number="T-1", status="paid", total=999))
+    db.commit()
+    ids = {"user": user.id, "other": other.id, "acme": acme.id, "globex": globex.id}
+    db.close()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(ids['user'])})}"}
+    return client, SessionLocal, headers, ids
+
+
+def stats_rows(SessionLocal, user_id):
+    db = SessionLocal()
+    rows = db.execute(
+        select(InvoiceStats.currency, InvoiceStats.status, InvoiceStats.invoice_count, InvoiceStats.total)
+        .where(InvoiceStats.user_id == user_id, InvoiceStats.invoice_count != 0)
+    ).all()
+    db.close()
+    return {(currency, status): (count, total) for currency, status, count, total in rows}
+
+
+def assert_matches_invoices(SessionLocal, user_id):
+    db = SessionLocal()
+    expected = {
+        (currency, status): (count, Decimal(total or 0))
+        for currency, status, count, total in db.execute(
+            select(Invoice.currency, Invoice.status, func.count(), func.sum(Invoice.total))
+            .where(Invoice.user_id == user_id)
+            .group_by(Invoice.currency, Invoice.status)
+        )
+    }
+    db.close()
+    assert stats_rows(SessionLocal, user_id) == expected
+
+
+def test_aggregates_follow_every_write_path(seeded):
+    client, SessionLocal, headers, ids = seeded
+
+    def create(**fields):
+        r = client.post("/v1/invoices", json={"client_id": ids["acme"], **fields}, headers=headers)
+        assert r.status_code == 201, r.text
+        return r.json()["id"]
+
+    first = create(total="100.00", status="sent")
+    second = create(total="50.00", currency="USD")
+    create(client_id=ids["globex"], total="20.00", status="paid")
+    assert_matches_invoices(SessionLocal, ids["user"])
+
+    assert client.put(f"/v1/invoices/{first}", json={"status": "paid", "total": "120.00"}, headers=headers).status_code == 200
+    assert client.put(f"/v1/invoices/{second}", json={"notes": "no stats change"}, headers=headers).status_code == 200
+    assert client.post(f"/v1/send-reminder?invoice_id={second}", headers=headers).status_code == 200  # draft -> sent
+    assert_matches_invoices(SessionLocal, ids["user"])
+
+    bulk = client.post("/v1/invoices:bulk", json={"invoices": [
+        {"client_id": ids["acme"], "total": "10.00", "status": "overdue"},
+        {"client_id": ids["acme"], "total": "5.00", "currency": "USD", "status": "overdue"},
+    ]}, headers=headers).json()["results"]
+    r = client.patch("/v1/invoices:bulk", json={"invoices": [
+        {"id": bulk[0]["id"], "status": "paid"},
+        {"id": second, "currency": "EUR", "total": "45.00"},
+    ]}, headers=headers)
+    assert r.json()["succeeded"] == 2, r.text
+    assert_matches_invoices(SessionLocal, ids["user"])
+
+    assert client.request("DELETE", "/v1/invoices:bulk", json={"ids": [bulk[1]["id"]]}, headers=headers).json()["succeeded"] == 1
+    assert client.delete(f"/v1/invoices/{first}", headers=headers).status_code == 204
+    assert_matches_invoices(SessionLocal, ids["user"])
+
+    # Deleting a client deletes its invoices through the ORM cascade
+    assert client.delete(f"/v1/clients/{ids['globex']}", headers=headers).status_code == 204
+    assert_matches_invoices(SessionLocal, ids["user"])
+    assert stats_rows(SessionLocal, ids["other"]) == {("NGN", "paid"): (1, Decimal("999.00"))}
+
+
+def test_dashboard_stats_endpoint(seeded, max_queries):
+    client, _, headers, ids = seeded
+    client.post("/v1/invoices:bulk", json={"invoices": [
+        {"client_id": ids["acme"], "total": "100.00", "status": "paid"},
+        {"client_id": ids["acme"], "total": "40.00", "status": "sent"},
+        {"client_id": ids["acme"], "total": "25.50", "status": "overdue"},
+        {"client_id": ids["acme"], "total": "9.99", "status": "draft"},
+        {"client_id": ids["acme"], "total": "30.00", "status": "paid", "currency": "USD"},
+    ]}, headers=headers)
+
+    client.get("/v1/me", headers=headers)  # warm the principal cache
+    with max_queries(2):
+        r = client.get("/v1/dashboard/stats", headers=headers)
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert {k: body[k] for k in ("total_clients", "total_invoices", "paid_invoices", "unpaid_invoices", "overdue_invoices")} == {
+        "total_clients": 2, "total_invoices": 5, "paid_invoices": 2, "unpaid_invoices": 2, "overdue_invoices": 1,
+    }
+    ngn, usd = body["currencies"]
+    assert (ngn["currency"], ngn["invoice_count"]) == ("NGN", 4)
+    assert [Decimal(ngn[k]) for k in ("revenue", "outstanding", "overdue")] == [Decimal("100"), Decimal("65.50"), Decimal("25.50")]
+    assert ngn["by_status"]["draft"] == {"count": 1, "total": "9.99"}
+    assert (usd["currency"], Decimal(usd["revenue"])) == ("USD", Decimal("30"))
+
+
+def test_rebuild_repairs_drift(seeded):
+    client, SessionLocal, headers, ids = seeded
+    client.post("/v1/invoices", json={"client_id": ids["acme"], "total": "70.00"}, headers=headers)
+    healthy = stats_rows(SessionLocal, ids["user"])
+
+    db = SessionLocal()
+    db.execute(update(InvoiceStats).values(invoice_count=42, total=0))
+    db.commit()
+    rebuild_invoice_stats(db.connection(), ids["user"])
+    db.commit()
+    db.close()
+    assert stats_rows(SessionLocal, ids["user"]) == healthy
+    # Scoped to the user: the other account's drift is left for its own rebuild
+    assert stats_rows(SessionLocal, ids["other"]) == {("NGN", "paid"): (42, Decimal("0.00"))}
+
+    db = SessionLocal()
+    rebuild_invoice_stats(db.connection())
+    db.commit()
+    db.close()
+    assert_matches_invoices(SessionLocal, ids["other"])
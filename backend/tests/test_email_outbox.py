@@ -0,0 +1,112 @@
+import smtplib
+import time
+
+import pytest
+from sqlalchemy import select
+
+from app.models.email_outbox import EmailOutbox
+from app.services import email as email_module
+from app.services.email import EmailService
+from app.services.email_outbox import OutboxWorker, PooledSMTPConnection
+from smtp_stub import SMTPStub
+
+
+def stub_service(smtp: SMTPStub) -> EmailService:
+    service = EmailService()
+    service.smtp_host, service.smtp_port = smtp.host, smtp.port
+    service.smtp_user, service.smtp_password = "user", "password"
+    service.use_tls = service.use_ssl = False
+    return service
+
+
+def test_worker_reuses_one_connection_for_the_batch(db_sessions):
+    db = db_sessions()
+    service = EmailService()
+    for i in range(20):
+        service.enqueue(db, f"user{i}@example.com", "Hello", "<p>Hi</p>", "Hi")
+    db.commit()
+
+    with SMTPStub() as smtp:
+        worker = OutboxWorker(db_sessions, PooledSMTPConnection(stub_service(smtp)), batch_size=8)
+        assert worker.drain() == (20, 0)
+        worker.connection.close()
+
+    assert len(smtp.messages) == 20
+    assert smtp.connections == 1
+    assert smtp.logins == 1
+    statuses = db.execute(select(EmailOutbox.status)).scalars().all()
+    assert set(statuses) == {"sent"}
+    db.close()
+
+
+def test_permanent_failure_is_not_retried(db_sessions):
+    db = db_sessions()
+    service = EmailService()
+    service.enqueue(db, "bounce@example.com", "Hello", "<p>Hi</p>")
+    service.enqueue(db, "ok@example.com", "Hello", "<p>Hi</p>")
+    db.commit()
+
+    with SMTPStub(reject=("bounce@example.com",)) as smtp:
+        worker = OutboxWorker(db_sessions, PooledSMTPConnection(stub_service(smtp)))
+        assert worker.drain() == (1, 1)
+        worker.connection.close()
+
+    rows = {m.to_email: m for m in db.execute(select(EmailOutbox)).scalars()}
+    assert rows["bounce@example.com"].status == "failed"
+    assert rows["bounce@example.com"].attempts == 1
+    assert rows["ok@example.com"].status == "sent"
+    db.close()
+
+
+def test_connection_failure_backs_off(db_sessions):
+    db = db_sessions()
+    EmailService().enqueue(db, "later@example.com", "Hello", "<p>Hi</p>")
+    db.commit()
+
+    service = EmailService()
+    service.smtp_host, service.smtp_port = "127.0.0.1", 1  # nothing listens here
+    service.use_tls = service.use_ssl = False
+    worker = OutboxWorker(db_sessions, PooledSMTPConnection(service), backoff_base_seconds=60)
+    assert worker.drain() == (0, 1)
+
+    message = db.execute(select(EmailOutbox)).scalar_one()
+    assert message.status == "pending"
+    assert message.attempts == 1
+    assert message.next_attempt_at > message.created_at
+    # Not due yet, so nothing is attempted
+    assert worker.drain() == (0, 0)
+    db.close()
+
+
+def test_failed_login_closes_the_connection():
+    with SMTPStub(password="password") as smtp:
+        service = stub_service(smtp)
+        service.smtp_password = "wrong"
+        for _ in range(2):  # as every retry of the outbox would
+            with pytest.raises(smtplib.SMTPAuthenticationError):
+                service.connect()
+        deadline = time.monotonic() + 5
+        while smtp.open_connections and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert (smtp.connections, smtp.open_connections, smtp.logins) == (2, 0, 0)
+
+        service.smtp_password = "password"
+        with service.connect():
+            assert smtp.logins == 1
+
+
+def test_register_only_queues_the_email(client_app, monkeypatch):
+    client, SessionLocal = client_app
+
+    def fail_connect():
+        raise AssertionError("register must not talk to SMTP")
+
+    monkeypatch.setattr(email_module.email_service, "connect", fail_connect)
+    r = client.post("/v1/auth/register", json={"email": "queued@example.com", "password": "secret123"})
+    assert r.status_code == 201, r.text
+
+    db = SessionLocal()
+    message = db.execute(select(EmailOutbox)).scalar_one()
+    assert message.to_email == "queued@example.com"
+    assert "verify-email?token=" in message.html_body
+    db.close()
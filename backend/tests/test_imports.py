@@ -0,0 +1,207 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from app.api.v1.auth import create_access_token
+from app.core.security import get_password_hash
+from app.models.client import Client
+from app.models.invoice import Invoice
+from app.models.user import User
+from app.core import quotas
+from app.core.quotas import QuotaPolicy
+from app.services import imports
+from app.services.invoice_export import CSV_HEADER
+from app.services.imports import run_import, start_import
+
+
+@pytest.fixture()
+def seeded(client_app, monkeypatch):
+    client, SessionLocal = client_app
+    # Chunks of 2 rows: every file below spans several
+    monkeypatch.setattr(imports, "IMPORT_CHUNK_ROWS", 2)
+    for metric in ("import", "export"):
+        monkeypatch.setitem(quotas.QUOTA_POLICIES, metric, {tier: QuotaPolicy(per_minute=100) for tier in ("anonymous", "free", "pro")})
+    db = SessionLocal()
+    user = User(email="import@example.com", hashed_password=get_password_hash("secret123", rounds=4), is_verified=True)
+    db.add(user)
+    db.flush()
+    db.add(Client(user_id=user.id, name="Acme", email="Billing@Acme.com"))
+    db.commit()
+    user_id = user.id
+    db.close()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}", "Content-Type": "text/csv"}
+    return client, SessionLocal, headers, user_id
+
+
+def post_csv(client, headers, kind, text, **params):
+    return client.post(f"/v1/imports/{kind}", params=params, content=text.encode(), headers=headers)
+
+
+def client_names(SessionLocal, user_id):
+    db = SessionLocal()
+    names = sorted(db.scalars(select(Client.name).where(Client.user_id == user_id)))
+    db.close()
+    return names
+
+
+def test_clients_are_validated_and_deduplicated_by_email(seeded):
+    client, SessionLocal, headers, user_id = seeded
+    text = (
+        "﻿Name,Email,Phone,Address\n"
+        "Globex,ap@globex.com,555-0100,\n"
+        "Acme Ltd,billing@acme.com,,\n"  # taken by an existing client, whatever the case
+        "\n"
+        "Initech,not-an-email,,\n"
+        ",anon@example.com,,\n"
+        "Globex EU,AP@globex.com,,\n"  # taken by an earlier row
+        '"Hooli, Inc.",,,"1 Main St\nSuite 2"\n'
+    )
+    r = post_csv(client, headers, "clients", text)
+    assert r.status_code == 200, r.text
+    job = r.json()
+    assert (job["status"], job["rows_done"], job["imported"], job["duplicates"], job["failed"]) == ("completed", 7, 2, 2, 2)
+    assert job["rows_per_second"] > 0
+    assert [(error["row"], error["error"].split(":")[0]) for error in job["errors"]] == [
+        (3, "Duplicate email billing@acme.com"), (5, "email"), (6, "name"), (7, "Duplicate email AP@globex.com"),
+    ]
+    assert client_names(SessionLocal, user_id) == ["Acme", "Globex", "Hooli, Inc."]
+    # Found by search like clients created one by one
+    hits = client.get("/v1/search", params={"q": "hooli"}, headers=headers).json()
+    assert [hit["title"] for hit in hits] == ["Hooli, Inc."]
+    assert client.get(f"/v1/imports/{job['id']}", headers=headers).json()["imported"] == 2
+
+    assert post_csv(client, headers, "clients", "email\nx@example.com\n").status_code == 400
+    # A misspelt column rejects the file instead of being dropped from every row
+    r = post_csv(client, headers, "clients", "name,emial\nA,a@example.com\n")
+    assert (r.status_code, r.json()["detail"]) == (400, "Unknown columns: emial")
+    assert post_csv(client, headers, "clients", "").status_code == 400
+    assert post_csv(client, headers, "clients", "name\nA\xff").status_code == 200
+    assert client.post("/v1/imports/clients", content=b"name\n\xff\n", headers=headers).status_code == 400
+
+
+def invoice_snapshot(SessionLocal, user_id):
+    db = SessionLocal()
+    invoices = db.scalars(
+        select(Invoice).where(Invoice.user_id == user_id).options(selectinload(Invoice.items)).order_by(Invoice.number)
+    ).all()
+    snapshot = [
+        (
+            i.number, i.status, i.client_id, i.currency, i.issued_date, i.due_date, i.subtotal, i.tax, i.total, i.notes,
+            [(item.description, item.quantity, item.unit_price, item.amount) for item in i.items],
+        )
+        for i in invoices
+    ]
+    db.close()
+    return snapshot
+
+
+def test_invoices_round_trip_through_the_export(seeded):
+    client, SessionLocal, headers, user_id = seeded
+    json_headers = {"Authorization": headers["Authorization"]}
+    db = SessionLocal()
+    acme = db.scalar(select(Client.id).where(Client.user_id == user_id))
+    db.close()
+    created = client.post("/v1/invoices:bulk", json={"invoices": [
+        {"client_id": acme, "number": "IMP-1", "status": "paid", "currency": "EUR", "issued_date": "2025-02-03",
+         "due_date": "2025-03-05", "subtotal": "200.00", "tax": "15.50", "total": "215.50", "notes": 'Net 30, "rush"', "items": [
+            {"description": "Design", "quantity": "1", "unit_price": "100"},
+            {"description": "Hosting", "quantity": "2", "unit_price": "25"},
+            {"description": "Support", "quantity": "1.5", "unit_price": "33.33"},  # the chunk grows to keep the invoice whole
+        ]},
+        {"client_id": acme, "number": "IMP-2", "status": "overdue", "due_date": "2025-01-10"},
+        {"client_id": acme, "number": "IMP-3", "status": "sent", "issued_date": "2024-12-31", "total": "99.99",
+         "items": [{"description": "Audit", "unit_price": "99.99"}]},
+    ]}, headers=json_headers).json()["results"]
+    before = invoice_snapshot(SessionLocal, user_id)
+    stats = client.get("/v1/dashboard/stats", headers=json_headers).json()
+    revenue = client.get("/v1/reports/revenue", params={"from": "2024-12", "to": "2025-02"}, headers=json_headers).json()
+
+    export = client.get("/v1/invoices/export?format=csv", headers=json_headers)
+    assert export.text.splitlines()[0] == ",".join(CSV_HEADER)
+    client.request("DELETE", "/v1/invoices:bulk", json={"ids": [result["id"] for result in created]}, headers=json_headers)
+    assert invoice_snapshot(SessionLocal, user_id) == []
+
+    r = post_csv(client, headers, "invoices", export.text)
+    assert r.status_code == 200, r.text
+    assert (r.json()["rows_done"], r.json()["imported"], r.json()["failed"], r.json()["errors"]) == (5, 3, 0, [])
+    # Status, dates, amounts and items come back as they were, and so do the rollups they feed
+    assert invoice_snapshot(SessionLocal, user_id) == before
+    assert client.get("/v1/dashboard/stats", headers=json_headers).json() == stats
+    assert client.get("/v1/reports/revenue", params={"from": "2024-12", "to": "2025-02"}, headers=json_headers).json() == revenue
+
+    # Rows the export didn't write: a client by name, an auto-numbered invoice, and rows that fail
+    def line(**values):
+        return ",".join(values.get(name, "") for name in CSV_HEADER) + "\n"
+
+    more = ",".join(CSV_HEADER) + "\n" + line(invoice_number="IMP-4", client_name="ACME") + line(
+        invoice_number="IMP-5", client_name="Nobody") + line(invoice_number="IMP-1", client_id=str(acme)) + line(
+        invoice_status="sent", client_name="acme", item_description="Auto-numbered", item_unit_price="5")
+    job = post_csv(client, headers, "invoices", more).json()
+    assert (job["imported"], job["failed"]) == (2, 2)
+    assert [(error["row"], error["error"]) for error in job["errors"]] == [
+        (3, "Client not found"), (4, "Invoice number 'IMP-1' already exists. Please use a different number."),
+    ]
+    added = [(row[0], row[1], row[-1]) for row in invoice_snapshot(SessionLocal, user_id) if row[0] not in ("IMP-1", "IMP-2", "IMP-3")]
+    assert sorted(added, key=lambda row: row[0] != "IMP-4") == [
+        ("IMP-4", "draft", []), (added[1][0], "sent", [("Auto-numbered", 1, 5, 5)]),
+    ]
+    assert post_csv(client, headers, "invoices", "client_id,invoice_state\n1,paid\n").status_code == 400
+
+
+def test_invoice_without_a_number_keeps_its_items_together(seeded):
+    client, SessionLocal, headers, user_id = seeded
+    json_headers = {"Authorization": headers["Authorization"]}
+    db = SessionLocal()
+    acme = db.scalar(select(Client.id).where(Client.user_id == user_id))
+    db.close()
+    created = client.post("/v1/invoices:bulk", json={"invoices": [
+        {"client_id": acme, "number": "TMP", "status": "sent", "issued_date": "2025-02-03", "total": "60", "items": [
+            {"description": description, "unit_price": "20"} for description in ("Design", "Hosting", "Support")
+        ]},
+        {"client_id": acme, "number": "IMP-9", "status": "draft", "items": [{"description": "Audit", "unit_price": "5"}]},
+    ]}, headers=json_headers).json()["results"]
+    r = client.put(f"/v1/invoices/{created[0]['id']}", json={"number": None}, headers=json_headers)
+    assert (r.status_code, r.json()["number"]) == (200, None), r.text
+    before = [row[1:] for row in invoice_snapshot(SessionLocal, user_id)]
+    stats = client.get("/v1/dashboard/stats", headers=json_headers).json()
+
+    export = client.get("/v1/invoices/export?format=csv", headers=json_headers).text
+    client.request("DELETE", "/v1/invoices:bulk", json={"ids": [result["id"] for result in created]}, headers=json_headers)
+    job = post_csv(client, headers, "invoices", export).json()
+    # Lines are grouped by invoice_id: three items of one invoice, not three invoices
+    assert (job["rows_done"], job["imported"], job["failed"]) == (4, 2, 0)
+    after = invoice_snapshot(SessionLocal, user_id)
+    assert sorted(row[1:] for row in after) == sorted(before)
+    assert client.get("/v1/dashboard/stats", headers=json_headers).json() == stats
+
+
+def test_interrupted_import_resumes_after_its_last_chunk(seeded):
+    client, SessionLocal, headers, user_id = seeded
+    text = "name,email\n" + "".join(f"Client {n},c{n}@example.com\n" for n in range(7))
+
+    def cut_off(lines, after):
+        # The upload (or the process) dies after `after` lines
+        for n, line in enumerate(lines):
+            if n == after:
+                raise ConnectionError("client disconnected")
+            yield line
+
+    db = SessionLocal()
+    job = start_import(db, user_id, "clients")
+    job_id = job.id
+    with pytest.raises(ConnectionError):
+        run_import(db, job, cut_off(text.splitlines(keepends=True), 6))
+    db.close()
+    # Two chunks committed; the rows read after them were never imported
+    assert client.get(f"/v1/imports/{job_id}", headers=headers).json()["rows_done"] == 4
+    assert len(client_names(SessionLocal, user_id)) == 1 + 4
+
+    other = text.replace("Client 1,", "Client One,")
+    assert post_csv(client, headers, "clients", other, import_id=job_id).status_code == 409
+    r = post_csv(client, headers, "clients", text, import_id=job_id)
+    assert r.status_code == 200, r.text
+    assert (r.json()["status"], r.json()["rows_done"], r.json()["imported"], r.json()["duplicates"]) == ("completed", 7, 7, 0)
+    assert client_names(SessionLocal, user_id) == ["Acme", *(f"Client {n}" for n in range(7))]
+
+    assert post_csv(client, headers, "clients", text, import_id=job_id).status_code == 409
+    assert post_csv(client, headers, "invoices", text, import_id=job_id).status_code == 404
@@ -0,0 +1,145 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import func, select
+
+from app.api.v1.auth import create_access_token
+from app.core import quotas
+from app.core.quotas import QuotaPolicy
+from app.core.security import get_password_hash
+from app.models.client import Client
+from app.models.invoice import Invoice, InvoiceItem
+from app.models.user import User
+
+
+@pytest.fixture()
+def seeded(client_app):
+    client, SessionLocal = client_app
+    db = SessionLocal()
+    user = User(email="bulk@example.com", hashed_password=get_password_hash("secret123", rounds=4), is_verified=True)
+    other = User(email="other@example.com", hashed_password="x", is_verified=True)
+    db.add_all([user, other])
+    db.flush()
+    mine, theirs = Client(user_id=user.id, name="Acme"), Client(user_id=other.id, name="Not mine")
+    db.add_all([mine, theirs])
+    db.flush()
+    db.add(Invoice(user_id=user.id, client_id=mine.id, number="TAKEN-1"))
+    db.add(Invoice(user_id=other.id, client_id=theirs.id, number="OTHER-1"))
+    db.commit()
+    ids = {"user": user.id, "client": mine.id, "their_client": theirs.id}
+    db.close()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(ids['user'])})}"}
+    return client, SessionLocal, headers, ids
+
+
+def test_bulk_create_reports_each_entry(seeded):
+    client, SessionLocal, headers, ids = seeded
+    today = date.today()
+    r = client.post("/v1/invoices:bulk", json={"invoices": [
+        {"client_id": ids["client"], "items": [{"description": "Design", "quantity": "2", "unit_price": "50"}]},
+        {"client_id": ids["client"], "number": "HAND-1", "status": "sent"},
+        {"number": "NO-CLIENT"},
+        {"client_id": ids["their_client"]},
+        {"client_id": ids["client"], "number": "TAKEN-1"},
+        {"client_id": ids["client"], "number": "HAND-1"},
+        {"client_id": ids["client"], "items": [{"description": "A"}, {"description": "B", "unit_price": "3.333"}]},
+    ]}, headers=headers)
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert (body["succeeded"], body["failed"]) == (3, 4)
+    assert [result["status"] for result in body["results"]] == [201, 201, 422, 404, 400, 400, 201]
+    assert [result["index"] for result in body["results"]] == list(range(7))
+    assert "client_id" in body["results"][2]["error"]
+    assert body["results"][0]["number"] == f"INV-{today:%Y%m%d}-001"
+    assert body["results"][6]["number"] == f"INV-{today:%Y%m%d}-002"
+
+    invoice = client.get(f"/v1/invoices/{body['results'][0]['id']}", headers=headers).json()
+    assert [(i["description"], i["amount"]) for i in invoice["items"]] == [("Design", "100.00")]
+    invoice = client.get(f"/v1/invoices/{body['results'][6]['id']}", headers=headers).json()
+    assert [(i["description"], i["amount"]) for i in invoice["items"]] == [("A", "0.00"), ("B", "3.33")]
+    invoice = client.get(f"/v1/invoices/{body['results'][1]['id']}", headers=headers).json()
+    assert (invoice["number"], invoice["status"], invoice["currency"]) == ("HAND-1", "sent", "NGN")
+
+
+def test_bulk_create_statement_count_does_not_grow_with_batch(seeded, max_queries, monkeypatch):
+    client, _, headers, ids = seeded
+    monkeypatch.setitem(quotas.QUOTA_POLICIES, "write", {
+        tier: QuotaPolicy(per_minute=10_000) for tier in ("anonymous", "free", "pro")
+    })
+    counts = []
+    for size in (2, 200):
+        batch = [{"client_id": ids["client"], "items": [{"description": "Line", "unit_price": "10"}] * 3}] * size
+        with max_queries(12) as captured:
+            r = client.post("/v1/invoices:bulk", json={"invoices": batch}, headers=headers)
+        assert r.status_code == 200 and r.json()["succeeded"] == size, r.text
+        counts.append(captured.count)
+    # The first request also loads the user into the principal cache
+    assert counts[1] <= counts[0]
+
+
+def test_bulk_update(seeded):
+    client, SessionLocal, headers, ids = seeded
+    created = client.post("/v1/invoices:bulk", json={"invoices": [
+        {"client_id": ids["client"], "number": "U-1", "items": [{"description": "Old"}]},
+        {"client_id": ids["client"], "number": "U-2"},
+    ]}, headers=headers).json()["results"]
+    first, second = created[0]["id"], created[1]["id"]
+    db = SessionLocal()
+    their_invoice = db.scalar(select(Invoice.id).where(Invoice.number == "OTHER-1"))
+    db.close()
+
+    r = client.patch("/v1/invoices:bulk", json={"invoices": [
+        {"id": first, "status": "paid", "items": [{"description": "New", "quantity": "3", "unit_price": "2"}]},
+        {"id": second, "number": "TAKEN-1"},
+        {"id": their_invoice, "status": "paid"},
+        {"id": first, "notes": "twice"},
+        {"status": "paid"},
+    ]}, headers=headers)
+    assert r.status_code == 200, r.text
+    assert [result["status"] for result in r.json()["results"]] == [200, 400, 404, 400, 422]
+
+    invoice = client.get(f"/v1/invoices/{first}", headers=headers).json()
+    assert invoice["status"] == "paid" and invoice["notes"] is None
+    assert [(i["description"], i["amount"]) for i in invoice["items"]] == [("New", "6.00")]
+    invoice = client.get(f"/v1/invoices/{second}", headers=headers).json()
+    assert invoice["number"] == "U-2"
+
+    # Swapping into a number the batch frees is not supported; a fresh one is
+    r = client.patch("/v1/invoices:bulk", json={"invoices": [
+        {"id": second, "notes": "Net 30", "number": "U-2B"},
+        {"id": first, "number": "U-2"},
+    ]}, headers=headers)
+    assert [result["status"] for result in r.json()["results"]] == [200, 400]
+    invoice = client.get(f"/v1/invoices/{second}", headers=headers).json()
+    assert (invoice["number"], invoice["notes"], invoice["status"]) == ("U-2B", "Net 30", "draft")
+
+
+def test_bulk_delete(seeded):
+    client, SessionLocal, headers, ids = seeded
+    created = client.post("/v1/invoices:bulk", json={"invoices": [
+        {"client_id": ids["client"], "items": [{"description": "Gone"}]},
+        {"client_id": ids["client"]},
+    ]}, headers=headers).json()["results"]
+    db = SessionLocal()
+    their_invoice = db.scalar(select(Invoice.id).where(Invoice.number == "OTHER-1"))
+    db.close()
+
+    r = client.request("DELETE", "/v1/invoices:bulk", json={
+        "ids": [created[0]["id"], their_invoice, created[1]["id"], created[0]["id"], 999999],
+    }, headers=headers)
+    assert r.status_code == 200, r.text
+    assert [result["status"] for result in r.json()["results"]] == [204, 404, 204, 400, 404]
+
+    db = SessionLocal()
+    assert db.scalar(select(func.count(InvoiceItem.id)).where(InvoiceItem.invoice_id == created[0]["id"])) == 0
+    assert db.get(Invoice, their_invoice) is not None
+    db.close()
+    assert client.get(f"/v1/invoices/{created[1]['id']}", headers=headers).status_code == 404
+
+
+def test_bulk_batch_size_is_limited(seeded):
+    client, _, headers, ids = seeded
+    r = client.post("/v1/invoices:bulk", json={"invoices": [{"client_id": ids["client"]}] * 501}, headers=headers)
+    assert r.status_code == 422
+    r = client.post("/v1/invoices:bulk", json={"invoices": []}, headers=headers)
+    assert r.status_code == 422
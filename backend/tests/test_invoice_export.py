@@ -0,0 +1,88 @@
+import csv
+import io
+import json
+
+import pytest
+
+from app.api.v1.auth import create_access_token
+from app.core.security import get_password_hash
+from app.models.client import Client
+from app.models.invoice import Invoice
+from app.models.user import User
+from app.core import quotas
+from app.core.quotas import QuotaPolicy
+from app.services import invoice_export
+
+
+@pytest.fixture()
+def seeded(client_app):
+    client, SessionLocal = client_app
+    db = SessionLocal()
+    user = User(email="export@example.com", hashed_password=get_password_hash("secret123", rounds=4), is_verified=True)
+    other = User(email="other@example.com", hashed_password="x", is_verified=True)
+    db.add_all([user, other])
+    db.flush()
+    acme, globex, theirs = Client(user_id=user.id, name="Acme"), Client(user_id=user.id, name="Globex"), Client(user_id=other.id, name="Theirs")
+    db.add_all([acme, globex, theirs])
+    db.flush()
+    db.add(Invoice(user_id=other.id, client_id=theirs.id, number="T-1"))
+    db.commit()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+    ids = {"acme": acme.id, "globex": globex.id}
+    db.close()
+
+    created = client.post("/v1/invoices:bulk", json={"invoices": [
+        {"client_id": ids["acme"], "number": "E-1", "status": "paid", "total": "150.00", "notes": 'Net 30, "rush"', "items": [
+            {"description": "Design", "quantity": "1", "unit_price": "100"},
+            {"description": "Hosting, yearly", "quantity": "2", "unit_price": "25"},
+        ]},
+        {"client_id": ids["globex"], "number": "E-2", "due_date": "2025-03-01"},
+        {"client_id": ids["acme"], "number": "E-3", "status": "sent", "items": [{"description": "Support", "unit_price": "10"}]},
+    ]}, headers=headers).json()["results"]
+    return client, headers, ids, [result["id"] for result in created]
+
+
+def test_csv_has_one_line_per_item(seeded, max_queries):
+    client, headers, _, invoice_ids = seeded
+    client.get("/v1/me", headers=headers)  # warm the principal cache
+    with max_queries(1):
+        r = client.get("/v1/invoices/export?format=csv", headers=headers)
+    assert r.status_code == 200, r.text
+    assert r.headers["content-type"] == "text/csv; charset=utf-8"
+    assert r.headers["content-disposition"].startswith('attachment; filename="invoices-')
+    # The export quota's headers reach the client even though the route returns its own response
+    assert r.headers["ratelimit-limit"] == "5"
+    assert 0 <= int(r.headers["ratelimit-remaining"]) < 5 and int(r.headers["ratelimit-reset"]) > 0
+
+    rows = list(csv.DictReader(io.StringIO(r.text)))
+    assert [(row["invoice_number"], row["client_name"], row["item_description"]) for row in rows] == [
+        ("E-1", "Acme", "Design"), ("E-1", "Acme", "Hosting, yearly"), ("E-2", "Globex", ""), ("E-3", "Acme", "Support"),
+    ]
+    first = rows[0]
+    assert (first["invoice_id"], first["notes"], first["total"], first["item_amount"]) == (str(invoice_ids[0]), 'Net 30, "rush"', "150.00", "100.00")
+    assert rows[2]["due_date"] == "2025-03-01" and rows[2]["item_id"] == ""
+
+
+def test_ndjson_groups_items_and_applies_filters(seeded, monkeypatch):
+    client, headers, ids, invoice_ids = seeded
+    # Batches of 1 row: an invoice's items span several fetches
+    monkeypatch.setattr(invoice_export, "EXPORT_BATCH_ROWS", 1)
+    r = client.get("/v1/invoices/export?format=ndjson", headers=headers)
+    assert r.status_code == 200 and r.headers["content-type"] == "application/x-ndjson"
+    invoices = [json.loads(line) for line in r.text.splitlines()]
+    assert [(i["id"], i["number"], [item["description"] for item in i["items"]]) for i in invoices] == [
+        (invoice_ids[0], "E-1", ["Design", "Hosting, yearly"]), (invoice_ids[1], "E-2", []), (invoice_ids[2], "E-3", ["Support"]),
+    ]
+    assert invoices[0]["items"][1] == {"id": invoices[0]["items"][1]["id"], "description": "Hosting, yearly", "quantity": "2.00", "unit_price": "25.00", "amount": "50.00"}
+
+    # Same filters as the list (exports are rate limited more tightly than reads)
+    monkeypatch.setitem(quotas.QUOTA_POLICIES, "export", {tier: QuotaPolicy(per_minute=100) for tier in ("anonymous", "free", "pro")})
+
+    def numbers(query):
+        return [json.loads(line)["number"] for line in client.get(f"/v1/invoices/export?format=ndjson&{query}", headers=headers).text.splitlines()]
+
+    assert numbers("status=paid") == ["E-1"]
+    assert numbers(f"client_id={ids['acme']}") == ["E-1", "E-3"]
+    assert numbers("due_from=2025-01-01&due_to=2025-12-31") == ["E-2"]
+    assert numbers("status=overdue") == []
+    assert client.get("/v1/invoices/export?format=xlsx", headers=headers).status_code == 422
@@ -0,0 +1,132 @@
+"""
+Generated invoice numbers come from an atomic per-user sequence: parallel
+creates must never collide. These tests commit for real (no outer
+transaction to roll back), since the row lock is what is being tested.
+
+Runs against SQLite, and also against Postgres when TEST_POSTGRES_URL is set.
+"""
+import asyncio
+from datetime import date
+
+import httpx
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.main import app
+from app.db.session import Base, get_db
+from app.api.v1.auth import create_access_token
+from app.core import quotas
+from app.core.invoice_numbers import sequence_scope, validate_number_format
+from app.core.quotas import QuotaPolicy
+from app.core.security import get_password_hash
+from app.models.client import Client
+from app.models.user import User
+
+@pytest.fixture()
+def client_app(database_url, monkeypatch):
+    # Parallel writers wait on each other's locks rather than failing fast
+    connect_args = {"check_same_thread": False, "timeout": 60} if database_url.startswith("sqlite") else {}
+    # NullPool: a bounded pool smaller than the threadpool can starve requests that already hold a connection
+    engine = create_engine(database_url, connect_args=connect_args, poolclass=NullPool)
+    if engine.dialect.name == "sqlite":
+        # With the default rollback journal, a writer waiting to commit and a reader waiting to
+        # write can deadlock each other into "database is locked"; WAL lets readers carry on
+        event.listen(engine, "connect", lambda dbapi_conn, record: dbapi_conn.execute("PRAGMA journal_mode=WAL"))
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    monkeypatch.setitem(quotas.QUOTA_POLICIES, "write", {
+        tier: QuotaPolicy(per_minute=10_000) for tier in ("anonymous", "free", "pro")
+    })
+    try:
+        yield SessionLocal
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+
+def seed(SessionLocal) -> tuple[dict, int]:
+    db = SessionLocal()
+    user = User(email="numbers@example.com", hashed_password=get_password_hash("secret123", rounds=4), is_verified=True)
+    db.add(user)
+    db.flush()
+    client_row = Client(user_id=user.id, name="Acme")
+    db.add(client_row)
+    db.commit()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+    client_id = client_row.id
+    db.close()
+    return headers, client_id
+
+
+async def create_many(headers: dict, payloads: list[dict]) -> list[httpx.Response]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await asyncio.gather(*(client.post("/v1/invoices", json=p, headers=headers) for p in payloads))
+
+
+def test_parallel_creates_get_distinct_consecutive_numbers(client_app):
+    headers, client_id = seed(client_app)
+
+    responses = asyncio.run(create_many(headers, [{"client_id": client_id}] * 300))
+
+    assert [r.status_code for r in responses if r.status_code != 201] == []
+    numbers = sorted(r.json()["number"] for r in responses)
+    today = date.today()
+    assert numbers == [f"INV-{today:%Y%m%d}-{n:03d}" for n in range(1, 301)]
+
+
+def test_numbering_is_one_statement(client_app, max_queries):
+    headers, client_id = seed(client_app)
+
+    with max_queries(10) as captured:
+        responses = asyncio.run(create_many(headers, [{"client_id": client_id}]))
+    assert responses[0].status_code == 201, responses[0].text
+    assert sum("invoice_sequences" in statement for statement in captured.statements) == 1
+    assert not any("count(" in statement.lower() for statement in captured.statements)
+
+
+def test_generated_number_skips_hand_entered_duplicates(client_app):
+    headers, client_id = seed(client_app)
+    today = date.today()
+    taken = [f"INV-{today:%Y%m%d}-001", f"INV-{today:%Y%m%d}-002"]
+
+    responses = asyncio.run(create_many(headers, [{"client_id": client_id, "number": number} for number in taken]))
+    assert [r.status_code for r in responses] == [201, 201]
+    (generated,) = asyncio.run(create_many(headers, [{"client_id": client_id}]))
+    assert generated.status_code == 201, generated.text
+    assert generated.json()["number"] == f"INV-{today:%Y%m%d}-003"
+
+    (duplicate,) = asyncio.run(create_many(headers, [{"client_id": client_id, "number": taken[0]}]))
+    assert duplicate.status_code == 400
+    assert "already exists" in duplicate.json()["detail"]
+
+
+def test_configurable_format(client_app, monkeypatch):
+    monkeypatch.setattr("app.core.invoice_numbers.settings.INVOICE_NUMBER_FORMAT", "{date:%Y}/{seq:05d}")
+    headers, client_id = seed(client_app)
+
+    responses = asyncio.run(create_many(headers, [{"client_id": client_id}] * 3))
+    assert sorted(r.json()["number"] for r in responses) == [f"{date.today():%Y}/{n:05d}" for n in (1, 2, 3)]
+
+
+def test_number_format_scopes_and_validation():
+    day = date(2025, 1, 15)
+    assert sequence_scope("INV-{date:%Y%m%d}-{seq:03d}", day) == "INV-20250115-{seq}"
+    assert sequence_scope("INV-{seq:06d}", day) == "INV-{seq}"
+    validate_number_format("{date:%Y}/{seq}")
+    for bad in ("INV-{date:%Y%m%d}", "{seq}-{seq}", "{unknown}-{seq}", "INV-{seq"):
+        with pytest.raises(ValueError):
+            validate_number_format(bad)
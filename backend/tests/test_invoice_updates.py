@@ -0,0 +1,126 @@
+import re
+
+import pytest
+
+from app.api.v1.auth import create_access_token
+from app.core.security import get_password_hash
+from app.models.client import Client
+from app.models.user import User
+
+
+@pytest.fixture()
+def invoice(client_app):
+    client, SessionLocal = client_app
+    db = SessionLocal()
+    user = User(email="editor@example.com", hashed_password=get_password_hash("secret123", rounds=4), is_verified=True)
+    db.add(user)
+    db.flush()
+    client_row = Client(user_id=user.id, name="Acme")
+    db.add(client_row)
+    db.commit()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+    client_id = client_row.id
+    db.close()
+
+    r = client.post("/v1/invoices", json={"client_id": client_id, "items": [
+        {"description": "Design", "quantity": "1", "unit_price": "100"},
+        {"description": "Build", "quantity": "2", "unit_price": "50"},
+        {"description": "Hosting", "quantity": "1", "unit_price": "20"},
+    ]}, headers=headers)
+    assert r.status_code == 201, r.text
+    assert r.headers["etag"].startswith('"1-')
+    return client, headers, client_id, r.json()
+
+
+def write_statements(captured) -> list[str]:
+    """The writes issued, as "UPDATE invoice_items" etc."""
+    writes = (re.match(r"(INSERT INTO|UPDATE|DELETE FROM) (\w+)", s) for s in captured.statements)
+    return [f"{m.group(1).split()[0]} {m.group(2)}" for m in writes if m]
+
+
+def test_items_are_diffed_by_id(invoice, max_queries):
+    client, headers, _, created = invoice
+    design, build, hosting = created["items"]
+
+    with max_queries(8) as captured:
+        r = client.put(f"/v1/invoices/{created['id']}", json={"items": [
+            {"id": design["id"], "description": "Design", "quantity": "1", "unit_price": "100"},
+            {"id": build["id"], "description": "Build", "quantity": "3", "unit_price": "50"},
+            {"description": "Support", "quantity": "1", "unit_price": "10"},
+        ]}, headers=headers)
+    assert r.status_code == 200, r.text
+    items = r.json()["items"]
+    assert [i["id"] for i in items[:2]] == [design["id"], build["id"]]
+    assert [(i["description"], i["amount"]) for i in items] == [("Design", "100.00"), ("Build", "150.00"), ("Support", "10.00")]
+    assert hosting["id"] not in {i["id"] for i in items}
+    # Unchanged Design isn't written; the invoice row is updated to bump its version, and
+    # its search document rewritten in place (item descriptions changed)
+    assert sorted(write_statements(captured)) == [
+        "DELETE invoice_items", "INSERT invoice_items", "INSERT search_documents", "UPDATE invoice_items", "UPDATE invoices",
+    ]
+    # No re-read after the write: only the initial invoice + items load
+    assert sum(s.startswith("SELECT") and "FROM invoices" in s for s in captured.statements) == 1
+
+    # The response matches what a fresh read returns
+    fresh = client.get(f"/v1/invoices/{created['id']}", headers=headers).json()
+    assert fresh["items"] == items and fresh["version"] == r.json()["version"] == 2
+
+
+def test_item_ids_must_belong_to_the_invoice(invoice):
+    client, headers, client_id, created = invoice
+    other = client.post("/v1/invoices", json={"client_id": client_id, "items": [{"description": "Other"}]}, headers=headers).json()
+    keep = created["items"][0]
+
+    for items in ([{"id": other["items"][0]["id"], "description": "Stolen"}], [keep, keep]):
+        r = client.put(f"/v1/invoices/{created['id']}", json={"items": items}, headers=headers)
+        assert r.status_code == 400
+        assert "not items of this invoice" in r.json()["detail"]
+    assert client.get(f"/v1/invoices/{created['id']}", headers=headers).json()["items"] == created["items"]
+
+
+def test_if_match_rejects_stale_writes(invoice):
+    client, headers, _, created = invoice
+    url = f"/v1/invoices/{created['id']}"
+    r = client.get(url, headers=headers)
+    etag = r.headers["etag"]
+    assert etag.startswith('"1-')
+
+    # Editor A saves first; editor B still holds version 1
+    r = client.put(url, json={"notes": "A"}, headers={**headers, "If-Match": '"1"'})
+    assert r.status_code == 200 and r.headers["etag"].startswith('"2-')
+    # The full ETag works as well as the bare version
+    r = client.put(url, json={"notes": "B"}, headers={**headers, "If-Match": etag})
+    assert r.status_code == 412
+    assert client.get(url, headers=headers).json()["notes"] == "A"
+
+    # Item-only edits bump the version too
+    r = client.put(url, json={"items": created["items"][:1]}, headers={**headers, "If-Match": '"2"'})
+    assert r.status_code == 200 and r.json()["version"] == 3
+    assert client.put(url, json={"notes": "C"}, headers={**headers, "If-Match": 'W/"3"'}).status_code == 412
+    assert client.put(url, json={"notes": "C"}, headers={**headers, "If-Match": '"9", "3"'}).status_code == 200
+    assert client.put(url, json={"notes": "D"}, headers={**headers, "If-Match": "*"}).status_code == 200
+    # Without If-Match writes are unconditional, as before
+    assert client.put(url, json={"notes": "E"}, headers=headers).json()["version"] == 6
+
+    assert client.request("DELETE", url, headers={**headers, "If-Match": '"1"'}).status_code == 412
+    assert client.request("DELETE", url, headers={**headers, "If-Match": '"6"'}).status_code == 204
+
+
+def test_bulk_update_checks_versions_and_diffs_items(invoice):
+    client, headers, _, created = invoice
+    design, build, _ = created["items"]
+
+    r = client.patch("/v1/invoices:bulk", json={"invoices": [
+        {"id": created["id"], "version": 1, "items": [design, {**build, "quantity": "4", "amount": None}, {"description": "New"}]},
+    ]}, headers=headers)
+    assert r.status_code == 200, r.text
+    assert r.json()["results"][0] | {"error": None} == {
+        "index": 0, "status": 200, "id": created["id"], "number": created["number"], "version": 2, "error": None,
+    }
+    items = client.get(f"/v1/invoices/{created['id']}", headers=headers).json()["items"]
+    assert [(i["id"], i["amount"]) for i in items[:2]] == [(design["id"], "100.00"), (build["id"], "200.00")]
+    assert [i["description"] for i in items] == ["Design", "Build", "New"]
+
+    r = client.patch("/v1/invoices:bulk", json={"invoices": [{"id": created["id"], "version": 1, "notes": "late"}]}, headers=headers)
+    assert r.json()["results"][0]["status"] == 412
+    assert r.json()["results"][0]["version"] == 2
@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event, inspect, text
+
+from app.db.migrate import SchemaOutOfDateError, check_schema, current_version, migrate
+from app.db.migrations import LATEST_VERSION
+from app.db.session import Base
+from app.services.verification_tokens import hash_token
+
+
+@pytest.fixture()
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'schema.db'}")
+    yield engine
+    engine.dispose()
+
+
+def count_statements(engine):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+def test_startup_check_is_a_single_query_once_migrated(engine):
+    with pytest.raises(SchemaOutOfDateError):
+        check_schema(engine)
+
+    assert migrate(engine) == list(range(1, LATEST_VERSION + 1))
+    assert migrate(engine) == []
+    assert {"invoices", "clients", "users", "schema_version"} <= set(inspect(engine).get_table_names())
+
+    statements = count_statements(engine)
+    assert check_schema(engine) == LATEST_VERSION
+    assert len(statements) == 1
+
+
+def test_auto_migrate_and_partial_target(engine):
+    assert migrate(engine, target=2) == [1, 2]
+    with engine.connect() as conn:
+        assert current_version(conn) == 2
+    assert check_schema(engine, auto_migrate=True) == LATEST_VERSION
+    with engine.connect() as conn:
+        assert current_version(conn) == LATEST_VERSION
+
+
+def test_upgrades_a_database_created_before_versioning(engine):
+    # Schema as create_all used to leave it: no currency column, plaintext tokens, single-column indexes
+    Base.metadata.create_all(bind=engine)
+    expires = datetime.utcnow() + timedelta(hours=1)
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_invoices_user_id_id"))
+        conn.execute(text("ALTER TABLE invoices DROP COLUMN currency"))
+        conn.execute(text("CREATE INDEX ix_invoices_user_id ON invoices (user_id)"))
+        conn.execute(text("ALTER TABLE users ADD COLUMN verification_token VARCHAR"))
+        conn.execute(text("ALTER TABLE users ADD COLUMN verification_token_expires DATETIME"))
+        conn.execute(
+            text("INSERT INTO users (email, hashed_password, is_active, is_verified, is_pro, verification_token, verification_token_expires) "
+                 "VALUES ('old@example.com', 'x', 1, 0, 0, 'plain-token', :expires)"),
+            {"expires": expires},
+        )
+
+    migrate(engine)
+
+    db = inspect(engine)
+    assert "currency" in {c["name"] for c in db.get_columns("invoices")}
+    index_names = {i["name"] for i in db.get_indexes("invoices")}
+    assert "ix_invoices_user_id_id" in index_names
+    assert "ix_invoices_user_id" not in index_names
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT token_hash FROM email_verification_tokens")).scalar() == hash_token("plain-token")
+        assert conn.execute(text("SELECT verification_token FROM users")).scalar() is None
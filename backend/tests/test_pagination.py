@@ -0,0 +1,113 @@
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app.api.v1.auth import create_access_token
+from app.core.security import get_password_hash
+from app.models.client import Client
+from app.models.invoice import Invoice
+from app.models.payment import Payment
+from app.models.user import User
+
+
+@pytest.fixture()
+def seeded(client_app):
+    client, SessionLocal = client_app
+    db = SessionLocal()
+    user = User(email="pages@example.com", hashed_password=get_password_hash("secret123", rounds=4), is_verified=True)
+    other = User(email="other@example.com", hashed_password="x", is_verified=True)
+    db.add_all([user, other])
+    db.flush()
+    clients = [Client(user_id=user.id, name=name) for name in ["Delta", "alpha", "Charlie", "Bravo", "Bravo", "Echo", "Foxtrot"]]
+    db.add_all(clients + [Client(user_id=other.id, name="Not mine")])
+    db.flush()
+    start = datetime(2025, 1, 1)
+    for i in range(23):
+        db.add(Invoice(
+            user_id=user.id,
+            client_id=clients[0].id,
+            number=f"PG-{i}",
+            # Duplicates and NULLs in both nullable sort columns
+            due_date=None if i % 5 == 0 else date(2025, 3, 1) + timedelta(days=i % 4),
+            total=None if i % 7 == 0 else Decimal(i % 6) + Decimal("0.50"),
+            created_at=start + timedelta(hours=i % 9),
+        ))
+        db.add(Payment(user_id=user.id, amount=10 + i, provider_ref=f"pg-{i}", created_at=start + timedelta(days=i % 4)))
+    db.commit()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+    db.close()
+    return client, SessionLocal, headers
+
+
+def walk(client, path: str, headers: dict, limit: int) -> list[dict]:
+    rows, cursor, pages = [], None, 0
+    while True:
+        url = f"{path}{'&' if '?' in path else '?'}limit={limit}" + (f"&cursor={cursor}" if cursor else "")
+        r = client.get(url, headers=headers)
+        assert r.status_code == 200, r.text
+        page = r.json()
+        rows += page
+        pages += 1
+        if r.headers["x-has-more"] == "false":
+            assert "x-next-cursor" not in r.headers
+            return rows
+        assert len(page) == limit
+        cursor = r.headers["x-next-cursor"]
+        assert pages < 50
+
+
+def expected_order(rows: list[dict], field: str, descending: bool) -> list[int]:
+    # NULLs after every value ascending, before every value descending; id breaks ties
+    values = [r for r in rows if r[field] is not None]
+    nulls = [r for r in rows if r[field] is None]
+    parse = (lambda v: Decimal(v)) if field == "total" else (lambda v: v)
+    values.sort(key=lambda r: (parse(r[field]), r["id"]), reverse=descending)
+    nulls.sort(key=lambda r: r["id"], reverse=descending)
+    ordered = nulls + values if descending else values + nulls
+    return [r["id"] for r in ordered]
+
+
+@pytest.mark.parametrize("sort", ["id", "-id", "due_date", "-due_date", "created_at", "-created_at", "total", "-total"])
+def test_invoice_pages_cover_every_row_once_in_order(seeded, sort):
+    client, _, headers = seeded
+    all_rows = client.get("/v1/invoices?limit=100", headers=headers).json()
+    assert len(all_rows) == 23
+
+    paged = walk(client, f"/v1/invoices?sort={sort}", headers, limit=4)
+    field, descending = sort.lstrip("-"), sort.startswith("-")
+    assert [r["id"] for r in paged] == expected_order(all_rows, field, descending)
+
+
+def test_client_and_payment_pages(seeded):
+    client, _, headers = seeded
+    clients = walk(client, "/v1/clients?sort=name", headers, limit=2)
+    assert [c["name"] for c in clients] == ["Bravo", "Bravo", "Charlie", "Delta", "Echo", "Foxtrot", "alpha"]
+    assert [c["id"] for c in walk(client, "/v1/clients?sort=-id", headers, limit=3)] == sorted(
+        (c["id"] for c in clients), reverse=True
+    )
+
+    payments = walk(client, "/v1/payments/history", headers, limit=5)
+    assert len(payments) == 23
+    keys = [(p["created_at"], p["id"]) for p in payments]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_exact_page_boundary_has_no_next_cursor(seeded):
+    client, _, headers = seeded
+    r = client.get("/v1/clients?limit=7", headers=headers)
+    assert len(r.json()) == 7
+    assert r.headers["x-has-more"] == "false" and "x-next-cursor" not in r.headers
+
+
+def test_cursors_are_signed_and_bound_to_resource_and_sort(seeded):
+    client, _, headers = seeded
+    cursor = client.get("/v1/invoices?sort=due_date&limit=2", headers=headers).headers["x-next-cursor"]
+    payload, signature = cursor.split(".")
+
+    assert client.get(f"/v1/invoices?sort=due_date&cursor={payload}x.{signature}", headers=headers).status_code == 400
+    assert client.get("/v1/invoices?cursor=garbage", headers=headers).status_code == 400
+    r = client.get(f"/v1/invoices?sort=total&cursor={cursor}", headers=headers)
+    assert r.status_code == 400 and "due_date" in r.json()["detail"]
+    assert client.get(f"/v1/clients?sort=due_date&cursor={cursor}", headers=headers).status_code == 400
+    assert client.get("/v1/invoices?sort=number", headers=headers).status_code == 400
@@ -0,0 +1,94 @@
+from app.api.v1.auth import create_access_token
+from app.core.config import settings
+from app.core.principal_cache import PrincipalCache, UserSnapshot, principal_cache
+from app.core.security import get_password_hash
+from app.models.user import User
+
+
+def create_verified_user(SessionLocal, email: str) -> dict:
+    db = SessionLocal()
+    user = User(email=email, full_name="Cache User", hashed_password=get_password_hash("secret123", rounds=4), is_verified=True)
+    db.add(user)
+    db.commit()
+    token = create_access_token({"sub": str(user.id)})
+    db.close()
+    return {"Authorization": f"Bearer {token}"}
+
+
+def snapshot(user_id: int, email: str = "a@example.com") -> UserSnapshot:
+    return UserSnapshot(id=user_id, email=email)
+
+
+def test_cache_expires_and_evicts_lru(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.core.principal_cache.time.monotonic", lambda: now[0])
+    cache = PrincipalCache(max_entries=2, ttl_seconds=10)
+
+    cache.put("sig1", 1, snapshot(1), cache.generation(1))
+    cache.put("sig2", 2, snapshot(2), cache.generation(2))
+    assert cache.get("sig1", 1) is not None  # sig1 becomes most recently used
+    cache.put("sig3", 3, snapshot(3), cache.generation(3))
+    assert cache.get("sig2", 2) is None
+    assert cache.evictions == 1
+
+    now[0] += 11
+    assert cache.get("sig1", 1) is None
+    assert cache.stats()["hits"] == 1
+
+
+def test_invalidation_blocks_stale_put():
+    cache = PrincipalCache(max_entries=10, ttl_seconds=60)
+    generation = cache.generation(1)
+    cache.put("sig1", 1, snapshot(1), generation)
+    cache.invalidate_user(1)
+    assert cache.get("sig1", 1) is None
+
+    # A lookup that started before the invalidation must not re-cache its result
+    cache.put("sig1", 1, snapshot(1, "old@example.com"), generation)
+    assert cache.get("sig1", 1) is None
+
+
+def test_generations_are_bounded_without_reopening_the_race():
+    cache = PrincipalCache(max_entries=2, ttl_seconds=60)
+    generation = cache.generation(1)
+    cache.invalidate_user(1)
+    for user_id in range(2, 100):
+        cache.invalidate_user(user_id)
+    assert len(cache.generations) == 2 and 1 not in cache.generations
+
+    # User 1's generation was dropped, but a lookup that started before its invalidation still can't cache
+    cache.put("sig1", 1, snapshot(1, "old@example.com"), generation)
+    assert cache.get("sig1", 1) is None
+    cache.put("sig1", 1, snapshot(1), cache.generation(1))
+    assert cache.get("sig1", 1) is not None
+
+
+def test_me_is_served_from_cache_and_invalidated_on_update(client_app):
+    client, SessionLocal = client_app
+    headers = create_verified_user(SessionLocal, "cached@example.com")
+
+    r = client.get("/v1/me", headers=headers)
+    assert r.status_code == 200, r.text
+    misses = principal_cache.misses
+    r = client.get("/v1/me", headers=headers)
+    assert r.status_code == 200
+    assert principal_cache.misses == misses
+    assert principal_cache.hits >= 1
+
+    r = client.patch("/v1/me", json={"company_name": "Acme Studio"}, headers=headers)
+    assert r.status_code == 200, r.text
+    r = client.get("/v1/me", headers=headers)
+    assert r.json()["company_name"] == "Acme Studio"
+
+
+def test_monitoring_requires_admin(client_app, monkeypatch):
+    client, SessionLocal = client_app
+    headers = create_verified_user(SessionLocal, "admin@example.com")
+
+    r = client.get("/v1/monitoring/principal-cache", headers=headers)
+    assert r.status_code == 403
+
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", ["admin@example.com"])
+    r = client.get("/v1/monitoring/principal-cache", headers=headers)
+    assert r.status_code == 200
+    assert {"hits", "misses", "entries"} <= set(r.json())
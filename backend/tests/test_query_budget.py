@@ -0,0 +1,78 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import InvalidRequestError
+
+from app.api.v1.auth import create_access_token
+from app.core.security import get_password_hash
+from app.models.client import Client
+from app.models.invoice import Invoice, InvoiceItem
+from app.models.user import User
+
+
+@pytest.fixture()
+def seeded(client_app):
+    client, SessionLocal = client_app
+    db = SessionLocal()
+    user = User(email="budget@example.com", full_name="Budget User", hashed_password=get_password_hash("secret123", rounds=4), is_verified=True)
+    db.add(user)
+    db.flush()
+    client_row = Client(user_id=user.id, name="Acme")
+    db.add(client_row)
+    db.flush()
+    invoice_ids = []
+    for i in range(10):
+        invoice = Invoice(user_id=user.id, client_id=client_row.id, number=f"Q-{i}")
+        invoice.items = [InvoiceItem(description=f"Line {n}", quantity=1, unit_price=5, amount=5) for n in range(3)]
+        db.add(invoice)
+        db.flush()
+        invoice_ids.append(invoice.id)
+    db.commit()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+    ids = (client_row.id, invoice_ids)
+    db.close()
+
+    # Warm the principal cache so budgets measure the endpoint, not authentication
+    assert client.get("/v1/me", headers=headers).status_code == 200
+    return client, SessionLocal, headers, ids
+
+
+def test_list_invoices_query_count_does_not_grow_with_rows(seeded, max_queries):
+    client, _, headers, _ = seeded
+    with max_queries(3):  # collection ETag, invoices + one selectin for all their items
+        r = client.get("/v1/invoices", headers=headers)
+    assert r.status_code == 200
+    assert len(r.json()) == 10 and all(len(i["items"]) == 3 for i in r.json())
+    assert {i["user_business_info"]["email"] for i in r.json()} == {"budget@example.com"}
+    assert r.headers["x-has-more"] == "false" and "x-next-cursor" not in r.headers
+
+
+def test_invoice_write_budgets(seeded, max_queries):
+    client, _, headers, (client_id, invoice_ids) = seeded
+    with max_queries(2):
+        assert client.get(f"/v1/invoices/{invoice_ids[0]}", headers=headers).status_code == 200
+    # client check, 2 INSERTs, the two aggregate upserts (totals, monthly), the search document, reload with items
+    with max_queries(8):
+        r = client.post("/v1/invoices", headers=headers, json={
+            "client_id": client_id, "number": "Q-new", "items": [{"description": "A", "quantity": 1, "unit_price": 3}],
+        })
+    assert r.status_code == 201, r.text
+    # load, replace items, rewrite the search document (DELETE + INSERT ... SELECT)
+    with max_queries(8):
+        r = client.put(f"/v1/invoices/{invoice_ids[1]}", headers=headers, json={"items": [{"description": "B", "quantity": 2, "unit_price": 3}]})
+    assert r.status_code == 200, r.text
+
+
+def test_server_timing_header_reports_statements(seeded):
+    client, _, headers, _ = seeded
+    r = client.get("/v1/invoices", headers=headers)
+    assert r.headers["server-timing"].startswith("db;dur=")
+    assert r.headers["server-timing"].endswith('desc="3 queries"')
+
+
+def test_implicit_lazy_load_raises(seeded):
+    _, SessionLocal, _, _ = seeded
+    db = SessionLocal()
+    invoice = db.scalars(select(Invoice).limit(1)).one()
+    with pytest.raises(InvalidRequestError):
+        invoice.items
+    db.close()
@@ -0,0 +1,177 @@
+"""
+Every query issued by the hot endpoints must be served by an index.
+
+Runs against SQLite, and also against Postgres when TEST_POSTGRES_URL is set
+(there `enable_seqscan` is switched off, so a sequential scan in the plan
+means no usable index exists even on these tiny test tables).
+"""
+import json
+import re
+from datetime import date
+
+import pytest
+from sqlalchemy import event, select
+
+from app.api.v1.auth import create_access_token
+from app.core.security import get_password_hash
+from app.models.client import Client
+from app.models.extraction import Extraction
+from app.models.invoice import Invoice, InvoiceItem
+from app.models.payment import Payment
+from app.models.user import User
+
+
+@pytest.fixture()
+def client_app(client_app, db_connection):
+    return (*client_app, db_connection)
+
+
+class QueryRecorder:
+    """Collects the SELECTs run on a connection."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.queries = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            self.queries.append((statement, parameters))
+
+    def __enter__(self):
+        event.listen(self.connection, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.connection, "before_cursor_execute", self._record)
+
+
+def scans(connection, statement: str, parameters) -> list[str]:
+    """Plan steps that read a whole table (or a whole index)."""
+    if connection.dialect.name == "sqlite":
+        plan = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+        return [row[3] for row in plan if re.match(r"SCAN \w+", row[3])]
+
+    connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    try:
+        plan = connection.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+    finally:
+        connection.exec_driver_sql("SET LOCAL enable_seqscan = on")
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    found, nodes = [], [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        if node["Node Type"] == "Seq Scan":
+            found.append(f"Seq Scan on {node['Relation Name']}")
+        nodes.extend(node.get("Plans", []))
+    return found
+
+
+def assert_indexed(connection, queries) -> None:
+    assert queries, "no queries recorded"
+    for statement, parameters in queries:
+        assert scans(connection, statement, parameters) == [], statement
+
+
+def seed(SessionLocal):
+    db = SessionLocal()
+    user = User(email="plans@example.com", full_name="Plan User", hashed_password=get_password_hash("secret123", rounds=4), is_verified=True)
+    db.add(user)
+    db.flush()
+    client_row = Client(user_id=user.id, name="Acme")
+    db.add(client_row)
+    db.flush()
+    invoice = Invoice(user_id=user.id, client_id=client_row.id, number="P-1", status="sent", due_date=date(2025, 1, 31))
+    invoice.items = [InvoiceItem(description="Design", quantity=1, unit_price=10, amount=10)]
+    db.add(invoice)
+    db.add(Invoice(user_id=user.id, client_id=client_row.id, number="P-2", status="draft", total=25))
+    db.add(Client(user_id=user.id, name="Beta"))
+    db.add(Payment(user_id=user.id, amount=29.99, provider="paystack", provider_ref="plan-ref"))
+    db.add(Extraction(user_id=user.id, source_type="text"))
+    db.commit()
+    ids = user.id, client_row.id, invoice.id
+    db.close()
+    return ids
+
+
+@pytest.mark.parametrize("query", [
+    "",
+    "?status=sent",
+    "?client_id={client_id}",
+    "?due_from=2025-01-01&due_to=2025-02-01",
+])
+def test_list_invoices_uses_indexes(client_app, query):
+    client, SessionLocal, connection = client_app
+    user_id, client_id, invoice_id = seed(SessionLocal)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+
+    with QueryRecorder(connection) as recorder:
+        r = client.get("/v1/invoices" + query.format(client_id=client_id, invoice_id=invoice_id), headers=headers)
+    assert r.status_code == 200, r.text
+    assert_indexed(connection, recorder.queries)
+
+
+@pytest.mark.parametrize("path, sort", [
+    ("/v1/invoices", "id"),
+    ("/v1/invoices", "-id"),
+    ("/v1/invoices", "due_date"),
+    ("/v1/invoices", "-created_at"),
+    ("/v1/invoices", "total"),
+    ("/v1/clients", "name"),
+    ("/v1/clients", "-id"),
+])
+def test_keyset_pages_use_indexes(client_app, path, sort):
+    client, SessionLocal, connection = client_app
+    user_id, _, _ = seed(SessionLocal)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+
+    first = client.get(f"{path}?sort={sort}&limit=1", headers=headers)
+    assert first.headers["x-has-more"] == "true"
+    with QueryRecorder(connection) as recorder:
+        r = client.get(f"{path}?sort={sort}&limit=1&cursor={first.headers['x-next-cursor']}", headers=headers)
+    assert r.status_code == 200, r.text
+    assert_indexed(connection, recorder.queries)
+
+
+def test_invoice_client_and_payment_endpoints_use_indexes(client_app):
+    client, SessionLocal, connection = client_app
+    user_id, client_id, invoice_id = seed(SessionLocal)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+
+    with QueryRecorder(connection) as recorder:
+        requests = [
+            client.get(f"/v1/invoices/{invoice_id}", headers=headers),
+            client.post("/v1/invoices", json={"client_id": client_id, "issued_date": "2025-01-15"}, headers=headers),
+            client.get("/v1/clients", headers=headers),
+            client.get(f"/v1/clients/{client_id}", headers=headers),
+            client.get("/v1/payments/history", headers=headers),
+            client.post(
+                "/v1/payments/webhook/paystack",
+                json={"event": "charge.success", "data": {"reference": "plan-ref", "amount": 2999}},
+                headers={"x-paystack-signature": "unused-without-secret"},
+            ),
+        ]
+    assert [r.status_code for r in requests] == [200, 201, 200, 200, 200, 200]
+    assert_indexed(connection, recorder.queries)
+
+
+def test_user_extractions_use_index(client_app):
+    _, SessionLocal, connection = client_app
+    user_id, _, _ = seed(SessionLocal)
+    statement = select(Extraction).where(Extraction.user_id == user_id).order_by(Extraction.created_at.desc())
+    compiled = statement.compile(connection)
+    parameters = tuple(compiled.params[name] for name in compiled.positiontup) if compiled.positional else compiled.params
+    assert scans(connection, str(compiled), parameters) == []
+
+
+def test_default_invoice_listing_needs_no_sort(client_app):
+    client, SessionLocal, connection = client_app
+    if connection.dialect.name != "sqlite":
+        pytest.skip("plan wording is SQLite-specific")
+    user_id, _, _ = seed(SessionLocal)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+    with QueryRecorder(connection) as recorder:
+        client.get("/v1/invoices", headers=headers)
+    statement, parameters = next(q for q in recorder.queries if "FROM invoices" in q[0])
+    plan = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+    assert not any("TEMP B-TREE" in row[3] for row in plan), plan
@@ -0,0 +1,147 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from starlette.requests import Request
+
+from app.api.v1.auth import create_access_token
+from app.core import quotas
+from app.core.quotas import QuotaPolicy, concurrency_limiter
+from app.core.rate_limiter import get_client_ip
+from app.core.security import get_password_hash
+from app.models.extraction import Extraction
+from app.models.usage_counter import UsageCounter
+from app.models.user import User
+
+
+@pytest.fixture()
+def client_app(client_app, monkeypatch):
+    from app.api.v1 import extraction as extraction_module
+
+    class StubExtractor:
+        def extract_from_text(self, text: str):
+            return {"jobs": ["Logo design"], "amount": 500, "currency": "USD", "confidence": 90}
+
+    monkeypatch.setattr(extraction_module, "get_extractor", lambda provider=None: StubExtractor())
+    monkeypatch.setitem(quotas.QUOTA_POLICIES, "extraction", {
+        "anonymous": QuotaPolicy(per_minute=2, per_day=3, concurrency=1),
+        "free": QuotaPolicy(per_minute=10, per_day=3, concurrency=1),
+        "pro": QuotaPolicy(per_minute=10, per_day=6, concurrency=1),
+    })
+    return client_app
+
+
+def create_verified_user(SessionLocal, email: str, pro: bool = False) -> tuple[int, dict]:
+    db = SessionLocal()
+    user = User(
+        email=email,
+        full_name="Quota User",
+        hashed_password=get_password_hash("secret123", rounds=4),
+        is_verified=True,
+        is_pro=pro,
+        subscription_status="active" if pro else None,
+    )
+    db.add(user)
+    db.commit()
+    user_id = user.id
+    token = create_access_token({"sub": str(user_id)})
+    db.close()
+    return user_id, {"Authorization": f"Bearer {token}"}
+
+
+def extract(client: TestClient, headers=None):
+    return client.post("/v1/extract-job-details", data={"text": "Logo for Acme, $500"}, headers=headers or {})
+
+
+def test_daily_quota_depends_on_tier(client_app):
+    client, SessionLocal = client_app
+    free_id, free_headers = create_verified_user(SessionLocal, "free@example.com")
+    _, pro_headers = create_verified_user(SessionLocal, "pro@example.com", pro=True)
+
+    responses = [extract(client, free_headers) for _ in range(4)]
+    assert [r.status_code for r in responses] == [200, 200, 200, 429]
+    assert [r.headers["RateLimit-Remaining"] for r in responses] == ["2", "1", "0", "0"]
+    assert responses[0].headers["RateLimit-Limit"] == "3"
+    assert int(responses[3].headers["Retry-After"]) > 0
+
+    assert all(extract(client, pro_headers).status_code == 200 for _ in range(6))
+    assert extract(client, pro_headers).status_code == 429
+
+    db = SessionLocal()
+    counter = db.execute(select(UsageCounter).where(UsageCounter.subject == f"user:{free_id}")).scalar_one()
+    assert (counter.metric, counter.count) == ("extraction", 3)
+    assert db.execute(select(Extraction.user_id)).scalars().first() == free_id
+    db.close()
+
+
+def test_failed_requests_give_their_daily_unit_back(client_app, monkeypatch):
+    client, SessionLocal = client_app
+    user_id, headers = create_verified_user(SessionLocal, "flaky@example.com")
+    from app.api.v1 import extraction as extraction_module
+
+    class FlakyExtractor:
+        failing = True
+
+        def extract_from_text(self, text: str):
+            if self.failing:
+                raise RuntimeError("provider unavailable")
+            return {"jobs": ["Logo design"], "amount": 500, "currency": "USD", "confidence": 90}
+
+    monkeypatch.setattr(extraction_module, "get_extractor", lambda provider=None: FlakyExtractor())
+    assert [extract(client, headers).status_code for _ in range(4)] == [500] * 4
+    db = SessionLocal()
+    counter = db.execute(select(UsageCounter).where(UsageCounter.subject == f"user:{user_id}")).scalar_one()
+    assert counter.count == 0
+    db.close()
+
+    # The whole daily quota is still there once the provider recovers
+    FlakyExtractor.failing = False
+    assert [extract(client, headers).status_code for _ in range(4)] == [200, 200, 200, 429]
+
+
+def test_anonymous_per_minute_limit_by_client_ip(client_app):
+    client, _ = client_app
+    responses = [extract(client) for _ in range(3)]
+    assert [r.status_code for r in responses] == [200, 200, 429]
+    assert responses[1].headers["RateLimit-Remaining"] == "0"
+    assert responses[2].headers["Retry-After"] == "30"
+
+    # A spoofed X-Forwarded-For does not buy a fresh budget
+    assert extract(client, {"X-Forwarded-For": "198.51.100.9"}).status_code == 429
+
+
+def test_concurrency_cap(client_app):
+    client, SessionLocal = client_app
+    user_id, headers = create_verified_user(SessionLocal, "busy@example.com")
+    assert concurrency_limiter.acquire(f"extraction:user:{user_id}", 1)
+    try:
+        r = extract(client, headers)
+        assert r.status_code == 429
+        assert "concurrent" in r.json()["detail"]
+    finally:
+        concurrency_limiter.release(f"extraction:user:{user_id}")
+    assert extract(client, headers).status_code == 200
+    assert concurrency_limiter.in_flight == {}
+
+
+def test_write_endpoints_report_quota_headers(client_app):
+    client, SessionLocal = client_app
+    _, headers = create_verified_user(SessionLocal, "writer@example.com")
+    r = client.post("/v1/clients", json={"name": "Acme"}, headers=headers)
+    assert r.status_code == 201, r.text
+    assert r.headers["RateLimit-Limit"] == str(quotas.QUOTA_POLICIES["write"]["free"].per_minute)
+    assert "RateLimit-Reset" in r.headers
+
+
+def _request(client_host: str, forwarded_for: str | None = None) -> Request:
+    headers = [(b"x-forwarded-for", forwarded_for.encode())] if forwarded_for else []
+    return Request({"type": "http", "headers": headers, "client": (client_host, 1234)})
+
+
+def test_client_ip_only_trusts_configured_proxies(monkeypatch):
+    monkeypatch.setattr("app.core.rate_limiter.settings.TRUSTED_PROXY_HOPS", 0)
+    assert get_client_ip(_request("10.0.0.2", "1.1.1.1")) == "10.0.0.2"
+
+    monkeypatch.setattr("app.core.rate_limiter.settings.TRUSTED_PROXY_HOPS", 1)
+    # The client prepended a fake entry; our proxy appended the real address
+    assert get_client_ip(_request("10.0.0.2", "1.1.1.1, 203.0.113.7")) == "203.0.113.7"
+    assert get_client_ip(_request("10.0.0.2")) == "10.0.0.2"
@@ -0,0 +1,115 @@
+import multiprocessing
+
+import pytest
+
+from app.core.rate_limiter import InMemoryRateLimiter, RateLimiter
+from app.core.rate_limit_backends import RateLimitBackend, RedisRateLimitBackend, SharedMemoryRateLimitBackend
+from redis_stub import RedisStub
+
+
+def test_allows_burst_up_to_limit_then_recovers():
+    limiter = InMemoryRateLimiter(max_requests=3, window_minutes=1)
+    now = 1000.0
+    decisions = [limiter.hit("1.2.3.4", now) for _ in range(4)]
+    assert [d.allowed for d in decisions] == [True, True, True, False]
+    assert [d.remaining for d in decisions[:3]] == [2, 1, 0]
+    assert decisions[3].retry_after == 20.0
+
+    # One emission interval later exactly one more request fits
+    assert limiter.hit("1.2.3.4", now + 20).allowed
+    assert not limiter.hit("1.2.3.4", now + 20).allowed
+    # Other keys are unaffected
+    assert limiter.hit("5.6.7.8", now).allowed
+
+
+def test_idle_keys_are_evicted_without_being_revisited():
+    limiter = InMemoryRateLimiter(max_requests=10, window_minutes=1)
+    for i in range(100):
+        limiter.hit(f"10.0.0.{i}", 1000.0)
+    assert len(limiter.backend.tats) == 100
+
+    # Each later check sweeps idle keys from the LRU end
+    for i in range(60):
+        limiter.hit(f"10.1.0.{i}", 2000.0 + i)
+    assert len(limiter.backend.tats) < 100
+
+
+def test_table_is_capped():
+    limiter = InMemoryRateLimiter(max_requests=10, window_minutes=1, max_keys=50)
+    for i in range(1000):
+        limiter.hit(f"key-{i}", 1000.0)
+    assert len(limiter.backend.tats) == 50
+    assert "default:key-999" in limiter.backend.tats
+
+
+def _hammer_shared_limiter(path: str, results) -> None:
+    backend = SharedMemoryRateLimitBackend(path, slots=1024)
+    limiter = RateLimiter(max_requests=20, window_minutes=1, backend=backend, name="extraction")
+    results.put(sum(limiter.hit("203.0.113.7").allowed for _ in range(20)))
+    backend.close()
+
+
+def test_backend_without_hit_cannot_be_created():
+    class Incomplete(RateLimitBackend):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_shared_memory_backend_limits_across_processes(tmp_path):
+    path = str(tmp_path / "ratelimit")
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    workers = [ctx.Process(target=_hammer_shared_limiter, args=(path, results)) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+    # 3 processes x 20 attempts share a single budget of 20
+    assert sum(results.get(timeout=5) for _ in workers) == 20
+
+
+def test_shared_memory_backend_reuses_idle_slots(tmp_path):
+    backend = SharedMemoryRateLimitBackend(str(tmp_path / "ratelimit"), slots=8)
+    for i in range(100):
+        assert backend.hit(f"key-{i}", 1, 60, now=1000.0 + i * 120).allowed
+    backend.close()
+
+
+def test_redis_backend_against_stand_in_server():
+    with RedisStub(password="s3cret") as redis:
+        backend = RedisRateLimitBackend(redis.url)
+        limiter = RateLimiter(max_requests=3, window_minutes=1, backend=backend, name="extraction")
+        now = 6000.0  # start of a window
+        decisions = [limiter.hit("198.51.100.1", now) for _ in range(4)]
+        assert [d.allowed for d in decisions] == [True, True, True, False]
+        assert decisions[2].remaining == 0
+
+        # Halfway through the next window half of the previous window still counts
+        assert limiter.hit("198.51.100.1", now + 90).allowed
+        assert not limiter.hit("198.51.100.1", now + 90).allowed
+        assert limiter.hit("198.51.100.1", now + 125).allowed
+        backend.connection.close()
+
+
+def test_redis_backend_drops_a_connection_that_failed_auth():
+    with RedisStub(password="s3cret") as redis:
+        backend = RedisRateLimitBackend(redis.url.replace("s3cret", "wrong"), fail_open=False)
+        assert not backend.hit("key", 1, 60).allowed
+        assert backend.connection.sock is None
+        # The next call authenticates again instead of sending INCR on an unauthenticated socket
+        assert not backend.hit("key", 1, 60).allowed
+        assert redis.commands == [b"AUTH", b"AUTH"]
+
+        backend.connection.password = "s3cret"
+        assert backend.hit("key", 1, 60).allowed
+        assert redis.commands[2:4] == [b"AUTH", b"INCR"]
+        backend.connection.close()
+
+
+def test_redis_backend_fails_open_when_unreachable():
+    backend = RedisRateLimitBackend("redis://127.0.0.1:1/0", timeout=0.2)
+    assert backend.hit("key", 1, 60).allowed
+    backend = RedisRateLimitBackend("redis://127.0.0.1:1/0", fail_open=False, timeout=0.2)
+    assert not backend.hit("key", 1, 60).allowed
@@ -0,0 +1,92 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db import session as db_session
+from app.db.session import Base
+from app.db.replica import check_replica, measure_replica_lag, replica_router
+from app.api.v1.auth import create_access_token
+from app.core.security import get_password_hash
+from app.models.client import Client
+from app.models.payment import Payment
+from app.models.user import User
+
+
+@pytest.fixture()
+def client_app(client_app, tmp_path, monkeypatch):
+    client, SessionLocal = client_app
+    # The "replica" is a second database, so tests can tell which one served a read
+    replica_engine = create_engine(f"sqlite:///{tmp_path / 'replica.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=replica_engine)
+    ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+    monkeypatch.setattr(db_session, "ReadSessionLocal", ReplicaSessionLocal)
+    monkeypatch.setattr(replica_router, "enabled", True)
+    monkeypatch.setattr(replica_router, "healthy", True)
+    replica_router.pins.clear()
+
+    try:
+        yield client, SessionLocal, ReplicaSessionLocal
+    finally:
+        replica_router.pins.clear()
+        replica_engine.dispose()
+
+
+def create_verified_user(SessionLocal, email: str) -> tuple[int, dict]:
+    db = SessionLocal()
+    user = User(email=email, full_name="Replica User", hashed_password=get_password_hash("secret123", rounds=4), is_verified=True)
+    db.add(user)
+    db.commit()
+    user_id = user.id
+    db.close()
+    return user_id, {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+
+
+def seed_replica(ReplicaSessionLocal, user_id: int) -> None:
+    db = ReplicaSessionLocal()
+    db.add(Client(user_id=user_id, name="Replica Co"))
+    db.add(Payment(user_id=user_id, amount=10, provider_ref="replica-ref"))
+    db.commit()
+    db.close()
+
+
+def client_names(client: TestClient, headers: dict) -> list[str]:
+    r = client.get("/v1/clients", headers=headers)
+    assert r.status_code == 200, r.text
+    return [c["name"] for c in r.json()]
+
+
+def test_reads_go_to_replica_until_the_user_writes(client_app, monkeypatch):
+    client, SessionLocal, ReplicaSessionLocal = client_app
+    user_id, headers = create_verified_user(SessionLocal, "reader@example.com")
+    seed_replica(ReplicaSessionLocal, user_id)
+
+    assert client_names(client, headers) == ["Replica Co"]
+    r = client.get("/v1/payments/history", headers=headers)
+    assert [p["provider_ref"] for p in r.json()] == ["replica-ref"]
+
+    # A write pins the user to the primary, so they read it back immediately
+    now = [1000.0]
+    monkeypatch.setattr("app.db.replica.time.monotonic", lambda: now[0])
+    assert client.post("/v1/clients", json={"name": "Fresh Co"}, headers=headers).status_code == 201
+    assert client_names(client, headers) == ["Fresh Co"]
+
+    now[0] += replica_router.pin_seconds + 1
+    assert client_names(client, headers) == ["Replica Co"]
+
+
+def test_unhealthy_or_lagging_replica_falls_back_to_primary(client_app, tmp_path):
+    client, SessionLocal, ReplicaSessionLocal = client_app
+    user_id, headers = create_verified_user(SessionLocal, "lag@example.com")
+    seed_replica(ReplicaSessionLocal, user_id)
+
+    replica_router.record_check(replica_router.max_lag_seconds + 10)
+    assert client_names(client, headers) == []
+    replica_router.record_check(0.0)
+    assert client_names(client, headers) == ["Replica Co"]
+
+    assert measure_replica_lag(ReplicaSessionLocal.kw["bind"]) == 0.0
+    broken = create_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    check_replica(replica_router, broken)
+    assert not replica_router.healthy
+    assert client_names(client, headers) == []
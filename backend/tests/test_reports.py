@@ -0,0 +1,136 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.api.v1.auth import create_access_token
+from app.core.security import get_password_hash
+from app.models.client import Client
+from app.models.invoice_stats import InvoiceMonthlyStats
+from app.models.user import User
+from app.services.invoice_stats import rebuild_monthly_stats
+from app.services.reports import aging_query, revenue_query, shift_month
+
+
+@pytest.fixture()
+def seeded(client_app):
+    client, SessionLocal = client_app
+    db = SessionLocal()
+    user = User(email="reports@example.com", hashed_password=get_password_hash("secret123", rounds=4), is_verified=True)
+    db.add(user)
+    db.flush()
+    client_row = Client(user_id=user.id, name="Acme")
+    db.add(client_row)
+    db.commit()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+    ids = {"user": user.id, "client": client_row.id}
+    db.close()
+
+    def create(**fields):
+        r = client.post("/v1/invoices", json={"client_id": ids["client"], **fields}, headers=headers)
+        assert r.status_code == 201, r.text
+        return r.json()["id"]
+
+    return client, SessionLocal, headers, ids, create
+
+
+def monthly_rows(SessionLocal, user_id):
+    db = SessionLocal()
+    rows = set(db.execute(
+        select(InvoiceMonthlyStats.month, InvoiceMonthlyStats.currency, InvoiceMonthlyStats.status,
+               InvoiceMonthlyStats.invoice_count, InvoiceMonthlyStats.total)
+        .where(InvoiceMonthlyStats.user_id == user_id, InvoiceMonthlyStats.invoice_count != 0)
+    ).all())
+    db.close()
+    return rows
+
+
+def test_revenue_by_month_and_currency(seeded):
+    client, SessionLocal, headers, ids, create = seeded
+    january = create(issued_date="2025-01-15", total="100.00", status="sent")
+    create(issued_date="2025-01-31", total="40.00", status="paid")
+    create(issued_date="2025-01-20", total="999.00")  # draft: not revenue
+    create(issued_date="2025-02-01", total="30.00", status="paid", currency="USD")
+    create(issued_date="2025-03-10", total="70.00", status="sent")
+
+    # A late payment and a re-dated invoice adjust the months they touch
+    client.put(f"/v1/invoices/{january}", json={"status": "paid"}, headers=headers)
+    moved = create(issued_date="2025-02-10", total="5.00", status="sent")
+    client.put(f"/v1/invoices/{moved}", json={"issued_date": "2025-03-01"}, headers=headers)
+
+    r = client.get("/v1/reports/revenue?from=2025-01&to=2025-03", headers=headers)
+    assert r.status_code == 200, r.text
+    months = [(m["month"], m["currency"], m["invoice_count"], Decimal(m["invoiced"]), Decimal(m["paid"])) for m in r.json()["months"]]
+    assert months == [
+        ("2025-01", "NGN", 2, Decimal("140"), Decimal("140")),
+        ("2025-02", "USD", 1, Decimal("30"), Decimal("30")),
+        ("2025-03", "NGN", 2, Decimal("75"), Decimal("0")),
+    ]
+    r = client.get("/v1/reports/revenue?from=2025-02&to=2025-02&currency=NGN", headers=headers)
+    assert r.json()["months"] == []
+
+    # Invoices without an issue date count in the month they were created
+    create(total="12.00", status="paid")
+    this_month = f"{date.today():%Y-%m}"
+    r = client.get("/v1/reports/revenue", headers=headers)
+    assert (r.json()["start"], r.json()["end"]) == (shift_month(this_month, -11), this_month)
+    assert [(m["month"], Decimal(m["paid"])) for m in r.json()["months"]][-1] == (this_month, Decimal("12"))
+
+    # Incremental rows match a rebuild from scratch
+    maintained = monthly_rows(SessionLocal, ids["user"])
+    db = SessionLocal()
+    rebuild_monthly_stats(db.connection(), ids["user"])
+    db.commit()
+    db.close()
+    assert monthly_rows(SessionLocal, ids["user"]) == maintained
+
+
+def test_revenue_range_is_validated(seeded):
+    client, _, headers, _, _ = seeded
+    assert client.get("/v1/reports/revenue?from=2025-05&to=2025-01", headers=headers).status_code == 400
+    assert client.get("/v1/reports/revenue?from=2000-01&to=2025-01", headers=headers).status_code == 400
+    assert client.get("/v1/reports/revenue?from=2025-13", headers=headers).status_code == 422
+
+
+def test_aging_buckets(seeded):
+    client, _, headers, _, create = seeded
+    for due, total in [
+        ("2025-07-10", "1.00"),   # not yet due
+        (None, "2.00"),           # no due date
+        ("2025-06-30", "4.00"),   # due today: 0 days
+        ("2025-05-31", "8.00"),   # 30 days
+        ("2025-05-30", "16.00"),  # 31 days
+        ("2025-04-01", "32.00"),  # 90 days
+        ("2025-03-31", "64.00"),  # 91 days
+    ]:
+        create(due_date=due, total=total, status="overdue" if due and due < "2025-06-01" else "sent")
+    create(due_date="2025-01-01", total="500.00", status="paid")
+    create(due_date="2025-01-01", total="500.00")  # draft
+    create(due_date="2025-01-01", total="7.00", status="sent", currency="USD")
+
+    r = client.get("/v1/reports/aging?as_of=2025-06-30", headers=headers)
+    assert r.status_code == 200, r.text
+    ngn, usd = r.json()["currencies"]
+    assert [(b["bucket"], b["invoice_count"], Decimal(b["total"])) for b in ngn["buckets"]] == [
+        ("current", 2, Decimal("3")),
+        ("0-30", 2, Decimal("12")),
+        ("31-60", 1, Decimal("16")),
+        ("61-90", 1, Decimal("32")),
+        ("90+", 1, Decimal("64")),
+    ]
+    assert (ngn["invoice_count"], Decimal(ngn["total"])) == (7, Decimal("127"))
+    assert [b["invoice_count"] for b in usd["buckets"]] == [0, 0, 0, 0, 1]
+
+    r = client.get("/v1/reports/aging?as_of=2025-06-30&currency=USD", headers=headers)
+    assert [c["currency"] for c in r.json()["currencies"]] == ["USD"]
+
+
+def test_report_queries_compile_for_postgres():
+    dialect = postgresql.dialect()
+    sql = str(aging_query(1, date(2025, 6, 30)).compile(dialect=dialect))
+    # The bucket CASE (with its bound dates) is only in the subquery; the outer GROUP BY names its column
+    assert "GROUP BY anon_1.currency, anon_1.bucket" in sql
+    assert "GROUP BY invoice_monthly_stats.month" in str(revenue_query(1, "2025-01", "2025-12").compile(dialect=dialect))
+    assert shift_month("2025-01", -1) == "2024-12" and shift_month("2024-12", 13) == "2026-01"
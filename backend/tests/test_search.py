@@ -0,0 +1,159 @@
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.dialects import postgresql
+
+from app.api.v1.auth import create_access_token
+from app.core.security import get_password_hash
+from app.models.client import Client
+from app.models.invoice import Invoice
+from app.models.search_document import SearchDocument
+from app.models.user import User
+from app.services.search import rebuild_search_index, search_query, search_terms
+
+
+@pytest.fixture()
+def seeded(client_app):
+    client, SessionLocal = client_app
+    db = SessionLocal()
+    user = User(email="search@example.com", hashed_password=get_password_hash("secret123", rounds=4), is_verified=True)
+    other = User(email="other@example.com", hashed_password="x", is_verified=True)
+    db.add_all([user, other])
+    db.commit()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+    other_headers = {"Authorization": f"Bearer {create_access_token({'sub': str(other.id)})}"}
+    db.close()
+    return client, SessionLocal, headers, other_headers
+
+
+def hits(client, headers, q, **params):
+    r = client.get("/v1/search", params={"q": q, **params}, headers=headers)
+    assert r.status_code == 200, r.text
+    return [(hit["type"], hit["title"]) for hit in r.json()]
+
+
+def documents(SessionLocal):
+    db = SessionLocal()
+    rows = set(db.execute(select(
+        SearchDocument.user_id, SearchDocument.kind, SearchDocument.entity_id,
+        SearchDocument.title, SearchDocument.subtitle, SearchDocument.content,
+    )).all())
+    db.close()
+    return rows
+
+
+def test_search_follows_every_write_path(seeded):
+    client, SessionLocal, headers, other_headers = seeded
+    acme = client.post("/v1/clients", json={"name": "Acme Corp", "email": "billing@acme.com"}, headers=headers).json()["id"]
+    client.post("/v1/clients", json={"name": "Acme Rival"}, headers=other_headers)
+    logo = client.post("/v1/invoices", json={
+        "client_id": acme, "number": "INV-100", "items": [{"description": "Logo design", "unit_price": "300"}],
+    }, headers=headers).json()
+
+    assert hits(client, headers, "logo acme") == [("invoice", "INV-100")]
+    assert hits(client, headers, "acm") == [("client", "Acme Corp"), ("invoice", "INV-100")]  # client name is its whole text
+    assert hits(client, headers, "inv-100") == [("invoice", "INV-100")]
+    assert hits(client, headers, "acme", type="client") == [("client", "Acme Corp")]
+    assert hits(client, other_headers, "acme") == [("client", "Acme Rival")]
+
+    # Item and note edits, a client rename, then deletes
+    client.put(f"/v1/invoices/{logo['id']}", json={
+        "notes": "Rush job", "items": [{"description": "Brand guidelines", "unit_price": "300"}],
+    }, headers=headers)
+    assert hits(client, headers, "logo") == []
+    assert hits(client, headers, "rush brand") == [("invoice", "INV-100")]
+    client.put(f"/v1/clients/{acme}", json={"name": "Globex"}, headers=headers)
+    assert hits(client, headers, "acme") == [("client", "Globex")]  # still in its email
+    assert hits(client, headers, "globex rush") == [("invoice", "INV-100")]
+
+    created = client.post("/v1/invoices:bulk", json={"invoices": [
+        {"client_id": acme, "number": "B-1", "notes": "Hosting renewal"},
+        {"client_id": acme, "number": "B-2", "items": [{"description": "Hosting setup", "unit_price": "5"}]},
+    ]}, headers=headers).json()["results"]
+    assert {title for _, title in hits(client, headers, "hosting")} == {"B-1", "B-2"}
+    client.patch("/v1/invoices:bulk", json={"invoices": [{"id": created[0]["id"], "notes": "Domain renewal"}]}, headers=headers)
+    assert hits(client, headers, "hosting") == [("invoice", "B-2")]
+    client.request("DELETE", "/v1/invoices:bulk", json={"ids": [created[1]["id"]]}, headers=headers)
+    assert hits(client, headers, "hosting") == []
+
+    client.delete(f"/v1/invoices/{logo['id']}", headers=headers)
+    assert set(hits(client, headers, "globex")) == {("client", "Globex"), ("invoice", "B-1")}
+    # Deleting a client deletes its invoices (and their documents) through the ORM cascade
+    client.delete(f"/v1/clients/{acme}", headers=headers)
+    assert hits(client, headers, "globex") == []
+
+    # Documents kept in sync match a rebuild from scratch
+    client.post("/v1/clients", json={"name": "Initech"}, headers=headers)
+    maintained = documents(SessionLocal)
+    db = SessionLocal()
+    rebuild_search_index(db.connection())
+    db.commit()
+    db.close()
+    assert documents(SessionLocal) == maintained
+
+
+def test_interleaved_rewrites_of_one_document(seeded):
+    client, SessionLocal, headers, _ = seeded
+    acme = client.post("/v1/clients", json={"name": "Acme"}, headers=headers).json()["id"]
+    invoice_id = client.post("/v1/invoices", json={"client_id": acme, "number": "INV-7"}, headers=headers).json()["id"]
+
+    # One session edits the invoice while another renames its client; the rename
+    # commits in the middle of the edit's commit, after its sync has started,
+    # as it can under READ COMMITTED on Postgres
+    editing, renaming = SessionLocal(), SessionLocal()
+    editing.get(Invoice, invoice_id).notes = "Rush job"
+    connection = editing.connection()
+    renamed = []
+
+    def rename_first(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO search_documents") and not renamed:
+            renamed.append(acme)
+            renaming.get(Client, acme).name = "Globex"
+            renaming.commit()
+
+    event.listen(connection, "before_cursor_execute", rename_first)
+    editing.commit()  # an upsert: the document the rename just wrote doesn't break uq_search_documents_entity
+    event.remove(connection, "before_cursor_execute", rename_first)
+    editing.close()
+    renaming.close()
+
+    invoice_documents = [row for row in documents(SessionLocal) if row[1] == "invoice"]
+    assert [(title, subtitle) for _, _, _, title, subtitle, _ in invoice_documents] == [("INV-7", "Globex")]
+    assert hits(client, headers, "globex rush") == [("invoice", "INV-7")]
+
+
+def test_ranked_keyset_pages(seeded):
+    client, _, headers, _ = seeded
+    acme = client.post("/v1/clients", json={"name": "Acme"}, headers=headers).json()["id"]
+    client.post("/v1/invoices:bulk", json={"invoices": [
+        {"client_id": acme, "number": f"P-{i}", "notes": "design " * (1 if i else 5) + "filler " * 20}
+        for i in range(7)
+    ]}, headers=headers)
+
+    seen, cursor = [], None
+    while True:
+        r = client.get("/v1/search", params={"q": "design", "limit": 3, **({"cursor": cursor} if cursor else {})}, headers=headers)
+        assert r.status_code == 200, r.text
+        seen += r.json()
+        if r.headers["x-has-more"] == "false":
+            assert "x-next-cursor" not in r.headers
+            break
+        cursor = r.headers["x-next-cursor"]
+    # Every match exactly once, the invoice mentioning "design" most often first
+    assert seen[0]["title"] == "P-0"
+    assert sorted(hit["title"] for hit in seen) == [f"P-{i}" for i in range(7)]
+    assert [hit["score"] for hit in seen] == sorted((hit["score"] for hit in seen), reverse=True)
+
+    # Cursors belong to the search that issued them
+    assert client.get("/v1/search", params={"q": "filler", "cursor": cursor}, headers=headers).status_code == 400
+    assert client.get("/v1/search", params={"q": "design", "cursor": "x.y"}, headers=headers).status_code == 400
+    assert client.get("/v1/search", params={"q": "'*:()"}, headers=headers).status_code == 400
+
+
+def test_postgres_query_uses_the_gin_expression():
+    class Conn:
+        dialect = postgresql.dialect()
+
+    sql = str(search_query(Conn(), 1, search_terms("Logo, ACME!"), "invoice", (-0.5, 10)).compile(dialect=postgresql.dialect()))
+    assert "to_tsvector('simple', search_documents.content) @@ to_tsquery('simple'" in sql
+    assert "ts_rank" in sql and "(anon_1.rank, anon_1.id) > (" in sql
+    assert search_terms("Logo, ACME!") == ["logo", "acme"]
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.core import security
+from app.core.security import PasswordHasher, get_password_hash, needs_rehash, verify_password
+from app.models.user import User
+
+
+def test_needs_rehash_detects_cost_change(monkeypatch):
+    hashed = get_password_hash("secret123", rounds=4)
+    monkeypatch.setattr(security, "_BCRYPT_ROUNDS", 4)
+    assert not needs_rehash(hashed)
+    monkeypatch.setattr(security, "_BCRYPT_ROUNDS", 5)
+    assert needs_rehash(hashed)
+    assert needs_rehash("not-a-bcrypt-hash")
+
+
+def test_process_pool_hash_and_verify(monkeypatch):
+    monkeypatch.setattr(security, "_BCRYPT_ROUNDS", 4)
+    hasher = PasswordHasher(workers=1, max_pending=1)
+    try:
+        hashed = asyncio.run(hasher.hash("secret123"))
+        assert asyncio.run(hasher.verify("secret123", hashed))
+        assert not asyncio.run(hasher.verify("wrong123", hashed))
+    finally:
+        hasher.shutdown()
+
+
+def test_hasher_sheds_load_when_queue_is_full():
+    hasher = PasswordHasher(workers=0, max_pending=0)
+    hasher._in_flight = hasher.capacity
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(hasher.verify("secret123", "$2b$04$invalid"))
+    assert exc.value.status_code == 503
+    assert exc.value.headers["Retry-After"] == "1"
+
+
+def test_login_rehashes_when_cost_changes(client_app, monkeypatch):
+    client, SessionLocal = client_app
+    monkeypatch.setattr(security.password_hasher, "workers", 0)
+    monkeypatch.setattr(security, "_BCRYPT_ROUNDS", 5)
+
+    db = SessionLocal()
+    db.add(User(
+        email="rehash@example.com",
+        hashed_password=get_password_hash("secret123", rounds=4),
+        is_verified=True,
+    ))
+    db.commit()
+    db.close()
+
+    r = client.post(
+        "/v1/auth/login",
+        data={"username": "rehash@example.com", "password": "secret123"},
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    assert r.status_code == 200, r.text
+
+    db = SessionLocal()
+    user = db.query(User).filter(User.email == "rehash@example.com").one()
+    assert user.hashed_password.startswith("$2b$05$")
+    assert verify_password("secret123", user.hashed_password)
+    db.close()
@@ -0,0 +1,68 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.db.slow_queries import install_query_hooks, normalize_sql, params_shape, slow_query_log, statement_timeout
+from app.api.v1.auth import create_access_token
+from app.core.config import settings
+from app.core.security import get_password_hash
+from app.models.user import User
+
+
+@pytest.fixture()
+def client_app(client_app, db_connection, monkeypatch):
+    install_query_hooks(db_connection.engine)
+    # Every statement counts as slow
+    monkeypatch.setattr(slow_query_log, "threshold_ms", 0.0001)
+    monkeypatch.setattr(slow_query_log, "explain", True)
+    slow_query_log.clear()
+    try:
+        yield client_app
+    finally:
+        slow_query_log.clear()
+
+
+def test_normalized_sql_and_parameter_shapes():
+    sql = "SELECT *\n  FROM invoices WHERE user_id = ? AND id IN (?, ?, ?) AND status = 'paid' LIMIT 50"
+    assert normalize_sql(sql) == "SELECT * FROM invoices WHERE user_id = ? AND id IN (...) AND status = ? LIMIT ?"
+    assert params_shape((1, "a@example.com")) == ["int", "str"]
+    assert params_shape({"id": 1}) == {"id": "int"}
+    assert params_shape([(1,), (2,)], executemany=True) == {"rows": 2, "row": ["int"]}
+
+
+def test_slow_queries_are_recorded_with_route_and_plan(client_app, monkeypatch):
+    client, SessionLocal = client_app
+    db = SessionLocal()
+    user = User(email="slow@example.com", hashed_password=get_password_hash("secret123", rounds=4), is_verified=True)
+    db.add(user)
+    db.commit()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+    db.close()
+
+    assert client.get("/v1/invoices", headers=headers).status_code == 200
+
+    r = client.get("/v1/monitoring/slow-queries", headers=headers)
+    assert r.status_code == 403
+
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", ["slow@example.com"])
+    r = client.get("/v1/monitoring/slow-queries", headers=headers)
+    assert r.status_code == 200
+    entries = r.json()["entries"]
+    listing = next(e for e in entries if e["route"] == "GET /v1/invoices" and "FROM invoices" in e["sql"])
+    assert listing["params"] == ["int", "int", "int"]
+    assert "ix_invoices_user_id_id" in listing["plan"]
+    # Values never reach the log
+    assert all("slow@example.com" not in str(e) for e in entries)
+
+
+def test_statement_timeout_interrupts_runaway_sqlite_query(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'timeout.db'}")
+    install_query_hooks(engine)
+    runaway = text("WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) SELECT count(*) FROM n")
+
+    with statement_timeout(50), engine.connect() as conn:
+        with pytest.raises(OperationalError, match="interrupted"):
+            conn.execute(runaway)
+        # The connection is still usable afterwards
+        assert conn.execute(text("SELECT 1")).scalar() == 1
+    engine.dispose()
@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+import re
+
+from sqlalchemy import func, select
+
+from app.models.email_outbox import EmailOutbox
+from app.models.user import User
+from app.models.verification_token import EmailVerificationToken
+from app.services.verification_tokens import hash_token, sweep_expired_tokens
+
+
+def test_register_stores_only_token_hash_and_verifies(client_app):
+    client, SessionLocal = client_app
+
+    r = client.post("/v1/auth/register", json={"email": "verify@example.com", "password": "secret123"})
+    assert r.status_code == 201, r.text
+
+    db = SessionLocal()
+    queued = db.execute(select(EmailOutbox)).scalar_one()
+    sent = {"token": re.search(r"token=([\w-]+)", queued.text_body).group(1)}
+    stored = db.execute(select(EmailVerificationToken)).scalar_one()
+    assert stored.token_hash == hash_token(sent["token"])
+    assert stored.token_hash != sent["token"]
+    db.close()
+
+    r = client.get("/v1/auth/verify-email", params={"token": sent["token"]})
+    assert r.status_code == 200, r.text
+
+    db = SessionLocal()
+    assert db.execute(select(User.is_verified).where(User.email == "verify@example.com")).scalar_one()
+    assert db.execute(select(func.count()).select_from(EmailVerificationToken)).scalar_one() == 0
+    db.close()
+
+    # Tokens are single use
+    r = client.get("/v1/auth/verify-email", params={"token": sent["token"]})
+    assert r.status_code == 400
+
+
+def test_sweeper_deletes_expired_tokens_in_batches(client_app):
+    _, SessionLocal = client_app
+    db = SessionLocal()
+    now = datetime.utcnow()
+    for i in range(5):
+        user = User(email=f"sweep{i}@example.com", hashed_password="x")
+        db.add(user)
+        db.flush()
+        expires = now - timedelta(hours=1) if i < 4 else now + timedelta(hours=1)
+        db.add(EmailVerificationToken(user_id=user.id, token_hash=hash_token(f"t{i}"), expires_at=expires))
+    db.commit()
+
+    assert sweep_expired_tokens(db, batch_size=3, now=now) == 4
+    remaining = db.execute(select(EmailVerificationToken.token_hash)).scalars().all()
+    assert remaining == [hash_token("t4")]
+    db.close()
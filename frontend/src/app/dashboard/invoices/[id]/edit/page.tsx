@@ -13,7 +13,7 @@ export default function EditInvoicePage() {
   const router = useRouter();
   const invoiceId = parseInt(params.id as string);
   const { data: invoice, isLoading: invoiceLoading } = useInvoice(invoiceId);
-  const updateInvoice = useUpdateInvoice(invoiceId);
+  const updateInvoice = useUpdateInvoice(invoiceId, invoice?.version);
 
   const handleSubmit = (data: InvoiceCreate | InvoiceUpdate) => {
     updateInvoice.mutate(data as InvoiceUpdate, {
@@ -41,12 +41,12 @@ export default function DashboardPage() {
       {/* Stats Cards */}
       <StatsCards 
         stats={stats || { 
-          totalClients: 0, 
-          totalInvoices: 0, 
-          totalRevenue: 0, 
-          overdueInvoices: 0,
-          paidInvoices: 0,
-          unpaidInvoices: 0
+          total_clients: 0, 
+          total_invoices: 0, 
+          paid_invoices: 0,
+          unpaid_invoices: 0,
+          overdue_invoices: 0,
+          currencies: []
         }} 
         isLoading={statsLoading} 
       />
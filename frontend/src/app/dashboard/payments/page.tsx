@@ -8,7 +8,7 @@ import { CreditCard, Loader2, Receipt } from 'lucide-react';
 import type { Payment } from '@/types/api';
 
 export default function PaymentsPage() {
-  const { data: payments, isLoading } = usePaymentHistory(50, 0);
+  const { data: payments, isLoading } = usePaymentHistory(50);
 
   const getStatusBadge = (status: string) => {
     const variants: Record<string, 'default' | 'secondary' | 'destructive' | 'outline'> = {
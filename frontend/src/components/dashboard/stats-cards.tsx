@@ -2,7 +2,8 @@
 
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card';
 import { Users, FileText, DollarSign, AlertCircle } from 'lucide-react';
-import type { DashboardStats } from '@/lib/hooks/use-dashboard';
+import { formatCurrency } from '@/lib/format';
+import type { CurrencyStats, DashboardStats } from '@/types/api';
 
 interface StatsCardsProps {
   stats: DashboardStats;
@@ -29,12 +30,10 @@ export function StatsCards({ stats, isLoading }: StatsCardsProps) {
     );
   }
 
-  const formatCurrency = (amount: number) => {
-    return new Intl.NumberFormat('en-US', {
-      style: 'currency',
-      currency: 'USD',
-    }).format(amount);
-  };
+  // Amounts are never added across currencies: the busiest currency leads, the others are listed below it
+  const [primary, ...others] = stats.currencies;
+  const amount = (currency: CurrencyStats | undefined, field: 'revenue' | 'outstanding' | 'overdue') =>
+    formatCurrency(Number(currency?.[field] ?? 0), currency?.currency ?? 'NGN');
 
   return (
     <div className="grid gap-4 md:grid-cols-2 lg:grid-cols-4">
@@ -44,7 +43,7 @@ export function StatsCards({ stats, isLoading }: StatsCardsProps) {
           <Users className="h-4 w-4 text-muted-foreground" />
         </CardHeader>
         <CardContent>
-          <div className="text-2xl font-bold">{stats.totalClients}</div>
+          <div className="text-2xl font-bold">{stats.total_clients}</div>
           <p className="text-xs text-muted-foreground">Active clients</p>
         </CardContent>
       </Card>
@@ -55,9 +54,9 @@ export function StatsCards({ stats, isLoading }: StatsCardsProps) {
           <FileText className="h-4 w-4 text-muted-foreground" />
         </CardHeader>
         <CardContent>
-          <div className="text-2xl font-bold">{stats.totalInvoices}</div>
+          <div className="text-2xl font-bold">{stats.total_invoices}</div>
           <p className="text-xs text-muted-foreground">
-            {stats.paidInvoices} paid, {stats.unpaidInvoices} unpaid
+            {stats.paid_invoices} paid, {stats.unpaid_invoices} unpaid
           </p>
         </CardContent>
       </Card>
@@ -68,8 +67,15 @@ export function StatsCards({ stats, isLoading }: StatsCardsProps) {
           <DollarSign className="h-4 w-4 text-muted-foreground" />
         </CardHeader>
         <CardContent>
-          <div className="text-2xl font-bold">{formatCurrency(stats.totalRevenue)}</div>
-          <p className="text-xs text-muted-foreground">From paid invoices</p>
+          <div className="text-2xl font-bold">{amount(primary, 'revenue')}</div>
+          <p className="text-xs text-muted-foreground">
+            From paid invoices, {amount(primary, 'outstanding')} outstanding
+          </p>
+          {others.map((currency) => (
+            <p key={currency.currency} className="text-xs text-muted-foreground">
+              {amount(currency, 'revenue')} paid, {amount(currency, 'outstanding')} outstanding
+            </p>
+          ))}
         </CardContent>
       </Card>
 
@@ -79,8 +85,13 @@ export function StatsCards({ stats, isLoading }: StatsCardsProps) {
           <AlertCircle className="h-4 w-4 text-destructive" />
         </CardHeader>
         <CardContent>
-          <div className="text-2xl font-bold text-destructive">{stats.overdueInvoices}</div>
-          <p className="text-xs text-muted-foreground">Require attention</p>
+          <div className="text-2xl font-bold text-destructive">{stats.overdue_invoices}</div>
+          <p className="text-xs text-muted-foreground">
+            {stats.currencies
+              .filter((currency) => Number(currency.overdue) > 0)
+              .map((currency) => amount(currency, 'overdue'))
+              .join(', ') || 'Require attention'}
+          </p>
         </CardContent>
       </Card>
     </div>
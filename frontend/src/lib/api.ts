@@ -13,6 +13,12 @@ import type {
   SubscriptionStatus,
   Payment,
   AuthResponse,
+  DashboardStats,
+  RevenueReport,
+  AgingReport,
+  SearchParams,
+  SearchResult,
+  ImportJob,
 } from '@/types/api';
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
@@ -107,8 +113,8 @@ export const usersAPI = {
 };
 
 export const clientsAPI = {
-  getAll: (limit?: number, offset?: number) =>
-    api.get<Client[]>('/v1/clients', { params: { limit, offset } }),
+  getAll: (limit?: number, cursor?: string, sort?: 'id' | '-id' | 'name' | '-name') =>
+    api.get<Client[]>('/v1/clients', { params: { limit, cursor, sort } }),
   
   getById: (id: number) =>
     api.get<Client>(`/v1/clients/${id}`),
@@ -133,11 +139,47 @@ export const invoicesAPI = {
   create: (data: InvoiceCreate) =>
     api.post<Invoice>('/v1/invoices', data),
   
-  update: (id: number, data: InvoiceUpdate) =>
-    api.put<Invoice>(`/v1/invoices/${id}`, data),
+  update: (id: number, data: InvoiceUpdate, version?: number) =>
+    api.put<Invoice>(`/v1/invoices/${id}`, data, {
+      headers: version === undefined ? undefined : { 'If-Match': `"${version}"` },
+    }),
   
   delete: (id: number) =>
     api.delete(`/v1/invoices/${id}`),
+
+  // Whole file as a Blob, for a download link; takes the list filters
+  export: (format: 'csv' | 'ndjson', params?: Omit<InvoiceListParams, 'limit' | 'sort' | 'cursor'>) =>
+    api.get<Blob>('/v1/invoices/export', { params: { format, ...params }, responseType: 'blob' }),
+};
+
+export const dashboardAPI = {
+  getStats: () =>
+    api.get<DashboardStats>('/v1/dashboard/stats'),
+};
+
+export const reportsAPI = {
+  getRevenue: (params?: { from?: string; to?: string; currency?: string }) =>
+    api.get<RevenueReport>('/v1/reports/revenue', { params }),
+
+  getAging: (params?: { as_of?: string; currency?: string }) =>
+    api.get<AgingReport>('/v1/reports/aging', { params }),
+};
+
+export const searchAPI = {
+  search: (params: SearchParams) =>
+    api.get<SearchResult[]>('/v1/search', { params }),
+};
+
+export const importsAPI = {
+  // The file is sent as the request body, not as a form
+  upload: (kind: 'clients' | 'invoices', file: Blob, importId?: number) =>
+    api.post<ImportJob>(`/v1/imports/${kind}`, file, {
+      params: { import_id: importId },
+      headers: { 'Content-Type': 'text/csv' },
+    }),
+
+  get: (id: number) =>
+    api.get<ImportJob>(`/v1/imports/${id}`),
 };
 
 export const generateAPI = {
@@ -180,8 +222,8 @@ export const paymentsAPI = {
   getSubscriptionStatus: () =>
     api.get<SubscriptionStatus>('/v1/payments/subscription/status'),
   
-  getPaymentHistory: (limit?: number, offset?: number) =>
-    api.get<Payment[]>('/v1/payments/history', { params: { limit, offset } }),
+  getPaymentHistory: (limit?: number, cursor?: string) =>
+    api.get<Payment[]>('/v1/payments/history', { params: { limit, cursor } }),
   
   sendReminder: (invoice_id: number) =>
     api.post<{ status: string; invoice_id: number }>('/v1/send-reminder', null, { params: { invoice_id } }),
@@ -4,11 +4,11 @@ import type { ClientCreate, ClientUpdate } from '@/types/api';
 import { toast } from 'sonner';
 import { formatErrorMessage } from '@/lib/utils';
 
-export const useClients = (limit?: number, offset?: number) => {
+export const useClients = (limit?: number, cursor?: string) => {
   return useQuery({
-    queryKey: ['clients', { limit, offset }],
+    queryKey: ['clients', { limit, cursor }],
     queryFn: async () => {
-      const response = await clientsAPI.getAll(limit, offset);
+      const response = await clientsAPI.getAll(limit, cursor);
       return response.data;
     },
   });
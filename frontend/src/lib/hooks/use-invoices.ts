@@ -44,11 +44,11 @@ export const useCreateInvoice = () => {
   });
 };
 
-export const useUpdateInvoice = (id: number) => {
+export const useUpdateInvoice = (id: number, version?: number) => {
   const queryClient = useQueryClient();
 
   return useMutation({
-    mutationFn: (data: InvoiceUpdate) => invoicesAPI.update(id, data),
+    mutationFn: (data: InvoiceUpdate) => invoicesAPI.update(id, data, version),
     onSuccess: () => {
       queryClient.invalidateQueries({ queryKey: ['invoices'] });
       queryClient.invalidateQueries({ queryKey: ['invoices', id] });
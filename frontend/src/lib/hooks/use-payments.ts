@@ -80,11 +80,11 @@ export function useSendReminder() {
 }
 
 // Get payment history
-export function usePaymentHistory(limit?: number, offset?: number) {
+export function usePaymentHistory(limit?: number, cursor?: string) {
   return useQuery<Payment[]>({
-    queryKey: ['payments', 'history', limit, offset],
+    queryKey: ['payments', 'history', limit, cursor],
     queryFn: async () => {
-      const response = await paymentsAPI.getPaymentHistory(limit, offset);
+      const response = await paymentsAPI.getPaymentHistory(limit, cursor);
       return response.data;
     },
   });
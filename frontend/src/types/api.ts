@@ -84,6 +84,7 @@ export interface UserBusinessInfo {
 }
 
 export interface InvoiceItem {
+  id?: number;  // Set on saved items; kept on update so the item is edited in place
   description: string;
   quantity: number;
   unit_price: number;
@@ -109,6 +110,7 @@ export interface Invoice {
   user_business_info?: UserBusinessInfo;
   created_at: string;
   updated_at: string;
+  version: number;  // Sent back as If-Match on update
 }
 
 export interface InvoiceCreate {
@@ -141,12 +143,19 @@ export interface InvoiceListParams {
   status?: 'draft' | 'sent' | 'paid' | 'overdue';
   client_id?: number;
   limit?: number;
-  offset?: number;
   due_from?: string;
   due_to?: string;
-  cursor?: number;
+  // Keyset pagination: pass the previous page's X-Next-Cursor header back with the same sort
+  sort?: InvoiceSort;
+  cursor?: string;
 }
 
+export type InvoiceSort =
+  | 'id' | '-id'
+  | 'due_date' | '-due_date'
+  | 'created_at' | '-created_at'
+  | 'total' | '-total';
+
 // Extraction Types - Backend Response Format
 export interface BackendExtractionData {
   jobs?: string[];
@@ -222,12 +231,85 @@ export interface SubscriptionStatus {
 }
 
 // Dashboard Types
+export interface StatusTotals {
+  count: number;
+  total: string;  // Decimal as string
+}
+
+export interface CurrencyStats {
+  currency: string;
+  invoice_count: number;
+  revenue: string;  // paid
+  outstanding: string;  // sent + overdue
+  overdue: string;
+  by_status: Record<string, StatusTotals>;
+}
+
 export interface DashboardStats {
   total_clients: number;
   total_invoices: number;
-  total_revenue: number;
-  pending_amount: number;
+  paid_invoices: number;
+  unpaid_invoices: number;  // draft + sent
   overdue_invoices: number;
+  currencies: CurrencyStats[];  // most invoices first
+}
+
+// Report Types
+export interface RevenueMonth {
+  month: string;  // YYYY-MM
+  currency: string;
+  invoice_count: number;
+  invoiced: string;  // Decimal as string
+  paid: string;
+}
+
+export interface RevenueReport {
+  start: string;
+  end: string;
+  months: RevenueMonth[];
+}
+
+export interface AgingBucket {
+  bucket: 'current' | '0-30' | '31-60' | '61-90' | '90+';
+  invoice_count: number;
+  total: string;
+}
+
+export interface AgingReport {
+  as_of: string;
+  currencies: { currency: string; invoice_count: number; total: string; buckets: AgingBucket[] }[];
+}
+
+// Search Types
+export interface SearchParams {
+  q: string;
+  type?: 'invoice' | 'client';
+  limit?: number;
+  cursor?: string;  // the previous page's X-Next-Cursor header, with the same q and type
+}
+
+export interface SearchResult {
+  type: 'invoice' | 'client';
+  id: number;
+  title?: string;  // invoice number / client name
+  subtitle?: string;  // client name / client email
+  score: number;
+}
+
+// Import Types
+export interface ImportJob {
+  id: number;  // pass back as import_id with the same file to resume an interrupted import
+  kind: 'clients' | 'invoices';
+  status: 'running' | 'completed';
+  rows_done: number;
+  imported: number;
+  duplicates: number;
+  failed: number;
+  errors: { row: number; error: string }[];
+  created_at: string;
+  updated_at: string;
+  completed_at?: string;
+  rows_per_second?: number;
 }
 
 // API Error Response